@@ -20,11 +20,19 @@ sys.path.insert(0, str(packages_path))
 
 # 导入路由
 from routes.events import router as events_router
-from routes.project_memory import router as project_memory_router
+from routes.project_memory import (
+    router as project_memory_router,
+    start_rank_refresh,
+    stop_rank_refresh
+)
 from routes.architect import router as architect_router
 from routes.listener import router as listener_router
 from routes.conversations import router as conversations_router
-from routes.conversations_session_memory import router as conversations_session_memory_router
+from routes.conversations_session_memory import (
+    router as conversations_session_memory_router,
+    start_sync_worker,
+    stop_sync_worker
+)
 from routes.knowledge_base import router as knowledge_base_router
 
 
@@ -68,6 +76,24 @@ app.include_router(conversations_session_memory_router, tags=["conversations-ses
 app.include_router(knowledge_base_router, tags=["knowledge_base"])
 
 
+# ============================================================================
+# 生命周期
+# ============================================================================
+
+@app.on_event("startup")
+async def on_startup():
+    """启动后台任务（Session Memory同步队列在重启后继续处理，记忆排序分定期刷新）"""
+    await start_sync_worker()
+    await start_rank_refresh()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """停止后台任务"""
+    await stop_sync_worker()
+    await stop_rank_refresh()
+
+
 # ============================================================================
 # 根端点
 # ============================================================================
@@ -97,6 +97,24 @@ def save_conversations(data: Dict[str, Any]) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+async def notify_session_changed(session_id: str, created: bool = False) -> None:
+    """
+    通知Session Memory同步Worker会话已变化（只入队，不阻塞请求）
+    
+    Args:
+        session_id: 会话ID
+        created: 是否为新建会话
+    """
+    try:
+        from .conversations_session_memory import on_conversation_created, on_conversation_updated
+        if created:
+            await on_conversation_created(session_id)
+        else:
+            await on_conversation_updated(session_id)
+    except Exception as e:
+        print(f"[警告] Session Memory同步入队失败: {str(e)}")
+
+
 def find_session(session_id: str) -> Optional[Dict[str, Any]]:
     """查找会话"""
     data = load_conversations()
@@ -262,6 +280,7 @@ async def create_conversation(conversation: ConversationModel) -> Dict[str, Any]
         
         # 保存
         save_conversations(data)
+        await notify_session_changed(session_id, created=True)
         
         return {
             "success": True,
@@ -330,6 +349,7 @@ async def update_conversation(
         
         # 保存
         save_conversations(data)
+        await notify_session_changed(session_id)
         
         return {
             "success": True,
@@ -459,6 +479,7 @@ async def add_message(
         
         # 保存
         save_conversations(data)
+        await notify_session_changed(session_id)
         
         return {
             "success": True,
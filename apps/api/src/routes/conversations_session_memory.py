@@ -5,19 +5,82 @@
 提供对话数据与Session Memory MCP的双向同步接口
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 import json
 import httpx
 
+from services.session_memory_sync import (
+    SessionMemorySyncService,
+    DEFAULT_SESSION_MEMORY_URL,
+    DEFAULT_TIMEOUT,
+    format_session_for_memory,
+    create_session_memory_sync_service
+)
+from services.session_memory_sync_worker import (
+    SessionMemorySyncWorker,
+    create_session_memory_sync_worker
+)
+
 
 router = APIRouter(prefix="/api/conversations/session-memory", tags=["conversations-session-memory"])
 
-# Session Memory MCP服务地址（配置）
-SESSION_MEMORY_URL = "http://localhost:5173"  # 默认端口，可通过环境变量覆盖
-TIMEOUT = 10
+# Session Memory MCP服务地址（默认端口5173，可通过环境变量 SESSION_MEMORY_URL 覆盖）
+SESSION_MEMORY_URL = DEFAULT_SESSION_MEMORY_URL
+TIMEOUT = DEFAULT_TIMEOUT
+
+
+# ============================================================================
+# 全局服务实例
+# ============================================================================
+
+_sync_service: Optional[SessionMemorySyncService] = None
+_sync_worker: Optional[SessionMemorySyncWorker] = None
+
+
+def get_sync_service() -> SessionMemorySyncService:
+    """获取或创建Session Memory同步服务"""
+    global _sync_service
+    
+    if _sync_service is None:
+        _sync_service = create_session_memory_sync_service(base_url=SESSION_MEMORY_URL)
+    
+    return _sync_service
+
+
+def _load_sessions_by_id(session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量加载会话（只读取一次对话历史库文件）"""
+    from .conversations import load_conversations
+    
+    wanted = set(session_ids)
+    sessions = load_conversations().get("sessions", [])
+    return {s["session_id"]: s for s in sessions if s.get("session_id") in wanted}
+
+
+def get_sync_worker() -> SessionMemorySyncWorker:
+    """获取或创建后台同步Worker"""
+    global _sync_worker
+    
+    if _sync_worker is None:
+        _sync_worker = create_session_memory_sync_worker(
+            sync_service=get_sync_service(),
+            session_loader=_load_sessions_by_id
+        )
+    
+    return _sync_worker
+
+
+async def start_sync_worker() -> None:
+    """启动后台同步Worker（应用启动时调用，继续处理重启前遗留的队列）"""
+    await get_sync_worker().start()
+
+
+async def stop_sync_worker() -> None:
+    """停止后台同步Worker（应用关闭时调用）"""
+    if _sync_worker is not None:
+        await _sync_worker.stop()
 
 
 # ============================================================================
@@ -52,41 +115,18 @@ async def sync_to_session_memory(session_id: str) -> Dict[str, Any]:
         if not session:
             raise HTTPException(status_code=404, detail="会话不存在")
         
-        # 构建Session Memory格式的数据
-        session_memory_data = {
-            "user_id": "architect",
-            "content": _format_session_for_memory(session),
-            "metadata": {
-                "source": "conversations",
-                "session_id": session_id,
-                "title": session.get("title"),
-                "created_at": session.get("created_at"),
-                "participants": session.get("participants", []),
-                "tags": session.get("tags", []),
-                "total_messages": session.get("messages_count", 0),
-                "total_tokens": session.get("total_tokens", 0)
-            }
-        }
+        result = await get_sync_service().sync_session(session, force=True)
         
-        # 调用Session Memory MCP API
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            response = await client.post(
-                f"{SESSION_MEMORY_URL}/api/memory/store",
-                json=session_memory_data
-            )
-        
-        if response.status_code != 200:
+        if result["status"] != "synced":
             raise HTTPException(
                 status_code=500,
-                detail=f"Session Memory MCP返回错误: {response.text}"
+                detail=f"Session Memory MCP返回错误: {result['error']}"
             )
         
-        memory_response = response.json()
-        
         return {
             "success": True,
             "session_id": session_id,
-            "memory_id": memory_response.get("memory_id", "unknown"),
+            "memory_id": result["memory_id"],
             "synced_messages": session.get("messages_count", 0),
             "synced_at": datetime.now().isoformat()
         }
@@ -98,20 +138,28 @@ async def sync_to_session_memory(session_id: str) -> Dict[str, Any]:
 
 
 @router.post("/sync-all-to-session-memory")
-async def sync_all_to_session_memory() -> Dict[str, Any]:
+async def sync_all_to_session_memory(
+    force: bool = Query(False, description="忽略内容哈希，强制全部重新上传")
+) -> Dict[str, Any]:
     """
-    同步所有会话到Session Memory MCP
+    同步所有会话到Session Memory MCP（增量）
+    
+    **用途**: 批量将对话历史库中的会话上传到Session Memory MCP。
+    只上传内容哈希自上次成功同步后发生变化的会话，
+    所有请求复用一个连接池，并发数有上限，失败时带抖动退避重试
     
-    **用途**: 批量将所有对话历史库中的会话上传到Session Memory MCP
+    **参数**:
+    - force: 是否强制全部重新上传 (默认false)
     
     **返回**:
     ```json
     {
         "success": true,
         "total_sessions": 5,
-        "synced_sessions": 5,
+        "synced_sessions": 2,
+        "skipped_sessions": 3,
         "failed_sessions": 0,
-        "total_messages": 50,
+        "total_messages": 20,
         "synced_at": "2025-11-18T23:45:00"
     }
     ```
@@ -122,49 +170,11 @@ async def sync_all_to_session_memory() -> Dict[str, Any]:
         data = load_conversations()
         sessions = data.get("sessions", [])
         
-        synced_count = 0
-        failed_count = 0
-        total_messages = 0
-        
-        for session in sessions:
-            try:
-                session_memory_data = {
-                    "user_id": "architect",
-                    "content": _format_session_for_memory(session),
-                    "metadata": {
-                        "source": "conversations",
-                        "session_id": session.get("session_id"),
-                        "title": session.get("title"),
-                        "created_at": session.get("created_at"),
-                        "participants": session.get("participants", []),
-                        "tags": session.get("tags", []),
-                        "total_messages": session.get("messages_count", 0),
-                        "total_tokens": session.get("total_tokens", 0)
-                    }
-                }
-                
-                async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-                    response = await client.post(
-                        f"{SESSION_MEMORY_URL}/api/memory/store",
-                        json=session_memory_data
-                    )
-                
-                if response.status_code == 200:
-                    synced_count += 1
-                    total_messages += session.get("messages_count", 0)
-                else:
-                    failed_count += 1
-                    
-            except Exception as e:
-                failed_count += 1
-                continue
+        summary = await get_sync_service().sync_sessions(sessions, force=force)
         
         return {
             "success": True,
-            "total_sessions": len(sessions),
-            "synced_sessions": synced_count,
-            "failed_sessions": failed_count,
-            "total_messages": total_messages,
+            **summary,
             "synced_at": datetime.now().isoformat()
         }
         
@@ -317,6 +327,11 @@ async def check_session_memory_health() -> Dict[str, Any]:
         "success": true,
         "session_memory_status": "healthy",
         "url": "http://localhost:5173",
+        "sync_queue": {
+            "queue_depth": 2,
+            "lag_seconds": 1.5,
+            "is_running": true
+        },
         "checked_at": "2025-11-18T23:45:00"
     }
     ```
@@ -332,6 +347,7 @@ async def check_session_memory_health() -> Dict[str, Any]:
             "session_memory_status": "healthy" if is_healthy else "unhealthy",
             "url": SESSION_MEMORY_URL,
             "response_time_ms": response.elapsed.total_seconds() * 1000,
+            "sync_queue": _get_sync_queue_health(),
             "checked_at": datetime.now().isoformat()
         }
         
@@ -341,10 +357,19 @@ async def check_session_memory_health() -> Dict[str, Any]:
             "session_memory_status": "unavailable",
             "url": SESSION_MEMORY_URL,
             "error": str(e),
+            "sync_queue": _get_sync_queue_health(),
             "checked_at": datetime.now().isoformat()
         }
 
 
+def _get_sync_queue_health() -> Dict[str, Any]:
+    """后台同步队列状态（队列深度、滞后时间）"""
+    try:
+        return get_sync_worker().get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ============================================================================
 # 辅助函数
 # ============================================================================
@@ -359,43 +384,7 @@ def _format_session_for_memory(session: Dict[str, Any]) -> str:
     Returns:
         格式化的会话内容字符串
     """
-    lines = []
-    
-    # 标题
-    lines.append(f"# {session.get('title', '未命名会话')}")
-    lines.append("")
-    
-    # 元数据
-    lines.append("## 会话信息")
-    lines.append(f"- **创建时间**: {session.get('created_at', '未知')}")
-    lines.append(f"- **更新时间**: {session.get('updated_at', '未知')}")
-    lines.append(f"- **状态**: {session.get('status', 'unknown')}")
-    lines.append(f"- **参与者**: {', '.join(session.get('participants', []))}")
-    lines.append(f"- **标签**: {', '.join(session.get('tags', []))}")
-    lines.append(f"- **消息总数**: {session.get('messages_count', 0)}")
-    lines.append(f"- **Token总消耗**: {session.get('total_tokens', 0)}")
-    lines.append("")
-    
-    # 摘要
-    if session.get('summary'):
-        lines.append("## 摘要")
-        lines.append(session.get('summary'))
-        lines.append("")
-    
-    # 消息列表
-    lines.append("## 对话记录")
-    messages = session.get('messages', [])
-    for msg in messages:
-        from_user = msg.get('from', '未知')
-        content = msg.get('content', '')
-        timestamp = msg.get('timestamp', '')
-        tokens = msg.get('tokens', 0)
-        
-        lines.append(f"### {from_user} ({timestamp}) [{tokens} tokens]")
-        lines.append(content)
-        lines.append("")
-    
-    return "\n".join(lines)
+    return format_session_for_memory(session)
 
 
 # ============================================================================
@@ -404,35 +393,27 @@ def _format_session_for_memory(session: Dict[str, Any]) -> str:
 
 async def on_conversation_created(session_id: str) -> None:
     """
-    会话创建事件处理 - 自动同步到Session Memory
+    会话创建事件处理 - 加入后台同步队列
     
     Args:
         session_id: 新创建的会话ID
     """
     try:
-        # 延迟1秒确保数据已保存
-        import asyncio
-        await asyncio.sleep(1)
-        
-        # 同步到Session Memory
-        await sync_to_session_memory(session_id)
-        
+        get_sync_worker().enqueue(session_id)
     except Exception as e:
-        print(f"[错误] 自动同步失败: {str(e)}")
+        print(f"[错误] 加入同步队列失败: {str(e)}")
 
 
 async def on_conversation_updated(session_id: str) -> None:
     """
-    会话更新事件处理 - 自动同步到Session Memory
+    会话更新事件处理 - 加入后台同步队列
+    
+    连续的多次更新在去抖窗口内合并为一次上传
     
     Args:
         session_id: 更新的会话ID
     """
     try:
-        import asyncio
-        await asyncio.sleep(1)
-        await sync_to_session_memory(session_id)
-        
+        get_sync_worker().enqueue(session_id)
     except Exception as e:
-        print(f"[错误] 自动同步失败: {str(e)}")
-
+        print(f"[错误] 加入同步队列失败: {str(e)}")
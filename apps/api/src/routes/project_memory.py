@@ -5,18 +5,25 @@
 提供项目记忆管理的RESTful API接口
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-# TODO: 实际导入ProjectMemoryService
-# from packages.core_domain.src.services.project_memory_service import (
-#     ProjectMemoryService,
-#     MemoryType,
-#     MemoryCategory,
-#     RelationType
-# )
+# 导入项目记忆服务
+import sys
+from pathlib import Path
+# 添加packages路径到sys.path
+packages_path = Path(__file__).parent.parent.parent.parent.parent / "packages" / "core-domain" / "src"
+sys.path.insert(0, str(packages_path))
+
+from services.project_memory_service import (
+    ProjectMemoryService,
+    TagMatchMode,
+    create_project_memory_service
+)
 
 
 # ============================================================================
@@ -43,6 +50,7 @@ class RetrieveMemoriesRequest(BaseModel):
     category: Optional[str] = Field(None, description="分类过滤")
     memory_type: Optional[str] = Field(None, description="类型过滤")
     tags: Optional[List[str]] = Field(None, description="标签过滤")
+    tag_mode: str = Field(TagMatchMode.ANY, description="标签匹配模式: any（任一）/all（全部）")
     limit: int = Field(10, ge=1, le=100, description="返回数量")
 
 
@@ -82,8 +90,62 @@ class CreateRelationRequest(BaseModel):
 
 router = APIRouter(prefix="/api/projects", tags=["project-memory"])
 
-# 模拟的服务实例（实际应该从依赖注入获取）
-# project_memory_service = ProjectMemoryService()
+# 项目记忆数据库路径
+MEMORY_DB_PATH = "database/data/tasks.db"
+
+# 全局服务实例
+_project_memory_service: Optional[ProjectMemoryService] = None
+
+
+def get_project_memory_service() -> ProjectMemoryService:
+    """获取项目记忆服务实例（读写 MEMORY_DB_PATH）"""
+    global _project_memory_service
+    if _project_memory_service is None:
+        _project_memory_service = create_project_memory_service(db_path=MEMORY_DB_PATH, persist=True)
+    return _project_memory_service
+
+
+# 排序分定期刷新间隔（秒）
+RANK_REFRESH_INTERVAL = 3600
+
+_rank_refresh_task: Optional[asyncio.Task] = None
+
+
+async def _rank_refresh_loop(interval: float) -> None:
+    """定期重新计算记忆排序分（在线程中执行，不阻塞事件循环）"""
+    while True:
+        try:
+            await asyncio.to_thread(get_project_memory_service().refresh_rank_scores)
+        except Exception as e:
+            print(f"[错误] 刷新记忆排序分失败: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+async def start_rank_refresh(interval: float = RANK_REFRESH_INTERVAL) -> None:
+    """启动排序分定期刷新任务（应用启动时调用）"""
+    global _rank_refresh_task
+    if _rank_refresh_task is None or _rank_refresh_task.done():
+        _rank_refresh_task = asyncio.create_task(_rank_refresh_loop(interval))
+
+
+async def stop_rank_refresh() -> None:
+    """停止排序分定期刷新任务（应用关闭时调用）"""
+    global _rank_refresh_task
+    if _rank_refresh_task is not None:
+        _rank_refresh_task.cancel()
+        try:
+            await _rank_refresh_task
+        except asyncio.CancelledError:
+            pass
+        _rank_refresh_task = None
+
+
+def _split_csv(value: Optional[str]) -> Optional[List[str]]:
+    """逗号分隔的查询参数转换为列表"""
+    if not value:
+        return None
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    return items or None
 
 
 # ============================================================================
@@ -113,21 +175,14 @@ async def create_project_memory(
     ```
     """
     try:
-        # TODO: 实际调用ProjectMemoryService
-        # memory = project_memory_service.create_memory(
-        #     project_id=project_code,
-        #     **request.dict()
-        # )
+        memory = get_project_memory_service().create_memory(
+            project_id=project_code,
+            **request.dict()
+        )
         
-        # 模拟返回
         return {
             "success": True,
-            "memory": {
-                "id": "MEM-12345678",
-                "project_id": project_code,
-                **request.dict(),
-                "created_at": datetime.now().isoformat()
-            }
+            "memory": memory
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,6 +195,7 @@ async def retrieve_project_memories(
     category: Optional[str] = Query(None, description="分类过滤"),
     memory_type: Optional[str] = Query(None, description="类型过滤"),
     tags: Optional[str] = Query(None, description="标签过滤（逗号分隔）"),
+    tag_mode: str = Query(TagMatchMode.ANY, description="标签匹配模式: any（任一）/all（全部）"),
     limit: int = Query(10, ge=1, le=100, description="返回数量")
 ) -> Dict[str, Any]:
     """
@@ -150,21 +206,24 @@ async def retrieve_project_memories(
     **示例**:
     - GET /api/projects/TASKFLOW/memories?query=如何优化性能
     - GET /api/projects/TASKFLOW/memories?category=solution&limit=20
+    - GET /api/projects/TASKFLOW/memories?tags=react,performance&tag_mode=all
     """
+    if tag_mode not in (TagMatchMode.ANY, TagMatchMode.ALL):
+        raise HTTPException(status_code=400, detail=f"Invalid tag_mode: {tag_mode}")
+    
     try:
-        tags_list = tags.split(",") if tags else None
+        tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
         
-        # TODO: 实际调用ProjectMemoryService
-        # memories = project_memory_service.retrieve_memories(
-        #     project_id=project_code,
-        #     query=query,
-        #     category=category,
-        #     memory_type=memory_type,
-        #     tags=tags_list,
-        #     limit=limit
-        # )
+        memories = get_project_memory_service().retrieve_memories(
+            project_id=project_code,
+            query=query,
+            category=category,
+            memory_type=memory_type,
+            tags=tags_list,
+            tag_mode=tag_mode,
+            limit=limit
+        )
         
-        # 模拟返回
         return {
             "success": True,
             "project_id": project_code,
@@ -172,10 +231,11 @@ async def retrieve_project_memories(
             "filters": {
                 "category": category,
                 "memory_type": memory_type,
-                "tags": tags_list
+                "tags": tags_list,
+                "tag_mode": tag_mode
             },
-            "memories": [],  # TODO: 实际记忆列表
-            "count": 0,
+            "memories": memories,
+            "count": len(memories),
             "retrieved_at": datetime.now().isoformat()
         }
     except Exception as e:
@@ -382,18 +442,16 @@ async def create_memory_relation(
     - depends-on: 依赖于
     """
     try:
-        # TODO: 实际调用ProjectMemoryService
-        # relation = project_memory_service.create_memory_relation(
-        #     **request.dict()
-        # )
+        relation = get_project_memory_service().create_memory_relation(
+            source_memory_id=request.source_memory_id,
+            target_memory_id=request.target_memory_id,
+            relation_type=request.relation_type,
+            strength=request.strength
+        )
         
         return {
             "success": True,
-            "relation": {
-                "id": "REL-12345678",
-                **request.dict(),
-                "created_at": datetime.now().isoformat()
-            }
+            "relation": relation
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -412,20 +470,139 @@ async def get_related_memories(
     **用途**: 查询与指定记忆相关的其他记忆
     """
     try:
-        relation_types_list = relation_types.split(",") if relation_types else None
+        related = get_project_memory_service().get_related_memories(
+            memory_id=memory_id,
+            relation_types=_split_csv(relation_types),
+            min_strength=min_strength
+        )
         
-        # TODO: 实际调用ProjectMemoryService
-        # related = project_memory_service.get_related_memories(
-        #     memory_id=memory_id,
-        #     relation_types=relation_types_list,
-        #     min_strength=min_strength
-        # )
+        return {
+            "success": True,
+            "memory_id": memory_id,
+            "related_memories": related,
+            "count": len(related)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# 记忆关系图
+# ============================================================================
+
+@router.get("/{project_code}/memories/graph/path")
+async def find_memory_path(
+    project_code: str,
+    source: str = Query(..., description="起点记忆ID"),
+    target: str = Query(..., description="终点记忆ID"),
+    relation_types: Optional[str] = Query(None, description="关系类型过滤（逗号分隔）"),
+    min_strength: float = Query(0.0, ge=0.0, le=1.0, description="最小关系强度")
+) -> Dict[str, Any]:
+    """
+    查找两条记忆之间的最短关系路径
+    
+    **用途**: 解释两条记忆如何关联（如 问题 → 原因 → 解决方案）
+    
+    **说明**: 边代价为 1/strength，强关系优先
+    
+    **示例**:
+    - GET /api/projects/TASKFLOW/memories/graph/path?source=MEM-1&target=MEM-9
+    """
+    try:
+        result = get_project_memory_service().find_memory_path(
+            project_id=project_code,
+            source_memory_id=source,
+            target_memory_id=target,
+            relation_types=_split_csv(relation_types),
+            min_strength=min_strength
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No path between {source} and {target}")
+    
+    return {
+        "success": True,
+        "project_id": project_code,
+        **result
+    }
+
+
+@router.get("/{project_code}/memories/graph/rank")
+async def rank_related_memories(
+    project_code: str,
+    seeds: str = Query(..., description="种子记忆ID（逗号分隔）"),
+    relation_types: Optional[str] = Query(None, description="关系类型过滤（逗号分隔）"),
+    damping: float = Query(0.85, gt=0.0, lt=1.0, description="阻尼系数"),
+    limit: int = Query(10, ge=1, le=100, description="返回数量")
+) -> Dict[str, Any]:
+    """
+    以若干记忆为种子推荐相关记忆（个性化 PageRank）
+    
+    **用途**: 根据当前关注的记忆，找出关系图中最相关的其他记忆
+    
+    **示例**:
+    - GET /api/projects/TASKFLOW/memories/graph/rank?seeds=MEM-1,MEM-2&limit=5
+    """
+    seed_list = _split_csv(seeds)
+    if not seed_list:
+        raise HTTPException(status_code=400, detail="seeds is required")
+    
+    try:
+        memories = get_project_memory_service().rank_related_memories(
+            project_id=project_code,
+            seed_memory_ids=seed_list,
+            relation_types=_split_csv(relation_types),
+            damping=damping,
+            limit=limit
+        )
         
         return {
             "success": True,
+            "project_id": project_code,
+            "seeds": seed_list,
+            "memories": memories,
+            "count": len(memories)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{project_code}/memories/{memory_id}/graph/neighborhood")
+async def get_memory_neighborhood(
+    project_code: str,
+    memory_id: str,
+    max_hops: int = Query(2, ge=1, le=5, description="最大跳数"),
+    relation_types: Optional[str] = Query(None, description="关系类型过滤（逗号分隔）"),
+    min_strength: float = Query(0.0, ge=0.0, le=1.0, description="最小关系强度"),
+    limit: int = Query(50, ge=1, le=500, description="返回数量")
+) -> Dict[str, Any]:
+    """
+    获取记忆的多跳邻域
+    
+    **用途**: 沿关系图向外扩展，查看间接关联的记忆
+    
+    **示例**:
+    - GET /api/projects/TASKFLOW/memories/MEM-1/graph/neighborhood?max_hops=3
+    """
+    try:
+        memories = get_project_memory_service().get_memory_neighborhood(
+            project_id=project_code,
+            memory_id=memory_id,
+            max_hops=max_hops,
+            relation_types=_split_csv(relation_types),
+            min_strength=min_strength,
+            limit=limit
+        )
+        
+        return {
+            "success": True,
+            "project_id": project_code,
             "memory_id": memory_id,
-            "related_memories": [],  # TODO: 实际相关记忆
-            "count": 0
+            "max_hops": max_hops,
+            "memories": memories,
+            "count": len(memories)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -481,6 +658,21 @@ async def get_memory_stats(project_code: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{project_code}/memories/rank/refresh")
+async def refresh_memory_rank(project_code: str) -> Dict[str, Any]:
+    """
+    立即重新计算项目记忆的排序分
+    
+    **用途**: 批量导入记忆或调整重要性后手动刷新（平时由后台任务定期刷新）
+    """
+    try:
+        service = get_project_memory_service()
+        result = await asyncio.to_thread(service.refresh_rank_scores, project_code)
+        return {"success": True, "project_id": project_code, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/{project_code}/memories/{memory_id}")
 async def delete_memory(
     project_code: str,
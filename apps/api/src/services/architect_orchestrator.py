@@ -129,6 +129,7 @@ class ArchitectOrchestrator:
         Returns:
             处理结果统计：{
                 "tasks_created": 12,
+                "task_errors": [],  # 批量创建失败时逐条的错误原因
                 "issues_created": 3,
                 "components_created": 2,
                 "task_board_updated": True
@@ -136,6 +137,7 @@ class ArchitectOrchestrator:
         """
         result = {
             "tasks_created": 0,
+            "task_errors": [],
             "issues_created": 0,
             "decisions_created": 0,
             "articles_created": 0,
@@ -151,10 +153,12 @@ class ArchitectOrchestrator:
         )
         
         # 2. 创建任务
-        result["tasks_created"] = self._create_tasks_from_suggestions(
+        task_result = self._create_tasks_from_suggestions(
             analysis.project_code,
             analysis.suggested_tasks
         )
+        result["tasks_created"] = task_result["created"]
+        result["task_errors"] = task_result["errors"]
         
         # 3. 记录问题
         result["issues_created"] = self._create_issues_from_problems(
@@ -200,9 +204,14 @@ class ArchitectOrchestrator:
         self,
         project_code: str,
         suggestions: List[ArchitectTaskSuggestion]
-    ) -> int:
-        """将建议任务转换为实际任务记录"""
-        created = 0
+    ) -> Dict[str, Any]:
+        """将建议任务转换为实际任务记录（单事务批量写入，全部成功或全部不写入）
+        
+        Returns:
+            {"created": 创建数, "errors": [{"index", "id", "error"}]}；
+            未注入 state_manager 时 created 为 0，errors 中给出原因
+        """
+        tasks_data = []
         
         for suggestion in suggestions:
             # 构造Task对象
@@ -212,6 +221,7 @@ class ArchitectOrchestrator:
                 "description": suggestion.description,
                 "status": "pending",
                 "priority": self._map_priority(suggestion.priority),
+                "depends_on": suggestion.dependencies,
                 "estimated_hours": suggestion.estimated_hours,
                 "complexity": self._infer_complexity(suggestion.estimated_hours),
                 "project_id": project_code,
@@ -224,11 +234,17 @@ class ArchitectOrchestrator:
                     "source": "architect_analysis"
                 }
             }
-            
-            # TODO: 调用state_manager.create_task(task_data)
-            created += 1
+            tasks_data.append(task_data)
         
-        return created
+        if self.state_manager is None:
+            # 未注入 state_manager（如 Mock 模式）时不写入任何任务
+            return {
+                "created": 0,
+                "errors": [{"index": None, "id": None, "error": "state_manager not configured"}]
+            }
+        
+        result = self.state_manager.create_tasks(tasks_data)
+        return {"created": result["created"], "errors": result["errors"]}
     
     def _create_issues_from_problems(
         self,
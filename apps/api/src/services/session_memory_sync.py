@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+"""
+Session Memory 同步服务（Session Memory Sync Service）
+
+功能：
+1. 增量同步：基于内容哈希，只上传自上次成功同步后发生变化的会话
+2. 本地同步状态表（session_memory_sync_state）记录每个会话的同步进度
+3. 单个连接池化的 httpx.AsyncClient + 有界并发
+4. 失败重试（指数退避 + 随机抖动）
+5. 同步状态表的读写通过 asyncio.to_thread 在线程池中执行，不阻塞事件循环
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+
+# Session Memory MCP服务地址（可通过环境变量 SESSION_MEMORY_URL 覆盖）
+DEFAULT_SESSION_MEMORY_URL = os.getenv("SESSION_MEMORY_URL", "http://localhost:5173")
+DEFAULT_TIMEOUT = 10
+
+# 可重试的HTTP状态码（限流 + 服务端临时错误）
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+# ============================================================================
+# 会话 → Session Memory 数据格式
+# ============================================================================
+
+def format_session_for_memory(session: Dict[str, Any]) -> str:
+    """
+    将会话格式化为Session Memory适用的格式
+
+    Args:
+        session: 会话数据
+
+    Returns:
+        格式化的会话内容字符串
+    """
+    lines = []
+
+    # 标题
+    lines.append(f"# {session.get('title', '未命名会话')}")
+    lines.append("")
+
+    # 元数据
+    lines.append("## 会话信息")
+    lines.append(f"- **创建时间**: {session.get('created_at', '未知')}")
+    lines.append(f"- **更新时间**: {session.get('updated_at', '未知')}")
+    lines.append(f"- **状态**: {session.get('status', 'unknown')}")
+    lines.append(f"- **参与者**: {', '.join(session.get('participants', []))}")
+    lines.append(f"- **标签**: {', '.join(session.get('tags', []))}")
+    lines.append(f"- **消息总数**: {session.get('messages_count', 0)}")
+    lines.append(f"- **Token总消耗**: {session.get('total_tokens', 0)}")
+    lines.append("")
+
+    # 摘要
+    if session.get('summary'):
+        lines.append("## 摘要")
+        lines.append(session.get('summary'))
+        lines.append("")
+
+    # 消息列表
+    lines.append("## 对话记录")
+    messages = session.get('messages', [])
+    for msg in messages:
+        from_user = msg.get('from', '未知')
+        content = msg.get('content', '')
+        timestamp = msg.get('timestamp', '')
+        tokens = msg.get('tokens', 0)
+
+        lines.append(f"### {from_user} ({timestamp}) [{tokens} tokens]")
+        lines.append(content)
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def build_session_memory_payload(session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    构建上传到Session Memory的请求体
+
+    Args:
+        session: 会话数据
+
+    Returns:
+        Session Memory /api/memory/store 请求体
+    """
+    return {
+        "user_id": "architect",
+        "content": format_session_for_memory(session),
+        "metadata": {
+            "source": "conversations",
+            "session_id": session.get("session_id"),
+            "title": session.get("title"),
+            "created_at": session.get("created_at"),
+            "participants": session.get("participants", []),
+            "tags": session.get("tags", []),
+            "total_messages": session.get("messages_count", 0),
+            "total_tokens": session.get("total_tokens", 0)
+        }
+    }
+
+
+def compute_content_hash(payload: Dict[str, Any]) -> str:
+    """
+    计算请求体的内容哈希（用于增量同步）
+
+    Args:
+        payload: Session Memory 请求体
+
+    Returns:
+        SHA-256 十六进制摘要
+    """
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# SessionMemorySyncService - 同步服务
+# ============================================================================
+
+class SessionMemorySyncService:
+    """
+    Session Memory 同步服务
+
+    负责把对话历史库中的会话增量上传到Session Memory MCP，
+    同步进度保存在本地SQLite的 session_memory_sync_state 表中
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_SESSION_MEMORY_URL,
+        db_path: str = "database/data/tasks.db",
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        初始化同步服务
+
+        Args:
+            base_url: Session Memory MCP服务地址
+            db_path: 同步状态表所在的数据库文件路径
+            max_concurrency: 最大并发上传数
+            max_retries: 单个会话的最大重试次数（不含首次请求）
+            backoff_base: 退避基数（秒）
+            backoff_cap: 单次退避上限（秒）
+            timeout: 单次请求超时（秒）
+            transport: 自定义httpx传输层（测试/离线基准测试使用）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.db_path = Path(db_path)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.transport = transport
+        self.logger = logging.getLogger(__name__)
+
+        # 确保数据库目录存在
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """获取数据库连接（上下文管理器）
+
+        Yields:
+            sqlite3.Connection: 数据库连接
+        """
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        """初始化同步状态表（与 migration 006 保持一致）"""
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_memory_sync_state (
+                    session_id TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    memory_id TEXT,
+                    synced_at TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_memory_sync_synced "
+                "ON session_memory_sync_state(synced_at)"
+            )
+
+    # ========================================================================
+    # 同步状态
+    # ========================================================================
+
+    def get_sync_states(self, session_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        获取会话的同步状态
+
+        Args:
+            session_ids: 会话ID列表，None表示全部
+
+        Returns:
+            {session_id: 同步状态}
+        """
+        with self._get_connection() as conn:
+            if session_ids is None:
+                rows = conn.execute("SELECT * FROM session_memory_sync_state").fetchall()
+            else:
+                ids = list(session_ids)
+                rows = []
+                # 分批查询，避免超过SQLite变量数量上限
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(conn.execute(
+                        f"SELECT * FROM session_memory_sync_state WHERE session_id IN ({placeholders})",
+                        chunk
+                    ).fetchall())
+
+        return {row["session_id"]: dict(row) for row in rows}
+
+    def _mark_synced(self, session_id: str, content_hash: str, memory_id: Optional[str]) -> None:
+        """记录同步成功"""
+        now = datetime.now().isoformat()
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT INTO session_memory_sync_state (
+                    session_id, content_hash, memory_id, synced_at, attempts, last_error, updated_at
+                ) VALUES (?, ?, ?, ?, 0, NULL, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    memory_id = excluded.memory_id,
+                    synced_at = excluded.synced_at,
+                    attempts = 0,
+                    last_error = NULL,
+                    updated_at = excluded.updated_at
+            """, (session_id, content_hash, memory_id, now, now))
+
+    def _mark_failed(self, session_id: str, error: str) -> None:
+        """记录同步失败（保留上次成功的哈希，下次仍会重新上传）"""
+        now = datetime.now().isoformat()
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT INTO session_memory_sync_state (
+                    session_id, attempts, last_error, updated_at
+                ) VALUES (?, 1, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    attempts = attempts + 1,
+                    last_error = excluded.last_error,
+                    updated_at = excluded.updated_at
+            """, (session_id, error[:500], now))
+
+    # ========================================================================
+    # HTTP
+    # ========================================================================
+
+    @asynccontextmanager
+    async def client(self):
+        """创建连接池化的 httpx.AsyncClient（整个批次复用）
+
+        Yields:
+            httpx.AsyncClient
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency
+        )
+        kwargs: Dict[str, Any] = {"timeout": self.timeout, "limits": limits}
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        async with httpx.AsyncClient(**kwargs) as client:
+            yield client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """计算第attempt次重试前的等待时间（Full Jitter）"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def _post_with_retry(
+        self,
+        client: httpx.AsyncClient,
+        payload: Dict[str, Any]
+    ) -> httpx.Response:
+        """
+        上传单个请求体，对网络错误和可重试状态码做带抖动的指数退避重试
+
+        Raises:
+            httpx.HTTPError: 重试耗尽后仍然失败
+        """
+        url = f"{self.base_url}/api/memory/store"
+        attempt = 0
+
+        while True:
+            try:
+                response = await client.post(url, json=payload)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    # ========================================================================
+    # 同步
+    # ========================================================================
+
+    async def sync_session(
+        self,
+        session: Dict[str, Any],
+        client: Optional[httpx.AsyncClient] = None,
+        force: bool = False,
+        known_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        同步单个会话
+
+        Args:
+            session: 会话数据
+            client: 复用的HTTP客户端，None时临时创建
+            force: 是否忽略内容哈希强制上传
+            known_hash: 已知的上次同步哈希（批量同步时预先查询，避免逐条读库）
+
+        Returns:
+            {"session_id", "status": synced/skipped/failed, "memory_id", "error"}
+        """
+        session_id = session.get("session_id")
+        payload = build_session_memory_payload(session)
+        content_hash = compute_content_hash(payload)
+
+        if known_hash is None and not force:
+            states = await asyncio.to_thread(self.get_sync_states, [session_id])
+            state = states.get(session_id)
+            known_hash = state.get("content_hash") if state else None
+
+        if not force and known_hash == content_hash:
+            return {"session_id": session_id, "status": "skipped", "memory_id": None, "error": None}
+
+        try:
+            if client is None:
+                async with self.client() as own_client:
+                    response = await self._post_with_retry(own_client, payload)
+            else:
+                response = await self._post_with_retry(client, payload)
+        except Exception as e:
+            await asyncio.to_thread(self._mark_failed, session_id, str(e))
+            return {"session_id": session_id, "status": "failed", "memory_id": None, "error": str(e)}
+
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}: {response.text}"
+            await asyncio.to_thread(self._mark_failed, session_id, error)
+            return {"session_id": session_id, "status": "failed", "memory_id": None, "error": error}
+
+        try:
+            memory_id = response.json().get("memory_id", "unknown")
+        except ValueError:
+            memory_id = "unknown"
+
+        await asyncio.to_thread(self._mark_synced, session_id, content_hash, memory_id)
+        return {"session_id": session_id, "status": "synced", "memory_id": memory_id, "error": None}
+
+    async def sync_many(
+        self,
+        sessions: List[Dict[str, Any]],
+        force: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        通过同一个连接池、有界并发地同步多个会话
+
+        Args:
+            sessions: 会话列表
+            force: 是否忽略内容哈希强制上传
+
+        Returns:
+            每个会话的同步结果（顺序与输入一致）
+        """
+        states = {} if force else await asyncio.to_thread(
+            self.get_sync_states, [s.get("session_id") for s in sessions]
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self.client() as client:
+            async def _bounded(session: Dict[str, Any]) -> Dict[str, Any]:
+                state = states.get(session.get("session_id"))
+                async with semaphore:
+                    return await self.sync_session(
+                        session,
+                        client=client,
+                        force=force,
+                        # 空串表示"已查询、无记录"，避免逐条回查同步状态表
+                        known_hash=(state or {}).get("content_hash") or ""
+                    )
+
+            return list(await asyncio.gather(*(_bounded(s) for s in sessions)))
+
+    async def sync_sessions(
+        self,
+        sessions: List[Dict[str, Any]],
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        批量增量同步会话
+
+        Args:
+            sessions: 会话列表
+            force: 是否忽略内容哈希强制全部上传
+
+        Returns:
+            同步汇总
+        """
+        results = await self.sync_many(sessions, force=force)
+
+        synced = [r for r in results if r["status"] == "synced"]
+        skipped = [r for r in results if r["status"] == "skipped"]
+        failed = [r for r in results if r["status"] == "failed"]
+        messages_by_id = {s.get("session_id"): s.get("messages_count", 0) for s in sessions}
+
+        return {
+            "total_sessions": len(sessions),
+            "synced_sessions": len(synced),
+            "skipped_sessions": len(skipped),
+            "failed_sessions": len(failed),
+            "total_messages": sum(messages_by_id.get(r["session_id"], 0) for r in synced),
+            "failures": [{"session_id": r["session_id"], "error": r["error"]} for r in failed]
+        }
+
+
+# ============================================================================
+# 便捷函数
+# ============================================================================
+
+def create_session_memory_sync_service(
+    base_url: str = DEFAULT_SESSION_MEMORY_URL,
+    db_path: str = "database/data/tasks.db",
+    max_concurrency: int = 8
+) -> SessionMemorySyncService:
+    """
+    创建Session Memory同步服务实例
+
+    Args:
+        base_url: Session Memory MCP服务地址
+        db_path: 数据库文件路径
+        max_concurrency: 最大并发上传数
+
+    Returns:
+        SessionMemorySyncService实例
+    """
+    return SessionMemorySyncService(
+        base_url=base_url,
+        db_path=db_path,
+        max_concurrency=max_concurrency
+    )
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Session Memory 后台同步 Worker
+
+功能：
+1. 按会话去抖（debounce）：短时间内的多次变更合并为一次上传
+2. 待同步队列持久化到SQLite（session_memory_sync_queue），重启后继续处理
+3. 失败按会话退避重试
+4. 暴露队列深度和滞后时间，供健康检查使用
+
+设计：
+- 会话事件只做一次 UPSERT 入队，不在请求路径上调用Session Memory
+- 后台协程在最早到期时间唤醒，批量取出到期会话并通过同步服务上传
+- 持续有新事件的会话最多等待 max_delay 秒，避免被无限推迟
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from services.session_memory_sync import SessionMemorySyncService
+
+
+# 批量加载会话的回调：session_ids -> {session_id: session}
+SessionLoader = Callable[[List[str]], Dict[str, Dict[str, Any]]]
+
+
+class SessionMemorySyncWorker:
+    """
+    Session Memory 后台同步Worker
+
+    会话创建/更新事件进入持久化队列，按会话去抖后批量同步
+    """
+
+    def __init__(
+        self,
+        sync_service: SessionMemorySyncService,
+        session_loader: SessionLoader,
+        db_path: str = "database/data/tasks.db",
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        batch_size: int = 50,
+        retry_base_seconds: float = 5.0,
+        retry_cap_seconds: float = 300.0
+    ):
+        """
+        初始化后台同步Worker
+
+        Args:
+            sync_service: Session Memory同步服务
+            session_loader: 批量加载会话的回调
+            db_path: 队列表所在的数据库文件路径
+            debounce_seconds: 去抖窗口（秒），窗口内的新事件会推迟上传
+            max_delay_seconds: 从首次入队起的最长等待时间（秒）
+            batch_size: 每轮最多处理的会话数
+            retry_base_seconds: 失败重试的基础延迟（秒）
+            retry_cap_seconds: 失败重试的最大延迟（秒）
+        """
+        self.sync_service = sync_service
+        self.session_loader = session_loader
+        self.db_path = Path(db_path)
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(debounce_seconds, max_delay_seconds)
+        self.batch_size = batch_size
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_cap_seconds = retry_cap_seconds
+        self.logger = logging.getLogger(__name__)
+
+        # 运行状态
+        self.is_running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # 统计信息
+        self.stats = {
+            "events_received": 0,
+            "events_coalesced": 0,
+            "sessions_synced": 0,
+            "sessions_skipped": 0,
+            "sessions_failed": 0,
+            "started_at": None,
+            "last_flush_at": None
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """获取数据库连接（上下文管理器）
+
+        Yields:
+            sqlite3.Connection: 数据库连接
+        """
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        """初始化待同步队列表（与 migration 007 保持一致）"""
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_memory_sync_queue (
+                    session_id TEXT PRIMARY KEY,
+                    enqueued_at REAL NOT NULL,
+                    last_event_at REAL NOT NULL,
+                    due_at REAL NOT NULL,
+                    event_count INTEGER DEFAULT 1,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_memory_sync_queue_due "
+                "ON session_memory_sync_queue(due_at)"
+            )
+
+    # ========================================================================
+    # 入队
+    # ========================================================================
+
+    def enqueue(self, session_id: str) -> None:
+        """
+        会话发生变化，加入待同步队列
+
+        同一会话已在队列中时只推迟到期时间（去抖），不产生新的上传；
+        会话处于失败退避中时，到期时间不早于退避结束时间。
+        会话已到期（正在上传）或处于退避中时，新事件重新计时：
+        enqueued_at 重置为当前时间，max_delay 从此刻起算
+
+        Args:
+            session_id: 会话ID
+        """
+        now = time.time()
+        with self._get_connection() as conn:
+            cursor = conn.execute("""
+                INSERT INTO session_memory_sync_queue (
+                    session_id, enqueued_at, last_event_at, due_at, event_count, attempts
+                ) VALUES (?, ?, ?, ?, 1, 0)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    enqueued_at = CASE
+                        WHEN attempts > 0 OR due_at <= excluded.enqueued_at THEN excluded.enqueued_at
+                        ELSE enqueued_at
+                    END,
+                    last_event_at = excluded.last_event_at,
+                    due_at = CASE
+                        WHEN attempts > 0
+                            THEN MAX(due_at, excluded.last_event_at + ?)
+                        WHEN due_at <= excluded.enqueued_at
+                            THEN excluded.last_event_at + ?
+                        ELSE MIN(excluded.last_event_at + ?, enqueued_at + ?)
+                    END,
+                    event_count = event_count + 1
+                RETURNING event_count
+            """, (
+                session_id, now, now, now + self.debounce_seconds,
+                self.debounce_seconds,
+                self.debounce_seconds,
+                self.debounce_seconds, self.max_delay_seconds
+            ))
+            event_count = cursor.fetchone()[0]
+
+        self.stats["events_received"] += 1
+        if event_count > 1:
+            self.stats["events_coalesced"] += 1
+
+        self._wake()
+
+    def _wake(self) -> None:
+        """唤醒后台协程重新计算下一次到期时间"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ========================================================================
+    # 生命周期
+    # ========================================================================
+
+    async def start(self) -> None:
+        """启动后台同步协程（持久化队列中遗留的会话会被继续处理）"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._wakeup = asyncio.Event()
+        self.stats["started_at"] = datetime.now().isoformat()
+        self._task = asyncio.create_task(self._run())
+        self.logger.info("SessionMemorySyncWorker started, pending=%d", self.get_queue_stats()["queue_depth"])
+
+    async def stop(self) -> None:
+        """停止后台同步协程（队列保留在数据库中）"""
+        self.is_running = False
+        self._wake()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=10)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            self._task = None
+        self.logger.info("SessionMemorySyncWorker stopped")
+
+    async def _run(self) -> None:
+        """后台主循环：睡眠到最早到期时间，或被新事件唤醒"""
+        while self.is_running:
+            try:
+                await self.flush_due()
+            except Exception as e:
+                self.logger.error(f"Session Memory sync flush failed: {e}", exc_info=True)
+
+            timeout = self._seconds_until_next_due()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _seconds_until_next_due(self) -> float:
+        """距离队列中最早到期会话的秒数（队列为空时返回较长的空闲等待）"""
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT MIN(due_at) FROM session_memory_sync_queue").fetchone()
+        if row is None or row[0] is None:
+            return 60.0
+        return max(0.0, row[0] - time.time())
+
+    # ========================================================================
+    # 处理
+    # ========================================================================
+
+    async def flush_due(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        同步所有已到期的会话
+
+        Args:
+            now: 当前时间戳（测试用）
+
+        Returns:
+            本轮处理结果 {"synced", "skipped", "failed", "dropped"}
+        """
+        now = time.time() if now is None else now
+        with self._get_connection() as conn:
+            due_rows = [dict(r) for r in conn.execute("""
+                SELECT session_id, last_event_at, attempts FROM session_memory_sync_queue
+                WHERE due_at <= ?
+                ORDER BY due_at
+                LIMIT ?
+            """, (now, self.batch_size)).fetchall()]
+
+        result = {"synced": 0, "skipped": 0, "failed": 0, "dropped": 0}
+        if not due_rows:
+            return result
+
+        sessions = self.session_loader([r["session_id"] for r in due_rows])
+        present = [sessions[r["session_id"]] for r in due_rows if r["session_id"] in sessions]
+        sync_results = {
+            r["session_id"]: r
+            for r in await self.sync_service.sync_many(present)
+        }
+
+        with self._get_connection() as conn:
+            for row in due_rows:
+                session_id = row["session_id"]
+                outcome = sync_results.get(session_id)
+
+                if outcome is None or outcome["status"] in ("synced", "skipped"):
+                    # 只有在处理期间没有新事件时才出队，否则保留给下一轮
+                    conn.execute("""
+                        DELETE FROM session_memory_sync_queue
+                        WHERE session_id = ? AND last_event_at = ?
+                    """, (session_id, row["last_event_at"]))
+                    key = "dropped" if outcome is None else outcome["status"]
+                    result[key] += 1
+                else:
+                    delay = min(self.retry_cap_seconds, self.retry_base_seconds * (2 ** row["attempts"]))
+                    conn.execute("""
+                        UPDATE session_memory_sync_queue
+                        SET attempts = attempts + 1,
+                            last_error = ?,
+                            due_at = MAX(due_at, ?)
+                        WHERE session_id = ?
+                    """, (outcome["error"], time.time() + delay, session_id))
+                    result["failed"] += 1
+
+        self.stats["sessions_synced"] += result["synced"]
+        self.stats["sessions_skipped"] += result["skipped"]
+        self.stats["sessions_failed"] += result["failed"]
+        self.stats["last_flush_at"] = datetime.now().isoformat()
+        return result
+
+    # ========================================================================
+    # 统计
+    # ========================================================================
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """
+        获取队列深度和滞后时间
+
+        Returns:
+            {"queue_depth", "retrying", "lag_seconds", "oldest_enqueued_at"}
+        """
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT
+                    COUNT(*) AS depth,
+                    SUM(CASE WHEN attempts > 0 THEN 1 ELSE 0 END) AS retrying,
+                    MIN(enqueued_at) AS oldest
+                FROM session_memory_sync_queue
+            """).fetchone()
+
+        oldest = row["oldest"]
+        return {
+            "queue_depth": row["depth"],
+            "retrying": row["retrying"] or 0,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "oldest_enqueued_at": datetime.fromtimestamp(oldest).isoformat() if oldest else None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取Worker统计信息"""
+        return {
+            **self.stats,
+            **self.get_queue_stats(),
+            "is_running": self.is_running,
+            "debounce_seconds": self.debounce_seconds,
+            "max_delay_seconds": self.max_delay_seconds
+        }
+
+
+# ============================================================================
+# 便捷函数
+# ============================================================================
+
+def create_session_memory_sync_worker(
+    sync_service: SessionMemorySyncService,
+    session_loader: SessionLoader,
+    debounce_seconds: float = 2.0,
+    max_delay_seconds: float = 30.0
+) -> SessionMemorySyncWorker:
+    """
+    创建后台同步Worker实例（队列表与同步服务共用一个数据库）
+
+    Args:
+        sync_service: Session Memory同步服务
+        session_loader: 批量加载会话的回调
+        debounce_seconds: 去抖窗口（秒）
+        max_delay_seconds: 最长等待时间（秒）
+
+    Returns:
+        SessionMemorySyncWorker实例
+    """
+    return SessionMemorySyncWorker(
+        sync_service=sync_service,
+        session_loader=session_loader,
+        db_path=str(sync_service.db_path),
+        debounce_seconds=debounce_seconds,
+        max_delay_seconds=max_delay_seconds
+    )
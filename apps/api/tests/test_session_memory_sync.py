@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Session Memory 同步服务测试
+
+测试内容：
+1. 增量同步（内容哈希未变化时跳过）
+2. 可重试错误的退避重试
+3. 同步状态表记录
+4. 后台Worker去抖合并与队列持久化
+"""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+# 添加src路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from services.session_memory_sync import (
+    SessionMemorySyncService,
+    build_session_memory_payload,
+    compute_content_hash
+)
+from services.session_memory_sync_worker import SessionMemorySyncWorker
+
+
+def _session(session_id: str, summary: str = "") -> dict:
+    return {
+        "session_id": session_id,
+        "title": f"会话 {session_id}",
+        "status": "active",
+        "participants": ["用户", "架构师AI"],
+        "tags": ["test"],
+        "messages_count": 1,
+        "total_tokens": 10,
+        "summary": summary,
+        "messages": [{"from": "用户", "content": "你好", "timestamp": "2025-11-18T10:00:00", "tokens": 10}]
+    }
+
+
+def _make_service(tmp_path, handler, **kwargs) -> SessionMemorySyncService:
+    return SessionMemorySyncService(
+        base_url="http://standin",
+        db_path=str(tmp_path / "sync.db"),
+        backoff_base=0.001,
+        backoff_cap=0.001,
+        transport=httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+def test_content_hash_is_stable():
+    """相同会话内容产生相同哈希"""
+    a = compute_content_hash(build_session_memory_payload(_session("s-1")))
+    b = compute_content_hash(build_session_memory_payload(_session("s-1")))
+    c = compute_content_hash(build_session_memory_payload(_session("s-1", summary="changed")))
+    assert a == b
+    assert a != c
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_skips_unchanged(tmp_path):
+    """第二次同步只上传内容变化的会话"""
+    posted = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(request)
+        return httpx.Response(200, json={"memory_id": f"MEM-{len(posted)}"})
+
+    service = _make_service(tmp_path, handler)
+    sessions = [_session("s-1"), _session("s-2"), _session("s-3")]
+
+    first = await service.sync_sessions(sessions)
+    assert first["synced_sessions"] == 3
+    assert len(posted) == 3
+
+    sessions[1]["summary"] = "新的摘要"
+    second = await service.sync_sessions(sessions)
+    assert second["synced_sessions"] == 1
+    assert second["skipped_sessions"] == 2
+    assert len(posted) == 4
+
+    forced = await service.sync_sessions(sessions, force=True)
+    assert forced["synced_sessions"] == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_on_retryable_status(tmp_path):
+    """503错误会重试，成功后记录同步状态"""
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] < 3:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"memory_id": "MEM-ok"})
+
+    service = _make_service(tmp_path, handler, max_retries=3)
+    result = await service.sync_session(_session("s-1"))
+
+    assert result["status"] == "synced"
+    assert calls["count"] == 3
+    state = service.get_sync_states(["s-1"])["s-1"]
+    assert state["memory_id"] == "MEM-ok"
+    assert state["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_sync_is_retried_next_time(tmp_path):
+    """重试耗尽后记录失败，下次批量同步会再次上传"""
+    responses = {"ok": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if responses["ok"]:
+            return httpx.Response(200, json={"memory_id": "MEM-1"})
+        return httpx.Response(500, text="error")
+
+    service = _make_service(tmp_path, handler, max_retries=1)
+    first = await service.sync_sessions([_session("s-1")])
+    assert first["failed_sessions"] == 1
+    assert service.get_sync_states(["s-1"])["s-1"]["attempts"] == 1
+
+    responses["ok"] = True
+    second = await service.sync_sessions([_session("s-1")])
+    assert second["synced_sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_state_io_runs_off_event_loop(tmp_path):
+    """同步状态表的读写在线程池中执行，不阻塞事件循环"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"memory_id": "MEM-1"})
+
+    service = _make_service(tmp_path, handler)
+    loop_thread = threading.get_ident()
+    threads = []
+    for name in ("get_sync_states", "_mark_synced"):
+        original = getattr(service, name)
+
+        def traced(*args, _original=original, **kwargs):
+            threads.append(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        setattr(service, name, traced)
+
+    await service.sync_sessions([_session("s-1"), _session("s-2")])
+    await service.sync_session(_session("s-3"))
+
+    assert len(threads) == 5
+    assert loop_thread not in threads
+
+
+def _make_worker(service, sessions: dict, **kwargs) -> SessionMemorySyncWorker:
+    return SessionMemorySyncWorker(
+        sync_service=service,
+        session_loader=lambda ids: {i: sessions[i] for i in ids if i in sessions},
+        db_path=str(service.db_path),
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_events(tmp_path):
+    """去抖窗口内的多次事件只上传一次"""
+    posted = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(request)
+        return httpx.Response(200, json={"memory_id": "MEM-1"})
+
+    service = _make_service(tmp_path, handler)
+    worker = _make_worker(service, {"s-1": _session("s-1")}, debounce_seconds=60)
+
+    for _ in range(5):
+        worker.enqueue("s-1")
+    assert worker.get_queue_stats()["queue_depth"] == 1
+    assert worker.stats["events_coalesced"] == 4
+
+    # 未到期时不上传
+    assert (await worker.flush_due())["synced"] == 0
+    assert posted == []
+
+    result = await worker.flush_due(now=1e12)
+    assert result["synced"] == 1
+    assert len(posted) == 1
+    assert worker.get_queue_stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_queue_survives_restart(tmp_path):
+    """队列持久化：新Worker实例继续处理遗留会话，失败的会话保留并退避"""
+    responses = {"ok": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if responses["ok"]:
+            return httpx.Response(200, json={"memory_id": "MEM-1"})
+        return httpx.Response(500, text="error")
+
+    service = _make_service(tmp_path, handler, max_retries=1)
+    sessions = {"s-1": _session("s-1")}
+
+    first = _make_worker(service, sessions, debounce_seconds=0)
+    first.enqueue("s-1")
+    first.enqueue("s-gone")
+    result = await first.flush_due()
+    assert result["failed"] == 1
+    assert result["dropped"] == 1
+
+    stats = first.get_queue_stats()
+    assert stats["queue_depth"] == 1
+    assert stats["retrying"] == 1
+
+    # 模拟重启
+    responses["ok"] = True
+    second = _make_worker(service, sessions, debounce_seconds=0)
+    result = await second.flush_due(now=1e12)
+    assert result["synced"] == 1
+    assert second.get_queue_stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_during_backoff_keeps_retry_delay(tmp_path):
+    """退避期间到达的新事件不会让会话提前重试"""
+    posted = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(request)
+        return httpx.Response(500, text="error")
+
+    service = _make_service(tmp_path, handler, max_retries=1)
+    worker = _make_worker(
+        service, {"s-1": _session("s-1")},
+        debounce_seconds=0, max_delay_seconds=0, retry_base_seconds=60
+    )
+
+    worker.enqueue("s-1")
+    assert (await worker.flush_due())["failed"] == 1
+    attempts = len(posted)
+
+    worker.enqueue("s-1")
+    assert (await worker.flush_due())["failed"] == 0
+    assert len(posted) == attempts
+    assert worker.get_queue_stats()["retrying"] == 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rearms_due_or_backoff_row(tmp_path):
+    """已到期（上传中）或退避中的会话收到新事件时重新计时"""
+    service = _make_service(tmp_path, lambda request: httpx.Response(200, json={}))
+    worker = _make_worker(service, {}, debounce_seconds=30, max_delay_seconds=60)
+
+    def _row():
+        with worker._get_connection() as conn:
+            return dict(conn.execute(
+                "SELECT enqueued_at, due_at FROM session_memory_sync_queue WHERE session_id = 's-1'"
+            ).fetchone())
+
+    for attempts, due_offset in ((0, -100), (1, 5)):
+        worker.enqueue("s-1")
+        now = time.time()
+        with worker._get_connection() as conn:
+            conn.execute(
+                "UPDATE session_memory_sync_queue SET enqueued_at = ?, due_at = ?, attempts = ?",
+                (now - 100, now + due_offset, attempts)
+            )
+
+        worker.enqueue("s-1")
+        row = _row()
+        assert row["enqueued_at"] >= now
+        assert row["due_at"] >= now + 30
+        assert worker.get_queue_stats()["lag_seconds"] < 5
@@ -13,7 +13,7 @@ from datetime import datetime
 import re
 
 from .models import Task, TaskStatus, ExecutionPlan
-from .state_manager import StateManager
+from .state_manager import StateManager, DEFAULT_LEASE_SECONDS
 from .utils.markdown_parser import parse_task_markdown
 from .utils.git_helper import (
     create_git_branch, commit_code, get_current_branch, 
@@ -26,8 +26,8 @@ class CursorWorker:
     """Cursor Worker Agent - 负责任务执行
     
     工作流:
-    1. 轮询待执行任务
-    2. 认领任务
+    1. 原子认领一个依赖已满足的待执行任务（带租约和 fencing token）
+    2. 执行过程中续约，租约被回收后放弃任务
     3. 生成执行计划
     4. 执行任务代码生成
     5. 运行测试
@@ -45,11 +45,14 @@ class CursorWorker:
         self.worker_id = worker_id
         self.state_manager = state_manager
         self.poll_interval = config.get('worker.poll_interval', 30)
+        self.lease_seconds = config.get('worker.lease_seconds', DEFAULT_LEASE_SECONDS)
+        # 已认领任务的 fencing token：{task_id: token}
+        self.fencing_tokens: Dict[str, int] = {}
         self.tasks_completed = 0
         self.tasks_failed = 0
     
     def poll_tasks(self) -> Optional[Task]:
-        """轮询获取待执行任务
+        """轮询获取待执行任务（只读预览，不认领；认领请用 claim_next_task）
         
         Returns:
             可执行的任务，如果没有则返回 None
@@ -73,7 +76,7 @@ class CursorWorker:
         return None
     
     def claim_task(self, task: Task) -> bool:
-        """认领任务
+        """认领指定任务（原子操作，并发认领时只有一个 Worker 成功）
         
         Args:
             task: 待认领的任务
@@ -81,21 +84,64 @@ class CursorWorker:
         Returns:
             是否认领成功
         """
-        # 更新任务状态为 in_progress
-        success = self.state_manager.update_task_status(
-            task.id, TaskStatus.IN_PROGRESS
+        claim = self.state_manager.claim_task(
+            self.worker_id, task_id=task.id, lease_seconds=self.lease_seconds
         )
+        if claim is None:
+            return False
         
-        if success:
-            # 更新任务的分配信息
-            task.assigned_to = self.worker_id
-            task.assigned_at = datetime.now()
+        self._on_claimed(task, claim)
+        return True
+    
+    def claim_next_task(self) -> Optional[Task]:
+        """原子认领下一个依赖已满足的待执行任务
+        
+        Returns:
+            认领到的任务，如果没有可执行任务则返回 None
+        """
+        claim = self.state_manager.claim_task(self.worker_id, lease_seconds=self.lease_seconds)
+        if claim is None:
+            return None
+        
+        task = self.state_manager.get_task(claim["task_id"])
+        self._on_claimed(task, claim)
+        return task
+    
+    def _on_claimed(self, task: Task, claim: Dict[str, Any]) -> None:
+        """记录认领信息并创建 Git 分支"""
+        self.fencing_tokens[task.id] = claim["fencing_token"]
+        task.status = TaskStatus.IN_PROGRESS
+        task.assigned_to = self.worker_id
+        task.assigned_at = datetime.now()
+        
+        # 创建 Git 分支
+        if is_git_repo():
+            create_git_branch(task.id)
+    
+    def renew_lease(self, task: Task) -> bool:
+        """续约已认领任务的租约
+        
+        Args:
+            task: 已认领的任务
             
-            # 创建 Git 分支
-            if is_git_repo():
-                create_git_branch(task.id)
+        Returns:
+            是否续约成功；False 表示租约已过期被回收，应放弃该任务
+        """
+        token = self.fencing_tokens.get(task.id)
+        if token is None:
+            return False
+        if self.state_manager.renew_lease(task.id, token, self.lease_seconds):
+            return True
         
-        return success
+        self.fencing_tokens.pop(task.id, None)
+        return False
+    
+    def _update_claimed_status(self, task: Task, status: TaskStatus) -> bool:
+        """以认领时的 fencing token 更新任务状态（租约被回收后不会覆盖新持有者）"""
+        token = self.fencing_tokens.pop(task.id, None)
+        if token is None:
+            return False
+        return self.state_manager.update_task_status(task.id, status, fencing_token=token)
     
     def generate_execution_plan(self, task: Task) -> ExecutionPlan:
         """生成执行计划
@@ -284,11 +330,7 @@ class CursorWorker:
             architect.receive_task_report(task.id, report)
             
             # 更新任务状态为 review
-            success = self.state_manager.update_task_status(
-                task.id, TaskStatus.REVIEW
-            )
-            
-            return success
+            return self._update_claimed_status(task, TaskStatus.REVIEW)
         except Exception as e:
             print(f"[CursorWorker] ✗ 提交审查失败: {str(e)}")
             return False
@@ -463,23 +505,23 @@ class CursorWorker:
         Returns:
             成功执行的任务，如果没有可执行的任务返回 None
         """
-        # 轮询获取任务
-        task = self.poll_tasks()
+        # 原子认领任务
+        task = self.claim_next_task()
         
         if task is None:
             return None
         
-        # 认领任务
-        if not self.claim_task(task):
-            return None
-        
         # 生成执行计划
         plan = self.generate_execution_plan(task)
         
         # 执行任务
         if not self.execute_task(task, plan):
             self.tasks_failed += 1
-            self.state_manager.update_task_status(task.id, TaskStatus.FAILED)
+            self._update_claimed_status(task, TaskStatus.FAILED)
+            return None
+        
+        # 租约已被回收（执行超时），任务已交给其他 Worker
+        if not self.renew_lease(task):
             return None
         
         # 运行测试
@@ -488,19 +530,22 @@ class CursorWorker:
         if not test_results["passed"]:
             # 测试失败，标记为失败
             self.tasks_failed += 1
-            self.state_manager.update_task_status(task.id, TaskStatus.FAILED)
+            self._update_claimed_status(task, TaskStatus.FAILED)
+            return None
+        
+        if not self.renew_lease(task):
             return None
         
         # 提交代码
         if not self.commit_code(task, test_results):
             self.tasks_failed += 1
-            self.state_manager.update_task_status(task.id, TaskStatus.FAILED)
+            self._update_claimed_status(task, TaskStatus.FAILED)
             return None
         
         # 提交审查（包含测试结果）
         if not self.submit_for_review(task, test_results):
             self.tasks_failed += 1
-            self.state_manager.update_task_status(task.id, TaskStatus.FAILED)
+            self._update_claimed_status(task, TaskStatus.FAILED)
             return None
         
         return task
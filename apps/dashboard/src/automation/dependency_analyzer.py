@@ -2,12 +2,69 @@
 依赖分析引擎
 
 分析任务依赖关系、检测循环依赖、计算关键路径
+
+所有图算法都在整数下标的邻接表上迭代执行，复杂度 O(V+E)，不使用递归，
+依赖链深度不受 Python 递归深度限制。不在任务列表中的依赖视为外部依赖，忽略。
+
+CachedDependencyAnalyzer 按任务图指纹缓存分析结果（LRU），图未变化时重复查询不再重算。
 """
 
-from typing import Dict, List, Set, Tuple, Optional
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Set, Tuple, Optional
 from .models import Task, TaskStatus
 
 
+# CachedDependencyAnalyzer 默认缓存的结果数
+DEFAULT_CACHE_SIZE = 128
+
+
+class _TaskGraph:
+    """任务依赖图的整数下标表示
+
+    ids[i] / tasks[i] 为第 i 个任务，preds[i] / succs[i] 为其前驱（依赖）/ 后继（依赖它的任务）下标。
+    重复的任务ID以最后一次出现为准，重复的依赖只保留一次。
+    """
+
+    __slots__ = ("ids", "tasks", "index", "preds", "succs")
+
+    def __init__(self, tasks: List[Task]):
+        task_dict = {task.id: task for task in tasks}
+        self.ids = list(task_dict)
+        self.tasks = list(task_dict.values())
+        self.index = {task_id: i for i, task_id in enumerate(self.ids)}
+        index = self.index
+        self.preds: List[List[int]] = [
+            [index[dep_id] for dep_id in dict.fromkeys(task.depends_on) if dep_id in index]
+            for task in self.tasks
+        ]
+        self.succs: List[List[int]] = [[] for _ in self.ids]
+        for i, preds in enumerate(self.preds):
+            for j in preds:
+                self.succs[j].append(i)
+
+    def topological_order(self) -> Optional[List[int]]:
+        """Kahn 算法，存在循环依赖时返回 None"""
+        in_degree = [len(p) for p in self.preds]
+        order = [i for i, d in enumerate(in_degree) if d == 0]
+        succs = self.succs
+        head = 0
+        while head < len(order):
+            for j in succs[order[head]]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    order.append(j)
+            head += 1
+        return order if len(order) == len(self.ids) else None
+
+    def acyclic_order(self) -> List[int]:
+        """拓扑序，存在循环依赖时抛出 ValueError"""
+        order = self.topological_order()
+        if order is None:
+            raise ValueError("Circular dependency detected")
+        return order
+
+
 class DependencyAnalyzer:
     """依赖分析器 - 分析任务依赖关系
     
@@ -31,37 +88,7 @@ class DependencyAnalyzer:
         Returns:
             是否存在循环依赖
         """
-        # 构建任务图
-        task_dict = {task.id: task for task in tasks}
-        
-        # DFS 检测循环
-        visited = set()
-        rec_stack = set()
-        
-        def has_cycle_dfs(task_id: str) -> bool:
-            visited.add(task_id)
-            rec_stack.add(task_id)
-            
-            task = task_dict.get(task_id)
-            if task is None:
-                return False
-            
-            for dep_id in task.depends_on:
-                if dep_id not in visited:
-                    if has_cycle_dfs(dep_id):
-                        return True
-                elif dep_id in rec_stack:
-                    return True
-            
-            rec_stack.remove(task_id)
-            return False
-        
-        for task in tasks:
-            if task.id not in visited:
-                if has_cycle_dfs(task.id):
-                    return True
-        
-        return False
+        return _TaskGraph(tasks).topological_order() is None
     
     def get_topological_order(self, tasks: List[Task]) -> Optional[List[str]]:
         """获取任务的拓扑排序
@@ -72,107 +99,47 @@ class DependencyAnalyzer:
         Returns:
             拓扑排序后的任务ID列表，如果有循环依赖返回None
         """
-        if self.has_cycle(tasks):
+        graph = _TaskGraph(tasks)
+        order = graph.topological_order()
+        if order is None:
             return None
-        
-        # 构建任务图
-        task_dict = {task.id: task for task in tasks}
-        
-        # 计算入度
-        in_degree = {}
-        for task in tasks:
-            in_degree[task.id] = len(task.depends_on)
-        
-        # 拓扑排序（Kahn算法）
-        queue = [task_id for task_id in in_degree if in_degree[task_id] == 0]
-        result = []
-        
-        while queue:
-            task_id = queue.pop(0)
-            result.append(task_id)
-            
-            # 检查依赖此任务的其他任务
-            for other in tasks:
-                if task_id in other.depends_on:
-                    in_degree[other.id] -= 1
-                    if in_degree[other.id] == 0:
-                        queue.append(other.id)
-        
-        return result if len(result) == len(tasks) else None
+        return [graph.ids[i] for i in order]
     
     def get_critical_path(self, tasks: List[Task]) -> List[str]:
-        """计算关键路径
+        """计算关键路径（预估工时之和最大的依赖链）
         
         Args:
             tasks: 任务列表
             
         Returns:
-            关键路径上的任务ID列表
-        """
-        # 构建任务图
-        task_dict = {task.id: task for task in tasks}
-        
-        # 计算每个任务的最长路径
-        memo = {}
-        
-        def longest_path(task_id: str) -> float:
-            if task_id in memo:
-                return memo[task_id]
-            
-            task = task_dict.get(task_id)
-            if task is None:
-                return 0
-            
-            max_dep_time = 0
-            for dep_id in task.depends_on:
-                dep_task = task_dict.get(dep_id)
-                if dep_task:
-                    max_dep_time = max(max_dep_time, longest_path(dep_id) + dep_task.estimated_hours)
+            关键路径上的任务ID列表（从起点到终点）
             
-            memo[task_id] = max(task.estimated_hours, max_dep_time)
-            return memo[task_id]
-        
-        # 找出端点任务
-        all_ids = set(task_dict.keys())
-        dep_ids = set()
-        for task in tasks:
-            dep_ids.update(task.depends_on)
-        
-        end_tasks = all_ids - dep_ids
-        
-        # 找出最长的关键路径
-        max_path_length = 0
-        critical_task = None
-        
-        for task_id in end_tasks:
-            path_length = longest_path(task_id)
-            if path_length > max_path_length:
-                max_path_length = path_length
-                critical_task = task_id
-        
-        # 反向追踪关键路径
-        if critical_task is None:
+        Raises:
+            ValueError: 存在循环依赖
+        """
+        graph = _TaskGraph(tasks)
+        if not graph.ids:
             return []
-        
+        hours = [task.estimated_hours for task in graph.tasks]
+        
+        # 按拓扑序计算每个任务的最早完成时间，并记录取得最大值的前驱
+        finish = [0.0] * len(graph.ids)
+        best_pred = [-1] * len(graph.ids)
+        for i in graph.acyclic_order():
+            start = 0.0
+            for j in graph.preds[i]:
+                if best_pred[i] < 0 or finish[j] > start:
+                    start = finish[j]
+                    best_pred[i] = j
+            finish[i] = start + hours[i]
+        
+        # 从完成时间最大的任务沿前驱回溯
+        current = max(range(len(finish)), key=finish.__getitem__)
         critical_path = []
-        current = critical_task
-        
-        while current:
-            critical_path.insert(0, current)
-            task = task_dict.get(current)
-            
-            # 找出依赖链中时间最长的
-            next_task = None
-            max_time = 0
-            
-            for dep_id in task.depends_on if task else []:
-                dep_task = task_dict.get(dep_id)
-                if dep_task and dep_task.estimated_hours > max_time:
-                    max_time = dep_task.estimated_hours
-                    next_task = dep_id
-            
-            current = next_task
-        
+        while current >= 0:
+            critical_path.append(graph.ids[current])
+            current = best_pred[current]
+        critical_path.reverse()
         return critical_path
     
     def get_executable_tasks(self, tasks: List[Task], completed_tasks: Set[str]) -> List[str]:
@@ -217,25 +184,24 @@ class DependencyAnalyzer:
             target_task_id: 目标任务ID
             
         Returns:
-            阻塞该任务的关键任务列表
+            阻塞该任务的关键任务列表（全部未完成的直接或间接依赖，按距离由近到远）
         """
-        task_dict = {task.id: task for task in tasks}
+        graph = _TaskGraph(tasks)
+        target = graph.index.get(target_task_id)
+        if target is None:
+            return []
+        # BFS 求祖先闭包，每个任务只访问一次
+        visited = {target}
+        queue = deque([target])
         blocking = []
-        
-        def find_blocking(task_id: str):
-            task = task_dict.get(task_id)
-            if task is None:
-                return
-            
-            for dep_id in task.depends_on:
-                dep_task = task_dict.get(dep_id)
-                if dep_task:
-                    if dep_task.status not in [TaskStatus.COMPLETED]:
-                        blocking.append(dep_id)
-                    find_blocking(dep_id)
-        
-        find_blocking(target_task_id)
-        return list(set(blocking))  # 去重
+        while queue:
+            for j in graph.preds[queue.popleft()]:
+                if j not in visited:
+                    visited.add(j)
+                    queue.append(j)
+                    if graph.tasks[j].status != TaskStatus.COMPLETED:
+                        blocking.append(graph.ids[j])
+        return blocking
     
     def get_parallelizable_groups(self, tasks: List[Task]) -> List[List[str]]:
         """识别可以并行执行的任务组
@@ -244,42 +210,23 @@ class DependencyAnalyzer:
             tasks: 任务列表
             
         Returns:
-            任务组列表，每组内的任务可以并行执行
-        """
-        task_dict = {task.id: task for task in tasks}
-        
-        # 按层级分组
-        levels = {}
-        
-        def get_level(task_id: str) -> int:
-            if task_id in levels:
-                return levels[task_id]
+            任务组列表，每组内的任务可以并行执行（组按层级排序，组内保持输入顺序）
             
-            task = task_dict.get(task_id)
-            if task is None:
-                return 0
-            
-            if not task.depends_on:
-                level = 0
-            else:
-                level = 1 + max(get_level(dep_id) for dep_id in task.depends_on)
-            
-            levels[task_id] = level
-            return level
-        
-        # 计算每个任务的层级
-        for task in tasks:
-            get_level(task.id)
-        
-        # 按层级分组
-        groups_dict = {}
-        for task_id, level in levels.items():
-            if level not in groups_dict:
-                groups_dict[level] = []
-            groups_dict[level].append(task_id)
-        
-        # 返回按层级排序的组
-        return [groups_dict[i] for i in sorted(groups_dict.keys())]
+        Raises:
+            ValueError: 存在循环依赖
+        """
+        graph = _TaskGraph(tasks)
+        # 层级 = 最长依赖链上的前驱数量
+        levels = [0] * len(graph.ids)
+        for i in graph.acyclic_order():
+            for j in graph.succs[i]:
+                if levels[i] + 1 > levels[j]:
+                    levels[j] = levels[i] + 1
+        
+        groups: List[List[str]] = [[] for _ in range(max(levels, default=-1) + 1)]
+        for i, level in enumerate(levels):
+            groups[level].append(graph.ids[i])
+        return groups
     
     def estimate_total_time(self, tasks: List[Task]) -> float:
         """估计完成所有任务的总时间
@@ -306,3 +253,146 @@ class DependencyAnalyzer:
                 total_time += task.estimated_hours
         
         return total_time
+
+
+class CachedDependencyAnalyzer(DependencyAnalyzer):
+    """带 LRU 结果缓存的依赖分析器
+
+    缓存键为 (方法, 图指纹, 额外参数)。图指纹默认由每个任务的
+    (ID, 依赖, 预估工时, 状态) 计算，代价为一次 O(V+E) 哈希，远低于重建依赖图；
+    调用方持有任务版本号（如 StateManager 的任务版本）时可通过 version 参数直接作为指纹，
+    命中时为 O(1)。version 必须在任务的上述字段变化时随之变化。
+
+    返回值为缓存结果的副本，调用方修改不会影响缓存；循环依赖引发的 ValueError 同样被缓存。
+
+    用法:
+        analyzer = CachedDependencyAnalyzer(maxsize=64)
+        analyzer.get_critical_path(tasks)                  # 计算并缓存
+        analyzer.get_critical_path(tasks)                  # 命中
+        analyzer.get_critical_path(tasks, version=42)      # 按版本号缓存
+        analyzer.cache_info()                              # 命中/未命中统计
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        """初始化
+
+        Args:
+            maxsize: 最多缓存的结果数，超出时淘汰最久未使用的结果
+
+        Raises:
+            ValueError: maxsize 不是正数
+        """
+        super().__init__()
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive: {maxsize}")
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple, Tuple[Any, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(tasks: List[Task]) -> int:
+        """任务图指纹：任务ID、依赖、预估工时或状态变化时改变（与任务顺序有关）"""
+        return hash(tuple(
+            (task.id, tuple(task.depends_on), task.estimated_hours, getattr(task.status, "value", task.status))
+            for task in tasks
+        ))
+
+    def cache_info(self) -> Dict[str, Any]:
+        """缓存统计
+
+        Returns:
+            {"hits", "misses", "evictions", "size", "maxsize", "hit_rate"}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def cache_clear(self) -> None:
+        """清空缓存和统计"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _cached(self, method: str, tasks: List[Task], version: Optional[Hashable],
+                extra: Hashable, compute: Callable[[], Any]) -> Any:
+        """查找缓存，未命中时计算并缓存（包括 ValueError）"""
+        graph_key = ("version", version) if version is not None else ("hash", self.fingerprint(tasks))
+        key = (method, graph_key, extra)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            try:
+                entry = (compute(), None)
+            except ValueError as e:
+                entry = (None, str(e))
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+
+        result, error = entry
+        if error is not None:
+            raise ValueError(error)
+        return result
+
+    def has_cycle(self, tasks: List[Task], version: Optional[Hashable] = None) -> bool:
+        return self._cached("has_cycle", tasks, version, None, lambda: DependencyAnalyzer.has_cycle(self, tasks))
+
+    def get_topological_order(self, tasks: List[Task], version: Optional[Hashable] = None) -> Optional[List[str]]:
+        order = self._cached(
+            "topological_order", tasks, version, None,
+            lambda: DependencyAnalyzer.get_topological_order(self, tasks)
+        )
+        return list(order) if order is not None else None
+
+    def get_critical_path(self, tasks: List[Task], version: Optional[Hashable] = None) -> List[str]:
+        return list(self._cached(
+            "critical_path", tasks, version, None,
+            lambda: DependencyAnalyzer.get_critical_path(self, tasks)
+        ))
+
+    def get_executable_tasks(self, tasks: List[Task], completed_tasks: Set[str],
+                             version: Optional[Hashable] = None) -> List[str]:
+        return list(self._cached(
+            "executable_tasks", tasks, version, frozenset(completed_tasks),
+            lambda: DependencyAnalyzer.get_executable_tasks(self, tasks, completed_tasks)
+        ))
+
+    def identify_blocking_tasks(self, tasks: List[Task], target_task_id: str,
+                                version: Optional[Hashable] = None) -> List[str]:
+        return list(self._cached(
+            "blocking_tasks", tasks, version, target_task_id,
+            lambda: DependencyAnalyzer.identify_blocking_tasks(self, tasks, target_task_id)
+        ))
+
+    def get_parallelizable_groups(self, tasks: List[Task], version: Optional[Hashable] = None) -> List[List[str]]:
+        groups = self._cached(
+            "parallelizable_groups", tasks, version, None,
+            lambda: DependencyAnalyzer.get_parallelizable_groups(self, tasks)
+        )
+        return [list(group) for group in groups]
+
+    def estimate_total_time(self, tasks: List[Task], version: Optional[Hashable] = None) -> float:
+        def compute() -> float:
+            if not tasks:
+                return 0
+            hours = {task.id: task.estimated_hours for task in tasks}
+            return sum(hours[task_id] for task_id in self.get_critical_path(tasks, version))
+
+        return self._cached("total_time", tasks, version, None, compute)
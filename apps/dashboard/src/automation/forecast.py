@@ -0,0 +1,248 @@
+"""
+蒙特卡洛交付预测
+
+DependencyAnalyzer.estimate_total_time 把 estimated_hours 当作精确值；
+ScheduleForecaster 把每个任务的实际工时视为随机变量，给出完成时间的置信区间:
+- 按复杂度校准时长分布：已完成任务的 actual_hours / estimated_hours 取对数，
+  拟合对数正态分布（样本不足时先退回全部复杂度合并的样本，再退回默认分布）
+- 一次抽样数千次试验的时长矩阵（任务 × 试验），按拓扑序逐任务传播最早完成时间，
+  每个任务的计算对全部试验向量化
+- 输出 P50/P80/P95 完成时间，以及每个任务的关键度（落在关键路径上的试验比例）
+
+与关键路径一致，不考虑 Worker 数量限制（资源无限的下界）；已完成任务时长为 0，
+执行中的任务按完整时长计。需要安装 NumPy。
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖
+    np = None
+
+from .dependency_analyzer import CachedDependencyAnalyzer, _TaskGraph
+from .models import Task, TaskStatus
+
+
+DEFAULT_TRIALS = 2000
+PERCENTILES = (50, 80, 95)
+
+# 校准所需的最少样本数
+MIN_CALIBRATION_SAMPLES = 5
+
+# 无历史数据时的默认分布：实际/预估 ~ LogNormal(0, sigma)
+DEFAULT_SIGMA = {"low": 0.25, "medium": 0.4, "high": 0.6}
+FALLBACK_SIGMA = 0.4
+
+# 每批试验的矩阵元素上限（任务数 × 试验数），控制内存
+CHUNK_ELEMENTS = 2_000_000
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status)
+
+
+class ScheduleForecaster:
+    """蒙特卡洛交付预测器
+
+    用法:
+        forecaster = ScheduleForecaster(trials=2000, seed=42)
+        forecaster.calibrate(history)      # 可选，默认用 forecast 的任务列表校准
+        result = forecaster.forecast(tasks)
+    """
+
+    def __init__(self, trials: int = DEFAULT_TRIALS, seed: Optional[int] = None,
+                 analyzer: Optional[CachedDependencyAnalyzer] = None):
+        """初始化预测器
+
+        Args:
+            trials: 试验次数
+            seed: 随机种子（相同种子和输入的结果可复现）
+            analyzer: 计算确定性工时的依赖分析器（跨预测共享时按任务版本号复用结果）
+
+        Raises:
+            ImportError: 未安装 NumPy
+            ValueError: 试验次数不是正数
+        """
+        if np is None:
+            raise ImportError("ScheduleForecaster requires numpy")
+        if trials <= 0:
+            raise ValueError(f"trials must be positive: {trials}")
+        self.trials = trials
+        self.seed = seed
+        self.analyzer = analyzer or CachedDependencyAnalyzer()
+        # 复杂度 -> (mu, sigma, 样本数)
+        self.distributions: Dict[str, Tuple[float, float, int]] = {}
+        self.pooled: Optional[Tuple[float, float, int]] = None
+
+    def calibrate(self, history: Sequence[Task]) -> Dict[str, Dict[str, Any]]:
+        """用已完成任务的实际工时校准各复杂度的时长分布
+
+        Args:
+            history: 任务列表（只使用已完成且预估、实际工时都大于 0 的任务）
+
+        Returns:
+            各复杂度的校准结果 {complexity: {"mu", "sigma", "samples", "source"}}
+        """
+        ratios: Dict[str, List[float]] = {}
+        for task in history:
+            if _status_value(task.status) != TaskStatus.COMPLETED.value:
+                continue
+            if not (task.actual_hours or 0) > 0 or not (task.estimated_hours or 0) > 0:
+                continue
+            ratios.setdefault(task.complexity, []).append(task.actual_hours / task.estimated_hours)
+
+        def fit(samples: List[float]) -> Tuple[float, float, int]:
+            logs = np.log(np.asarray(samples))
+            return float(logs.mean()), float(logs.std(ddof=1)), len(samples)
+
+        self.distributions = {
+            complexity: fit(samples)
+            for complexity, samples in ratios.items() if len(samples) >= MIN_CALIBRATION_SAMPLES
+        }
+        pooled = [r for samples in ratios.values() for r in samples]
+        self.pooled = fit(pooled) if len(pooled) >= MIN_CALIBRATION_SAMPLES else None
+        return {c: self.describe(c) for c in sorted(set(DEFAULT_SIGMA) | set(ratios))}
+
+    def distribution(self, complexity: str) -> Tuple[float, float]:
+        """复杂度对应的 (mu, sigma)：实际/预估 ~ LogNormal(mu, sigma)"""
+        params = self.distributions.get(complexity) or self.pooled
+        if params is not None:
+            return params[0], params[1]
+        return 0.0, DEFAULT_SIGMA.get(complexity, FALLBACK_SIGMA)
+
+    def describe(self, complexity: str) -> Dict[str, Any]:
+        """复杂度的分布参数及来源（calibrated / pooled / default）"""
+        mu, sigma = self.distribution(complexity)
+        if complexity in self.distributions:
+            source, samples = "calibrated", self.distributions[complexity][2]
+        elif self.pooled is not None:
+            source, samples = "pooled", self.pooled[2]
+        else:
+            source, samples = "default", 0
+        return {"mu": round(mu, 4), "sigma": round(sigma, 4), "samples": samples, "source": source}
+
+    def forecast(self, tasks: Sequence[Task], start: Optional[datetime] = None,
+                 top: int = 20, version: Optional[Hashable] = None) -> Dict[str, Any]:
+        """预测全部任务的完成时间
+
+        Args:
+            tasks: 任务列表（未校准时先用它校准）
+            start: 起算时间，默认当前时间
+            top: 返回关键度最高的任务数
+            version: 任务版本号（如 StateManager.get_task_version()），
+                     指定时确定性工时按版本号缓存，任务未变化时不再重算
+
+        Returns:
+            {"trials", "tasks", "remaining", "deterministic_hours", "mean_hours",
+             "percentiles": {"p50": 小时, ...}, "completion_dates": {"p50": ISO 时间, ...},
+             "criticality": [{"task_id", "title", "index"}], "calibration": {...}}
+
+        Raises:
+            ValueError: 存在循环依赖
+        """
+        if not self.distributions and self.pooled is None:
+            self.calibrate(tasks)
+        start = start or datetime.now()
+
+        graph = _TaskGraph(tasks)
+        order = graph.acyclic_order()
+        n = len(graph.ids)
+        remaining = [
+            i for i, task in enumerate(graph.tasks)
+            if _status_value(task.status) != TaskStatus.COMPLETED.value
+        ]
+        complexities = sorted({graph.tasks[i].complexity for i in remaining})
+        result = {
+            "trials": self.trials,
+            "seed": self.seed,
+            "tasks": n,
+            "remaining": len(remaining),
+            "deterministic_hours": round(
+                self.analyzer.estimate_total_time(
+                    [graph.tasks[i] for i in remaining],
+                    version=("forecast", version) if version is not None else None
+                ), 2
+            ),
+            "calibration": {c: self.describe(c) for c in complexities}
+        }
+
+        makespan, critical_counts = self._simulate(graph, order, remaining)
+        quantiles = np.percentile(makespan, PERCENTILES)
+        result["mean_hours"] = round(float(makespan.mean()), 2)
+        result["percentiles"] = {f"p{p}": round(float(q), 2) for p, q in zip(PERCENTILES, quantiles)}
+        result["completion_dates"] = {
+            f"p{p}": (start + timedelta(hours=float(q))).isoformat(timespec="minutes")
+            for p, q in zip(PERCENTILES, quantiles)
+        }
+        criticality = critical_counts / self.trials
+        ranked = [i for i in np.argsort(-criticality, kind="stable")[:top] if criticality[i] > 0]
+        result["criticality"] = [
+            {"task_id": graph.ids[i], "title": graph.tasks[i].title, "index": round(float(criticality[i]), 4)}
+            for i in ranked
+        ]
+        return result
+
+    def _sample_durations(self, graph: _TaskGraph, remaining: List[int], rng, trials: int):
+        """抽样时长矩阵（任务 × 试验），已完成任务为 0"""
+        durations = np.zeros((len(graph.ids), trials))
+        by_complexity: Dict[str, List[int]] = {}
+        for i in remaining:
+            by_complexity.setdefault(graph.tasks[i].complexity, []).append(i)
+        for complexity, rows in by_complexity.items():
+            mu, sigma = self.distribution(complexity)
+            estimates = np.array([graph.tasks[i].estimated_hours or 0.0 for i in rows])
+            factors = rng.lognormal(mu, sigma, size=(len(rows), trials))
+            durations[rows] = estimates[:, None] * factors
+        return durations
+
+    def _simulate(self, graph: _TaskGraph, order: List[int], remaining: List[int]):
+        """分批执行试验，返回每次试验的完成时间和每个任务落在关键路径上的次数"""
+        n = len(graph.ids)
+        rng = np.random.default_rng(self.seed)
+        makespan = np.empty(self.trials)
+        critical_counts = np.zeros(n, dtype=np.int64)
+        if n == 0:
+            makespan.fill(0.0)
+            return makespan, critical_counts
+
+        preds = [np.array(p, dtype=np.int64) for p in graph.preds]
+        chunk = max(1, min(self.trials, CHUNK_ELEMENTS // n))
+        for offset in range(0, self.trials, chunk):
+            trials = min(chunk, self.trials - offset)
+            columns = np.arange(trials)
+            finish = self._sample_durations(graph, remaining, rng, trials)
+            # 每个任务在每次试验中最晚完成的前驱（-1 表示无前驱）
+            best_pred = np.full((n, trials), -1, dtype=np.int64)
+            for i in order:
+                p = preds[i]
+                if len(p) == 1:
+                    finish[i] += finish[p[0]]
+                    best_pred[i] = p[0]
+                elif len(p) > 1:
+                    candidates = finish[p]
+                    k = candidates.argmax(axis=0)
+                    finish[i] += candidates[k, columns]
+                    best_pred[i] = p[k]
+
+            # 从完成最晚的任务沿最晚前驱回溯关键路径
+            current = finish.argmax(axis=0)
+            makespan[offset:offset + trials] = finish[current, columns]
+            active = np.ones(trials, dtype=bool)
+            while active.any():
+                np.add.at(critical_counts, current[active], 1)
+                current = np.where(active, best_pred[current, columns], -1)
+                active = current >= 0
+        # 已完成任务时长为 0，不计关键度
+        done = np.ones(n, dtype=bool)
+        done[remaining] = False
+        critical_counts[done] = 0
+        return makespan, critical_counts
+
+
+def forecast_tasks(tasks: Sequence[Task], trials: int = DEFAULT_TRIALS,
+                   seed: Optional[int] = None, analyzer: Optional[CachedDependencyAnalyzer] = None,
+                   **kwargs) -> Dict[str, Any]:
+    """用任务列表自身的历史校准并预测完成时间（见 ScheduleForecaster.forecast）"""
+    return ScheduleForecaster(trials=trials, seed=seed, analyzer=analyzer).forecast(tasks, **kwargs)
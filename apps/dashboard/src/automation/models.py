@@ -10,6 +10,10 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict
 
 
+# 默认分片（任务和 Worker 按分片划分，每个分片由各自的主调度器调度）
+DEFAULT_SHARD = "default"
+
+
 class TaskStatus(str, Enum):
     """任务状态枚举
     
@@ -73,6 +77,7 @@ class Task(BaseModel):
     estimated_hours: float = Field(default=1.0, description="预估工时（小时）")
     actual_hours: Optional[float] = Field(default=None, description="实际工时（小时）")
     complexity: str = Field(default="medium", description="复杂度：low/medium/high")
+    project_id: Optional[str] = Field(default=None, description="所属项目，同时是调度分片（为空时属于默认分片）")
     
     # 审查信息
     revision_count: int = Field(default=0, description="修订次数")
@@ -0,0 +1,302 @@
+"""
+资源受限的列表调度计划
+
+get_parallelizable_groups 假设 Worker 无限；ListSchedulingPlanner 在给定 Worker
+容量（槽位数）下生成具体的分时分配计划:
+- 优先级：关键路径优先，即任务到终点的最长剩余工时（b-level，含自身工时）
+- 列表调度：虚拟时钟按任务结束推进，每个时刻按优先级依次把就绪任务放到
+  放得下它的 Worker 上（best-fit：空闲槽位最少但足够的 Worker），
+  放不下的大任务不阻塞后面的小任务（回填）
+- 可选局部搜索：前向-后向改进（forward-backward improvement），用上一轮计划的
+  完成时间作为优先级在反向图上排一次，再用反向计划的时间排回正向，
+  makespan 不再缩短时停止
+
+任务按复杂度占用槽位，规则与 ReadyQueue 相同（超过 Worker 容量时独占该 Worker）。
+时长取 estimated_hours；不在任务列表中的依赖视为已满足。
+"""
+
+import heapq
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .dependency_analyzer import _TaskGraph
+from .models import Task
+from .ready_queue import DEFAULT_PRIORITY_RANK, PRIORITY_RANK, task_slots
+
+
+DEFAULT_REFINE_ITERATIONS = 10
+
+
+@dataclass
+class PlannedTask:
+    """计划中的一次分配"""
+    task_id: str
+    worker_id: str
+    start: float
+    finish: float
+    slots: int
+
+
+@dataclass
+class SchedulePlan:
+    """分时分配计划（时间单位：小时，从 0 开始）"""
+    entries: List[PlannedTask]
+    makespan: float
+    lower_bound: float          # max(关键路径, 最少槽位工作量 / 总槽位)
+    iterations: int = 0         # 局部搜索实际执行的轮数
+    improvement: float = 0.0    # 局部搜索缩短的 makespan
+    workers: Dict[str, int] = field(default_factory=dict)
+
+    def ranks(self) -> Dict[str, float]:
+        """任务 -> 计划开始时间（TaskScheduler.follow_plan 按此顺序分配）"""
+        return {entry.task_id: entry.start for entry in self.entries}
+
+    def by_worker(self) -> Dict[str, List[PlannedTask]]:
+        """按 Worker 分组、按开始时间排序的分配"""
+        result: Dict[str, List[PlannedTask]] = {worker_id: [] for worker_id in self.workers}
+        for entry in self.entries:
+            result[entry.worker_id].append(entry)
+        return result
+
+    def utilization(self) -> float:
+        """槽位利用率：占用的槽位时间 / (总槽位 × makespan)"""
+        total = sum(self.workers.values()) * self.makespan
+        return sum((e.finish - e.start) * e.slots for e in self.entries) / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "makespan": round(self.makespan, 4),
+            "lower_bound": round(self.lower_bound, 4),
+            "utilization": round(self.utilization(), 4),
+            "iterations": self.iterations,
+            "improvement": round(self.improvement, 4),
+            "workers": dict(self.workers),
+            "entries": [asdict(entry) for entry in self.entries]
+        }
+
+
+class ListSchedulingPlanner:
+    """关键路径优先的列表调度器
+
+    用法:
+        planner = ListSchedulingPlanner({"worker-1": 2, "worker-2": 1})
+        plan = planner.plan(tasks, refine=True)
+    """
+
+    def __init__(self, workers: Dict[str, int]):
+        """初始化
+
+        Args:
+            workers: Worker ID -> 槽位数
+
+        Raises:
+            ValueError: 没有 Worker 或容量不是正整数
+        """
+        if not workers:
+            raise ValueError("At least one worker is required")
+        for worker_id, capacity in workers.items():
+            if capacity < 1:
+                raise ValueError(f"Invalid worker capacity: {worker_id}={capacity}")
+        self.worker_ids = list(workers)
+        self.capacities = [workers[w] for w in self.worker_ids]
+
+    def plan(
+        self,
+        tasks: Sequence[Task],
+        pinned: Optional[Dict[str, str]] = None,
+        refine: bool = False,
+        max_iterations: int = DEFAULT_REFINE_ITERATIONS,
+        time_budget: Optional[float] = None
+    ) -> SchedulePlan:
+        """生成分配计划
+
+        Args:
+            tasks: 待执行的任务（已完成的任务不要传入）
+            pinned: 已在执行的任务 -> Worker，固定在时刻 0 开始
+            refine: 是否执行前向-后向改进
+            max_iterations: 局部搜索最多轮数
+            time_budget: 局部搜索的时间预算（秒）
+
+        Returns:
+            SchedulePlan
+
+        Raises:
+            ValueError: 存在循环依赖，或 pinned 引用了未知的 Worker
+        """
+        graph = _TaskGraph(tasks)
+        order = graph.acyclic_order()
+        n = len(graph.ids)
+        durations = [float(task.estimated_hours or 0.0) for task in graph.tasks]
+        max_capacity = max(self.capacities)
+        slots = [min(task_slots(task.complexity), max_capacity) for task in graph.tasks]
+        worker_index = {w: i for i, w in enumerate(self.worker_ids)}
+        pins = {}
+        for task_id, worker_id in (pinned or {}).items():
+            if worker_id not in worker_index:
+                raise ValueError(f"Unknown worker for pinned task {task_id}: {worker_id}")
+            if task_id in graph.index:
+                pins[graph.index[task_id]] = worker_index[worker_id]
+
+        # b-level：到终点的最长剩余工时（含自身）
+        b_level = [0.0] * n
+        for i in reversed(order):
+            b_level[i] = durations[i] + max((b_level[j] for j in graph.succs[i]), default=0.0)
+        tie = [
+            PRIORITY_RANK.get(getattr(task.priority, "value", task.priority), DEFAULT_PRIORITY_RANK)
+            for task in graph.tasks
+        ]
+        keys = [(-b_level[i], tie[i], i) for i in range(n)]
+
+        start, finish, assigned = self._schedule(graph.preds, graph.succs, durations, slots, keys, pins)
+        best = (max(finish, default=0.0), start, finish, assigned)
+        initial = best[0]
+
+        iterations = 0
+        if refine and n:
+            deadline = time.perf_counter() + time_budget if time_budget is not None else None
+            while iterations < max_iterations and (deadline is None or time.perf_counter() < deadline):
+                iterations += 1
+                # 反向：完成越晚的任务越先排（反向图上 succs 为前驱）
+                _, back_finish, _ = self._schedule(
+                    graph.succs, graph.preds, durations, slots,
+                    [(-best[2][i], i) for i in range(n)], {}
+                )
+                # 正向：反向计划中完成越晚（即正向越早开始）的任务越先排
+                start, finish, assigned = self._schedule(
+                    graph.preds, graph.succs, durations, slots,
+                    [(-back_finish[i], i) for i in range(n)], pins
+                )
+                makespan = max(finish)
+                if makespan >= best[0] - 1e-9:
+                    break
+                best = (makespan, start, finish, assigned)
+
+        makespan, start, finish, assigned = best
+        entries = sorted(
+            (PlannedTask(graph.ids[i], self.worker_ids[assigned[i]], start[i], finish[i],
+                         min(slots[i], self.capacities[assigned[i]]))
+             for i in range(n)),
+            key=lambda e: (e.start, e.finish, e.task_id)
+        )
+        # 工作量下界按任务可能占用的最少槽位计（放在小容量 Worker 上时按容量计）
+        min_capacity = min(self.capacities)
+        lower_bound = max(
+            max(b_level, default=0.0),
+            sum(durations[i] * min(slots[i], min_capacity) for i in range(n)) / sum(self.capacities)
+        )
+        return SchedulePlan(
+            entries=entries,
+            makespan=makespan,
+            lower_bound=lower_bound,
+            iterations=iterations,
+            improvement=initial - makespan,
+            workers=dict(zip(self.worker_ids, self.capacities))
+        )
+
+    def _schedule(
+        self,
+        preds: List[List[int]],
+        succs: List[List[int]],
+        durations: List[float],
+        slots: List[int],
+        keys: List[Tuple],
+        pins: Dict[int, int]
+    ) -> Tuple[List[float], List[float], List[int]]:
+        """一次列表调度，返回每个任务的 (开始时间, 完成时间, Worker 下标)"""
+        n = len(durations)
+        capacities = self.capacities
+        free = list(capacities)
+        # 空闲槽位数 -> Worker 下标（dict 作为有序集合）；完全空闲的 Worker 另按容量索引
+        buckets: Dict[int, Dict[int, None]] = {}
+        idle: Dict[int, Dict[int, None]] = {}
+        for w, capacity in enumerate(capacities):
+            buckets.setdefault(capacity, {})[w] = None
+            idle.setdefault(capacity, {})[w] = None
+        bucket_keys = sorted(set(capacities))
+        max_capacity = bucket_keys[-1]
+
+        def take(w: int, amount: int) -> None:
+            if free[w] == capacities[w]:
+                del idle[capacities[w]][w]
+            del buckets[free[w]][w]
+            free[w] -= amount
+            if free[w]:
+                buckets.setdefault(free[w], {})[w] = None
+
+        def give(w: int, amount: int) -> None:
+            if free[w]:
+                del buckets[free[w]][w]
+            free[w] += amount
+            buckets.setdefault(free[w], {})[w] = None
+            if free[w] == capacities[w]:
+                idle[capacities[w]][w] = None
+
+        def find_worker(need: int) -> Optional[int]:
+            # best-fit：空闲槽位足够且最少
+            for f in range(need, max_capacity + 1):
+                bucket = buckets.get(f)
+                if bucket:
+                    return next(iter(bucket))
+            # 容量小于任务槽位数的完全空闲 Worker（任务独占）
+            for capacity in range(need - 1, 0, -1):
+                bucket = idle.get(capacity)
+                if bucket:
+                    return next(iter(bucket))
+            return None
+
+        start = [0.0] * n
+        finish = [0.0] * n
+        assigned = [-1] * n
+        remaining = [len(p) for p in preds]
+        ready: Dict[int, List[Tuple]] = {}
+        running: List[Tuple[float, int]] = []
+
+        def launch(i: int, w: int, now: float) -> None:
+            used = min(slots[i], capacities[w])
+            take(w, used)
+            start[i] = now
+            finish[i] = now + durations[i]
+            assigned[i] = w
+            heapq.heappush(running, (finish[i], i))
+
+        for i, w in pins.items():
+            if free[w] < min(slots[i], capacities[w]):
+                continue  # 放不下的固定任务按普通任务排
+            launch(i, w, 0.0)
+        for i in range(n):
+            if remaining[i] == 0 and assigned[i] < 0:
+                heapq.heappush(ready.setdefault(slots[i], []), (keys[i], i))
+
+        now = 0.0
+        scheduled = len([i for i in range(n) if assigned[i] >= 0])
+        while scheduled < n or running:
+            # 按优先级依次放入放得下的就绪任务
+            while True:
+                best = None
+                for need, heap in ready.items():
+                    if heap and (best is None or heap[0] < ready[best][0]) and find_worker(need) is not None:
+                        best = need
+                if best is None:
+                    break
+                _, i = heapq.heappop(ready[best])
+                launch(i, find_worker(best), now)
+                scheduled += 1
+
+            if not running:
+                break
+            # 推进到下一个结束时刻
+            now = running[0][0]
+            while running and running[0][0] == now:
+                _, i = heapq.heappop(running)
+                give(assigned[i], min(slots[i], capacities[assigned[i]]))
+                for j in succs[i]:
+                    remaining[j] -= 1
+                    if remaining[j] == 0 and assigned[j] < 0:
+                        heapq.heappush(ready.setdefault(slots[j], []), (keys[j], j))
+        return start, finish, assigned
+
+
+def plan_tasks(tasks: Sequence[Task], workers: Dict[str, int], **kwargs) -> SchedulePlan:
+    """按 Worker 容量生成分配计划（见 ListSchedulingPlanner.plan）"""
+    return ListSchedulingPlanner(workers).plan(tasks, **kwargs)
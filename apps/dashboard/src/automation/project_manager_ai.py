@@ -253,7 +253,7 @@ class ProjectManagerAI:
         return tasks
     
     def create_tasks_in_board(self, tasks: List[Task]) -> bool:
-        """将任务创建到白板
+        """将任务创建到白板（单事务批量写入，全部成功或全部不写入）
         
         Args:
             tasks: 任务列表
@@ -261,12 +261,7 @@ class ProjectManagerAI:
         Returns:
             是否创建成功
         """
-        success_count = 0
-        for task in tasks:
-            if self.state_manager.create_task(task):
-                success_count += 1
-        
-        return success_count == len(tasks)
+        return self.state_manager.create_tasks(tasks)["success"]
     
     def execute_workflow(self, user_requirement: str) -> Dict[str, Any]:
         """执行完整的任务拆解工作流
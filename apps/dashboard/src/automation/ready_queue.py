@@ -0,0 +1,493 @@
+"""
+增量就绪队列
+
+维护调度所需的增量状态，任务状态变化时局部更新，不再每轮全量重算:
+- 每个任务未完成依赖计数（unmet）和反向依赖表（dependents）
+- 就绪任务堆：按 (优先级, -预估工时) 排序的待分配且依赖已满足的任务，
+  按任务占用的槽位数分堆；设置了计划顺序（set_ranks）时，计划内的任务按计划
+  开始时间排在其他任务之前
+- 可用 Worker 堆：按加权负载排序的有空闲槽位的 Worker
+
+Worker 有容量（槽位数）和权重，任务按复杂度占用槽位（high 占用更多），
+超过 Worker 容量时按容量计（独占该 Worker）。
+
+一次调度决策（取出一个就绪任务 + 负载最低且放得下的 Worker）为 O(log n)；
+一次状态变化的代价与该任务的依赖/被依赖数成正比。
+堆采用惰性删除：条目失效时不立即移除，出堆时校验。
+"""
+
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import TaskStatus
+
+
+# 优先级排序键（与原 schedule_tasks 一致：P0、P1 之外的优先级都排在最后）
+PRIORITY_RANK = {"P0": 0, "P1": 1}
+DEFAULT_PRIORITY_RANK = 2
+
+# 计划内任务的排序键首项（排在所有优先级之前）
+PLANNED_RANK = -1
+
+# 任务按复杂度占用的槽位数
+COMPLEXITY_SLOTS = {"low": 1, "medium": 1, "high": 2}
+DEFAULT_TASK_SLOTS = 1
+
+PENDING = TaskStatus.PENDING.value
+COMPLETED = TaskStatus.COMPLETED.value
+
+
+def task_slots(complexity: Optional[str]) -> int:
+    """任务按复杂度占用的槽位数
+
+    Args:
+        complexity: 复杂度（low/medium/high）
+
+    Returns:
+        槽位数
+    """
+    return COMPLEXITY_SLOTS.get(getattr(complexity, "value", complexity), DEFAULT_TASK_SLOTS)
+
+
+class _TaskState:
+    """就绪队列中单个任务的状态"""
+
+    __slots__ = ("status", "key", "slots", "depends_on", "unmet")
+
+    def __init__(self, status: str, key: Tuple[int, float], slots: int, depends_on: Set[str]):
+        self.status = status
+        self.key = key
+        self.slots = slots
+        self.depends_on = depends_on
+        self.unmet = 0
+
+
+class _WorkerState:
+    """就绪队列中单个 Worker 的容量状态"""
+
+    __slots__ = ("capacity", "weight", "used", "available")
+
+    def __init__(self, capacity: int, weight: float):
+        self.capacity = capacity
+        self.weight = weight
+        self.used = 0
+        self.available = True
+
+    @property
+    def load(self) -> float:
+        """加权负载：已用槽位 / (容量 × 权重)，权重越大越优先分配"""
+        return self.used / (self.capacity * self.weight)
+
+    def fit(self, slots: int) -> int:
+        """能放下任务时返回实际占用的槽位数，否则返回 0"""
+        slots = min(slots, self.capacity)
+        return slots if self.capacity - self.used >= slots else 0
+
+
+class ReadyQueue:
+    """增量就绪队列
+
+    通过 upsert_task / remove_task 同步任务状态变化，
+    通过 add_worker / remove_worker / release_slots 同步 Worker 容量，
+    pop_assignment 取出下一组 (任务, Worker, 占用槽位)。
+    """
+
+    def __init__(self):
+        """初始化空队列"""
+        self._tasks: Dict[str, _TaskState] = {}
+        # 反向依赖：dep_id -> 依赖它的任务ID集合（dep_id 可以是尚不存在的任务）
+        self._dependents: Dict[str, Set[str]] = {}
+        # 就绪堆（按任务槽位数分堆）条目：(优先级, -工时, 序号, task_id)
+        self._ready: Dict[int, List[Tuple[int, float, int, str]]] = {}
+        # 当前有效的就绪条目：task_id -> (序号, 排序键, 槽位数)，出堆时按序号校验
+        self._ready_entry: Dict[str, Tuple[int, Tuple[int, float], int]] = {}
+        self._ready_size = 0
+        # 计划顺序：task_id -> 计划开始时间
+        self._ranks: Dict[str, float] = {}
+        self._workers: Dict[str, _WorkerState] = {}
+        # 可用 Worker 堆条目：(加权负载, 序号, worker_id)
+        self._available: List[Tuple[float, int, str]] = []
+        self._available_entry: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+    # ========================================================================
+    # 任务状态
+    # ========================================================================
+
+    def upsert_task(
+        self,
+        task_id: str,
+        status: str,
+        priority: Optional[str] = None,
+        estimated_hours: Optional[float] = None,
+        depends_on: Iterable[str] = (),
+        complexity: Optional[str] = None
+    ) -> None:
+        """新增任务或应用任务的最新状态
+
+        Args:
+            task_id: 任务ID
+            status: 任务状态
+            priority: 优先级（P0/P1/P2）
+            estimated_hours: 预估工时
+            depends_on: 依赖的任务ID
+            complexity: 复杂度（决定占用的槽位数）
+        """
+        status = getattr(status, "value", status)
+        priority = getattr(priority, "value", priority)
+        key = (PRIORITY_RANK.get(priority, DEFAULT_PRIORITY_RANK), -(estimated_hours or 0.0))
+        slots = task_slots(complexity)
+        deps = set(depends_on)
+
+        state = self._tasks.get(task_id)
+        was_completed = state is not None and state.status == COMPLETED
+
+        if state is None:
+            state = _TaskState(status, key, slots, deps)
+            self._tasks[task_id] = state
+            self._link(task_id, deps)
+            state.unmet = self._count_unmet(deps)
+        else:
+            if deps != state.depends_on:
+                self._unlink(task_id, state.depends_on)
+                self._link(task_id, deps)
+                state.depends_on = deps
+                state.unmet = self._count_unmet(deps)
+            state.status = status
+            state.key = key
+            state.slots = slots
+
+        is_completed = status == COMPLETED
+        if is_completed != was_completed:
+            self._propagate(task_id, -1 if is_completed else 1)
+
+        self._refresh(task_id, state)
+
+    def set_status(self, task_id: str, status: str) -> None:
+        """只更新任务状态（优先级、工时、依赖不变），如分配成功后标记为执行中
+
+        Args:
+            task_id: 任务ID
+            status: 新状态
+        """
+        state = self._tasks.get(task_id)
+        if state is None:
+            return
+        status = getattr(status, "value", status)
+        was_completed = state.status == COMPLETED
+        state.status = status
+        if (status == COMPLETED) != was_completed:
+            self._propagate(task_id, -1 if status == COMPLETED else 1)
+        self._refresh(task_id, state)
+
+    def remove_task(self, task_id: str) -> None:
+        """删除任务（依赖它的任务视为依赖未满足）
+
+        Args:
+            task_id: 任务ID
+        """
+        state = self._tasks.pop(task_id, None)
+        if state is None:
+            return
+        self._unlink(task_id, state.depends_on)
+        self._ready_entry.pop(task_id, None)
+        if state.status == COMPLETED:
+            self._propagate(task_id, 1)
+
+    def set_ranks(self, ranks: Optional[Dict[str, float]]) -> None:
+        """设置计划顺序（如 SchedulePlan.ranks()），None 表示恢复按优先级排序
+
+        计划内的任务按 rank 升序排在计划外的任务之前；依赖和槽位约束不变。
+
+        Args:
+            ranks: task_id -> rank（越小越先分配）
+        """
+        self._ranks = dict(ranks or {})
+        for task_id, state in self._tasks.items():
+            self._refresh(task_id, state)
+
+    def clear_tasks(self) -> None:
+        """清空任务状态（保留 Worker 和计划顺序）"""
+        self._tasks.clear()
+        self._dependents.clear()
+        self._ready.clear()
+        self._ready_entry.clear()
+        self._ready_size = 0
+
+    def is_ready(self, task_id: str) -> bool:
+        """任务是否待分配且依赖全部完成"""
+        state = self._tasks.get(task_id)
+        return state is not None and state.status == PENDING and state.unmet == 0
+
+    def ready_count(self) -> int:
+        """就绪任务数"""
+        return len(self._ready_entry)
+
+    def _link(self, task_id: str, deps: Set[str]) -> None:
+        for dep_id in deps:
+            self._dependents.setdefault(dep_id, set()).add(task_id)
+
+    def _unlink(self, task_id: str, deps: Set[str]) -> None:
+        for dep_id in deps:
+            dependents = self._dependents.get(dep_id)
+            if dependents is not None:
+                dependents.discard(task_id)
+                if not dependents:
+                    del self._dependents[dep_id]
+
+    def _count_unmet(self, deps: Set[str]) -> int:
+        """未完成（或不存在）的依赖数"""
+        count = 0
+        for dep_id in deps:
+            dep = self._tasks.get(dep_id)
+            if dep is None or dep.status != COMPLETED:
+                count += 1
+        return count
+
+    def _propagate(self, task_id: str, delta: int) -> None:
+        """任务完成（delta=-1）或撤销完成（delta=+1）时更新依赖它的任务"""
+        for dependent_id in self._dependents.get(task_id, ()):
+            dependent = self._tasks.get(dependent_id)
+            if dependent is not None:
+                dependent.unmet += delta
+                self._refresh(dependent_id, dependent)
+
+    def _order_key(self, task_id: str, state: _TaskState) -> Tuple[int, float]:
+        """就绪堆排序键：计划内的任务按计划顺序，其余按 (优先级, -工时)"""
+        rank = self._ranks.get(task_id)
+        return state.key if rank is None else (PLANNED_RANK, rank)
+
+    def _refresh(self, task_id: str, state: _TaskState) -> None:
+        """按最新状态入堆或使旧条目失效"""
+        if state.status == PENDING and state.unmet == 0:
+            key = self._order_key(task_id, state) if self._ranks else state.key
+            entry = self._ready_entry.get(task_id)
+            if entry is not None and entry[1:] == (key, state.slots):
+                return
+            seq = next(self._seq)
+            self._ready_entry[task_id] = (seq, key, state.slots)
+            heapq.heappush(
+                self._ready.setdefault(state.slots, []),
+                (key[0], key[1], seq, task_id)
+            )
+            self._ready_size += 1
+            self._compact()
+        else:
+            self._ready_entry.pop(task_id, None)
+
+    def _compact(self) -> None:
+        """失效条目过多时重建就绪堆，避免长期运行时堆无限增长"""
+        if self._ready_size > 2 * len(self._ready_entry) + 1024:
+            self._ready = {}
+            for task_id, (seq, key, slots) in self._ready_entry.items():
+                self._ready.setdefault(slots, []).append((key[0], key[1], seq, task_id))
+            for heap in self._ready.values():
+                heapq.heapify(heap)
+            self._ready_size = len(self._ready_entry)
+
+    def _peek_ready(self, slots: int) -> Optional[Tuple[int, float, int, str]]:
+        """占用 slots 个槽位的就绪任务中优先级最高的条目（丢弃堆顶失效条目）"""
+        heap = self._ready.get(slots)
+        while heap:
+            entry = self._ready_entry.get(heap[0][3])
+            if entry is not None and entry[0] == heap[0][2]:
+                return heap[0]
+            heapq.heappop(heap)
+            self._ready_size -= 1
+        return None
+
+    def _push_ready(self, task_id: str) -> None:
+        """把取出但未能分配的任务放回"""
+        state = self._tasks.get(task_id)
+        if state is not None:
+            self._refresh(task_id, state)
+
+    # ========================================================================
+    # Worker 容量
+    # ========================================================================
+
+    def add_worker(self, worker_id: str, capacity: int = 1, weight: float = 1.0) -> None:
+        """注册 Worker 或更新其容量和权重（已占用槽位保持不变）
+
+        Args:
+            worker_id: Worker ID
+            capacity: 槽位数
+            weight: 权重（相同负载下权重大的 Worker 优先分配）
+
+        Raises:
+            ValueError: 容量或权重不是正数
+        """
+        if capacity < 1 or weight <= 0:
+            raise ValueError(f"Invalid worker capacity/weight: {capacity}/{weight}")
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            worker = self._workers[worker_id] = _WorkerState(capacity, weight)
+        else:
+            worker.capacity = capacity
+            worker.weight = weight
+        self._refresh_worker(worker_id, worker)
+
+    def remove_worker(self, worker_id: str) -> None:
+        """注销 Worker
+
+        Args:
+            worker_id: Worker ID
+        """
+        self._workers.pop(worker_id, None)
+        self._available_entry.pop(worker_id, None)
+
+    def set_worker_available(self, worker_id: str, available: bool) -> None:
+        """Worker 是否参与分配（不健康时暂停，槽位占用保持不变）
+
+        Args:
+            worker_id: Worker ID
+            available: 是否参与分配
+        """
+        worker = self._workers.get(worker_id)
+        if worker is not None and worker.available != available:
+            worker.available = available
+            self._refresh_worker(worker_id, worker)
+
+    def acquire_slots(self, worker_id: str, slots: int, force: bool = False) -> int:
+        """在指定 Worker 上占用槽位（手动分配、恢复已有分配时使用）
+
+        Args:
+            worker_id: Worker ID
+            slots: 任务的槽位数
+            force: 放不下时也占用（恢复其他调度器已做出的分配）
+
+        Returns:
+            实际占用的槽位数，放不下或 Worker 不存在时返回 0
+        """
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            return 0
+        used = slots if force else worker.fit(slots)
+        if used:
+            worker.used += used
+            self._refresh_worker(worker_id, worker)
+        return used
+
+    def release_slots(self, worker_id: str, slots: int) -> None:
+        """任务结束，释放 Worker 的槽位
+
+        Args:
+            worker_id: Worker ID
+            slots: acquire_slots / pop_assignment 返回的槽位数
+        """
+        worker = self._workers.get(worker_id)
+        if worker is not None:
+            worker.used = max(0, worker.used - slots)
+            self._refresh_worker(worker_id, worker)
+
+    def worker_load(self, worker_id: str) -> float:
+        """Worker 的加权负载（不存在时为 0）"""
+        worker = self._workers.get(worker_id)
+        return worker.load if worker is not None else 0.0
+
+    def worker_slots(self, worker_id: str) -> Tuple[int, int]:
+        """Worker 的 (已用槽位, 容量)"""
+        worker = self._workers.get(worker_id)
+        return (worker.used, worker.capacity) if worker is not None else (0, 0)
+
+    def idle_count(self) -> int:
+        """有空闲槽位且参与分配的 Worker 数"""
+        return len(self._available_entry)
+
+    def least_loaded_worker(self) -> Optional[str]:
+        """加权负载最低、有空闲槽位的 Worker（不取出）"""
+        while self._available:
+            _, seq, worker_id = self._available[0]
+            if self._available_entry.get(worker_id) == seq:
+                return worker_id
+            heapq.heappop(self._available)
+        return None
+
+    def _refresh_worker(self, worker_id: str, worker: _WorkerState) -> None:
+        """按最新负载入堆或使旧条目失效"""
+        if worker.available and worker.used < worker.capacity:
+            seq = next(self._seq)
+            self._available_entry[worker_id] = seq
+            heapq.heappush(self._available, (worker.load, seq, worker_id))
+            if len(self._available) > 2 * len(self._available_entry) + 1024:
+                self._available = [
+                    (self._workers[w].load, s, w) for w, s in self._available_entry.items()
+                ]
+                heapq.heapify(self._available)
+        else:
+            self._available_entry.pop(worker_id, None)
+
+    def _find_worker(self, slots: int) -> Optional[Tuple[str, int]]:
+        """加权负载最低且放得下任务的 Worker
+
+        依次检查堆顶，放不下的 Worker 暂存后放回；同容量的 Worker 中
+        负载最低者放不下时其余也放不下，通常只检查堆顶几个条目。
+        """
+        skipped = []
+        found = None
+        while self._available:
+            item = heapq.heappop(self._available)
+            if self._available_entry.get(item[2]) != item[1]:
+                continue
+            used = self._workers[item[2]].fit(slots)
+            if used:
+                found = (item[2], used)
+                break
+            skipped.append(item)
+        for item in skipped:
+            heapq.heappush(self._available, item)
+        return found
+
+    # ========================================================================
+    # 调度决策
+    # ========================================================================
+
+    def pop_assignment(self) -> Optional[Tuple[str, str, int]]:
+        """取出下一个分配：优先级最高且有 Worker 放得下的就绪任务，O(log n)
+
+        各槽位数的就绪堆按堆顶优先级依次尝试；高复杂度任务放不下时，
+        低复杂度任务可以先使用剩余槽位。调用方分配失败时应调用 release_assignment 放回。
+
+        Returns:
+            (task_id, worker_id, 占用槽位数)，没有可分配的组合时返回 None
+        """
+        if not self._ready_entry or not self._available_entry:
+            return None
+        heads = sorted(
+            head for head in (self._peek_ready(slots) for slots in list(self._ready))
+            if head is not None
+        )
+        for rank, neg_hours, seq, task_id in heads:
+            slots = self._ready_entry[task_id][2]
+            found = self._find_worker(slots)
+            if found is None:
+                continue
+            worker_id, used = found
+            heapq.heappop(self._ready[slots])
+            self._ready_size -= 1
+            del self._ready_entry[task_id]
+            worker = self._workers[worker_id]
+            worker.used += used
+            self._refresh_worker(worker_id, worker)
+            return task_id, worker_id, used
+        return None
+
+    def release_assignment(
+        self,
+        task_id: str,
+        worker_id: str,
+        slots: int,
+        task_available: bool = True
+    ) -> None:
+        """分配失败：释放 Worker 槽位，任务仍可分配时放回任务
+
+        Args:
+            task_id: 任务ID
+            worker_id: Worker ID
+            slots: pop_assignment 返回的槽位数
+            task_available: 任务是否仍可分配（False 表示已被其他调度器认领）
+        """
+        self.release_slots(worker_id, slots)
+        if task_available:
+            self._push_ready(task_id)
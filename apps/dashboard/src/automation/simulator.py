@@ -0,0 +1,284 @@
+"""
+调度离散事件模拟器
+
+在虚拟时钟上驱动真实的 TaskScheduler（临时 SQLite 数据库），用于上线前评估调度策略和吞吐:
+- 按规模和形状生成合成任务 DAG（分层 / 随机 / 多条链）
+- 模拟 Worker：容量、权重（速度），执行时长按预估工时乘对数正态噪声，按概率失败并重试
+- 输出 makespan、槽位利用率、排队等待分位数、调度器每次决策的 CPU 时间等，
+  结果为可序列化的字典，便于跟踪性能回归
+"""
+
+import heapq
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Task, TaskStatus
+from .state_manager import StateManager
+from .task_scheduler import TaskScheduler
+
+
+# 结果格式版本，字段变化时递增
+RESULT_SCHEMA_VERSION = 1
+
+# 模拟期间刷新 Worker 心跳的真实时间间隔（秒）
+HEARTBEAT_EVERY_SECONDS = 60
+
+DAG_SHAPES = ("layered", "random", "chains")
+
+PRIORITY_MIX = (("P0", 0.1), ("P1", 0.3), ("P2", 0.6))
+COMPLEXITY_MIX = (("low", 0.3), ("medium", 0.5), ("high", 0.2))
+
+
+@dataclass
+class SimulationConfig:
+    """模拟参数"""
+    tasks: int = 1000
+    shape: str = "layered"          # layered / random / chains
+    width: int = 50                 # layered：每层任务数；chains：链数
+    max_deps: int = 3               # 每个任务最多依赖数（layered / random）
+    window: int = 200               # random：依赖从最近 window 个任务中选
+    mean_hours: float = 4.0         # 预估工时的中位数
+    workers: int = 20
+    capacity: int = 1               # 每个 Worker 的槽位数
+    weights: List[float] = field(default_factory=lambda: [1.0])  # 按顺序循环分配给 Worker，权重即速度
+    duration_sigma: float = 0.3     # 实际时长 = 预估工时 × LogNormal(0, sigma) / 权重
+    failure_rate: float = 0.0       # 每次执行失败的概率
+    max_retries: int = 2            # 失败后重新放回待分配的次数
+    seed: int = 42
+
+
+def _weighted_choice(rng: random.Random, choices: Tuple[Tuple[str, float], ...]) -> str:
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def generate_dag(config: SimulationConfig) -> List[Task]:
+    """生成合成任务 DAG（依赖只指向编号更小的任务，列表即拓扑序）
+
+    Args:
+        config: 模拟参数
+
+    Returns:
+        任务列表
+
+    Raises:
+        ValueError: 未知的 DAG 形状
+    """
+    if config.shape not in DAG_SHAPES:
+        raise ValueError(f"Unknown DAG shape: {config.shape} (expected one of {DAG_SHAPES})")
+
+    rng = random.Random(config.seed)
+    base = datetime(2026, 1, 1)
+    tasks = []
+    for i in range(config.tasks):
+        if config.shape == "layered":
+            layer_start = (i // config.width) * config.width
+            previous = range(max(0, layer_start - config.width), layer_start)
+            deps = rng.sample(previous, min(len(previous), rng.randint(0, config.max_deps)))
+        elif config.shape == "random":
+            previous = range(max(0, i - config.window), i)
+            deps = rng.sample(previous, min(len(previous), rng.randint(0, config.max_deps)))
+        else:
+            deps = [i - config.width] if i >= config.width else []
+
+        tasks.append(Task(
+            id=f"sim-{i}",
+            title=f"模拟任务 {i}",
+            priority=_weighted_choice(rng, PRIORITY_MIX),
+            complexity=_weighted_choice(rng, COMPLEXITY_MIX),
+            estimated_hours=round(config.mean_hours * rng.lognormvariate(0, 0.5), 3),
+            depends_on=[f"sim-{d}" for d in sorted(deps)],
+            created_at=base + timedelta(seconds=i)
+        ))
+    return tasks
+
+
+def critical_path_hours(tasks: List[Task]) -> float:
+    """按预估工时计算的关键路径长度（makespan 下界，任务列表须为拓扑序）"""
+    finish: Dict[str, float] = {}
+    for task in tasks:
+        start = max((finish[d] for d in task.depends_on), default=0.0)
+        finish[task.id] = start + task.estimated_hours
+    return max(finish.values(), default=0.0)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    samples = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(samples[min(len(samples) - 1, int(len(samples) * q))], 4)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(samples[-1], 4)}
+
+
+class SchedulingSimulator:
+    """离散事件模拟器
+
+    虚拟时钟按事件推进：每个时刻先应用本时刻结束的任务（完成 / 失败重试），
+    再调用一次 TaskScheduler.schedule_tasks() 分配任务。调度器、StateManager、
+    就绪队列和认领都是生产代码，只有时间和 Worker 执行是模拟的。
+    """
+
+    def __init__(self, config: SimulationConfig, db_path: Optional[str] = None):
+        """初始化模拟器
+
+        Args:
+            config: 模拟参数
+            db_path: 数据库路径，为空时使用临时目录（run 结束后删除）
+        """
+        self.config = config
+        self.db_path = db_path
+        self.rng = random.Random(config.seed + 1)
+
+    def run(self) -> Dict[str, Any]:
+        """执行一次模拟
+
+        Returns:
+            机器可读的结果字典（见 RESULT_SCHEMA_VERSION）
+        """
+        if self.db_path is not None:
+            return self._run(self.db_path)
+        with tempfile.TemporaryDirectory() as tmp:
+            return self._run(str(Path(tmp) / "simulation.db"))
+
+    def _run(self, db_path: str) -> Dict[str, Any]:
+        config = self.config
+        tasks = generate_dag(config)
+        by_id = {t.id: t for t in tasks}
+        dependents: Dict[str, List[str]] = {}
+        unmet: Dict[str, int] = {}
+        for task in tasks:
+            unmet[task.id] = len(task.depends_on)
+            for dep_id in task.depends_on:
+                dependents.setdefault(dep_id, []).append(task.id)
+
+        sm = StateManager(db_path=db_path)
+        sm.create_tasks(tasks)
+        # 租约按真实时间计算，模拟期间不应过期
+        scheduler = TaskScheduler(sm, lease_seconds=24 * 3600, scheduler_id="simulator")
+        speeds = {}
+        for i in range(config.workers):
+            worker_id = f"sim-worker-{i}"
+            speeds[worker_id] = config.weights[i % len(config.weights)]
+            scheduler.register_worker(worker_id, capacity=config.capacity, weight=speeds[worker_id])
+
+        now = 0.0
+        ready_at = {t.id: 0.0 for t in tasks if not t.depends_on}
+        waits: List[float] = []
+        running: List[Tuple[float, int, str, str, int, bool]] = []  # (结束时间, 序号, 任务, Worker, 槽位, 成功)
+        seq = 0
+        attempts: Dict[str, int] = {}
+        busy_slot_hours = 0.0
+        completed = failed = retries = 0
+        decisions = passes = 0
+        scheduler_cpu = 0.0
+        wall_start = last_beat = time.perf_counter()
+
+        while True:
+            # 心跳按真实时间判断健康，大规模模拟可能运行数分钟
+            if time.perf_counter() - last_beat > HEARTBEAT_EVERY_SECONDS:
+                for worker_id in speeds:
+                    scheduler.heartbeat(worker_id)
+                last_beat = time.perf_counter()
+
+            cpu_start = time.process_time()
+            assignments = scheduler.schedule_tasks()
+            scheduler_cpu += time.process_time() - cpu_start
+            passes += 1
+
+            for worker_id, task_ids in assignments.items():
+                for task_id in task_ids:
+                    decisions += 1
+                    waits.append(now - ready_at.pop(task_id))
+                    attempts[task_id] = attempts.get(task_id, 0) + 1
+                    task = by_id[task_id]
+                    duration = (
+                        task.estimated_hours * self.rng.lognormvariate(0, config.duration_sigma)
+                        / speeds[worker_id]
+                    )
+                    success = self.rng.random() >= config.failure_rate
+                    slots = scheduler.workers[worker_id]['tasks'][task_id]['slots']
+                    busy_slot_hours += duration * slots
+                    heapq.heappush(running, (now + duration, seq, task_id, worker_id, slots, success))
+                    seq += 1
+
+            if not running:
+                break
+
+            # 推进虚拟时钟到下一个结束时刻，应用该时刻结束的全部任务
+            now = running[0][0]
+            finished = []
+            while running and running[0][0] == now:
+                finished.append(heapq.heappop(running))
+
+            status_updates = []
+            for _, _, task_id, worker_id, _, success in finished:
+                scheduler.complete_task(task_id, worker_id, success=success)
+                if success:
+                    completed += 1
+                    status_updates.append((task_id, TaskStatus.COMPLETED))
+                    for dependent_id in dependents.get(task_id, ()):
+                        unmet[dependent_id] -= 1
+                        if unmet[dependent_id] == 0:
+                            ready_at[dependent_id] = now
+                elif attempts[task_id] <= config.max_retries:
+                    retries += 1
+                    status_updates.append((task_id, TaskStatus.PENDING))
+                    ready_at[task_id] = now
+                else:
+                    failed += 1
+            sm.update_tasks_status(status_updates)
+
+        wall = time.perf_counter() - wall_start
+        makespan = now
+        total_slots = config.workers * config.capacity
+        lower_bound = critical_path_hours(tasks)
+
+        return {
+            "schema_version": RESULT_SCHEMA_VERSION,
+            "config": asdict(config),
+            "tasks": {
+                "total": len(tasks),
+                "edges": sum(len(t.depends_on) for t in tasks),
+                "completed": completed,
+                "failed": failed,
+                "retries": retries,
+                "unreachable": len(tasks) - completed - failed
+            },
+            "makespan_hours": round(makespan, 4),
+            "critical_path_hours": round(lower_bound, 4),
+            "makespan_vs_critical_path": round(makespan / lower_bound, 4) if lower_bound else None,
+            "throughput_tasks_per_hour": round(completed / makespan, 4) if makespan else None,
+            "utilization": round(busy_slot_hours / (total_slots * makespan), 4) if makespan else 0.0,
+            "queue_wait_hours": _percentiles(waits),
+            "scheduler": {
+                "passes": passes,
+                "decisions": decisions,
+                "cpu_ms": round(scheduler_cpu * 1000, 2),
+                "cpu_us_per_decision": round(scheduler_cpu / decisions * 1e6, 2) if decisions else None,
+                "cpu_us_per_pass": round(scheduler_cpu / passes * 1e6, 2)
+            },
+            "wall_s": round(wall, 3)
+        }
+
+
+def run_simulation(config: Optional[SimulationConfig] = None, **overrides) -> Dict[str, Any]:
+    """按参数执行一次模拟
+
+    Args:
+        config: 模拟参数，默认 SimulationConfig()
+        **overrides: 覆盖 config 中的字段
+
+    Returns:
+        结果字典
+    """
+    config = config or SimulationConfig()
+    if overrides:
+        config = SimulationConfig(**{**asdict(config), **overrides})
+    return SchedulingSimulator(config).run()
@@ -7,12 +7,68 @@
 
 import sqlite3
 import json
+from enum import Enum
 from pathlib import Path
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Dict, Any, Sequence, Tuple, Union
 from contextlib import contextmanager
 
-from .models import Task, TaskStatus, TaskPriority, Review, Worker, SystemStatus
+from pydantic import ValidationError
+
+from .models import DEFAULT_SHARD, Task, TaskStatus, TaskPriority, Review, Worker, SystemStatus
+
+
+# query_tasks 可投影的列（Task 模型字段 + 增量同步版本号 version）
+TASK_COLUMNS = (
+    "id", "title", "description", "status", "priority",
+    "depends_on", "blocked_by", "assigned_to", "assigned_at", "completed_at",
+    "created_at", "updated_at", "estimated_hours", "actual_hours",
+    "complexity", "revision_count", "max_revision_attempts", "project_id", "version"
+)
+
+# 存储为 JSON 数组的列（字典投影时解码，原始元组保持字符串）
+JSON_LIST_COLUMNS = ("depends_on", "blocked_by")
+
+# 过滤条件：单个值或多个值（枚举自动取 value）
+FilterValue = Union[str, Sequence[str], None]
+
+TASK_INSERT_SQL = """
+    INSERT INTO tasks (
+        id, title, description, status, priority,
+        depends_on, blocked_by, assigned_to,
+        created_at, updated_at, estimated_hours,
+        complexity, revision_count, max_revision_attempts, project_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 批量操作按 ID 查询时每条语句的参数个数（低于 SQLite 默认上限 999）
+ID_CHUNK_SIZE = 500
+
+# 任务事件（写入提交后通知监听器）：任务创建、状态更新、过期租约被回收
+TASK_EVENT_CREATED = "task_created"
+TASK_EVENT_STATUS = "task_status"
+TASK_EVENT_REAPED = "lease_reaped"
+
+# 任务事件监听器：listener(event, task_ids, status)，status 只在 task_status 事件中给出
+TaskListener = Callable[[str, List[str], Optional[str]], None]
+
+# 认领任务的默认租约时长（秒），Worker 需在到期前续约
+DEFAULT_LEASE_SECONDS = 600
+
+# 任务所属分片：project_id，为空时属于默认分片
+TASK_SHARD = f"COALESCE(project_id, '{DEFAULT_SHARD}')"
+
+# 认领条件：待分配且所有依赖已完成（depends_on 为空、NULL 或非法 JSON 视为无依赖；
+# 依赖可以属于其他分片）
+CLAIMABLE_CONDITION = """
+    t.status = 'pending'
+    AND NOT EXISTS (
+        SELECT 1
+        FROM json_each(CASE WHEN json_valid(t.depends_on) THEN t.depends_on ELSE '[]' END) AS d
+        LEFT JOIN tasks AS dep ON dep.id = d.value
+        WHERE dep.status IS NOT 'completed'
+    )
+"""
 
 
 class StateManager:
@@ -32,17 +88,60 @@ class StateManager:
         
         # 初始化数据库
         self._init_db()
+        self._task_columns: Optional[frozenset] = None
+        
+        # 状态计数缓存：(计数版本号, {status: count})，版本号变化时重新读取
+        self._status_counts_cache: Optional[Tuple[int, Dict[str, int]]] = None
+        
+        # 进程内任务事件监听器（如事件驱动的调度器）
+        self._task_listeners: List[TaskListener] = []
+    
+    def add_task_listener(self, listener: TaskListener) -> None:
+        """注册任务事件监听器
+        
+        通过本实例的写入（创建任务、更新状态、回收租约）在事务提交后同步回调，
+        监听器应尽快返回。其他进程或其他 StateManager 实例的写入不会通知。
+        
+        Args:
+            listener: listener(event, task_ids, status)
+        """
+        if listener not in self._task_listeners:
+            self._task_listeners.append(listener)
+    
+    def remove_task_listener(self, listener: TaskListener) -> None:
+        """注销任务事件监听器
+        
+        Args:
+            listener: add_task_listener 注册的监听器
+        """
+        if listener in self._task_listeners:
+            self._task_listeners.remove(listener)
+    
+    def _emit_task_event(self, event: str, task_ids: List[str], status: Optional[str] = None) -> None:
+        """通知监听器（监听器出错不影响写入结果）"""
+        for listener in list(self._task_listeners):
+            try:
+                listener(event, task_ids, status)
+            except Exception as e:
+                print(f"[StateManager] ⚠️ 任务事件监听器出错: {e}")
     
     @contextmanager
-    def _get_connection(self):
+    def _get_connection(self, immediate: bool = False):
         """获取数据库连接（上下文管理器）
         
+        Args:
+            immediate: 以 BEGIN IMMEDIATE 开启事务（先取写锁再读）。多个进程并发写时，
+                       延迟事务在读后升级写锁可能因死锁检测直接失败（database is locked），
+                       立即事务则在 busy timeout 内排队等待
+        
         Yields:
             sqlite3.Connection: 数据库连接
         """
         conn = sqlite3.connect(str(self.db_path))
         conn.row_factory = sqlite3.Row
         try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
             yield conn
             conn.commit()
         except Exception:
@@ -78,10 +177,16 @@ class StateManager:
                     actual_hours REAL,
                     complexity TEXT,
                     revision_count INTEGER DEFAULT 0,
-                    max_revision_attempts INTEGER DEFAULT 3
+                    max_revision_attempts INTEGER DEFAULT 3,
+                    lease_expires_at TEXT,
+                    fencing_token INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    project_id TEXT
                 )
             """)
             
+            self._ensure_claim_columns(cursor)
+            
             # 创建审查表
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS reviews (
@@ -117,6 +222,237 @@ class StateManager:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_assigned ON tasks(assigned_to)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_task ON reviews(task_id)")
+            # 键集分页：按 (created_at, id) 排序，按状态过滤时走复合索引
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_id ON tasks(created_at, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks(status, created_at, id)")
+            # 认领：按 (priority, created_at, id) 顺序找第一个可认领任务；回收：按租约到期时间
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority, created_at, id)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_lease ON tasks(status, lease_expires_at)")
+            
+            self._init_status_counters(cursor)
+            self._init_change_tracking(cursor)
+            self._init_worker_registry(cursor)
+    
+    def _ensure_claim_columns(self, cursor: sqlite3.Cursor) -> None:
+        """为旧库补充认领租约列
+        
+        lease_expires_at: 租约到期时间，到期未续约的任务由 reap_expired_leases 放回待分配
+        fencing_token: 每次认领递增的令牌，持有旧令牌的 Worker 无法再修改任务状态
+        
+        Args:
+            cursor: 数据库游标
+        """
+        cursor.execute("PRAGMA table_info(tasks)")
+        existing = {row[1] for row in cursor.fetchall()}
+        if "lease_expires_at" not in existing:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN lease_expires_at TEXT")
+        if "fencing_token" not in existing:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN fencing_token INTEGER NOT NULL DEFAULT 0")
+    
+    def _init_status_counters(self, cursor: sqlite3.Cursor) -> None:
+        """创建触发器维护的状态计数表
+        
+        task_status_counts 按状态保存任务数，task_stats_version 在计数变化时递增；
+        绕过 StateManager 直接写 tasks 表的脚本同样会被触发器计入
+        
+        Args:
+            cursor: 数据库游标（与建表处于同一事务）
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_status_counts'"
+        )
+        needs_backfill = cursor.fetchone() is None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_status_counts (
+                status TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_stats_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO task_stats_version (id, version) VALUES (1, 0)")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_status_counts_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+                UPDATE task_stats_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_status_counts_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+                UPDATE task_stats_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_status_counts_update
+            AFTER UPDATE OF status ON tasks
+            WHEN OLD.status IS NOT NEW.status
+            BEGIN
+                UPDATE task_status_counts SET count = count - 1 WHERE status = OLD.status;
+                INSERT INTO task_status_counts (status, count) VALUES (NEW.status, 1)
+                ON CONFLICT(status) DO UPDATE SET count = count + 1;
+                UPDATE task_stats_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+        
+        if needs_backfill:
+            self._rebuild_status_counts(cursor)
+    
+    def _init_change_tracking(self, cursor: sqlite3.Cursor) -> None:
+        """创建触发器维护的任务版本号（增量同步用）
+        
+        task_change_seq 是全局单调递增的版本号，任务的任何插入/更新都会把该行的
+        version 设为新版本号，删除则在 task_tombstones 中记录被删除的 ID 及版本号。
+        客户端保存最大版本号，之后只拉取 version 更大的变更（get_task_changes）。
+        
+        Args:
+            cursor: 数据库游标（与建表处于同一事务）
+        """
+        cursor.execute("PRAGMA table_info(tasks)")
+        if "version" not in {row[1] for row in cursor.fetchall()}:
+            # 旧库：已有任务统一记为版本 1，首次同步（since=0）时全部下发
+            cursor.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("UPDATE tasks SET version = 1")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_change_seq (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO task_change_seq (id, version)
+            SELECT 1, COALESCE(MAX(version), 0) FROM tasks
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS task_tombstones (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_version ON tasks(version)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_tombstones_version ON task_tombstones(version)")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_version_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                UPDATE task_change_seq SET version = version + 1 WHERE id = 1;
+                UPDATE tasks SET version = (SELECT version FROM task_change_seq WHERE id = 1)
+                WHERE rowid = NEW.rowid;
+                DELETE FROM task_tombstones WHERE id = NEW.id;
+            END
+        """)
+        # 只在写入本身没有改 version 时触发（触发器内设置 version 的 UPDATE 不再触发）
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_version_update
+            AFTER UPDATE ON tasks
+            WHEN NEW.version IS OLD.version
+            BEGIN
+                UPDATE task_change_seq SET version = version + 1 WHERE id = 1;
+                UPDATE tasks SET version = (SELECT version FROM task_change_seq WHERE id = 1)
+                WHERE rowid = NEW.rowid;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_task_version_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_change_seq SET version = version + 1 WHERE id = 1;
+                INSERT INTO task_tombstones (id, version)
+                VALUES (OLD.id, (SELECT version FROM task_change_seq WHERE id = 1))
+                ON CONFLICT(id) DO UPDATE SET version = excluded.version;
+            END
+        """)
+    
+    def _init_worker_registry(self, cursor: sqlite3.Cursor) -> None:
+        """创建多调度器共享的 Worker 注册表、任务分配表和调度器租约表
+        
+        workers 补充容量、权重和分片列；任务的分片即其 project_id（为空时属于默认分片，
+        各分片的调度器只同步和认领本分片的任务）；worker_assignments 记录执行中任务的持有者、
+        令牌和占用槽位，任务离开 in_progress（完成、失败、回收）或被删除时由触发器删除；
+        scheduler_leases 是选主用的租约，每次换主令牌递增。
+        
+        Args:
+            cursor: 数据库游标（与建表处于同一事务）
+        """
+        cursor.execute("PRAGMA table_info(workers)")
+        existing = {row[1] for row in cursor.fetchall()}
+        if "capacity" not in existing:
+            cursor.execute("ALTER TABLE workers ADD COLUMN capacity INTEGER NOT NULL DEFAULT 1")
+        if "weight" not in existing:
+            cursor.execute("ALTER TABLE workers ADD COLUMN weight REAL NOT NULL DEFAULT 1.0")
+        if "shard" not in existing:
+            cursor.execute(f"ALTER TABLE workers ADD COLUMN shard TEXT NOT NULL DEFAULT '{DEFAULT_SHARD}'")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workers_shard ON workers(shard)")
+        
+        cursor.execute("PRAGMA table_info(tasks)")
+        if "project_id" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN project_id TEXT")
+        # 按分片认领：与 idx_tasks_status_priority 相同的顺序（表达式索引，查询须使用同一表达式）
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_shard_status_priority "
+            f"ON tasks({TASK_SHARD}, status, priority, created_at, id)"
+        )
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS worker_assignments (
+                task_id TEXT PRIMARY KEY,
+                worker_id TEXT NOT NULL,
+                fencing_token INTEGER NOT NULL,
+                slots INTEGER NOT NULL DEFAULT 1,
+                assigned_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_worker_assignments_worker ON worker_assignments(worker_id)"
+        )
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_assignment_release_update
+            AFTER UPDATE OF status ON tasks
+            WHEN NEW.status IS NOT 'in_progress'
+            BEGIN
+                DELETE FROM worker_assignments WHERE task_id = NEW.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_assignment_release_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                DELETE FROM worker_assignments WHERE task_id = OLD.id;
+            END
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scheduler_leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                token INTEGER NOT NULL,
+                expires_at TEXT NOT NULL
+            )
+        """)
+    
+    def _rebuild_status_counts(self, cursor: sqlite3.Cursor) -> None:
+        """用一次 GROUP BY 重新计算状态计数"""
+        cursor.execute("DELETE FROM task_status_counts")
+        cursor.execute("""
+            INSERT INTO task_status_counts (status, count)
+            SELECT status, COUNT(*) FROM tasks GROUP BY status
+        """)
+        cursor.execute("UPDATE task_stats_version SET version = version + 1 WHERE id = 1")
     
     def _task_dict_to_model(self, row: sqlite3.Row) -> Task:
         """将数据库行转换为 Task 模型
@@ -154,6 +490,7 @@ class StateManager:
             complexity=row_dict.get('complexity') or "medium",
             revision_count=row_dict.get('revision_count') or 0,
             max_revision_attempts=row_dict.get('max_revision_attempts') or 3,
+            project_id=row_dict.get('project_id'),
         )
     
     # ========== 任务管理 ==========
@@ -171,32 +508,99 @@ class StateManager:
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    INSERT INTO tasks (
-                        id, title, description, status, priority,
-                        depends_on, blocked_by, assigned_to,
-                        created_at, updated_at, estimated_hours,
-                        complexity, revision_count, max_revision_attempts
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    task.id,
-                    task.title,
-                    task.description,
-                    task.status.value if isinstance(task.status, TaskStatus) else task.status,
-                    task.priority.value if isinstance(task.priority, TaskPriority) else task.priority,
-                    json.dumps(task.depends_on),
-                    json.dumps(task.blocked_by),
-                    task.assigned_to,
-                    task.created_at.isoformat(),
-                    task.updated_at.isoformat(),
-                    task.estimated_hours,
-                    task.complexity,
-                    task.revision_count,
-                    task.max_revision_attempts,
-                ))
-                return True
+                cursor.execute(TASK_INSERT_SQL, self._task_insert_params(task))
             except sqlite3.IntegrityError:
                 return False
+        
+        self._emit_task_event(TASK_EVENT_CREATED, [task.id])
+        return True
+    
+    def create_tasks(self, tasks: Sequence[Union[Task, Dict[str, Any]]]) -> Dict[str, Any]:
+        """批量创建任务（单事务 executemany，全部成功或全部不写入）
+        
+        写入前在同一个写事务内校验：字典能否构造为 Task、批次内 ID 是否重复、
+        ID 是否已存在。任何一项出错时整批不写入，并逐条返回错误原因。
+        
+        Args:
+            tasks: 任务对象或任务字典列表（字典中 Task 之外的字段被忽略）
+            
+        Returns:
+            {"success": bool, "created": 写入数, "errors": [{"index", "id", "error"}]}
+        """
+        if not tasks:
+            return {"success": True, "created": 0, "errors": []}
+        
+        models: List[Task] = []
+        errors: List[Dict[str, Any]] = []
+        seen: Dict[str, int] = {}
+        for index, item in enumerate(tasks):
+            if isinstance(item, Task):
+                task = item
+            else:
+                try:
+                    task = Task(**item)
+                except (ValidationError, TypeError) as e:
+                    task_id = item.get("id") if isinstance(item, dict) else None
+                    errors.append({"index": index, "id": task_id, "error": f"invalid task: {e}"})
+                    continue
+            
+            if task.id in seen:
+                errors.append({
+                    "index": index, "id": task.id,
+                    "error": f"duplicate id in batch (first at index {seen[task.id]})"
+                })
+                continue
+            seen[task.id] = index
+            models.append(task)
+        
+        # 立即获取写锁：校验与写入之间不会有其他连接插入同 ID 任务
+        with self._get_connection(immediate=True) as conn:
+            existing = self._existing_task_ids(conn, list(seen))
+            errors.extend(
+                {"index": index, "id": task_id, "error": "task already exists"}
+                for task_id, index in seen.items() if task_id in existing
+            )
+            if errors:
+                errors.sort(key=lambda e: e["index"])
+                return {"success": False, "created": 0, "errors": errors}
+            
+            conn.executemany(TASK_INSERT_SQL, [self._task_insert_params(t) for t in models])
+        
+        self._emit_task_event(TASK_EVENT_CREATED, [t.id for t in models])
+        return {"success": True, "created": len(models), "errors": []}
+    
+    @staticmethod
+    def _task_insert_params(task: Task) -> Tuple:
+        """TASK_INSERT_SQL 的参数"""
+        return (
+            task.id,
+            task.title,
+            task.description,
+            task.status.value if isinstance(task.status, TaskStatus) else task.status,
+            task.priority.value if isinstance(task.priority, TaskPriority) else task.priority,
+            json.dumps(task.depends_on),
+            json.dumps(task.blocked_by),
+            task.assigned_to,
+            task.created_at.isoformat(),
+            task.updated_at.isoformat(),
+            task.estimated_hours,
+            task.complexity,
+            task.revision_count,
+            task.max_revision_attempts,
+            task.project_id,
+        )
+    
+    @staticmethod
+    def _existing_task_ids(conn: sqlite3.Connection, task_ids: List[str]) -> set:
+        """查询已存在的任务 ID（分块，避免超过 SQLite 参数上限）"""
+        existing = set()
+        for start in range(0, len(task_ids), ID_CHUNK_SIZE):
+            chunk = task_ids[start:start + ID_CHUNK_SIZE]
+            rows = conn.execute(
+                f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            existing.update(row[0] for row in rows)
+        return existing
     
     def get_task(self, task_id: str) -> Optional[Task]:
         """获取任务
@@ -216,31 +620,248 @@ class StateManager:
                 return self._task_dict_to_model(row)
             return None
     
-    def update_task_status(self, task_id: str, new_status: TaskStatus) -> bool:
+    def update_task_status(
+        self,
+        task_id: str,
+        new_status: TaskStatus,
+        fencing_token: Optional[int] = None
+    ) -> bool:
         """更新任务状态
         
         Args:
             task_id: 任务 ID
             new_status: 新的状态
+            fencing_token: 认领时获得的令牌；指定时只有任务仍在执行中且令牌仍有效
+                           （未被回收或重新认领）才更新，离开 in_progress 时同时清除租约
             
         Returns:
             是否更新成功
         """
-        with self._get_connection() as conn:
+        status = new_status.value if isinstance(new_status, TaskStatus) else new_status
+        sql = "UPDATE tasks SET status = ?, updated_at = ?"
+        params: List[Any] = [status, datetime.now().isoformat()]
+        if status != TaskStatus.IN_PROGRESS.value:
+            sql += ", lease_expires_at = NULL"
+        sql += " WHERE id = ?"
+        params.append(task_id)
+        if fencing_token is not None:
+            # 回收不改变令牌，需同时要求任务仍在执行中
+            sql += " AND fencing_token = ? AND status = 'in_progress'"
+            params.append(fencing_token)
+        
+        with self._get_connection(immediate=True) as conn:
             cursor = conn.cursor()
+            cursor.execute(sql, params)
+            updated = cursor.rowcount > 0
+        
+        if updated:
+            self._emit_task_event(TASK_EVENT_STATUS, [task_id], status)
+        return updated
+    
+    def record_actual_hours(self, task_id: str, actual_hours: float) -> bool:
+        """记录任务的实际工时（交付预测据此校准时长分布）
+        
+        Args:
+            task_id: 任务 ID
+            actual_hours: 实际工时（小时）
             
-            cursor.execute("""
-                UPDATE tasks
-                SET status = ?, updated_at = ?
-                WHERE id = ?
+        Returns:
+            任务是否存在
+        """
+        with self._get_connection(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET actual_hours = ?, updated_at = ? WHERE id = ?",
+                (actual_hours, datetime.now().isoformat(), task_id)
+            )
+            return cursor.rowcount > 0
+    
+    # ========== 任务认领（租约 + fencing token） ==========
+    
+    def claim_task(
+        self,
+        worker_id: str,
+        task_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        slots: int = 1,
+        leader: Optional[Tuple[str, int]] = None,
+        shard: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """原子认领一个任务
+        
+        单条 UPDATE ... WHERE status = 'pending' ... RETURNING 完成检查与认领，
+        多个 Worker（包括多进程）并发认领同一任务时只有一个成功。
+        认领成功时在同一事务内写入 worker_assignments。
+        
+        Args:
+            worker_id: 认领的 Worker ID
+            task_id: 认领指定任务；为空时按 (priority, created_at, id) 认领第一个
+                     依赖已满足的待分配任务
+            lease_seconds: 租约时长（秒）
+            slots: 任务在 Worker 上占用的槽位数
+            leader: (调度器租约名, 令牌)；指定时只有该租约仍由此令牌持有且未过期才认领，
+                    已被取代的调度器无法再分配任务
+            shard: 只认领该分片（project_id）的任务，为空时不限分片
+            
+        Returns:
+            {"task_id", "fencing_token", "lease_expires_at"}，没有可认领任务时返回 None
+        """
+        now = datetime.now()
+        expires = (now + timedelta(seconds=lease_seconds)).isoformat()
+        
+        leader_condition = ""
+        if leader is not None:
+            leader_condition = """
+                AND EXISTS (
+                    SELECT 1 FROM scheduler_leases
+                    WHERE name = ? AND token = ? AND expires_at >= ?
+                )
+            """
+        sql = f"""
+            UPDATE tasks
+            SET status = 'in_progress', assigned_to = ?, assigned_at = ?, updated_at = ?,
+                lease_expires_at = ?, fencing_token = fencing_token + 1
+            WHERE status = 'pending' AND id = (
+                SELECT t.id FROM tasks AS t
+                WHERE {CLAIMABLE_CONDITION}
+                    {"AND t.id = ?" if task_id is not None else ""}
+                    {f"AND {TASK_SHARD} = ?" if shard is not None else ""}
+                ORDER BY t.priority, t.created_at, t.id
+                LIMIT 1
+            ) {leader_condition}
+            RETURNING id, fencing_token, lease_expires_at
+        """
+        params: List[Any] = [worker_id, now.isoformat(), now.isoformat(), expires]
+        if task_id is not None:
+            params.append(task_id)
+        if shard is not None:
+            params.append(shard)
+        if leader is not None:
+            params.extend([leader[0], leader[1], now.isoformat()])
+        
+        with self._get_connection(immediate=True) as conn:
+            row = conn.execute(sql, params).fetchone()
+            if row is not None:
+                conn.execute("""
+                    INSERT OR REPLACE INTO worker_assignments
+                        (task_id, worker_id, fencing_token, slots, assigned_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (row[0], worker_id, row[1], slots, now.isoformat()))
+        
+        if row is None:
+            return None
+        return {"task_id": row[0], "fencing_token": row[1], "lease_expires_at": row[2]}
+    
+    def renew_lease(
+        self,
+        task_id: str,
+        fencing_token: int,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> bool:
+        """续约（令牌仍有效且任务仍在执行中）
+        
+        Args:
+            task_id: 任务 ID
+            fencing_token: 认领时获得的令牌
+            lease_seconds: 从现在起的租约时长（秒）
+            
+        Returns:
+            是否续约成功；False 表示租约已被回收，Worker 应放弃该任务
+        """
+        now = datetime.now()
+        with self._get_connection(immediate=True) as conn:
+            cursor = conn.execute("""
+                UPDATE tasks SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND fencing_token = ? AND status = 'in_progress'
             """, (
-                new_status.value if isinstance(new_status, TaskStatus) else new_status,
-                datetime.now().isoformat(),
+                (now + timedelta(seconds=lease_seconds)).isoformat(),
+                now.isoformat(),
                 task_id,
+                fencing_token,
             ))
-            
             return cursor.rowcount > 0
     
+    def reap_expired_leases(self, now: Optional[datetime] = None) -> List[str]:
+        """把租约已过期的执行中任务放回待分配
+        
+        令牌保持不变，下一次认领时递增，原持有者的令牌随之失效。
+        
+        Args:
+            now: 当前时间（测试用），默认 datetime.now()
+            
+        Returns:
+            被放回待分配的任务 ID 列表
+        """
+        now = (now or datetime.now()).isoformat()
+        with self._get_connection(immediate=True) as conn:
+            rows = conn.execute("""
+                UPDATE tasks
+                SET status = 'pending', assigned_to = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE status = 'in_progress' AND lease_expires_at IS NOT NULL AND lease_expires_at < ?
+                RETURNING id
+            """, (now, now)).fetchall()
+        
+        reaped = [row[0] for row in rows]
+        if reaped:
+            self._emit_task_event(TASK_EVENT_REAPED, reaped, TaskStatus.PENDING.value)
+        return reaped
+    
+    def update_tasks_status(
+        self,
+        updates: Sequence[Tuple[str, Union[TaskStatus, str]]]
+    ) -> Dict[str, Any]:
+        """批量更新任务状态（单事务 executemany，全部成功或全部不写入）
+        
+        Args:
+            updates: (任务 ID, 新状态) 列表
+            
+        Returns:
+            {"success": bool, "updated": 更新数, "errors": [{"index", "id", "error"}]}
+        """
+        if not updates:
+            return {"success": True, "updated": 0, "errors": []}
+        
+        valid_statuses = {s.value for s in TaskStatus}
+        errors: List[Dict[str, Any]] = []
+        seen: Dict[str, int] = {}
+        params = []
+        now = datetime.now().isoformat()
+        for index, (task_id, new_status) in enumerate(updates):
+            status = new_status.value if isinstance(new_status, TaskStatus) else new_status
+            if status not in valid_statuses:
+                errors.append({"index": index, "id": task_id, "error": f"invalid status: {status}"})
+            elif task_id in seen:
+                errors.append({
+                    "index": index, "id": task_id,
+                    "error": f"duplicate id in batch (first at index {seen[task_id]})"
+                })
+            else:
+                seen[task_id] = index
+                params.append((status, now, task_id))
+        
+        with self._get_connection(immediate=True) as conn:
+            existing = self._existing_task_ids(conn, list(seen))
+            errors.extend(
+                {"index": index, "id": task_id, "error": "task not found"}
+                for task_id, index in seen.items() if task_id not in existing
+            )
+            if errors:
+                errors.sort(key=lambda e: e["index"])
+                return {"success": False, "updated": 0, "errors": errors}
+            
+            conn.executemany("""
+                UPDATE tasks
+                SET status = ?1, updated_at = ?2,
+                    lease_expires_at = CASE WHEN ?1 = 'in_progress' THEN lease_expires_at END
+                WHERE id = ?3
+            """, params)
+        
+        by_status: Dict[str, List[str]] = {}
+        for status, _, task_id in params:
+            by_status.setdefault(status, []).append(task_id)
+        for status, task_ids in by_status.items():
+            self._emit_task_event(TASK_EVENT_STATUS, task_ids, status)
+        return {"success": True, "updated": len(params), "errors": []}
+    
     def list_tasks_by_status(self, status: TaskStatus) -> List[Task]:
         """按状态列出任务
         
@@ -250,15 +871,7 @@ class StateManager:
         Returns:
             任务列表
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM tasks WHERE status = ? ORDER BY created_at",
-                (status.value if isinstance(status, TaskStatus) else status,)
-            )
-            rows = cursor.fetchall()
-            
-            return [self._task_dict_to_model(row) for row in rows]
+        return self.query_tasks(status=status)
     
     def list_all_tasks(self) -> List[Task]:
         """列出所有任务
@@ -266,12 +879,7 @@ class StateManager:
         Returns:
             所有任务列表
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tasks ORDER BY created_at")
-            rows = cursor.fetchall()
-            
-            return [self._task_dict_to_model(row) for row in rows]
+        return self.query_tasks()
     
     def list_tasks_assigned_to(self, worker_id: str) -> List[Task]:
         """列出分配给特定 Worker 的任务
@@ -282,15 +890,197 @@ class StateManager:
         Returns:
             任务列表
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM tasks WHERE assigned_to = ? ORDER BY created_at",
-                (worker_id,)
-            )
-            rows = cursor.fetchall()
+        return self.query_tasks(assigned_to=worker_id)
+    
+    def query_tasks(
+        self,
+        status: FilterValue = None,
+        assigned_to: FilterValue = None,
+        priority: FilterValue = None,
+        fields: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+        raw: bool = False,
+        changed_since: Optional[int] = None,
+        shard: FilterValue = None,
+        include_dependencies: bool = False
+    ) -> List[Union[Task, Dict[str, Any], Tuple]]:
+        """按条件查询任务（过滤 + 键集分页 + 列投影）
+        
+        结果按 (created_at, id) 排序。翻页时把上一页最后一行的
+        (created_at, id) 作为 after 传入，不使用 OFFSET，深分页同样走索引。
+        
+        Args:
+            status: 状态过滤（单个或多个）
+            assigned_to: 执行者过滤（单个或多个）
+            priority: 优先级过滤（单个或多个）
+            fields: 只查询这些列（见 TASK_COLUMNS），为空时查询全部列
+            after: 键集分页游标 (created_at, id)，只返回排在其后的任务
+            limit: 最多返回的任务数
+            raw: 返回原始元组（按 fields 顺序，未指定时按 TASK_COLUMNS 顺序；
+                 不构造模型、不解码 JSON），用于只需少量列的统计和轮询
+            changed_since: 只返回版本号大于该值的任务（见 get_task_changes），
+                           此时结果按 version 排序（走版本号索引），不能与 after 同用
+            shard: 分片过滤（单个或多个，即 project_id，为空的任务属于默认分片）
+            include_dependencies: 按分片过滤时同时返回其他分片中已完成的任务，以及
+                                  本分片任务依赖的任务（调度器据此判断跨分片依赖是否满足）
             
+        Returns:
+            raw=True 时为元组列表；指定 fields 时为字典列表；否则为 Task 列表
+            
+        Raises:
+            ValueError: fields 包含未知列或数据库中不存在的列，或 after 与 changed_since 同用
+        """
+        if after is not None and changed_since is not None:
+            raise ValueError("after and changed_since cannot be combined")
+        if fields is not None:
+            available = self._get_task_columns()
+            unknown = [f for f in fields if f not in TASK_COLUMNS or f not in available]
+            if unknown or not fields:
+                raise ValueError(f"Unknown task fields: {unknown or fields}")
+            columns = ", ".join(fields)
+        elif raw:
+            fields = [c for c in TASK_COLUMNS if c in self._get_task_columns()]
+            columns = ", ".join(fields)
+        else:
+            columns = "*"
+        
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("status", status), ("assigned_to", assigned_to), ("priority", priority)):
+            values = self._filter_values(value)
+            if values is None:
+                continue
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        
+        shards = self._filter_values(shard)
+        if shards is not None:
+            placeholders = ', '.join('?' * len(shards))
+            condition = f"{TASK_SHARD} IN ({placeholders})"
+            params.extend(shards)
+            if include_dependencies:
+                condition = f"""({condition} OR status = ? OR id IN (
+                    SELECT d.value
+                    FROM tasks AS local,
+                         json_each(CASE WHEN json_valid(local.depends_on) THEN local.depends_on ELSE '[]' END) AS d
+                    WHERE {TASK_SHARD} IN ({placeholders})
+                ))"""
+                params.append(TaskStatus.COMPLETED.value)
+                params.extend(shards)
+            conditions.append(condition)
+        
+        if after is not None:
+            conditions.append("(created_at, id) > (?, ?)")
+            params.extend(after)
+        
+        if changed_since is not None:
+            conditions.append("version > ?")
+            params.append(changed_since)
+        
+        sql = f"SELECT {columns} FROM tasks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY version" if changed_since is not None else " ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        with self._get_connection() as conn:
+            if raw:
+                conn.row_factory = None
+            rows = conn.execute(sql, params).fetchall()
+        
+        if raw:
+            return rows
+        if columns == "*":
             return [self._task_dict_to_model(row) for row in rows]
+        
+        results = []
+        for row in rows:
+            item = dict(zip(fields, row))
+            for column in JSON_LIST_COLUMNS:
+                if column in item:
+                    item[column] = json.loads(item[column]) if item[column] else []
+            results.append(item)
+        return results
+    
+    @staticmethod
+    def _filter_values(value: FilterValue) -> Optional[List[str]]:
+        """过滤条件统一为字符串列表（None 表示不过滤）"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            values = [value]
+        else:
+            values = list(value)
+        return [v.value if isinstance(v, Enum) else v for v in values]
+    
+    def _get_task_columns(self) -> frozenset:
+        """tasks 表实际存在的列（兼容缺少部分列的旧库）"""
+        if self._task_columns is None:
+            with self._get_connection() as conn:
+                self._task_columns = frozenset(
+                    row["name"] for row in conn.execute("PRAGMA table_info(tasks)")
+                )
+        return self._task_columns
+    
+    def get_task_version(self) -> int:
+        """当前任务版本号（task_change_seq）
+        
+        任务的任何插入、更新、删除都会使其递增，可作为任务集合的缓存键
+        （如 CachedDependencyAnalyzer 的 version）。
+        
+        Returns:
+            版本号
+        """
+        with self._get_connection() as conn:
+            return conn.execute("SELECT version FROM task_change_seq WHERE id = 1").fetchone()[0]
+    
+    def get_task_changes(
+        self,
+        since: int = 0,
+        fields: Optional[Sequence[str]] = None,
+        raw: bool = False,
+        shard: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """增量获取任务变更
+        
+        先读取当前最大版本号再查询变更，返回的 version 不会超过已下发的变更：
+        查询期间发生的写入可能被提前包含，下次同步时会再次下发（至少一次，
+        客户端按 ID 覆盖即可）。
+        
+        Args:
+            since: 客户端已同步到的版本号，0 表示全量
+            fields: 任务投影的列（同 query_tasks）
+            raw: 返回原始元组（同 query_tasks）
+            shard: 只返回该分片的任务，以及其他分片中已完成或被本分片任务依赖的任务
+                   （用于判断跨分片依赖，包括依赖离开已完成状态）；deleted 不区分分片
+            
+        Returns:
+            {
+                "version": 新的同步版本号（下次作为 since 传入）,
+                "changed": 新增或修改的任务（格式同 query_tasks）,
+                "deleted": 已删除的任务 ID 列表,
+                "reset": since 超出当前版本号（数据库被重建），客户端应丢弃本地数据
+            }
+        """
+        version = self.get_task_version()
+        reset = since > version
+        if reset:
+            since = 0
+        
+        changed = self.query_tasks(
+            fields=fields, raw=raw, changed_since=since, shard=shard, include_dependencies=shard is not None
+        )
+        with self._get_connection() as conn:
+            deleted = [
+                row[0] for row in conn.execute(
+                    "SELECT id FROM task_tombstones WHERE version > ? ORDER BY version", (since,)
+                )
+            ] if since else []
+        
+        return {"version": version, "changed": changed, "deleted": deleted, "reset": reset}
     
     # ========== 审查管理 ==========
     
@@ -369,70 +1159,263 @@ class StateManager:
     
     # ========== Worker 管理 ==========
     
-    def register_worker(self, worker_id: str) -> bool:
-        """注册 Worker
+    def register_worker(
+        self,
+        worker_id: str,
+        capacity: int = 1,
+        weight: float = 1.0,
+        shard: str = DEFAULT_SHARD
+    ) -> bool:
+        """注册 Worker（已存在时更新容量、权重、分片并记一次心跳）
         
         Args:
             worker_id: Worker ID
+            capacity: 槽位数
+            weight: 权重
+            shard: 所属分片
             
         Returns:
-            是否注册成功
+            是否新注册（False 表示 Worker 已存在，信息已更新）
         """
-        with self._get_connection() as conn:
+        now = datetime.now().isoformat()
+        with self._get_connection(immediate=True) as conn:
             cursor = conn.cursor()
             
             try:
                 cursor.execute("""
-                    INSERT INTO workers (id, status, created_at, last_heartbeat)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    worker_id,
-                    "idle",
-                    datetime.now().isoformat(),
-                    datetime.now().isoformat(),
-                ))
+                    INSERT INTO workers (id, status, created_at, last_heartbeat, capacity, weight, shard)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (worker_id, "idle", now, now, capacity, weight, shard))
                 return True
             except sqlite3.IntegrityError:
+                cursor.execute("""
+                    UPDATE workers SET capacity = ?, weight = ?, shard = ?, last_heartbeat = ?
+                    WHERE id = ?
+                """, (capacity, weight, shard, now, worker_id))
                 return False
     
-    def get_system_status(self) -> SystemStatus:
-        """获取系统整体状态
+    def unregister_worker(self, worker_id: str) -> bool:
+        """注销 Worker（其执行中任务由租约到期回收）
         
+        Args:
+            worker_id: Worker ID
+            
         Returns:
-            系统状态对象
+            是否删除成功
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._get_connection(immediate=True) as conn:
+            return conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,)).rowcount > 0
+    
+    def worker_heartbeat(self, worker_id: str, now: Optional[datetime] = None) -> bool:
+        """记录 Worker 心跳（其他进程中的调度器据此判断健康状态）
+        
+        Args:
+            worker_id: Worker ID
+            now: 心跳时间（测试用），默认 datetime.now()
             
-            # 统计各状态的任务数
-            cursor.execute("SELECT COUNT(*) FROM tasks")
-            total = cursor.fetchone()[0]
+        Returns:
+            Worker 是否存在
+        """
+        with self._get_connection(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE workers SET last_heartbeat = ? WHERE id = ?",
+                ((now or datetime.now()).isoformat(), worker_id)
+            )
+            return cursor.rowcount > 0
+    
+    def record_worker_result(self, worker_id: str, success: bool) -> None:
+        """累计 Worker 完成/失败的任务数
+        
+        Args:
+            worker_id: Worker ID
+            success: 任务是否成功
+        """
+        column = "tasks_completed" if success else "tasks_failed"
+        with self._get_connection(immediate=True) as conn:
+            conn.execute(
+                f"UPDATE workers SET {column} = COALESCE({column}, 0) + 1 WHERE id = ?", (worker_id,)
+            )
+    
+    def list_workers(self, shard: Optional[str] = None) -> List[Dict[str, Any]]:
+        """列出 Worker 注册信息
+        
+        Args:
+            shard: 只列出该分片的 Worker，为空时列出全部
             
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (TaskStatus.PENDING.value,))
-            pending = cursor.fetchone()[0]
+        Returns:
+            [{"id", "status", "capacity", "weight", "shard", "tasks_completed",
+              "tasks_failed", "last_heartbeat"}]，last_heartbeat 为 datetime
+        """
+        sql = """
+            SELECT id, status, capacity, weight, shard, tasks_completed, tasks_failed, last_heartbeat
+            FROM workers
+        """
+        params: Tuple = ()
+        if shard is not None:
+            sql += " WHERE shard = ?"
+            params = (shard,)
+        with self._get_connection() as conn:
+            rows = conn.execute(sql + " ORDER BY created_at, id", params).fetchall()
+        
+        workers = []
+        for row in rows:
+            worker = dict(row)
+            worker["tasks_completed"] = worker["tasks_completed"] or 0
+            worker["tasks_failed"] = worker["tasks_failed"] or 0
+            worker["last_heartbeat"] = (
+                datetime.fromisoformat(worker["last_heartbeat"]) if worker["last_heartbeat"] else None
+            )
+            workers.append(worker)
+        return workers
+    
+    def list_assignments(self, shard: Optional[str] = None) -> List[Dict[str, Any]]:
+        """列出执行中任务的分配记录
+        
+        Args:
+            shard: 只列出该分片 Worker 持有的任务，为空时列出全部
             
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (TaskStatus.IN_PROGRESS.value,))
-            in_progress = cursor.fetchone()[0]
+        Returns:
+            [{"task_id", "worker_id", "fencing_token", "slots", "assigned_at"}]
+        """
+        sql = """
+            SELECT a.task_id, a.worker_id, a.fencing_token, a.slots, a.assigned_at
+            FROM worker_assignments AS a
+        """
+        params: Tuple = ()
+        if shard is not None:
+            sql += " JOIN workers AS w ON w.id = a.worker_id WHERE w.shard = ?"
+            params = (shard,)
+        with self._get_connection() as conn:
+            return [dict(row) for row in conn.execute(sql + " ORDER BY a.assigned_at, a.task_id", params)]
+    
+    # ========== 调度器选主（租约） ==========
+    
+    def acquire_lease(
+        self,
+        name: str,
+        holder: str,
+        ttl_seconds: float,
+        now: Optional[datetime] = None
+    ) -> Optional[int]:
+        """获取或续约租约（选主）
+        
+        租约空闲、已过期或本来就由 holder 持有时成功；换主时令牌递增，
+        持有者续约时令牌不变。
+        
+        Args:
+            name: 租约名（如 scheduler:default）
+            holder: 持有者标识（调度器 ID）
+            ttl_seconds: 从现在起的有效期（秒）
+            now: 当前时间（测试用），默认 datetime.now()
             
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (TaskStatus.REVIEW.value,))
-            review = cursor.fetchone()[0]
+        Returns:
+            租约令牌，租约由其他持有者持有且未过期时返回 None
+        """
+        now = now or datetime.now()
+        expires = (now + timedelta(seconds=ttl_seconds)).isoformat()
+        with self._get_connection(immediate=True) as conn:
+            row = conn.execute("""
+                INSERT INTO scheduler_leases (name, holder, token, expires_at)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    token = CASE WHEN holder = excluded.holder THEN token ELSE token + 1 END,
+                    holder = excluded.holder,
+                    expires_at = excluded.expires_at
+                WHERE holder = excluded.holder OR expires_at < ?
+                RETURNING token
+            """, (name, holder, expires, now.isoformat())).fetchone()
+        return row[0] if row is not None else None
+    
+    def release_lease(self, name: str, holder: str) -> bool:
+        """主动释放租约（令牌保留，下一个持有者获取时递增）
+        
+        Args:
+            name: 租约名
+            holder: 持有者标识
             
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (TaskStatus.COMPLETED.value,))
-            completed = cursor.fetchone()[0]
+        Returns:
+            是否释放成功（租约不由 holder 持有时返回 False）
+        """
+        with self._get_connection(immediate=True) as conn:
+            cursor = conn.execute("""
+                UPDATE scheduler_leases SET expires_at = ?
+                WHERE name = ? AND holder = ?
+            """, (datetime.min.isoformat(), name, holder))
+            return cursor.rowcount > 0
+    
+    def get_lease(self, name: str) -> Optional[Dict[str, Any]]:
+        """查询租约
+        
+        Args:
+            name: 租约名
+            
+        Returns:
+            {"name", "holder", "token", "expires_at"}，不存在时返回 None
+        """
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT name, holder, token, expires_at FROM scheduler_leases WHERE name = ?", (name,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+    
+    # ========== 状态统计 ==========
+    
+    def get_status_counts(self) -> Dict[str, int]:
+        """获取各状态的任务数
+        
+        计数由触发器维护；进程内缓存按 task_stats_version 失效，
+        缓存命中时只读取一行版本号，代价与任务总数无关
+        
+        Returns:
+            {status: count}（只包含计数大于 0 的状态）
+        """
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT version FROM task_stats_version WHERE id = 1").fetchone()
+            version = row[0] if row else 0
             
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (TaskStatus.FAILED.value,))
-            failed = cursor.fetchone()[0]
+            cached = self._status_counts_cache
+            if cached is not None and cached[0] == version:
+                return dict(cached[1])
             
-            cursor.execute("SELECT COUNT(*) FROM workers WHERE status = ?", ("idle",))
+            counts = {
+                status: count
+                for status, count in conn.execute("SELECT status, count FROM task_status_counts")
+                if count > 0
+            }
+        
+        self._status_counts_cache = (version, counts)
+        return dict(counts)
+    
+    def rebuild_status_counts(self) -> Dict[str, int]:
+        """按 tasks 表重建状态计数（校正用）
+        
+        Returns:
+            重建后的 {status: count}
+        """
+        with self._get_connection() as conn:
+            self._rebuild_status_counts(conn.cursor())
+        return self.get_status_counts()
+    
+    def get_system_status(self) -> SystemStatus:
+        """获取系统整体状态
+        
+        Returns:
+            系统状态对象
+        """
+        counts = self.get_status_counts()
+        
+        with self._get_connection() as conn:
             # Count active workers (last heartbeat within 5 minutes)
-            active_workers = cursor.fetchone()[0]
-            
-            return SystemStatus(
-                total_tasks=total,
-                pending_tasks=pending,
-                in_progress_tasks=in_progress,
-                review_tasks=review,
-                completed_tasks=completed,
-                failed_tasks=failed,
-                active_workers=active_workers,
-            )
+            active_workers = conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE status = ?", ("idle",)
+            ).fetchone()[0]
+        
+        return SystemStatus(
+            total_tasks=sum(counts.values()),
+            pending_tasks=counts.get(TaskStatus.PENDING.value, 0),
+            in_progress_tasks=counts.get(TaskStatus.IN_PROGRESS.value, 0),
+            review_tasks=counts.get(TaskStatus.REVIEW.value, 0),
+            completed_tasks=counts.get(TaskStatus.COMPLETED.value, 0),
+            failed_tasks=counts.get(TaskStatus.FAILED.value, 0),
+            active_workers=active_workers,
+        )
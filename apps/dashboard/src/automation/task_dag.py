@@ -0,0 +1,382 @@
+"""
+增量维护的任务依赖 DAG
+
+DependencyAnalyzer 每次调用都从任务列表重建整张图；TaskDAG 常驻内存，
+在任务 / 依赖增删和状态变化时局部更新:
+- 拓扑序：Pearce–Kelly 在线算法，加边时只在受影响区间内搜索和重排，同时检测循环依赖
+- 层级：最长依赖链上的前驱数量（与 get_parallelizable_groups 一致），按拓扑序只重算受影响的后代
+- 就绪集合：待分配（pending / blocked）且依赖全部完成的任务
+
+因此 executable_tasks() 和 parallel_groups() 的代价与结果规模成正比。
+
+依赖的任务尚不存在时记为缺失依赖：计入未完成依赖，不参与排序和层级，
+该任务加入后自动连边；删除任务时依赖它的任务改为缺失依赖。
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Set
+
+from .models import Task, TaskStatus
+
+
+COMPLETED = TaskStatus.COMPLETED.value
+
+# 可以执行的状态（与 DependencyAnalyzer.get_executable_tasks 一致）
+READY_STATUSES = (TaskStatus.PENDING.value, TaskStatus.BLOCKED.value)
+
+
+class TaskDAG:
+    """增量维护的任务依赖 DAG
+
+    加入会形成循环依赖的任务或依赖时抛出 ValueError，图保持不变。
+    """
+
+    def __init__(self):
+        """初始化空图"""
+        self._preds: Dict[str, Set[str]] = {}
+        self._succs: Dict[str, Set[str]] = {}
+        # 尚不存在的依赖：dep_id -> 依赖它的任务ID集合
+        self._missing: Dict[str, Set[str]] = {}
+        # 任务 -> 它的缺失依赖
+        self._missing_deps: Dict[str, Set[str]] = {}
+        self._status: Dict[str, str] = {}
+        # 拓扑序号：依赖的序号总是小于依赖它的任务（序号可以不连续）
+        self._ord: Dict[str, int] = {}
+        self._next_ord = 0
+        self._level: Dict[str, int] = {}
+        # 层级 -> 该层任务（dict 作为有序集合）；层级总是从 0 开始连续
+        self._levels: List[Dict[str, None]] = []
+        self._unmet: Dict[str, int] = {}
+        self._ready: Dict[str, None] = {}
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> "TaskDAG":
+        """由任务列表构建
+
+        Args:
+            tasks: 任务列表（按拓扑序给出时无需重排）
+
+        Returns:
+            TaskDAG
+
+        Raises:
+            ValueError: 存在循环依赖或重复的任务ID
+        """
+        dag = cls()
+        for task in tasks:
+            dag.add_task(task.id, task.depends_on, task.status)
+        return dag
+
+    # ========================================================================
+    # 查询
+    # ========================================================================
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._ord
+
+    def __len__(self) -> int:
+        return len(self._ord)
+
+    def executable_tasks(self) -> List[str]:
+        """待分配且依赖全部完成的任务（按变为就绪的先后）"""
+        return list(self._ready)
+
+    def is_ready(self, task_id: str) -> bool:
+        """任务是否待分配且依赖全部完成"""
+        return task_id in self._ready
+
+    def parallel_groups(self) -> List[List[str]]:
+        """按层级分组的任务，每组内的任务可以并行执行"""
+        return [list(group) for group in self._levels]
+
+    def level(self, task_id: str) -> int:
+        """任务的层级
+
+        Raises:
+            KeyError: 任务不存在
+        """
+        return self._level[task_id]
+
+    def topological_order(self) -> List[str]:
+        """当前拓扑序"""
+        return sorted(self._ord, key=self._ord.__getitem__)
+
+    def dependencies(self, task_id: str) -> Set[str]:
+        """任务的全部依赖（含缺失依赖）"""
+        return self._preds[task_id] | self._missing_deps[task_id]
+
+    def dependents(self, task_id: str) -> Set[str]:
+        """直接依赖该任务的任务"""
+        return set(self._succs[task_id])
+
+    # ========================================================================
+    # 更新
+    # ========================================================================
+
+    def add_task(self, task_id: str, depends_on: Iterable[str] = (),
+                 status: str = TaskStatus.PENDING.value) -> None:
+        """加入任务
+
+        Args:
+            task_id: 任务ID
+            depends_on: 依赖的任务ID（可以尚不存在）
+            status: 任务状态
+
+        Raises:
+            ValueError: 任务已存在，或加入后形成循环依赖
+        """
+        if task_id in self._ord:
+            raise ValueError(f"Task already exists: {task_id}")
+        deps = set(depends_on)
+        if task_id in deps:
+            raise ValueError(f"Circular dependency: {task_id} depends on itself")
+        present = {dep_id for dep_id in deps if dep_id in self._ord}
+        waiting = self._missing.get(task_id, set())
+        # 等待该任务的任务能到达它的某个依赖时，加入后成环
+        if present and waiting and self._reaches(waiting, present):
+            raise ValueError(f"Circular dependency through {task_id}")
+
+        self._preds[task_id] = set()
+        self._succs[task_id] = set()
+        self._status[task_id] = getattr(status, "value", status)
+        self._ord[task_id] = self._next_ord
+        self._next_ord += 1
+        self._level[task_id] = 0
+        self._set_level_group(task_id, None, 0)
+        self._unmet[task_id] = 0
+        self._missing_deps[task_id] = set()
+
+        for dep_id in deps:
+            if dep_id in present:
+                self._link(dep_id, task_id)
+            else:
+                self._missing.setdefault(dep_id, set()).add(task_id)
+                self._missing_deps[task_id].add(dep_id)
+                self._unmet[task_id] += 1
+
+        # 等待该任务的任务改为真实依赖（缺失依赖已计入未完成依赖数）
+        completed = self._status[task_id] == COMPLETED
+        for dependent_id in self._missing.pop(task_id, ()):
+            self._missing_deps[dependent_id].discard(task_id)
+            self._reorder(task_id, dependent_id)
+            self._preds[dependent_id].add(task_id)
+            self._succs[task_id].add(dependent_id)
+            if completed:
+                self._unmet[dependent_id] -= 1
+                self._refresh(dependent_id)
+
+        self._update_levels([task_id, *self._succs[task_id]])
+        self._refresh(task_id)
+
+    def remove_task(self, task_id: str) -> None:
+        """删除任务（依赖它的任务改为缺失依赖）
+
+        Args:
+            task_id: 任务ID
+        """
+        if task_id not in self._ord:
+            return
+        completed = self._status[task_id] == COMPLETED
+        for dep_id in self._preds.pop(task_id):
+            self._succs[dep_id].discard(task_id)
+        for dep_id in list(self._missing_deps[task_id]):
+            self._drop_missing(dep_id, task_id)
+        del self._missing_deps[task_id]
+        dependents = self._succs.pop(task_id)
+        for dependent_id in dependents:
+            self._preds[dependent_id].discard(task_id)
+            self._missing.setdefault(task_id, set()).add(dependent_id)
+            self._missing_deps[dependent_id].add(task_id)
+            if completed:
+                self._unmet[dependent_id] += 1
+                self._refresh(dependent_id)
+
+        self._set_level_group(task_id, self._level.pop(task_id), None)
+        del self._ord[task_id], self._status[task_id], self._unmet[task_id]
+        self._ready.pop(task_id, None)
+        self._update_levels(dependents)
+
+    def add_dependency(self, task_id: str, dep_id: str) -> None:
+        """为任务增加依赖
+
+        Args:
+            task_id: 任务ID
+            dep_id: 依赖的任务ID（可以尚不存在）
+
+        Raises:
+            KeyError: 任务不存在
+            ValueError: 加入后形成循环依赖
+        """
+        if task_id not in self._ord:
+            raise KeyError(task_id)
+        if dep_id == task_id:
+            raise ValueError(f"Circular dependency: {task_id} depends on itself")
+        if dep_id not in self._ord:
+            if dep_id not in self._missing_deps[task_id]:
+                self._missing.setdefault(dep_id, set()).add(task_id)
+                self._missing_deps[task_id].add(dep_id)
+                self._unmet[task_id] += 1
+                self._refresh(task_id)
+            return
+        if dep_id in self._preds[task_id]:
+            return
+
+        self._reorder(dep_id, task_id)
+        self._link(dep_id, task_id)
+        self._update_levels([task_id])
+        self._refresh(task_id)
+
+    def remove_dependency(self, task_id: str, dep_id: str) -> None:
+        """删除任务的一个依赖
+
+        Args:
+            task_id: 任务ID
+            dep_id: 依赖的任务ID
+        """
+        if task_id not in self._ord:
+            return
+        if dep_id in self._preds[task_id]:
+            self._preds[task_id].discard(dep_id)
+            self._succs[dep_id].discard(task_id)
+            if self._status[dep_id] != COMPLETED:
+                self._unmet[task_id] -= 1
+            self._update_levels([task_id])
+        elif dep_id in self._missing_deps[task_id]:
+            self._drop_missing(dep_id, task_id)
+            self._unmet[task_id] -= 1
+        self._refresh(task_id)
+
+    def set_status(self, task_id: str, status: str) -> None:
+        """更新任务状态（完成 / 撤销完成时更新依赖它的任务的就绪状态）
+
+        Args:
+            task_id: 任务ID
+            status: 新状态
+
+        Raises:
+            KeyError: 任务不存在
+        """
+        status = getattr(status, "value", status)
+        old = self._status[task_id]
+        self._status[task_id] = status
+        if (old == COMPLETED) != (status == COMPLETED):
+            delta = -1 if status == COMPLETED else 1
+            for dependent_id in self._succs[task_id]:
+                self._unmet[dependent_id] += delta
+                self._refresh(dependent_id)
+        self._refresh(task_id)
+
+    # ========================================================================
+    # 内部实现
+    # ========================================================================
+
+    def _link(self, dep_id: str, task_id: str) -> None:
+        """连边 dep_id -> task_id（调用方保证拓扑序已满足）"""
+        self._preds[task_id].add(dep_id)
+        self._succs[dep_id].add(task_id)
+        if self._status[dep_id] != COMPLETED:
+            self._unmet[task_id] += 1
+
+    def _drop_missing(self, dep_id: str, task_id: str) -> None:
+        waiting = self._missing[dep_id]
+        waiting.discard(task_id)
+        if not waiting:
+            del self._missing[dep_id]
+        self._missing_deps[task_id].discard(dep_id)
+
+    def _reaches(self, sources: Iterable[str], targets: Set[str]) -> bool:
+        """从 sources 沿后继能否到达 targets 中的任务"""
+        stack = list(sources)
+        visited = set(stack)
+        while stack:
+            node = stack.pop()
+            if node in targets:
+                return True
+            for succ in self._succs[node]:
+                if succ not in visited:
+                    visited.add(succ)
+                    stack.append(succ)
+        return False
+
+    def _reorder(self, x: str, y: str) -> None:
+        """Pearce–Kelly：为加边 x -> y 调整拓扑序
+
+        ord[x] < ord[y] 时无需调整；否则在区间 [ord[y], ord[x]] 内
+        向前搜索 y 的后代（遇到 x 即成环）、向后搜索 x 的祖先，
+        把祖先整体移到后代之前，复用这些任务原有的序号。
+
+        Raises:
+            ValueError: 加边后形成循环依赖
+        """
+        ord_ = self._ord
+        lower, upper = ord_[y], ord_[x]
+        if upper < lower:
+            return
+
+        forward = []
+        visited = {y}
+        stack = [y]
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            for succ in self._succs[node]:
+                if succ == x:
+                    raise ValueError(f"Circular dependency: {x} -> {y}")
+                if succ not in visited and ord_[succ] <= upper:
+                    visited.add(succ)
+                    stack.append(succ)
+
+        backward = []
+        visited = {x}
+        stack = [x]
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for pred in self._preds[node]:
+                if pred not in visited and ord_[pred] >= lower:
+                    visited.add(pred)
+                    stack.append(pred)
+
+        backward.sort(key=ord_.__getitem__)
+        forward.sort(key=ord_.__getitem__)
+        nodes = backward + forward
+        for node, position in zip(nodes, sorted(ord_[n] for n in nodes)):
+            ord_[node] = position
+
+    def _update_levels(self, changed: Iterable[str]) -> None:
+        """按拓扑序重算 changed 及受影响后代的层级，每个任务至多重算一次"""
+        ord_, level = self._ord, self._level
+        heap = [(ord_[n], n) for n in changed if n in ord_]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            preds = self._preds[node]
+            new_level = 1 + max(level[p] for p in preds) if preds else 0
+            if new_level == level[node]:
+                continue
+            self._set_level_group(node, level[node], new_level)
+            level[node] = new_level
+            for succ in self._succs[node]:
+                if succ not in done:
+                    heapq.heappush(heap, (ord_[succ], succ))
+
+    def _set_level_group(self, task_id: str, old: Optional[int], new: Optional[int]) -> None:
+        if old is not None:
+            del self._levels[old][task_id]
+        if new is not None:
+            while len(self._levels) <= new:
+                self._levels.append({})
+            self._levels[new][task_id] = None
+        while self._levels and not self._levels[-1]:
+            self._levels.pop()
+
+    def _refresh(self, task_id: str) -> None:
+        """按状态和未完成依赖数更新就绪集合"""
+        if self._status[task_id] in READY_STATUSES and self._unmet[task_id] == 0:
+            self._ready.setdefault(task_id, None)
+        else:
+            self._ready.pop(task_id, None)
@@ -1,16 +1,53 @@
 """
 并行任务调度器
 
-支持多Worker并行执行、智能任务分配、负载均衡、Worker健康检查
+支持多Worker并行执行、智能任务分配、负载均衡、Worker健康检查，
+以及由任务事件触发的事件驱动调度。
+
+Worker 注册表、心跳和任务分配保存在 SQLite 中，多个调度器进程（同一主机或共享卷）
+通过租约选主：同一分片只有主调度器分配任务，其余为备用；主调度器崩溃后，
+租约过期时备用接管，并从数据库恢复执行中的分配。任务按 project_id 属于某个分片，
+各分片的主调度器只同步、计划和认领本分片的任务，不同分片分配的任务互不重叠。
 """
 
-import time
-from typing import Dict, List, Optional
+import functools
+import json
+import os
+import socket
+import threading
+import uuid
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 
-from .models import Task, TaskStatus, Worker
-from .state_manager import StateManager
+from .models import DEFAULT_SHARD, Task, TaskStatus, Worker
+from .state_manager import StateManager, DEFAULT_LEASE_SECONDS, TASK_EVENT_STATUS
 from .dependency_analyzer import DependencyAnalyzer
+from .ready_queue import ReadyQueue, task_slots
+from .planner import DEFAULT_REFINE_ITERATIONS, ListSchedulingPlanner, SchedulePlan
+
+
+# 就绪队列增量同步所需的任务列
+READY_QUEUE_FIELDS = ["id", "status", "priority", "estimated_hours", "depends_on", "complexity", "project_id"]
+
+# 生成分配计划所需的任务列和状态（已完成、失败的任务不参与计划）
+PLAN_FIELDS = ["id", "status", "priority", "estimated_hours", "depends_on", "complexity", "assigned_to"]
+PLAN_STATUSES = [TaskStatus.PENDING.value, TaskStatus.BLOCKED.value, TaskStatus.IN_PROGRESS.value]
+
+# 事件驱动模式下的默认抖动窗口（秒）：首个事件后等待该时长再调度，合并同一批事件
+DEFAULT_DEBOUNCE_SECONDS = 0.05
+
+# 主调度器租约时长（秒），每轮调度续约；应大于调度间隔
+DEFAULT_LEADER_LEASE_SECONDS = 30
+
+
+def _synchronized(method):
+    """在调度器锁内执行（事件驱动模式下调度线程与 Worker 回调并发访问）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class TaskScheduler:
@@ -21,43 +58,112 @@ class TaskScheduler:
     - 智能分配任务
     - 负载均衡
     - 健康检查
+    - 回收租约过期的任务
+    
+    调度基于增量就绪队列（ReadyQueue）：每轮只同步上次以来变更的任务，
+    每次分配决策 O(log n)，不再全量重算可执行任务和遍历所有Worker。
+    
+    事件驱动模式下，任务创建、完成/失败、租约回收和Worker心跳立即触发
+    一轮（经过抖动合并的）调度，固定间隔的轮询只作为兜底。
+    
+    workers / worker_health 是数据库中本分片 Worker 注册表的缓存，每轮调度前
+    从数据库同步（其他进程中的 Worker 心跳、其他调度器做出的分配都会被看到）。
     """
     
-    def __init__(self, state_manager: StateManager):
+    def __init__(
+        self,
+        state_manager: StateManager,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        scheduler_id: Optional[str] = None,
+        shard: str = DEFAULT_SHARD,
+        leader_lease_seconds: float = DEFAULT_LEADER_LEASE_SECONDS
+    ):
         """初始化调度器
         
         Args:
             state_manager: 状态管理器实例
+            lease_seconds: 分配任务的租约时长（秒），Worker 心跳时续约
+            scheduler_id: 调度器标识（选主用），默认 主机名:进程号:随机后缀
+            shard: 管理的分片（Worker，以及 project_id 为该值的任务），不同分片的调度器各自选主、并行调度
+            leader_lease_seconds: 主调度器租约时长（秒）
         """
         self.state_manager = state_manager
+        self.lease_seconds = lease_seconds
+        self.scheduler_id = scheduler_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.shard = shard
+        self.leader_lease_seconds = leader_lease_seconds
+        self.lease_name = f"scheduler:{shard}"
+        # 持有主调度器租约时的令牌，备用时为 None
+        self.leader_token: Optional[int] = None
         self.analyzer = DependencyAnalyzer()
         self.workers = {}
         self.worker_health = {}
+        self.ready_queue = ReadyQueue()
+        # 就绪队列已同步到的任务版本号（见 StateManager.get_task_changes）
+        self._task_version = 0
+        self._lock = threading.RLock()
+        # 调度请求（事件驱动模式）和停止信号
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
     
-    def register_worker(self, worker_id: str) -> bool:
-        """注册Worker
+    @_synchronized
+    def register_worker(self, worker_id: str, capacity: int = 1, weight: float = 1.0) -> bool:
+        """注册Worker（写入共享注册表，归属本调度器的分片）
         
         Args:
             worker_id: Worker标识ID
+            capacity: 槽位数（可同时执行的任务量，high 复杂度任务占用更多槽位）
+            weight: 权重（机器规格，相同槽位占用下权重大的Worker负载更低）
             
         Returns:
-            是否注册成功
+            是否注册成功（本调度器已管理该Worker时返回 False）
+            
+        Raises:
+            ValueError: 容量或权重不是正数
         """
-        if worker_id not in self.workers:
-            self.workers[worker_id] = {
-                'id': worker_id,
-                'status': 'idle',
-                'current_task': None,
-                'completed_tasks': 0,
-                'failed_tasks': 0,
-            }
-            self.worker_health[worker_id] = {
-                'last_heartbeat': datetime.now(),
-                'is_alive': True,
-            }
-            return self.state_manager.register_worker(worker_id)
-        return False
+        if worker_id in self.workers:
+            return False
+        
+        self.ready_queue.add_worker(worker_id, capacity=capacity, weight=weight)
+        self.state_manager.register_worker(worker_id, capacity=capacity, weight=weight, shard=self.shard)
+        self._cache_worker({
+            'id': worker_id,
+            'status': 'idle',
+            'capacity': capacity,
+            'weight': weight,
+            'tasks_completed': 0,
+            'tasks_failed': 0,
+            'last_heartbeat': datetime.now(),
+        })
+        self.request_schedule()
+        return True
+    
+    def _cache_worker(self, row: Dict) -> None:
+        """把注册表中的一行写入缓存（已缓存时只更新注册信息和心跳）"""
+        worker_id = row['id']
+        worker = self.workers.setdefault(worker_id, {
+            'id': worker_id,
+            # 执行中的任务：task_id -> {'fencing_token', 'slots'}
+            'tasks': {},
+        })
+        worker.update({
+            'status': row['status'] or 'idle',
+            'capacity': row['capacity'],
+            'weight': row['weight'],
+            'completed_tasks': row['tasks_completed'],
+            'failed_tasks': row['tasks_failed'],
+        })
+        self.worker_health[worker_id] = {
+            'last_heartbeat': row['last_heartbeat'] or datetime.now(),
+            'is_alive': True,
+        }
+    
+    def _uncache_worker(self, worker_id: str) -> None:
+        del self.workers[worker_id]
+        del self.worker_health[worker_id]
+        self.ready_queue.remove_worker(worker_id)
     
+    @_synchronized
     def unregister_worker(self, worker_id: str) -> bool:
         """注销Worker
         
@@ -69,48 +175,78 @@ class TaskScheduler:
         """
         if worker_id in self.workers:
             # 如果有任务在执行，标记为待分配
-            if self.workers[worker_id]['current_task']:
-                task_id = self.workers[worker_id]['current_task']
-                self.state_manager.update_task_status(task_id, TaskStatus.PENDING)
+            self._release_tasks(worker_id)
             
-            del self.workers[worker_id]
-            del self.worker_health[worker_id]
+            self.state_manager.unregister_worker(worker_id)
+            self._uncache_worker(worker_id)
             return True
         return False
     
-    def get_worker_load(self, worker_id: str) -> int:
-        """获取Worker的负载（当前执行的任务数）
+    @_synchronized
+    def load_workers(self) -> None:
+        """从数据库同步本分片的 Worker 注册表、心跳和执行中的分配
+        
+        新调度器接管（或进程重启）时据此恢复执行中的任务及其令牌，
+        不会把仍在执行的Worker当作空闲重复分配。
+        """
+        rows = self.state_manager.list_workers(self.shard)
+        registered = {row['id'] for row in rows}
+        for worker_id in [w for w in self.workers if w not in registered]:
+            self._uncache_worker(worker_id)
+        for row in rows:
+            self.ready_queue.add_worker(row['id'], capacity=row['capacity'], weight=row['weight'])
+            self._cache_worker(row)
+        
+        held: Dict[str, Dict[str, Dict]] = {}
+        for assignment in self.state_manager.list_assignments(self.shard):
+            held.setdefault(assignment['worker_id'], {})[assignment['task_id']] = {
+                'fencing_token': assignment['fencing_token'],
+                'slots': assignment['slots'],
+            }
+        for worker_id, worker in self.workers.items():
+            current, latest = worker['tasks'], held.get(worker_id, {})
+            for task_id, entry in current.items():
+                if latest.get(task_id) != entry:
+                    self.ready_queue.release_slots(worker_id, entry['slots'])
+            for task_id, entry in latest.items():
+                if current.get(task_id) != entry:
+                    self.ready_queue.acquire_slots(worker_id, entry['slots'], force=True)
+            worker['tasks'] = latest
+    
+    def get_worker_load(self, worker_id: str) -> float:
+        """获取Worker的加权负载
         
         Args:
             worker_id: Worker标识ID
             
         Returns:
-            负载值
+            负载值：已用槽位 / (容量 × 权重)
         """
-        if worker_id in self.workers:
-            return 1 if self.workers[worker_id]['current_task'] else 0
-        return 0
+        return self.ready_queue.worker_load(worker_id)
+    
+    def get_worker_utilization(self, worker_id: str) -> float:
+        """获取Worker的槽位利用率
+        
+        Args:
+            worker_id: Worker标识ID
+            
+        Returns:
+            已用槽位 / 容量（0~1）
+        """
+        used, capacity = self.ready_queue.worker_slots(worker_id)
+        return used / capacity if capacity else 0.0
     
     def find_best_worker(self) -> Optional[str]:
-        """找出负载最低的可用Worker
+        """找出负载最低的可用Worker（按加权负载索引，O(log n)）
         
         Args:
             
         Returns:
             Worker ID，如果没有可用Worker返回None
         """
-        best_worker = None
-        min_load = float('inf')
-        
-        for worker_id in self.workers:
-            if self.is_worker_healthy(worker_id):
-                load = self.get_worker_load(worker_id)
-                if load < min_load:
-                    min_load = load
-                    best_worker = worker_id
-        
-        return best_worker
+        return self.ready_queue.least_loaded_worker()
     
+    @_synchronized
     def assign_task(self, task: Task, worker_id: str) -> bool:
         """为Worker分配任务
         
@@ -119,23 +255,56 @@ class TaskScheduler:
             worker_id: Worker标识ID
             
         Returns:
-            是否分配成功
+            是否分配成功（Worker 槽位不足、任务已被认领或不属于本分片时失败）
         """
         if worker_id not in self.workers:
             return False
         
-        # 更新任务状态
-        task.assigned_to = worker_id
-        task.assigned_at = datetime.now()
+        slots = self.ready_queue.acquire_slots(worker_id, task_slots(task.complexity))
+        if not slots:
+            return False
         
-        success = self.state_manager.update_task_status(task.id, TaskStatus.IN_PROGRESS)
+        # 原子认领：任务已被其他调度器/Worker 认领时失败
+        claim = self.state_manager.claim_task(
+            worker_id, task_id=task.id, lease_seconds=self.lease_seconds, slots=slots, shard=self.shard
+        )
+        if claim is None:
+            self.ready_queue.release_slots(worker_id, slots)
+            return False
         
-        if success:
-            self.workers[worker_id]['current_task'] = task.id
-            return True
+        task.assigned_to = worker_id
+        task.assigned_at = datetime.now()
+        self._on_claimed(task.id, worker_id, claim, slots)
+        return True
+    
+    def _on_claimed(self, task_id: str, worker_id: str, claim: Dict, slots: int) -> None:
+        """认领成功后记录Worker持有的任务，更新就绪队列"""
+        self.workers[worker_id]['tasks'][task_id] = {
+            'fencing_token': claim['fencing_token'],
+            'slots': slots,
+        }
+        self.ready_queue.set_status(task_id, TaskStatus.IN_PROGRESS)
+    
+    def _drop_task(self, worker_id: str, task_id: str) -> Optional[int]:
+        """Worker 不再持有任务，释放槽位
         
-        return False
+        Returns:
+            任务的 fencing token，Worker 未持有该任务时返回 None
+        """
+        held = self.workers[worker_id]['tasks'].pop(task_id, None)
+        if held is None:
+            return None
+        self.ready_queue.release_slots(worker_id, held['slots'])
+        self.request_schedule()
+        return held['fencing_token']
+    
+    def _release_tasks(self, worker_id: str) -> None:
+        """把Worker持有的任务放回待分配（令牌失效时说明任务已被回收，不做修改）"""
+        for task_id in list(self.workers[worker_id]['tasks']):
+            token = self._drop_task(worker_id, task_id)
+            self.state_manager.update_task_status(task_id, TaskStatus.PENDING, fencing_token=token)
     
+    @_synchronized
     def complete_task(self, task_id: str, worker_id: str, success: bool) -> bool:
         """标记任务完成
         
@@ -151,17 +320,20 @@ class TaskScheduler:
             return False
         
         # 更新Worker状态
-        self.workers[worker_id]['current_task'] = None
+        worker = self.workers[worker_id]
+        token = self._drop_task(worker_id, task_id)
         
+        self.state_manager.record_worker_result(worker_id, success)
         if success:
-            self.workers[worker_id]['completed_tasks'] += 1
-            return self.state_manager.update_task_status(task_id, TaskStatus.REVIEW)
+            worker['completed_tasks'] += 1
+            return self.state_manager.update_task_status(task_id, TaskStatus.REVIEW, fencing_token=token)
         else:
-            self.workers[worker_id]['failed_tasks'] += 1
-            return self.state_manager.update_task_status(task_id, TaskStatus.FAILED)
+            worker['failed_tasks'] += 1
+            return self.state_manager.update_task_status(task_id, TaskStatus.FAILED, fencing_token=token)
     
+    @_synchronized
     def heartbeat(self, worker_id: str) -> bool:
-        """接收Worker的心跳信号
+        """接收Worker的心跳信号（同时为其持有的任务续约）
         
         Args:
             worker_id: Worker标识ID
@@ -172,8 +344,22 @@ class TaskScheduler:
         if worker_id not in self.worker_health:
             return False
         
-        self.worker_health[worker_id]['last_heartbeat'] = datetime.now()
+        now = datetime.now()
+        self.state_manager.worker_heartbeat(worker_id, now)
+        self.worker_health[worker_id]['last_heartbeat'] = now
         self.worker_health[worker_id]['is_alive'] = True
+        self.ready_queue.set_worker_available(worker_id, True)
+        
+        # 有空闲槽位的Worker可以接收新任务
+        worker = self.workers[worker_id]
+        used, capacity = self.ready_queue.worker_slots(worker_id)
+        if used < capacity:
+            self.request_schedule()
+        
+        for task_id, held in list(worker['tasks'].items()):
+            if not self.state_manager.renew_lease(task_id, held['fencing_token'], self.lease_seconds):
+                # 租约已被回收，任务可能已交给其他Worker
+                self._drop_task(worker_id, task_id)
         return True
     
     def is_worker_healthy(self, worker_id: str, timeout: int = 300) -> bool:
@@ -194,6 +380,7 @@ class TaskScheduler:
         
         return elapsed < timeout
     
+    @_synchronized
     def check_worker_health(self) -> Dict[str, bool]:
         """检查所有Worker的健康状态
         
@@ -206,90 +393,259 @@ class TaskScheduler:
             is_healthy = self.is_worker_healthy(worker_id)
             health_status[worker_id] = is_healthy
             
-            if not is_healthy and self.workers[worker_id]['current_task']:
-                # Worker不健康且有任务在执行，释放任务
-                task_id = self.workers[worker_id]['current_task']
-                self.state_manager.update_task_status(task_id, TaskStatus.PENDING)
-                self.workers[worker_id]['current_task'] = None
+            # 不健康的Worker不再参与分配（心跳恢复后重新参与），释放其持有的任务
+            self.ready_queue.set_worker_available(worker_id, is_healthy)
+            if not is_healthy:
+                self._release_tasks(worker_id)
         
         return health_status
     
+    @_synchronized
+    def reap_expired_leases(self) -> List[str]:
+        """回收租约过期的任务（包括其他进程中已崩溃的Worker认领的任务）
+        
+        Returns:
+            被放回待分配的任务ID列表
+        """
+        reaped = set(self.state_manager.reap_expired_leases())
+        for worker_id, worker in self.workers.items():
+            for task_id in reaped.intersection(worker['tasks']):
+                self._drop_task(worker_id, task_id)
+        return sorted(reaped)
+    
+    @_synchronized
+    def sync_ready_queue(self) -> int:
+        """把上次同步以来变更的任务应用到就绪队列
+        
+        首次调用（或数据库被重建）时全量加载，之后只读取变更的任务。
+        只同步本分片的任务；其他分片中已完成或被本分片依赖的任务也会同步，只用于判断
+        跨分片依赖（按阻塞处理，不参与分配），依赖离开已完成状态时同样会收到变更。
+        
+        Returns:
+            本次应用的变更数（修改 + 删除）
+        """
+        changes = self.state_manager.get_task_changes(
+            self._task_version, fields=READY_QUEUE_FIELDS, raw=True, shard=self.shard
+        )
+        if changes["reset"]:
+            self.ready_queue.clear_tasks()
+        
+        for task_id, status, priority, estimated_hours, depends_on, complexity, project_id in changes["changed"]:
+            if (project_id or DEFAULT_SHARD) != self.shard and status != TaskStatus.COMPLETED.value:
+                status = TaskStatus.BLOCKED.value
+            self.ready_queue.upsert_task(
+                task_id, status, priority, estimated_hours,
+                json.loads(depends_on) if depends_on else (), complexity
+            )
+        for task_id in changes["deleted"]:
+            self.ready_queue.remove_task(task_id)
+        
+        self._task_version = changes["version"]
+        return len(changes["changed"]) + len(changes["deleted"])
+    
+    @_synchronized
     def schedule_tasks(self) -> Dict[str, List[str]]:
         """执行一轮任务调度
         
         Returns:
-            调度结果 {worker_id: [task_ids]}
+            调度结果 {worker_id: [task_ids]}，备用调度器返回空字典
         """
-        # 检查Worker健康状态
+        # 只有主调度器分配任务；刚接管时从数据库恢复 Worker 和执行中的分配
+        if not self.acquire_leadership():
+            return {}
+        self.load_workers()
+        
+        # 检查Worker健康状态，回收租约过期的任务
         self.check_worker_health()
+        self.reap_expired_leases()
         
-        # 获取所有任务
-        all_tasks = self.state_manager.list_all_tasks()
+        # 同步任务变更，依赖计数和就绪堆随之局部更新
+        self.sync_ready_queue()
         
-        # 获取已完成的任务ID集合
-        completed_ids = set(
-            t.id for t in all_tasks if t.status == TaskStatus.COMPLETED
-        )
+        # 每次取出优先级最高的就绪任务和放得下它的负载最低的Worker，O(log n)
+        assignments = {}
+        # 认领失败的任务，本轮结束后按数据库中的最新状态放回就绪队列
+        refused = []
         
-        # 获取可执行的任务
-        executable_tasks = self.analyzer.get_executable_tasks(all_tasks, completed_ids)
-        
-        # 过滤未分配的任务
-        unassigned_tasks = [
-            t for t in all_tasks
-            if t.id in executable_tasks and t.status == TaskStatus.PENDING
-        ]
-        
-        # 按优先级排序
-        unassigned_tasks.sort(
-            key=lambda t: (
-                0 if (t.priority.value if hasattr(t.priority, 'value') else t.priority) == 'P0' else
-                1 if (t.priority.value if hasattr(t.priority, 'value') else t.priority) == 'P1' else
-                2,
-                -t.estimated_hours  # 优先分配工时长的任务
+        while True:
+            picked = self.ready_queue.pop_assignment()
+            if picked is None:
+                break  # 没有就绪任务或可用槽位
+            
+            task_id, worker_id, slots = picked
+            claim = self.state_manager.claim_task(
+                worker_id, task_id=task_id, lease_seconds=self.lease_seconds, slots=slots,
+                leader=(self.lease_name, self.leader_token), shard=self.shard
             )
-        )
+            if claim is None:
+                if not self._still_leader():
+                    # 租约已被其他调度器接管，停止分配
+                    self.ready_queue.release_assignment(task_id, worker_id, slots)
+                    break
+                # 已被其他调度器/Worker 认领，或就绪队列与数据库不一致（如依赖状态）
+                self.ready_queue.release_assignment(task_id, worker_id, slots, task_available=False)
+                refused.append(task_id)
+                continue
+            
+            self._on_claimed(task_id, worker_id, claim, slots)
+            assignments.setdefault(worker_id, []).append(task_id)
+        
+        # 仍待分配的任务不会再产生变更，按最新的状态和依赖放回，下一轮重试
+        for task_id in refused:
+            task = self.state_manager.get_task(task_id)
+            if task is None:
+                self.ready_queue.remove_task(task_id)
+            else:
+                self.ready_queue.upsert_task(
+                    task.id, task.status, task.priority, task.estimated_hours, task.depends_on, task.complexity
+                )
         
-        # 调度任务
-        assignments = {}
+        return assignments
+    
+    # ========================================================================
+    # 分配计划
+    # ========================================================================
+    
+    @_synchronized
+    def build_plan(
+        self,
+        refine: bool = True,
+        max_iterations: int = DEFAULT_REFINE_ITERATIONS,
+        time_budget: Optional[float] = None
+    ) -> Optional[SchedulePlan]:
+        """按健康 Worker 的容量为本分片的未完成任务生成关键路径优先的分时分配计划
         
-        for task in unassigned_tasks:
-            worker_id = self.find_best_worker()
+        执行中的任务固定在其 Worker 上、从时刻 0 开始。
+        
+        Args:
+            refine: 是否执行前向-后向改进
+            max_iterations: 局部搜索最多轮数
+            time_budget: 局部搜索的时间预算（秒）
             
-            if worker_id is None:
-                break  # 没有可用Worker
+        Returns:
+            SchedulePlan，没有健康 Worker 时返回 None
             
-            if self.assign_task(task, worker_id):
-                if worker_id not in assignments:
-                    assignments[worker_id] = []
-                assignments[worker_id].append(task.id)
+        Raises:
+            ValueError: 存在循环依赖
+        """
+        capacities = {
+            worker_id: worker['capacity']
+            for worker_id, worker in self.workers.items() if self.is_worker_healthy(worker_id)
+        }
+        if not capacities:
+            return None
+        
+        tasks = []
+        pinned = {}
+        for row in self.state_manager.query_tasks(status=PLAN_STATUSES, fields=PLAN_FIELDS, shard=self.shard):
+            tasks.append(SimpleNamespace(
+                id=row['id'], priority=row['priority'], estimated_hours=row['estimated_hours'],
+                depends_on=row['depends_on'] or [], complexity=row['complexity']
+            ))
+            if row['status'] == TaskStatus.IN_PROGRESS.value and row['assigned_to'] in capacities:
+                pinned[row['id']] = row['assigned_to']
+        
+        return ListSchedulingPlanner(capacities).plan(
+            tasks, pinned=pinned, refine=refine, max_iterations=max_iterations, time_budget=time_budget
+        )
+    
+    @_synchronized
+    def follow_plan(self, plan: Optional[SchedulePlan]) -> None:
+        """之后的调度按计划的开始时间顺序分配计划内的任务（None 恢复按优先级分配）
         
-        return assignments
+        只改变就绪任务的出队顺序，Worker 仍按负载选择；计划外的新任务排在计划内任务之后。
+        """
+        self.ready_queue.set_ranks(plan.ranks() if plan is not None else None)
+        self.request_schedule()
+    
+    # ========================================================================
+    # 选主
+    # ========================================================================
+    
+    @property
+    def is_leader(self) -> bool:
+        """是否持有主调度器租约（以最近一次获取/续约为准）"""
+        return self.leader_token is not None
+    
+    @_synchronized
+    def acquire_leadership(self) -> bool:
+        """获取或续约本分片的主调度器租约
+        
+        Returns:
+            是否为主调度器
+        """
+        token = self.state_manager.acquire_lease(
+            self.lease_name, self.scheduler_id, self.leader_lease_seconds
+        )
+        if token is None:
+            if self.leader_token is not None:
+                print(f"[Scheduler] ⚠️ {self.scheduler_id} 失去主调度器租约，转为备用")
+            self.leader_token = None
+            return False
+        
+        if token != self.leader_token:
+            print(f"[Scheduler] 👑 {self.scheduler_id} 成为分片 {self.shard} 的主调度器 (令牌 {token})")
+            self.leader_token = token
+        return True
     
+    @_synchronized
+    def release_leadership(self) -> None:
+        """主动释放主调度器租约，备用调度器无需等待租约过期即可接管"""
+        if self.leader_token is not None:
+            self.state_manager.release_lease(self.lease_name, self.scheduler_id)
+            self.leader_token = None
+    
+    def _still_leader(self) -> bool:
+        """认领失败时确认租约是否仍由本调度器以当前令牌持有"""
+        lease = self.state_manager.get_lease(self.lease_name)
+        if (
+            lease is None or lease['holder'] != self.scheduler_id or lease['token'] != self.leader_token
+            or lease['expires_at'] < datetime.now().isoformat()
+        ):
+            self.leader_token = None
+            return False
+        return True
+    
+    @_synchronized
     def get_system_stats(self) -> Dict:
         """获取系统统计信息
         
         Returns:
             系统统计字典
         """
-        all_tasks = self.state_manager.list_all_tasks()
+        counts = self.state_manager.get_status_counts()
+        slots = {w: self.ready_queue.worker_slots(w) for w in self.workers}
+        total_capacity = sum(capacity for _, capacity in slots.values())
         
         stats = {
+            'scheduler_id': self.scheduler_id,
+            'shard': self.shard,
+            'is_leader': self.is_leader,
             'total_workers': len(self.workers),
             'healthy_workers': sum(1 for w in self.workers if self.is_worker_healthy(w)),
-            'idle_workers': sum(1 for w in self.workers if not self.workers[w]['current_task']),
-            'total_tasks': len(all_tasks),
-            'pending_tasks': len([t for t in all_tasks if t.status == TaskStatus.PENDING]),
-            'in_progress_tasks': len([t for t in all_tasks if t.status == TaskStatus.IN_PROGRESS]),
-            'completed_tasks': len([t for t in all_tasks if t.status == TaskStatus.COMPLETED]),
-            'failed_tasks': len([t for t in all_tasks if t.status == TaskStatus.FAILED]),
+            'idle_workers': sum(1 for w in self.workers if not self.workers[w]['tasks']),
+            'total_slots': total_capacity,
+            'used_slots': sum(used for used, _ in slots.values()),
+            'utilization': (
+                round(sum(used for used, _ in slots.values()) / total_capacity, 4) if total_capacity else 0.0
+            ),
+            'total_tasks': sum(counts.values()),
+            'pending_tasks': counts.get(TaskStatus.PENDING.value, 0),
+            'in_progress_tasks': counts.get(TaskStatus.IN_PROGRESS.value, 0),
+            'completed_tasks': counts.get(TaskStatus.COMPLETED.value, 0),
+            'failed_tasks': counts.get(TaskStatus.FAILED.value, 0),
             'worker_stats': {}
         }
         
         for worker_id, worker in self.workers.items():
             stats['worker_stats'][worker_id] = {
                 'status': worker['status'],
-                'current_task': worker['current_task'],
+                'current_tasks': sorted(worker['tasks']),
+                'capacity': worker['capacity'],
+                'weight': worker['weight'],
+                'used_slots': slots[worker_id][0],
+                'utilization': round(self.get_worker_utilization(worker_id), 4),
+                'load': round(self.get_worker_load(worker_id), 4),
                 'completed_tasks': worker['completed_tasks'],
                 'failed_tasks': worker['failed_tasks'],
                 'is_healthy': self.is_worker_healthy(worker_id),
@@ -297,30 +653,89 @@ class TaskScheduler:
         
         return stats
     
-    def start_scheduling_loop(self, interval: int = 10) -> None:
-        """启动调度循环
+    # ========================================================================
+    # 调度循环
+    # ========================================================================
+    
+    def request_schedule(self) -> None:
+        """请求尽快执行一轮调度（事件驱动模式下唤醒调度循环，多次请求合并为一轮）"""
+        self._wakeup.set()
+    
+    def _on_task_event(self, event: str, task_ids: List[str], status: Optional[str]) -> None:
+        """StateManager 任务事件：任务进入执行中不会产生新的可分配工作，其余事件触发调度"""
+        if event == TASK_EVENT_STATUS and status == TaskStatus.IN_PROGRESS.value:
+            return
+        self.request_schedule()
+    
+    def _wait_for_trigger(self, interval: float, debounce: float) -> bool:
+        """等待调度请求，最长 interval 秒（兜底轮询）
+        
+        Returns:
+            是否由事件触发（False 表示兜底超时或停止）
+        """
+        triggered = self._wakeup.wait(interval)
+        if triggered and debounce > 0:
+            # 抖动窗口：首个事件后再等 debounce 秒，窗口内的后续事件并入同一轮
+            self._stop_event.wait(debounce)
+        # 先清除再调度：调度期间到达的事件会让下一次等待立即返回
+        self._wakeup.clear()
+        return triggered and not self._stop_event.is_set()
+    
+    def stop(self) -> None:
+        """停止调度循环（可从其他线程调用）"""
+        self._stop_event.set()
+        self._wakeup.set()
+    
+    def start_scheduling_loop(
+        self,
+        interval: int = 10,
+        event_driven: bool = False,
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        on_assignments: Optional[Callable[[Dict[str, List[str]]], None]] = None
+    ) -> None:
+        """启动调度循环（阻塞，直到 stop() 或 Ctrl+C）
         
         Args:
-            interval: 调度间隔（秒）
+            interval: 调度间隔（秒）；事件驱动模式下为兜底轮询间隔
+            event_driven: 是否由任务事件和Worker心跳触发调度
+            debounce: 事件驱动模式的抖动窗口（秒）
+            on_assignments: 每轮有分配时的回调，默认打印分配结果
         """
-        print(f"[Scheduler] 🚀 启动任务调度循环 (间隔 {interval}秒)...")
+        mode = f"事件驱动, 兜底间隔 {interval}秒" if event_driven else f"间隔 {interval}秒"
+        print(f"[Scheduler] 🚀 启动任务调度循环 ({mode})...")
+        
+        self._stop_event.clear()
+        if event_driven:
+            self.state_manager.add_task_listener(self._on_task_event)
         
         try:
-            while True:
+            triggered = False
+            while not self._stop_event.is_set():
                 # 执行一轮调度
                 assignments = self.schedule_tasks()
                 
                 if assignments:
-                    print(f"[Scheduler] 📍 本轮分配:")
-                    for worker_id, task_ids in assignments.items():
-                        print(f"  - {worker_id}: {', '.join(task_ids)}")
+                    if on_assignments is not None:
+                        on_assignments(assignments)
+                    else:
+                        print(f"[Scheduler] 📍 本轮分配:")
+                        for worker_id, task_ids in assignments.items():
+                            print(f"  - {worker_id}: {', '.join(task_ids)}")
                 
-                # 打印系统状态
-                stats = self.get_system_stats()
-                print(f"[Scheduler] 📊 系统状态: {stats['completed_tasks']}/{stats['total_tasks']} 任务完成")
+                # 打印系统状态（事件触发的轮次不打印，避免高频输出）
+                if not triggered:
+                    stats = self.get_system_stats()
+                    print(f"[Scheduler] 📊 系统状态: {stats['completed_tasks']}/{stats['total_tasks']} 任务完成")
                 
                 # 等待下一轮
-                time.sleep(interval)
+                if event_driven:
+                    triggered = self._wait_for_trigger(interval, debounce)
+                else:
+                    self._stop_event.wait(interval)
         
         except KeyboardInterrupt:
             print(f"[Scheduler] ⏹️  停止调度循环")
+        finally:
+            if event_driven:
+                self.state_manager.remove_task_listener(self._on_task_event)
+            self.release_leadership()
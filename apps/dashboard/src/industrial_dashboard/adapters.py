@@ -3,9 +3,11 @@
 
 提供开箱即用的适配器，支持快速集成
 """
-from typing import List
+from typing import Any, Dict, List, Optional
+from collections import Counter
 import json
 from pathlib import Path
+from types import SimpleNamespace
 from .data_provider import DataProvider, TaskData, StatsData
 
 
@@ -34,6 +36,8 @@ class StateManagerAdapter(DataProvider):
             state_manager: StateManager 实例
         """
         self.sm = state_manager
+        # 依赖分析结果缓存（按任务版本号，首次使用时创建）
+        self._analyzer = None
         self.completions_file = Path("automation-data/task_completions.json")
         self._load_completions()
     
@@ -45,68 +49,145 @@ class StateManagerAdapter(DataProvider):
         else:
             self.completions = {}
     
+    # 任务列表投影的列（Dashboard 轮询只需这些，不构造 Task 模型）
+    TASK_FIELDS = (
+        "id", "title", "description", "status", "priority",
+        "complexity", "estimated_hours", "created_at", "assigned_to"
+    )
+    
     def get_stats(self) -> StatsData:
         """获取统计数据"""
-        all_tasks = self.sm.list_all_tasks()
+        # 触发器维护的状态计数 + 版本号缓存，代价与任务数无关
+        counts = Counter()
+        for status, count in self.sm.get_status_counts().items():
+            counts[str(status).lower()] += count
         
         return StatsData(
-            total_tasks=len(all_tasks),
-            pending_tasks=len([
-                t for t in all_tasks 
-                if str(t.status).lower() == 'pending'
-            ]),
-            in_progress_tasks=len([
-                t for t in all_tasks 
-                if str(t.status).lower() == 'in_progress'
-            ]),
-            completed_tasks=len([
-                t for t in all_tasks 
-                if str(t.status).lower() == 'completed'
-            ]),
-            review_tasks=len([
-                t for t in all_tasks 
-                if str(t.status).lower() == 'review'
-            ]),
-            failed_tasks=len([
-                t for t in all_tasks 
-                if str(t.status).lower() == 'failed'
-            ])
+            total_tasks=sum(counts.values()),
+            pending_tasks=counts['pending'],
+            in_progress_tasks=counts['in_progress'],
+            completed_tasks=counts['completed'],
+            review_tasks=counts['review'],
+            failed_tasks=counts['failed']
         )
     
     def get_tasks(self) -> List[TaskData]:
         """获取任务列表"""
-        all_tasks = self.sm.list_all_tasks()
+        rows = self.sm.query_tasks(fields=self.TASK_FIELDS, raw=True)
+        return [self._row_to_task_data(row) for row in rows]
+    
+    def get_task_changes(self, since: int = 0) -> Dict[str, Any]:
+        """获取自 since 版本以来的任务变更（基于 tasks.version）"""
+        changes = self.sm.get_task_changes(since, fields=self.TASK_FIELDS, raw=True)
+        changes["changed"] = [self._row_to_task_data(row) for row in changes["changed"]]
+        return changes
+    
+    # 交付预测需要的列
+    FORECAST_FIELDS = (
+        "id", "title", "status", "depends_on", "estimated_hours", "actual_hours", "complexity"
+    )
+    
+    def get_forecast(self, trials: int = 2000, seed: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """蒙特卡洛交付预测（用已完成任务的实际工时校准）"""
+        from automation.forecast import forecast_tasks
         
-        result = []
-        for task in all_tasks:
-            # 提取状态
-            status = str(task.status).split('.')[-1].lower() if hasattr(task.status, 'name') else str(task.status).lower()
-            
-            # 提取优先级
-            priority = str(task.priority).split('.')[-1] if hasattr(task.priority, 'name') else str(task.priority)
-            
-            # 获取完成详情
-            completion = self.completions.get(task.id, {})
-            
-            task_data = TaskData(
-                id=task.id,
-                title=task.title,
-                description=task.description or "",
-                status=status,
-                priority=priority,
-                complexity=task.complexity or "medium",
-                estimated_hours=task.estimated_hours or 0.0,
-                created_at=task.created_at.isoformat() if task.created_at else None,
-                assigned_to=task.assigned_to
+        # 先读版本号再读任务：查询期间的写入只会让结果比版本号新，不会缓存过期结果
+        version = self.sm.get_task_version()
+        tasks = [
+            SimpleNamespace(
+                id=row["id"],
+                title=row["title"],
+                status=str(row["status"]).lower(),
+                depends_on=row["depends_on"],
+                estimated_hours=row["estimated_hours"] or 1.0,
+                actual_hours=row["actual_hours"] or self._completion_hours(row["id"]),
+                complexity=row["complexity"] or "medium"
             )
-            
-            # 添加完成详情到描述中（JSON格式）
-            if completion:
-                task_data.description = json.dumps(completion, ensure_ascii=False)
-            
-            result.append(task_data)
-        
+            for row in self.sm.query_tasks(fields=self.FORECAST_FIELDS)
+        ]
+        return forecast_tasks(
+            tasks, trials=trials, seed=seed, analyzer=self._dependency_analyzer(), version=version
+        )
+    
+    # 依赖分析需要的列
+    DEPENDENCY_FIELDS = ("id", "status", "depends_on", "estimated_hours")
+    
+    def get_dependency_analysis(self) -> Optional[Dict[str, Any]]:
+        """未完成任务的依赖分析（按任务版本号缓存，任务未变化时不再重算）"""
+        version = self.sm.get_task_version()
+        tasks = [
+            SimpleNamespace(
+                id=row["id"],
+                status=str(row["status"]).lower(),
+                depends_on=row["depends_on"],
+                estimated_hours=row["estimated_hours"] or 1.0
+            )
+            for row in self.sm.query_tasks(fields=self.DEPENDENCY_FIELDS)
+            if str(row["status"]).lower() != "completed"
+        ]
+        analyzer = self._dependency_analyzer()
+        return {
+            "version": version,
+            "critical_path": analyzer.get_critical_path(tasks, version=version),
+            "total_hours": analyzer.estimate_total_time(tasks, version=version),
+            "parallel_groups": analyzer.get_parallelizable_groups(tasks, version=version),
+            "cache": analyzer.cache_info()
+        }
+    
+    def bulk_tasks(
+        self,
+        create: List[Dict[str, Any]],
+        update_status: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """批量写入适配器所用的 StateManager（创建失败时不执行更新）"""
+        result: Dict[str, Any] = {"success": True}
+        if create:
+            result["create"] = self.sm.create_tasks(create)
+            if not result["create"]["success"]:
+                result["success"] = False
+                return result
+        if update_status:
+            result["update_status"] = self.sm.update_tasks_status(
+                [(item.get("id"), item.get("status")) for item in update_status]
+            )
+            if not result["update_status"]["success"]:
+                result["success"] = False
         return result
+    
+    def _dependency_analyzer(self):
+        """共享的 CachedDependencyAnalyzer（依赖分析和交付预测共用）"""
+        if self._analyzer is None:
+            from automation.dependency_analyzer import CachedDependencyAnalyzer
+            self._analyzer = CachedDependencyAnalyzer()
+        return self._analyzer
+    
+    def _completion_hours(self, task_id: str) -> Optional[float]:
+        """任务完成详情（task_completions.json）中记录的实际工时"""
+        metrics = self.completions.get(task_id, {}).get("metrics", {})
+        return metrics.get("actual_hours") or None
+    
+    def _row_to_task_data(self, row: tuple) -> TaskData:
+        """TASK_FIELDS 投影的原始元组转换为 TaskData"""
+        (task_id, title, description, status, priority,
+         complexity, estimated_hours, created_at, assigned_to) = row
+        task_data = TaskData(
+            id=task_id,
+            title=title,
+            description=description or "",
+            status=str(status).lower(),
+            priority=priority or "P1",
+            complexity=complexity or "medium",
+            estimated_hours=estimated_hours or 1.0,
+            created_at=created_at,
+            assigned_to=assigned_to
+        )
+        
+        # 添加完成详情到描述中（JSON格式）
+        completion = self.completions.get(task_id, {})
+        if completion:
+            task_data.description = json.dumps(completion, ensure_ascii=False)
+        
+        return task_data
 
 
 class GenericDictAdapter(DataProvider):
@@ -126,6 +126,102 @@ class IndustrialDashboard:
             except Exception as e:
                 return JSONResponse(content={"error": str(e)}, status_code=500)
         
+        @self.app.get("/api/tasks/changes")
+        async def get_task_changes(since: int = 0):
+            """
+            增量获取任务变更（Dashboard 轮询用）
+            
+            Query:
+                since: 上次返回的 version，首次为 0
+            
+            Returns:
+                {"version": 新版本号, "changed": [任务], "deleted": [任务ID], "reset": 是否需丢弃本地数据}
+            """
+            try:
+                changes = self.data_provider.get_task_changes(since)
+                changes["changed"] = [task.to_dict() for task in changes["changed"]]
+                return JSONResponse(content=changes)
+            except Exception as e:
+                return JSONResponse(content={"error": str(e)}, status_code=500)
+        
+        @self.app.get("/api/forecast")
+        def get_forecast(trials: int = 2000, seed: Optional[int] = None):
+            """
+            蒙特卡洛交付预测（CPU 密集，同步路由在线程池中执行，不阻塞事件循环）
+            
+            Query:
+                trials: 试验次数（1~20000）
+                seed: 随机种子，指定时结果可复现
+            
+            Returns:
+                {"percentiles": {"p50", "p80", "p95"}, "completion_dates": {...},
+                 "criticality": [{"task_id", "title", "index"}], "calibration": {...}, ...}
+            """
+            if not 1 <= trials <= 20000:
+                return JSONResponse(content={"error": "trials must be between 1 and 20000"}, status_code=400)
+            try:
+                forecast = self.data_provider.get_forecast(trials=trials, seed=seed)
+                if forecast is None:
+                    return JSONResponse(content={"error": "forecast not supported by data provider"}, status_code=501)
+                return JSONResponse(content=forecast)
+            except ImportError as e:
+                return JSONResponse(content={"error": str(e)}, status_code=503)
+            except ValueError as e:
+                # 循环依赖
+                return JSONResponse(content={"error": str(e)}, status_code=409)
+            except Exception as e:
+                return JSONResponse(content={"error": str(e)}, status_code=500)
+        
+        @self.app.get("/api/dependencies")
+        def get_dependency_analysis():
+            """
+            未完成任务的依赖分析（同步路由在线程池中执行；任务未变化时直接返回缓存结果）
+            
+            Returns:
+                {"version", "critical_path", "total_hours", "parallel_groups",
+                 "cache": {"hits", "misses", "evictions", "size", "maxsize", "hit_rate"}}
+            """
+            try:
+                analysis = self.data_provider.get_dependency_analysis()
+                if analysis is None:
+                    return JSONResponse(
+                        content={"error": "dependency analysis not supported by data provider"}, status_code=501
+                    )
+                return JSONResponse(content=analysis)
+            except ValueError as e:
+                # 循环依赖
+                return JSONResponse(content={"error": str(e)}, status_code=409)
+            except Exception as e:
+                return JSONResponse(content={"error": str(e)}, status_code=500)
+        
+        @self.app.post("/api/tasks/bulk")
+        async def bulk_tasks(request: Request):
+            """
+            批量创建任务 / 批量更新状态（各自单事务，全部成功或全部不写入）
+            
+            Request Body:
+            {
+                "create": [{"id": "task-1", "title": "...", "depends_on": []}],
+                "update_status": [{"id": "task-0", "status": "completed"}]
+            }
+            
+            先创建后更新；创建失败时不执行更新。失败时返回 409 和逐条错误。
+            写入数据提供器所用的数据源（与看板读取的是同一个数据库）。
+            """
+            try:
+                body = await request.json()
+                response = self.data_provider.bulk_tasks(
+                    body.get("create") or [], body.get("update_status") or []
+                )
+                if response is None:
+                    return JSONResponse(
+                        content={"success": False, "error": "bulk writes not supported by data provider"},
+                        status_code=501
+                    )
+                return JSONResponse(content=response, status_code=200 if response["success"] else 409)
+            except Exception as e:
+                return JSONResponse(content={"success": False, "error": str(e)}, status_code=500)
+        
         @self.app.get("/health")
         async def health_check():
             from datetime import datetime
@@ -828,6 +924,9 @@ class IndustrialDashboard:
                         "message": f"任务 {task_id} 不存在或更新失败"
                     }, status_code=404)
                 
+                if actual_hours:
+                    state_manager.record_actual_hours(task_id, float(actual_hours))
+                
                 # 触发 task_completed 事件
                 event_helper = create_event_helper(
                     project_id="TASKFLOW",
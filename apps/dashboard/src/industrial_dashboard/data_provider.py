@@ -4,7 +4,7 @@
 定义了 Dashboard 需要的数据接口，项目只需实现这个接口即可集成
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass
 
@@ -108,4 +108,63 @@ class DataProvider(ABC):
             List[TaskData]: 任务数据列表
         """
         pass
-
+    
+    def get_task_changes(self, since: int = 0) -> Dict[str, Any]:
+        """
+        获取自 since 版本以来的任务变更（增量刷新）
+        
+        默认实现不支持增量，每次返回全量任务并要求客户端重置；
+        支持版本号的数据源应覆盖此方法
+        
+        Args:
+            since: 客户端已同步到的版本号
+        
+        Returns:
+            {"version": int, "changed": List[TaskData], "deleted": List[str], "reset": bool}
+        """
+        return {"version": 0, "changed": self.get_tasks(), "deleted": [], "reset": True}
+    
+    def get_dependency_analysis(self) -> Optional[Dict[str, Any]]:
+        """
+        未完成任务的依赖分析（关键路径、关键路径工时、可并行任务组）
+        
+        默认实现不支持，返回 None；能提供任务依赖的数据源应覆盖此方法
+        
+        Returns:
+            {"version", "critical_path", "total_hours", "parallel_groups", "cache"}，不支持时为 None
+        """
+        return None
+    
+    def get_forecast(self, trials: int = 2000, seed: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        蒙特卡洛交付预测（P50/P80/P95 完成时间、任务关键度）
+        
+        默认实现不支持，返回 None；能提供任务依赖和工时历史的数据源应覆盖此方法
+        
+        Args:
+            trials: 试验次数
+            seed: 随机种子
+        
+        Returns:
+            预测结果（见 automation.forecast.ScheduleForecaster.forecast），不支持时为 None
+        """
+        return None
+    
+    def bulk_tasks(
+        self,
+        create: List[Dict[str, Any]],
+        update_status: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        批量创建任务 / 批量更新状态（各自单事务，先创建后更新）
+        
+        默认实现不支持，返回 None；可写入任务的数据源应覆盖此方法
+        
+        Args:
+            create: 待创建的任务字典列表
+            update_status: [{"id": 任务ID, "status": 新状态}]
+        
+        Returns:
+            {"success": bool, "create": {...}, "update_status": {...}}，不支持时为 None
+        """
+        return None
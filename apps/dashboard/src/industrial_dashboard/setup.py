@@ -16,6 +16,10 @@ setup(
         "fastapi>=0.100.0",
         "uvicorn>=0.20.0",
     ],
+    extras_require={
+        # 蒙特卡洛交付预测（/api/forecast，未安装时返回 503）
+        "forecast": ["numpy>=1.24"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -2615,6 +2615,39 @@ def get_dashboard_html(title: str, subtitle: str, cache_version: str = "v1763481
             </div>
         </div>
         
+        <!-- 交付预测（蒙特卡洛，/api/forecast）-->
+        <div class="features-section" id="forecastSection">
+            <div class="section-header">
+                <span class="section-title">◆ 交付预测</span>
+                <span class="stat-meta" id="forecastMeta">蒙特卡洛模拟</span>
+            </div>
+            <div class="stats-grid" style="margin-top: 16px;">
+                <div class="stat-card">
+                    <div class="stat-label">P50 完成</div>
+                    <div class="stat-value" id="forecastP50" style="font-size: 20px;">—</div>
+                    <div class="stat-meta" id="forecastP50Hours">—</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-label">P80 完成</div>
+                    <div class="stat-value" id="forecastP80" style="font-size: 20px;">—</div>
+                    <div class="stat-meta" id="forecastP80Hours">—</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-label">P95 完成</div>
+                    <div class="stat-value" id="forecastP95" style="font-size: 20px;">—</div>
+                    <div class="stat-meta" id="forecastP95Hours">—</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-label">按预估工时</div>
+                    <div class="stat-value" id="forecastDeterministic" style="font-size: 20px;">—</div>
+                    <div class="stat-meta">Critical Path</div>
+                </div>
+            </div>
+            <div class="features-list" id="forecastCriticalList" style="max-height: 300px; overflow-y: auto; padding: 16px;">
+                <div class="empty-state">加载中...</div>
+            </div>
+        </div>
+        
         <!-- 功能清单模块（3个Tab）-->
         <div class="features-section">
             <div class="section-header">
@@ -3960,9 +3993,51 @@ AI代码管家等待您的提问...
         
         // 自动刷新控制变量
         let autoRefreshEnabled = true;
-        let lastTasksData = null;
         let isUserInteracting = false;
         
+        // 任务增量同步：本地任务表 + 已同步到的版本号（/api/tasks/changes）
+        const taskIndex = new Map();
+        let taskSyncVersion = 0;
+        let taskSyncPromise = null;
+        let taskSynced = false;
+        
+        // 拉取自上次同步以来的变更并合并到本地，返回是否有变化
+        // （首次同步总是视为有变化：空库返回版本 0 且没有变更，视图仍需渲染一次）
+        async function syncTasks() {{
+            // 多个视图同时调用时共用同一次请求
+            if (taskSyncPromise) return taskSyncPromise;
+            taskSyncPromise = (async () => {{
+                const res = await fetch('/api/tasks/changes?since=' + taskSyncVersion + '&_t=' + Date.now());
+                const delta = await res.json();
+                if (delta.error) throw new Error(delta.error);
+                
+                if (delta.reset) taskIndex.clear();
+                delta.deleted.forEach(id => taskIndex.delete(id));
+                delta.changed.forEach(task => taskIndex.set(task.id, task));
+                taskSyncVersion = delta.version;
+                
+                const changed = !taskSynced || delta.reset || delta.changed.length > 0 || delta.deleted.length > 0;
+                taskSynced = true;
+                if (changed) {{
+                    // 与 /api/tasks 相同：按创建时间倒序
+                    allTasksData = Array.from(taskIndex.values())
+                        .sort((a, b) => (b.created_at || '').localeCompare(a.created_at || ''));
+                }}
+                return changed;
+            }})();
+            try {{
+                return await taskSyncPromise;
+            }} finally {{
+                taskSyncPromise = null;
+            }}
+        }}
+        
+        // 获取最新任务列表（增量同步后的本地数据）
+        async function getTasks() {{
+            await syncTasks();
+            return allTasksData;
+        }}
+        
         // 性能监控
         let performanceStats = {{
             refreshCount: 0,
@@ -4002,12 +4077,11 @@ AI代码管家等待您的提问...
                 // 更新状态为加载中
                 updateRefreshStatus('刷新中...', 'loading');
                 
-                // 加载所有任务数据
-                const tasksRes = await fetch('/api/tasks?_t=' + Date.now()); // 添加时间戳避免缓存
-                const newTasksData = await tasksRes.json();
+                // 增量拉取任务变更并合并到本地
+                const changed = await syncTasks();
                 
                 // 检查数据是否有变化（避免不必要的DOM更新）
-                if (lastTasksData && JSON.stringify(lastTasksData) === JSON.stringify(newTasksData)) {{
+                if (!changed) {{
                     console.log('[自动刷新] 数据无变化，跳过UI更新');
                     updateRefreshStatus('自动刷新 5秒', 'active');
                     
@@ -4019,9 +4093,6 @@ AI代码管家等待您的提问...
                 }}
                 
                 // 数据有变化，更新UI
-                allTasksData = newTasksData;
-                lastTasksData = JSON.parse(JSON.stringify(newTasksData)); // 深拷贝
-                
                 // 显示当前版本的数据
                 switchVersion(currentVersion);
                 
@@ -4952,6 +5023,44 @@ AI代码管家等待您的提问...
             }});
         }}
         
+        async function loadForecast() {{
+            try {{
+                const response = await fetch('/api/forecast?trials=2000&seed=42');
+                const data = await response.json();
+                const list = document.getElementById('forecastCriticalList');
+                if (data.error) {{
+                    list.innerHTML = `<div class="empty-state">${{data.error}}</div>`;
+                    return;
+                }}
+                
+                ['p50', 'p80', 'p95'].forEach(p => {{
+                    const key = p.toUpperCase();
+                    document.getElementById('forecast' + key).textContent =
+                        data.completion_dates[p].replace('T', ' ');
+                    document.getElementById('forecast' + key + 'Hours').textContent =
+                        `${{data.percentiles[p]}} 小时`;
+                }});
+                document.getElementById('forecastDeterministic').textContent = `${{data.deterministic_hours}} h`;
+                document.getElementById('forecastMeta').textContent =
+                    `${{data.remaining}} 个未完成任务 · ${{data.trials}} 次模拟`;
+                
+                if (data.criticality.length === 0) {{
+                    list.innerHTML = '<div class="empty-state">暂无未完成任务</div>';
+                    return;
+                }}
+                // 关键度：该任务落在关键路径上的模拟比例
+                list.innerHTML = data.criticality.map(t => `
+                    <div class="feature-item" style="padding: 8px 12px; border-bottom: 1px solid var(--gray-200); display: flex; gap: 12px; align-items: center;">
+                        <span style="font-family: var(--font-mono); font-size: 12px; width: 56px; color: var(--black);">${{(t.index * 100).toFixed(1)}}%</span>
+                        <div style="flex: 1; font-size: 13px;">${{t.title}}</div>
+                        <span style="font-size: 11px; color: var(--gray-600); font-family: var(--font-mono);">${{t.task_id}}</span>
+                    </div>
+                `).join('');
+            }} catch (error) {{
+                console.error('加载交付预测失败:', error);
+            }}
+        }}
+        
         async function loadProjectScan() {{
             try {{
                 const response = await fetch('/api/project_scan');
@@ -5283,8 +5392,7 @@ AI代码管家等待您的提问...
             event.stopPropagation();
             
             try {{
-                const tasksRes = await fetch('/api/tasks');
-                const tasks = await tasksRes.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -5359,8 +5467,7 @@ ${{task.description || '暂无描述'}}
             
             try {{
                 // 获取任务详情
-                const tasksRes = await fetch('/api/tasks');
-                const tasks = await tasksRes.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -5445,8 +5552,7 @@ ${{task.description || '暂无描述'}}
             
             try {{
                 // 获取任务详情
-                const tasksRes = await fetch('/api/tasks');
-                const tasks = await tasksRes.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -5513,8 +5619,7 @@ ${{task.description || '暂无描述'}}
             
             try {{
                 // 获取任务详情
-                const tasksRes = await fetch('/api/tasks');
-                const tasks = await tasksRes.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -5823,8 +5928,7 @@ ${{task.description || '请实现以下功能...'}}
             event.stopPropagation();
             
             try {{
-                const tasksRes = await fetch('/api/tasks');
-                const tasks = await tasksRes.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -5931,8 +6035,7 @@ ${{task.description || '暂无描述'}}
         
         async function loadTodoFeatures() {{
             try {{
-                const response = await fetch('/api/tasks');
-                const tasks = await response.json();
+                const tasks = await getTasks();
                 
                 const count = document.getElementById('todoFeatureCount');
                 
@@ -6083,6 +6186,8 @@ ${{task.description || '暂无描述'}}
             loadCodeIndex('models');
             loadProjectScan();
             setInterval(loadProjectScan, 30000);
+            loadForecast();
+            setInterval(loadForecast, 60000);
             loadTodoFeatures();
             setInterval(loadTodoFeatures, 10000);
             loadDeveloperPrompt();
@@ -6522,8 +6627,7 @@ ${{task.description || '暂无描述'}}
         async function copyTaskPrompt(taskId) {{
             try {{
                 // 获取任务详情
-                const response = await fetch('/api/tasks');
-                const tasks = await response.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -6585,8 +6689,7 @@ ${{task.description || '暂无描述'}}
         async function copyTaskReport(taskId) {{
             try {{
                 // 获取任务详情
-                const response = await fetch('/api/tasks');
-                const tasks = await response.json();
+                const tasks = await getTasks();
                 const task = tasks.find(t => t.id === taskId);
                 
                 if (!task) {{
@@ -0,0 +1,21 @@
+-- ============================================================================
+-- Migration 006: Session Memory 同步状态表
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: 记录每个会话最近一次成功同步到Session Memory的内容哈希，
+--       批量同步时只上传内容发生变化的会话（增量同步）
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS session_memory_sync_state (
+    session_id TEXT PRIMARY KEY,                  -- 会话ID（对话历史库）
+    content_hash TEXT,                            -- 最近一次成功同步的内容哈希（SHA-256）
+    memory_id TEXT,                               -- Session Memory返回的记忆ID
+    synced_at TEXT,                               -- 最近一次成功同步时间
+    attempts INTEGER DEFAULT 0,                   -- 连续失败次数（成功后清零）
+    last_error TEXT,                              -- 最近一次失败原因
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_session_memory_sync_synced ON session_memory_sync_state(synced_at);
+
+-- Migration完成
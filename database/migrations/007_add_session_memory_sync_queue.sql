@@ -0,0 +1,21 @@
+-- ============================================================================
+-- Migration 007: Session Memory 后台同步队列
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: 会话创建/更新事件先进入持久化队列，由后台Worker按会话去抖后批量同步；
+--       服务重启后队列中的会话继续处理
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS session_memory_sync_queue (
+    session_id TEXT PRIMARY KEY,                  -- 会话ID（同一会话只保留一条）
+    enqueued_at REAL NOT NULL,                    -- 首次入队时间（Unix时间戳）
+    last_event_at REAL NOT NULL,                  -- 最近一次事件时间（Unix时间戳）
+    due_at REAL NOT NULL,                         -- 到期时间 = MIN(最近事件+去抖窗口, 首次入队+最长等待)
+    event_count INTEGER DEFAULT 1,                -- 合并的事件数
+    attempts INTEGER DEFAULT 0,                   -- 失败重试次数
+    last_error TEXT                               -- 最近一次失败原因
+);
+
+CREATE INDEX IF NOT EXISTS idx_session_memory_sync_queue_due ON session_memory_sync_queue(due_at);
+
+-- Migration完成
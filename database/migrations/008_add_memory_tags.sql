@@ -0,0 +1,32 @@
+-- ============================================================================
+-- Migration 008: 项目记忆标签索引表
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: project_memories.tags 为JSON字符串，无法走索引过滤。
+--       新增规范化的 memory_tags(memory_id, tag) 表，标签过滤改为索引连接；
+--       并从现有记忆回填标签（依赖 SQLite JSON1 扩展的 json_each）
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS memory_tags (
+    memory_id TEXT NOT NULL,                      -- 记忆ID（project_memories.id）
+    tag TEXT NOT NULL,                            -- 标签（已去除首尾空白）
+    PRIMARY KEY (memory_id, tag),
+    FOREIGN KEY (memory_id) REFERENCES project_memories(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- 按标签查记忆（any-of / all-of 过滤）
+CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags(tag, memory_id);
+
+-- ============================================================================
+-- 回填现有记忆的标签
+-- ============================================================================
+INSERT OR IGNORE INTO memory_tags (memory_id, tag)
+SELECT pm.id, TRIM(t.value)
+FROM project_memories pm, json_each(pm.tags) t
+WHERE pm.tags IS NOT NULL
+  AND json_valid(pm.tags)
+  AND json_type(pm.tags) = 'array'
+  AND t.type = 'text'
+  AND TRIM(t.value) <> '';
+
+-- Migration完成
@@ -0,0 +1,63 @@
+-- ============================================================================
+-- Migration 009: 项目记忆版本号 + 知识继承查询索引
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: 1. project_memories 每次写入（新增/修改/删除）时递增项目的版本号，
+--          知识继承包缓存据此判断是否失效（跨进程写入同样生效）
+--       2. 知识继承包的各部分按 项目+排序键 建复合索引，避免整项目排序
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS memory_versions (
+    project_id TEXT PRIMARY KEY,                  -- 项目ID
+    version INTEGER NOT NULL DEFAULT 0,           -- 记忆版本号（每次写入+1）
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_project_memories_version_insert
+AFTER INSERT ON project_memories
+BEGIN
+    INSERT INTO memory_versions (project_id, version, updated_at)
+    VALUES (NEW.project_id, 1, datetime('now'))
+    ON CONFLICT(project_id) DO UPDATE SET
+        version = version + 1,
+        updated_at = excluded.updated_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_project_memories_version_update
+AFTER UPDATE ON project_memories
+BEGIN
+    INSERT INTO memory_versions (project_id, version, updated_at)
+    VALUES (NEW.project_id, 1, datetime('now'))
+    ON CONFLICT(project_id) DO UPDATE SET
+        version = version + 1,
+        updated_at = excluded.updated_at;
+    -- 记忆被移到其他项目时，原项目同样失效
+    UPDATE memory_versions
+    SET version = version + 1, updated_at = datetime('now')
+    WHERE project_id = OLD.project_id AND OLD.project_id <> NEW.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_project_memories_version_delete
+AFTER DELETE ON project_memories
+BEGIN
+    INSERT INTO memory_versions (project_id, version, updated_at)
+    VALUES (OLD.project_id, 1, datetime('now'))
+    ON CONFLICT(project_id) DO UPDATE SET
+        version = version + 1,
+        updated_at = excluded.updated_at;
+END;
+
+-- ============================================================================
+-- 知识继承查询索引
+-- ============================================================================
+-- 决策/方案：按分类取重要性最高的记忆
+CREATE INDEX IF NOT EXISTS idx_project_memories_category_rank
+    ON project_memories(project_id, category, importance DESC, created_at DESC);
+-- 重要知识：按重要性排序
+CREATE INDEX IF NOT EXISTS idx_project_memories_rank
+    ON project_memories(project_id, importance DESC, created_at DESC);
+-- 最近记忆：按创建时间排序
+CREATE INDEX IF NOT EXISTS idx_project_memories_project_created
+    ON project_memories(project_id, created_at);
+
+-- Migration完成
@@ -0,0 +1,30 @@
+-- ============================================================================
+-- Migration 010: 项目记忆近似重复检测（MinHash-LSH）
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: auto_record_* 反复写入几乎相同的记忆，检索结果和数据库随之膨胀。
+--       为每条记忆保存 MinHash 签名，并按 LSH band 建立分桶键索引；
+--       插入新记忆时只查询同桶的候选，再用签名估计相似度。
+--       签名需在应用层计算，现有记忆通过
+--       ProjectMemoryService.rebuild_memory_signatures() 回填
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS memory_signatures (
+    memory_id TEXT PRIMARY KEY,                   -- 记忆ID（project_memories.id）
+    project_id TEXT NOT NULL,
+    signature BLOB NOT NULL,                      -- MinHash 签名（uint32 数组）
+    duplicate_of TEXT,                            -- 标记模式下：被判定为重复的原记忆ID
+    merge_count INTEGER NOT NULL DEFAULT 0,       -- 合并模式下：合并进来的重复记忆数
+    FOREIGN KEY (memory_id) REFERENCES project_memories(id) ON DELETE CASCADE
+);
+
+-- LSH 分桶：(项目, 分桶键) -> 记忆；只收录非重复记忆，作为后续插入的比对候选
+CREATE TABLE IF NOT EXISTS memory_lsh_buckets (
+    project_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,                      -- band 哈希（63位有符号整数）
+    memory_id TEXT NOT NULL,
+    PRIMARY KEY (project_id, bucket, memory_id),
+    FOREIGN KEY (memory_id) REFERENCES project_memories(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_memory_lsh_buckets_memory ON memory_lsh_buckets(memory_id);
@@ -0,0 +1,44 @@
+-- ============================================================================
+-- Migration 011: 项目记忆预计算排序分（rank_score）
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: 1. 原排序 importance DESC, created_at DESC 使旧的高重要性记忆永远排在前面。
+--          新增 rank_score 列 = 重要性 + 指数时间衰减 + 检索频次的加权和，
+--          由批处理任务（ProjectMemoryService.refresh_rank_scores /
+--          scripts/refresh_memory_rank.py）定期刷新
+--       2. (project_id, rank_score DESC) 索引：Top-K 检索为索引范围扫描
+--       3. 版本号触发器改为只监听内容相关列，刷新排序分不会使知识继承包缓存失效
+-- 注意: ALTER TABLE 不可重复执行；迁移后运行一次 refresh_memory_rank.py
+--       计算完整分数（此处仅按重要性回填近似值）
+-- ============================================================================
+
+ALTER TABLE project_memories ADD COLUMN rank_score REAL NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_project_memories_rank_score
+ON project_memories(project_id, rank_score DESC);
+
+-- 近似回填：只计重要性部分（权重 0.5）
+UPDATE project_memories SET rank_score = 0.5 * COALESCE(importance, 5) / 10.0;
+
+-- ============================================================================
+-- 版本号触发器：排除 rank_score
+-- ============================================================================
+DROP TRIGGER IF EXISTS trg_project_memories_version_update;
+
+CREATE TRIGGER IF NOT EXISTS trg_project_memories_version_update
+AFTER UPDATE OF
+    project_id, memory_type, external_memory_id, category, title, content,
+    context, tags, related_tasks, related_issues, importance, created_by,
+    created_at, updated_at
+ON project_memories
+BEGIN
+    INSERT INTO memory_versions (project_id, version, updated_at)
+    VALUES (NEW.project_id, 1, datetime('now'))
+    ON CONFLICT(project_id) DO UPDATE SET
+        version = version + 1,
+        updated_at = excluded.updated_at;
+    -- 记忆被移到其他项目时，原项目同样失效
+    UPDATE memory_versions
+    SET version = version + 1, updated_at = datetime('now')
+    WHERE project_id = OLD.project_id AND OLD.project_id <> NEW.project_id;
+END;
@@ -0,0 +1,260 @@
+-- ============================================================================
+-- Migration 012: 触发器维护 memory_stats / event_stats
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: 1. 统计计数原先由 Python 在每次插入后读-改-写（_update_memory_stats、
+--          EventStore.update_stats），绕过服务直接写库（迁移脚本、批量导入）
+--          的数据不会计入，且每次插入多出数次往返。
+--          改为在 project_memories / project_events 上的 INSERT、DELETE、
+--          UPDATE 触发器中增量维护，与数据写入处于同一事务
+--       2. 迁移末尾按现有数据重建一次统计；之后如需校正，运行
+--          scripts/rebuild_stats.py（ProjectMemoryService.rebuild_memory_stats /
+--          EventStore.rebuild_stats）
+--       3. events_today / events_this_week / events_this_month 是相对当前时间
+--          的窗口计数，触发器无法随时间衰减，只在重建时计算
+-- 依赖: 003_add_project_memories.sql、004_add_events_tables.sql
+-- ============================================================================
+
+-- ============================================================================
+-- 1. memory_stats
+-- ============================================================================
+-- memory_type -> 分类计数列：session / ultra / decision / solution，
+-- 其他类型只计入 total_memories
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_stats_insert
+AFTER INSERT ON project_memories
+BEGIN
+    INSERT INTO memory_stats (
+        project_id, total_memories, session_memories, ultra_memories,
+        decision_memories, solution_memories, last_updated
+    ) VALUES (
+        NEW.project_id, 1,
+        NEW.memory_type = 'session',
+        NEW.memory_type = 'ultra',
+        NEW.memory_type = 'decision',
+        NEW.memory_type = 'solution',
+        datetime('now')
+    )
+    ON CONFLICT(project_id) DO UPDATE SET
+        total_memories = total_memories + 1,
+        session_memories = session_memories + excluded.session_memories,
+        ultra_memories = ultra_memories + excluded.ultra_memories,
+        decision_memories = decision_memories + excluded.decision_memories,
+        solution_memories = solution_memories + excluded.solution_memories,
+        last_updated = excluded.last_updated;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_stats_delete
+AFTER DELETE ON project_memories
+BEGIN
+    UPDATE memory_stats SET
+        total_memories = total_memories - 1,
+        session_memories = session_memories - (OLD.memory_type = 'session'),
+        ultra_memories = ultra_memories - (OLD.memory_type = 'ultra'),
+        decision_memories = decision_memories - (OLD.memory_type = 'decision'),
+        solution_memories = solution_memories - (OLD.memory_type = 'solution'),
+        last_updated = datetime('now')
+    WHERE project_id = OLD.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_stats_update
+AFTER UPDATE OF project_id, memory_type ON project_memories
+WHEN OLD.project_id IS NOT NEW.project_id OR OLD.memory_type IS NOT NEW.memory_type
+BEGIN
+    UPDATE memory_stats SET
+        total_memories = total_memories - 1,
+        session_memories = session_memories - (OLD.memory_type = 'session'),
+        ultra_memories = ultra_memories - (OLD.memory_type = 'ultra'),
+        decision_memories = decision_memories - (OLD.memory_type = 'decision'),
+        solution_memories = solution_memories - (OLD.memory_type = 'solution'),
+        last_updated = datetime('now')
+    WHERE project_id = OLD.project_id;
+
+    INSERT INTO memory_stats (
+        project_id, total_memories, session_memories, ultra_memories,
+        decision_memories, solution_memories, last_updated
+    ) VALUES (
+        NEW.project_id, 1,
+        NEW.memory_type = 'session',
+        NEW.memory_type = 'ultra',
+        NEW.memory_type = 'decision',
+        NEW.memory_type = 'solution',
+        datetime('now')
+    )
+    ON CONFLICT(project_id) DO UPDATE SET
+        total_memories = total_memories + 1,
+        session_memories = session_memories + excluded.session_memories,
+        ultra_memories = ultra_memories + excluded.ultra_memories,
+        decision_memories = decision_memories + excluded.decision_memories,
+        solution_memories = solution_memories + excluded.solution_memories,
+        last_updated = excluded.last_updated;
+END;
+
+-- ============================================================================
+-- 2. event_stats
+-- ============================================================================
+-- 分类不在 task/issue/decision/deployment 内（如 general）计入 system_events；
+-- 严重性不在 warning/error/critical 内（含 NULL）计入 info_events
+
+CREATE TRIGGER IF NOT EXISTS trg_event_stats_insert
+AFTER INSERT ON project_events
+BEGIN
+    INSERT INTO event_stats (
+        project_id, total_events, task_events, issue_events,
+        decision_events, deployment_events, system_events,
+        info_events, warning_events, error_events, critical_events,
+        last_event_at, last_updated
+    ) VALUES (
+        NEW.project_id, 1,
+        NEW.event_category = 'task',
+        NEW.event_category = 'issue',
+        NEW.event_category = 'decision',
+        NEW.event_category = 'deployment',
+        NEW.event_category NOT IN ('task', 'issue', 'decision', 'deployment'),
+        COALESCE(NEW.severity, 'info') NOT IN ('warning', 'error', 'critical'),
+        COALESCE(NEW.severity = 'warning', 0),
+        COALESCE(NEW.severity = 'error', 0),
+        COALESCE(NEW.severity = 'critical', 0),
+        NEW.occurred_at,
+        datetime('now')
+    )
+    ON CONFLICT(project_id) DO UPDATE SET
+        total_events = total_events + 1,
+        task_events = task_events + excluded.task_events,
+        issue_events = issue_events + excluded.issue_events,
+        decision_events = decision_events + excluded.decision_events,
+        deployment_events = deployment_events + excluded.deployment_events,
+        system_events = system_events + excluded.system_events,
+        info_events = info_events + excluded.info_events,
+        warning_events = warning_events + excluded.warning_events,
+        error_events = error_events + excluded.error_events,
+        critical_events = critical_events + excluded.critical_events,
+        last_event_at = CASE
+            WHEN last_event_at IS NULL OR excluded.last_event_at > last_event_at
+            THEN excluded.last_event_at ELSE last_event_at
+        END,
+        last_updated = excluded.last_updated;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_stats_delete
+AFTER DELETE ON project_events
+BEGIN
+    UPDATE event_stats SET
+        total_events = total_events - 1,
+        task_events = task_events - (OLD.event_category = 'task'),
+        issue_events = issue_events - (OLD.event_category = 'issue'),
+        decision_events = decision_events - (OLD.event_category = 'decision'),
+        deployment_events = deployment_events - (OLD.event_category = 'deployment'),
+        system_events = system_events - (OLD.event_category NOT IN ('task', 'issue', 'decision', 'deployment')),
+        info_events = info_events - (COALESCE(OLD.severity, 'info') NOT IN ('warning', 'error', 'critical')),
+        warning_events = warning_events - COALESCE(OLD.severity = 'warning', 0),
+        error_events = error_events - COALESCE(OLD.severity = 'error', 0),
+        critical_events = critical_events - COALESCE(OLD.severity = 'critical', 0),
+        last_event_at = (SELECT MAX(occurred_at) FROM project_events WHERE project_id = OLD.project_id),
+        last_updated = datetime('now')
+    WHERE project_id = OLD.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_stats_update
+AFTER UPDATE OF project_id, event_category, severity ON project_events
+WHEN OLD.project_id IS NOT NEW.project_id
+    OR OLD.event_category IS NOT NEW.event_category
+    OR OLD.severity IS NOT NEW.severity
+BEGIN
+    UPDATE event_stats SET
+        total_events = total_events - 1,
+        task_events = task_events - (OLD.event_category = 'task'),
+        issue_events = issue_events - (OLD.event_category = 'issue'),
+        decision_events = decision_events - (OLD.event_category = 'decision'),
+        deployment_events = deployment_events - (OLD.event_category = 'deployment'),
+        system_events = system_events - (OLD.event_category NOT IN ('task', 'issue', 'decision', 'deployment')),
+        info_events = info_events - (COALESCE(OLD.severity, 'info') NOT IN ('warning', 'error', 'critical')),
+        warning_events = warning_events - COALESCE(OLD.severity = 'warning', 0),
+        error_events = error_events - COALESCE(OLD.severity = 'error', 0),
+        critical_events = critical_events - COALESCE(OLD.severity = 'critical', 0),
+        last_event_at = (SELECT MAX(occurred_at) FROM project_events WHERE project_id = OLD.project_id),
+        last_updated = datetime('now')
+    WHERE project_id = OLD.project_id;
+
+    INSERT INTO event_stats (
+        project_id, total_events, task_events, issue_events,
+        decision_events, deployment_events, system_events,
+        info_events, warning_events, error_events, critical_events,
+        last_event_at, last_updated
+    ) VALUES (
+        NEW.project_id, 1,
+        NEW.event_category = 'task',
+        NEW.event_category = 'issue',
+        NEW.event_category = 'decision',
+        NEW.event_category = 'deployment',
+        NEW.event_category NOT IN ('task', 'issue', 'decision', 'deployment'),
+        COALESCE(NEW.severity, 'info') NOT IN ('warning', 'error', 'critical'),
+        COALESCE(NEW.severity = 'warning', 0),
+        COALESCE(NEW.severity = 'error', 0),
+        COALESCE(NEW.severity = 'critical', 0),
+        NEW.occurred_at,
+        datetime('now')
+    )
+    ON CONFLICT(project_id) DO UPDATE SET
+        total_events = total_events + 1,
+        task_events = task_events + excluded.task_events,
+        issue_events = issue_events + excluded.issue_events,
+        decision_events = decision_events + excluded.decision_events,
+        deployment_events = deployment_events + excluded.deployment_events,
+        system_events = system_events + excluded.system_events,
+        info_events = info_events + excluded.info_events,
+        warning_events = warning_events + excluded.warning_events,
+        error_events = error_events + excluded.error_events,
+        critical_events = critical_events + excluded.critical_events,
+        last_event_at = (SELECT MAX(occurred_at) FROM project_events WHERE project_id = NEW.project_id),
+        last_updated = excluded.last_updated;
+END;
+
+-- ============================================================================
+-- 3. 按现有数据重建统计
+-- ============================================================================
+
+DELETE FROM memory_stats;
+
+INSERT INTO memory_stats (
+    project_id, total_memories, session_memories, ultra_memories,
+    decision_memories, solution_memories, last_updated
+)
+SELECT
+    project_id,
+    COUNT(*),
+    SUM(memory_type = 'session'),
+    SUM(memory_type = 'ultra'),
+    SUM(memory_type = 'decision'),
+    SUM(memory_type = 'solution'),
+    datetime('now')
+FROM project_memories
+GROUP BY project_id;
+
+DELETE FROM event_stats;
+
+INSERT INTO event_stats (
+    project_id, total_events, events_today, events_this_week, events_this_month,
+    task_events, issue_events, decision_events, deployment_events, system_events,
+    info_events, warning_events, error_events, critical_events,
+    last_event_at, last_updated
+)
+SELECT
+    project_id,
+    COUNT(*),
+    SUM(datetime(occurred_at) >= datetime('now', 'start of day')),
+    SUM(datetime(occurred_at) >= datetime('now', '-7 days')),
+    SUM(datetime(occurred_at) >= datetime('now', 'start of month')),
+    SUM(event_category = 'task'),
+    SUM(event_category = 'issue'),
+    SUM(event_category = 'decision'),
+    SUM(event_category = 'deployment'),
+    SUM(event_category NOT IN ('task', 'issue', 'decision', 'deployment')),
+    SUM(COALESCE(severity, 'info') NOT IN ('warning', 'error', 'critical')),
+    SUM(COALESCE(severity = 'warning', 0)),
+    SUM(COALESCE(severity = 'error', 0)),
+    SUM(COALESCE(severity = 'critical', 0)),
+    MAX(occurred_at),
+    datetime('now')
+FROM project_events
+GROUP BY project_id;
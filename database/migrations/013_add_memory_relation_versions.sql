@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Migration 013: 记忆关系版本号
+-- ============================================================================
+-- 创建时间: 2026-10-19
+-- 说明: memory_relations 每次写入（新增/修改/删除）时递增源记忆所属项目的
+--       关系版本号，进程内缓存的记忆关系图据此判断是否需要重新加载
+--       （其他进程或直接写库新增的关系同样生效）。
+--       删除记忆时关系被级联删除，此时源记忆已不存在、查不到项目，
+--       因此另在 project_memories 的 DELETE 触发器中递增该项目的版本号
+-- 依赖: 003_add_project_memories.sql
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS memory_relation_versions (
+    project_id TEXT PRIMARY KEY,                  -- 项目ID（源记忆所属项目）
+    version INTEGER NOT NULL DEFAULT 0,           -- 关系版本号（每次写入+1）
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_relations_version_insert
+AFTER INSERT ON memory_relations
+WHEN (SELECT project_id FROM project_memories WHERE id = NEW.source_memory_id) IS NOT NULL
+BEGIN
+    INSERT INTO memory_relation_versions (project_id, version, updated_at)
+    VALUES ((SELECT project_id FROM project_memories WHERE id = NEW.source_memory_id), 1, datetime('now'))
+    ON CONFLICT(project_id) DO UPDATE SET
+        version = version + 1,
+        updated_at = excluded.updated_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_relations_version_update
+AFTER UPDATE ON memory_relations
+BEGIN
+    UPDATE memory_relation_versions
+    SET version = version + 1, updated_at = datetime('now')
+    WHERE project_id IN (
+        SELECT project_id FROM project_memories
+        WHERE id IN (OLD.source_memory_id, NEW.source_memory_id)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_memory_relations_version_delete
+AFTER DELETE ON memory_relations
+BEGIN
+    UPDATE memory_relation_versions
+    SET version = version + 1, updated_at = datetime('now')
+    WHERE project_id = (SELECT project_id FROM project_memories WHERE id = OLD.source_memory_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_project_memories_relation_version_delete
+AFTER DELETE ON project_memories
+BEGIN
+    UPDATE memory_relation_versions
+    SET version = version + 1, updated_at = datetime('now')
+    WHERE project_id = OLD.project_id;
+END;
+
+-- Migration完成
@@ -6,7 +6,7 @@
 1. EventEmitter: 发射事件
 2. EventStore: 存储和查询事件
 3. 事件类型管理
-4. 事件统计
+4. 事件统计（event_stats 由数据库触发器维护，见 migration 012；未安装触发器时实时计算）
 """
 
 from typing import List, Dict, Any, Optional
@@ -19,6 +19,10 @@ from contextlib import contextmanager
 from enum import Enum
 
 
+# 维护 event_stats 的触发器（migration 012），存在时统计表才是最新的
+EVENT_STATS_TRIGGER = "trg_event_stats_insert"
+
+
 class EventSeverity(str, Enum):
     """事件严重性枚举"""
     INFO = "info"
@@ -130,12 +134,9 @@ class EventEmitter:
             "created_at": datetime.now().isoformat()
         }
         
-        # 保存事件
+        # 保存事件（event_stats 由触发器在同一事务内更新）
         self.event_store.save(event)
         
-        # 更新统计
-        self.event_store.update_stats(project_id, category, severity)
-        
         return event
     
     def emit_batch(
@@ -502,16 +503,18 @@ class EventStore:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # 尝试从统计表获取
-            cursor.execute("""
-                SELECT * FROM event_stats WHERE project_id = ?
-            """, (project_id,))
-            row = cursor.fetchone()
-            
-            if row:
-                return dict(row)
+            # 统计表只在 migration 012 的触发器存在时随写入更新，
+            # 否则其中的行可能早已过期（只有 migration 004 建的表）
+            if self._stats_triggers_installed(cursor):
+                cursor.execute("""
+                    SELECT * FROM event_stats WHERE project_id = ?
+                """, (project_id,))
+                row = cursor.fetchone()
+                
+                if row:
+                    return dict(row)
             
-            # 如果不存在，实时计算
+            # 统计行不存在或未安装触发器时，实时计算
             cursor.execute("""
                 SELECT 
                     COUNT(*) as total_events,
@@ -519,8 +522,8 @@ class EventStore:
                     SUM(CASE WHEN event_category = 'issue' THEN 1 ELSE 0 END) as issue_events,
                     SUM(CASE WHEN event_category = 'decision' THEN 1 ELSE 0 END) as decision_events,
                     SUM(CASE WHEN event_category = 'deployment' THEN 1 ELSE 0 END) as deployment_events,
-                    SUM(CASE WHEN event_category = 'system' THEN 1 ELSE 0 END) as system_events,
-                    SUM(CASE WHEN severity = 'info' THEN 1 ELSE 0 END) as info_events,
+                    SUM(CASE WHEN event_category NOT IN ('task', 'issue', 'decision', 'deployment') THEN 1 ELSE 0 END) as system_events,
+                    SUM(CASE WHEN COALESCE(severity, 'info') NOT IN ('warning', 'error', 'critical') THEN 1 ELSE 0 END) as info_events,
                     SUM(CASE WHEN severity = 'warning' THEN 1 ELSE 0 END) as warning_events,
                     SUM(CASE WHEN severity = 'error' THEN 1 ELSE 0 END) as error_events,
                     SUM(CASE WHEN severity = 'critical' THEN 1 ELSE 0 END) as critical_events,
@@ -532,79 +535,62 @@ class EventStore:
             row = cursor.fetchone()
             return dict(row) if row else {}
     
-    def update_stats(
-        self,
-        project_id: str,
-        category: str,
-        severity: str
-    ) -> None:
+    @staticmethod
+    def _stats_triggers_installed(cursor: sqlite3.Cursor) -> bool:
+        """event_stats 的维护触发器（migration 012）是否存在"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+            (EVENT_STATS_TRIGGER,)
+        )
+        return cursor.fetchone() is not None
+    
+    def rebuild_stats(self, project_id: Optional[str] = None) -> int:
         """
-        更新事件统计
+        按 project_events 重建事件统计
+        
+        日常计数由触发器维护（migration 012），本方法用于校正历史数据，
+        并刷新 events_today / events_this_week / events_this_month 窗口计数
         
         Args:
-            project_id: 项目ID
-            category: 事件分类
-            severity: 事件严重性
+            project_id: 项目ID，为空时重建全部项目
+            
+        Returns:
+            重建的项目统计数
         """
-        # 转换枚举为字符串值
-        if hasattr(category, 'value'):
-            category = category.value
-        if hasattr(severity, 'value'):
-            severity = severity.value
-        
-        # 确保是字符串类型
-        category = str(category)
-        severity = str(severity)
-        
-        # 有效的分类列（对应数据库列名）
-        valid_categories = ["task", "issue", "decision", "deployment", "system"]
-        valid_severities = ["info", "warning", "error", "critical"]
-        
-        # 如果分类或严重性不在有效列表中，使用默认值
-        if category not in valid_categories:
-            category = "system"  # general类别归到system
-        if severity not in valid_severities:
-            severity = "info"
+        where, params = ("WHERE project_id = ?", (project_id,)) if project_id else ("", ())
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
-            # 检查统计记录是否存在
-            cursor.execute("""
-                SELECT project_id FROM event_stats WHERE project_id = ?
-            """, (project_id,))
-            exists = cursor.fetchone() is not None
-            
-            now = datetime.now().isoformat()
-            
-            if exists:
-                # 更新现有统计
-                cursor.execute(f"""
-                    UPDATE event_stats
-                    SET total_events = total_events + 1,
-                        {category}_events = {category}_events + 1,
-                        {severity}_events = {severity}_events + 1,
-                        last_event_at = ?,
-                        last_updated = ?
-                    WHERE project_id = ?
-                """, (now, now, project_id))
-            else:
-                # 创建新统计记录
-                cursor.execute("""
-                    INSERT INTO event_stats (
-                        project_id, total_events, task_events, issue_events,
-                        decision_events, deployment_events, system_events,
-                        info_events, warning_events, error_events, critical_events,
-                        last_event_at, last_updated
-                    ) VALUES (?, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, ?, ?)
-                """, (project_id, now, now))
-                
-                # 更新对应的分类和严重性计数
-                cursor.execute(f"""
-                    UPDATE event_stats
-                    SET {category}_events = 1, {severity}_events = 1
-                    WHERE project_id = ?
-                """, (project_id,))
+            cursor.execute(f"DELETE FROM event_stats {where}", params)
+            cursor.execute(f"""
+                INSERT INTO event_stats (
+                    project_id, total_events, events_today, events_this_week, events_this_month,
+                    task_events, issue_events, decision_events, deployment_events, system_events,
+                    info_events, warning_events, error_events, critical_events,
+                    last_event_at, last_updated
+                )
+                SELECT
+                    project_id,
+                    COUNT(*),
+                    SUM(datetime(occurred_at) >= datetime('now', 'start of day')),
+                    SUM(datetime(occurred_at) >= datetime('now', '-7 days')),
+                    SUM(datetime(occurred_at) >= datetime('now', 'start of month')),
+                    SUM(event_category = 'task'),
+                    SUM(event_category = 'issue'),
+                    SUM(event_category = 'decision'),
+                    SUM(event_category = 'deployment'),
+                    SUM(event_category NOT IN ('task', 'issue', 'decision', 'deployment')),
+                    SUM(COALESCE(severity, 'info') NOT IN ('warning', 'error', 'critical')),
+                    SUM(COALESCE(severity = 'warning', 0)),
+                    SUM(COALESCE(severity = 'error', 0)),
+                    SUM(COALESCE(severity = 'critical', 0)),
+                    MAX(occurred_at),
+                    datetime('now')
+                FROM project_events
+                {where}
+                GROUP BY project_id
+            """, params)
+            return cursor.rowcount
     
     # ========================================================================
     # 事件类型管理
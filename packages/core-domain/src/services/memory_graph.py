@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆关系图（Memory Graph）
+
+功能：
+1. 将 memory_relations 加载为紧凑的邻接结构（按项目，数组存储的 CSR）
+2. 创建关系时增量更新，无需重新加载
+3. k 跳邻域遍历（BFS）
+4. 按关系强度加权的最短路径（Dijkstra，边代价 = 1 / strength）
+5. 个性化 PageRank（以若干记忆为种子，按强度加权）
+
+设计：
+- 关系视为无向边：A solved-by B 时，从 A 和 B 出发都能到达对方
+- CSR 为只读主体，新增边先进入增量表，超过阈值后合并重建
+- 节点/边的类型、强度过滤在遍历时进行，不复制图
+"""
+
+import heapq
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+
+class MemoryGraph:
+    """
+    单个项目的记忆关系图
+
+    节点为记忆ID，边为 memory_relations 中的关系（无向存储，记录原始方向）
+    """
+
+    # 增量边超过 CSR 边数的该比例时合并重建
+    COMPACT_RATIO = 0.25
+    # 增量边的最小合并阈值
+    COMPACT_MIN = 256
+
+    def __init__(self, project_id: str):
+        """
+        初始化空图
+
+        Args:
+            project_id: 项目ID
+        """
+        self.project_id = project_id
+
+        # 节点
+        self._node_ids: List[str] = []
+        self._node_index: Dict[str, int] = {}
+
+        # 关系类型编码
+        self._relation_types: List[str] = []
+        self._relation_index: Dict[str, int] = {}
+
+        # CSR：节点 i 的邻接边位于 [indptr[i], indptr[i+1])
+        self._indptr = array("i", [0])
+        self._indices = array("i")        # 邻居节点序号
+        self._strength = array("d")       # 关系强度
+        self._relation = array("b")       # 关系类型编码
+        self._outgoing = array("b")       # 1=原始方向（本节点为source） 0=反向
+
+        # 增量边：节点序号 -> [(邻居, 强度, 类型编码, 是否原始方向)]
+        self._pending: Dict[int, List[Tuple[int, float, int, int]]] = {}
+        self._pending_count = 0
+
+        self.relation_count = 0
+
+    # ========================================================================
+    # 构建
+    # ========================================================================
+
+    @classmethod
+    def from_relations(
+        cls,
+        project_id: str,
+        relations: Iterable[Tuple[str, str, str, float]],
+        memory_ids: Iterable[str] = ()
+    ) -> "MemoryGraph":
+        """
+        从关系列表构建图
+
+        Args:
+            project_id: 项目ID
+            relations: [(source_memory_id, target_memory_id, relation_type, strength), ...]
+            memory_ids: 额外的孤立节点（没有关系的记忆）
+
+        Returns:
+            MemoryGraph实例
+        """
+        graph = cls(project_id)
+        for memory_id in memory_ids:
+            graph._ensure_node(memory_id)
+        for source, target, relation_type, strength in relations:
+            graph._add_pending(source, target, relation_type, strength)
+        graph.compact()
+        return graph
+
+    def _ensure_node(self, memory_id: str) -> int:
+        """获取节点序号（不存在时创建）"""
+        idx = self._node_index.get(memory_id)
+        if idx is None:
+            idx = len(self._node_ids)
+            self._node_ids.append(memory_id)
+            self._node_index[memory_id] = idx
+            self._indptr.append(self._indptr[-1])
+        return idx
+
+    def _relation_code(self, relation_type: str) -> int:
+        """关系类型编码"""
+        code = self._relation_index.get(relation_type)
+        if code is None:
+            code = len(self._relation_types)
+            self._relation_types.append(relation_type)
+            self._relation_index[relation_type] = code
+        return code
+
+    def _add_pending(self, source: str, target: str, relation_type: str, strength: float) -> None:
+        """加入增量表（两个方向各一条）"""
+        s = self._ensure_node(source)
+        t = self._ensure_node(target)
+        code = self._relation_code(relation_type)
+        strength = float(strength if strength is not None else 1.0)
+        self._pending.setdefault(s, []).append((t, strength, code, 1))
+        self._pending.setdefault(t, []).append((s, strength, code, 0))
+        self._pending_count += 2
+        self.relation_count += 1
+
+    def add_relation(self, source: str, target: str, relation_type: str, strength: float = 1.0) -> None:
+        """
+        增量添加一条关系
+
+        Args:
+            source: 源记忆ID
+            target: 目标记忆ID
+            relation_type: 关系类型
+            strength: 关系强度
+        """
+        self._add_pending(source, target, relation_type, strength)
+        if self._pending_count >= max(self.COMPACT_MIN, len(self._indices) * self.COMPACT_RATIO):
+            self.compact()
+
+    def add_node(self, memory_id: str) -> None:
+        """添加孤立节点（新建的记忆）"""
+        self._ensure_node(memory_id)
+
+    def compact(self) -> None:
+        """将增量边合并进 CSR"""
+        if not self._pending:
+            return
+
+        n = len(self._node_ids)
+        indptr = array("i", [0]) * (n + 1)
+        indices = array("i")
+        strength = array("d")
+        relation = array("b")
+        outgoing = array("b")
+
+        for node in range(n):
+            start, end = self._indptr[node], self._indptr[node + 1]
+            indices.extend(self._indices[start:end])
+            strength.extend(self._strength[start:end])
+            relation.extend(self._relation[start:end])
+            outgoing.extend(self._outgoing[start:end])
+            for neighbor, s, code, out in self._pending.get(node, ()):
+                indices.append(neighbor)
+                strength.append(s)
+                relation.append(code)
+                outgoing.append(out)
+            indptr[node + 1] = len(indices)
+
+        self._indptr = indptr
+        self._indices = indices
+        self._strength = strength
+        self._relation = relation
+        self._outgoing = outgoing
+        self._pending = {}
+        self._pending_count = 0
+
+    # ========================================================================
+    # 查询
+    # ========================================================================
+
+    @property
+    def node_count(self) -> int:
+        return len(self._node_ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._node_index
+
+    def _relation_filter(self, relation_types: Optional[Sequence[str]]) -> Optional[Set[int]]:
+        """关系类型过滤转换为编码集合（None 表示不过滤）"""
+        if not relation_types:
+            return None
+        return {self._relation_index[r] for r in relation_types if r in self._relation_index}
+
+    def _neighbors(
+        self,
+        node: int,
+        allowed: Optional[Set[int]] = None,
+        min_strength: float = 0.0
+    ) -> Iterator[Tuple[int, float, int, int]]:
+        """遍历节点的邻接边 (邻居, 强度, 类型编码, 是否原始方向)"""
+        start, end = self._indptr[node], self._indptr[node + 1]
+        for e in range(start, end):
+            s = self._strength[e]
+            code = self._relation[e]
+            if s >= min_strength and (allowed is None or code in allowed):
+                yield self._indices[e], s, code, self._outgoing[e]
+        for neighbor, s, code, out in self._pending.get(node, ()):
+            if s >= min_strength and (allowed is None or code in allowed):
+                yield neighbor, s, code, out
+
+    def k_hop(
+        self,
+        memory_id: str,
+        max_hops: int = 2,
+        relation_types: Optional[Sequence[str]] = None,
+        min_strength: float = 0.0,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        k 跳邻域（BFS，按跳数由近到远）
+
+        Args:
+            memory_id: 起点记忆ID
+            max_hops: 最大跳数
+            relation_types: 关系类型过滤
+            min_strength: 最小关系强度
+            limit: 最多返回的节点数
+
+        Returns:
+            [{"memory_id", "hops", "via", "relation_type", "strength"}, ...]
+            via 为BFS树中的上一跳记忆
+        """
+        start = self._node_index.get(memory_id)
+        if start is None or max_hops <= 0:
+            return []
+
+        allowed = self._relation_filter(relation_types)
+        if allowed is not None and not allowed:
+            return []
+
+        visited = {start}
+        queue = deque([(start, 0)])
+        results = []
+        while queue:
+            node, hops = queue.popleft()
+            if hops >= max_hops:
+                continue
+            for neighbor, s, code, _ in self._neighbors(node, allowed, min_strength):
+                if neighbor in visited:
+                    continue
+                visited.add(neighbor)
+                results.append({
+                    "memory_id": self._node_ids[neighbor],
+                    "hops": hops + 1,
+                    "via": self._node_ids[node],
+                    "relation_type": self._relation_types[code],
+                    "strength": s
+                })
+                if limit is not None and len(results) >= limit:
+                    return results
+                queue.append((neighbor, hops + 1))
+        return results
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        relation_types: Optional[Sequence[str]] = None,
+        min_strength: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        强度加权最短路径（Dijkstra，边代价 = 1 / strength，强关系更“近”）
+
+        Args:
+            source: 起点记忆ID
+            target: 终点记忆ID
+            relation_types: 关系类型过滤
+            min_strength: 最小关系强度（强度为0的边总是忽略）
+
+        Returns:
+            {"path", "edges", "cost", "hops"}；不可达时返回None
+        """
+        s = self._node_index.get(source)
+        t = self._node_index.get(target)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return {"path": [source], "edges": [], "cost": 0.0, "hops": 0}
+
+        allowed = self._relation_filter(relation_types)
+        min_strength = max(min_strength, 1e-9)
+
+        dist = {s: 0.0}
+        prev: Dict[int, Tuple[int, float, int, int]] = {}
+        heap = [(0.0, s)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node == t:
+                break
+            if d > dist.get(node, float("inf")):
+                continue
+            for neighbor, strength, code, out in self._neighbors(node, allowed, min_strength):
+                nd = d + 1.0 / strength
+                if nd < dist.get(neighbor, float("inf")):
+                    dist[neighbor] = nd
+                    prev[neighbor] = (node, strength, code, out)
+                    heapq.heappush(heap, (nd, neighbor))
+
+        if t not in dist:
+            return None
+
+        path = [t]
+        edges = []
+        node = t
+        while node != s:
+            parent, strength, code, out = prev[node]
+            src, dst = (parent, node) if out else (node, parent)
+            edges.append({
+                "source_memory_id": self._node_ids[src],
+                "target_memory_id": self._node_ids[dst],
+                "relation_type": self._relation_types[code],
+                "strength": strength
+            })
+            path.append(parent)
+            node = parent
+
+        path.reverse()
+        edges.reverse()
+        return {
+            "path": [self._node_ids[i] for i in path],
+            "edges": edges,
+            "cost": round(dist[t], 6),
+            "hops": len(edges)
+        }
+
+    def personalized_pagerank(
+        self,
+        seeds: Sequence[str],
+        damping: float = 0.85,
+        max_iterations: int = 50,
+        tolerance: float = 1e-6,
+        top_k: int = 10,
+        relation_types: Optional[Sequence[str]] = None,
+        include_seeds: bool = False
+    ) -> List[Tuple[str, float]]:
+        """
+        个性化 PageRank（重启分布集中在种子记忆上，转移概率按关系强度加权）
+
+        Args:
+            seeds: 种子记忆ID列表
+            damping: 阻尼系数
+            max_iterations: 最大迭代次数
+            tolerance: 收敛阈值（L1）
+            top_k: 返回数量
+            relation_types: 关系类型过滤
+            include_seeds: 结果中是否包含种子本身
+
+        Returns:
+            [(memory_id, score), ...]，按分数降序
+        """
+        seed_nodes = sorted({self._node_index[m] for m in seeds if m in self._node_index})
+        if not seed_nodes:
+            return []
+
+        self.compact()
+        allowed = self._relation_filter(relation_types)
+        n = len(self._node_ids)
+        indptr, indices, strength, relation = self._indptr, self._indices, self._strength, self._relation
+
+        # 按强度归一化的出边权重
+        out_weight = [0.0] * n
+        edge_ok = [True] * len(indices)
+        for node in range(n):
+            total = 0.0
+            for e in range(indptr[node], indptr[node + 1]):
+                if allowed is not None and relation[e] not in allowed:
+                    edge_ok[e] = False
+                    continue
+                total += strength[e]
+            out_weight[node] = total
+
+        restart = 1.0 / len(seed_nodes)
+        rank = [0.0] * n
+        for node in seed_nodes:
+            rank[node] = restart
+
+        for _ in range(max_iterations):
+            new_rank = [0.0] * n
+            dangling = 0.0
+            for node in range(n):
+                r = rank[node]
+                if r == 0.0:
+                    continue
+                total = out_weight[node]
+                if total <= 0.0:
+                    dangling += r
+                    continue
+                share = damping * r / total
+                for e in range(indptr[node], indptr[node + 1]):
+                    if edge_ok[e]:
+                        new_rank[indices[e]] += share * strength[e]
+            # 随机重启 + 悬挂节点的质量回到种子
+            teleport = ((1.0 - damping) + damping * dangling) * restart
+            for node in seed_nodes:
+                new_rank[node] += teleport
+
+            delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+
+        seed_set = set(seed_nodes)
+        candidates = [
+            (score, node) for node, score in enumerate(rank)
+            if score > 0.0 and (include_seeds or node not in seed_set)
+        ]
+        top = heapq.nlargest(top_k, candidates)
+        return [(self._node_ids[node], round(score, 8)) for score, node in top]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """图统计"""
+        return {
+            "project_id": self.project_id,
+            "nodes": len(self._node_ids),
+            "relations": self.relation_count,
+            "relation_types": list(self._relation_types),
+            "pending_edges": self._pending_count
+        }
+
+
+# ============================================================================
+# 工厂函数
+# ============================================================================
+
+def create_memory_graph(
+    project_id: str,
+    relations: Iterable[Tuple[str, str, str, float]],
+    memory_ids: Iterable[str] = ()
+) -> MemoryGraph:
+    """创建记忆关系图
+
+    Args:
+        project_id: 项目ID
+        relations: [(source_memory_id, target_memory_id, relation_type, strength), ...]
+        memory_ids: 孤立节点
+
+    Returns:
+        MemoryGraph实例
+    """
+    return MemoryGraph.from_relations(project_id, relations, memory_ids)
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆本地检索引擎（Memory Search Index）
+
+功能：
+1. BM25 相关性排序（NumPy 向量化打分）
+2. 中日韩文字按双字（bigram）切分，英文/数字按单词切分
+3. 增量添加文档，无需重建索引
+4. 索引快照持久化到磁盘（.npz），重启后直接加载
+
+设计：
+- 倒排表按词项保存为 array.array（追加 O(1)），查询时通过 np.frombuffer 零拷贝转换
+- 查询时所有词项的贡献一次性用 np.bincount 累加，再按项目掩码过滤并用 argpartition 取 Top-K
+- 删除先做墓碑标记；墓碑超过阈值时压缩倒排表（移除已删除文档的条目并重算 df），
+  df 的偏差不超过阈值比例
+"""
+
+import io
+import math
+import os
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.memory_text import tokenize
+
+
+# 快照格式版本
+SNAPSHOT_VERSION = 1
+
+
+class MemorySearchIndex:
+    """
+    BM25 倒排索引
+
+    文档以 memory_id 标识，按 project_id 隔离检索
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        compact_ratio: float = 0.25,
+        compact_min: int = 64
+    ):
+        """
+        初始化空索引
+
+        Args:
+            k1: BM25 词频饱和参数
+            b: BM25 文档长度归一化参数
+            compact_ratio: 墓碑数超过有效文档数的该比例时压缩
+            compact_min: 墓碑数至少达到该值才压缩（避免小索引频繁压缩）
+        """
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+
+        # 词典与倒排表
+        self._vocab: Dict[str, int] = {}
+        self._post_docs: List[array] = []     # 每个词项的文档序号 int32
+        self._post_tf: List[array] = []       # 每个词项的词频 float32
+        self._df: List[int] = []              # 文档频率
+
+        # 文档信息（按文档序号）
+        self._doc_ids: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doc_project = array("i")        # 项目序号
+        self._doc_len = array("f")            # 文档长度（词项数）
+        self._alive = bytearray()             # 1=有效 0=已删除
+
+        # 项目
+        self._projects: Dict[str, int] = {}
+        self._project_names: List[str] = []
+
+        self._alive_count = 0
+        self._total_len = 0.0
+
+        # 已索引到的 project_memories.rowid（用于增量追赶）
+        self.last_rowid = 0
+        # 自上次快照以来的变更数
+        self.dirty_count = 0
+
+    # ========================================================================
+    # 写入
+    # ========================================================================
+
+    def __len__(self) -> int:
+        return self._alive_count
+
+    def __contains__(self, memory_id: str) -> bool:
+        idx = self._doc_index.get(memory_id)
+        return idx is not None and self._alive[idx] == 1
+
+    def add(self, memory_id: str, project_id: str, text: str, rowid: Optional[int] = None) -> None:
+        """
+        添加（或替换）一篇文档
+
+        Args:
+            memory_id: 记忆ID
+            project_id: 项目ID
+            text: 参与检索的文本（标题+内容+标签）
+            rowid: project_memories 中的 rowid（用于记录追赶位置）
+        """
+        if memory_id in self._doc_index:
+            self.remove(memory_id)
+
+        term_freqs = Counter(tokenize(text))
+        doc_idx = len(self._doc_ids)
+        doc_len = float(sum(term_freqs.values()))
+
+        project_idx = self._projects.get(project_id)
+        if project_idx is None:
+            project_idx = len(self._project_names)
+            self._projects[project_id] = project_idx
+            self._project_names.append(project_id)
+
+        self._doc_ids.append(memory_id)
+        self._doc_index[memory_id] = doc_idx
+        self._doc_project.append(project_idx)
+        self._doc_len.append(doc_len)
+        self._alive.append(1)
+        self._alive_count += 1
+        self._total_len += doc_len
+
+        for term, tf in term_freqs.items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = len(self._df)
+                self._vocab[term] = term_id
+                self._post_docs.append(array("i"))
+                self._post_tf.append(array("f"))
+                self._df.append(0)
+            self._post_docs[term_id].append(doc_idx)
+            self._post_tf[term_id].append(float(tf))
+            self._df[term_id] += 1
+
+        if rowid is not None and rowid > self.last_rowid:
+            self.last_rowid = rowid
+        self.dirty_count += 1
+
+    def remove(self, memory_id: str) -> bool:
+        """
+        删除文档（墓碑标记，倒排表中的条目在查询时被掩码过滤；墓碑过多时压缩）
+
+        Args:
+            memory_id: 记忆ID
+
+        Returns:
+            是否删除成功
+        """
+        doc_idx = self._doc_index.pop(memory_id, None)
+        if doc_idx is None or not self._alive[doc_idx]:
+            return False
+
+        self._alive[doc_idx] = 0
+        self._alive_count -= 1
+        self._total_len -= self._doc_len[doc_idx]
+        self.dirty_count += 1
+
+        tombstones = len(self._doc_ids) - self._alive_count
+        if tombstones >= max(self.compact_min, self._alive_count * self.compact_ratio):
+            self.compact()
+        return True
+
+    def compact(self) -> int:
+        """
+        压缩索引：移除已删除文档及其倒排条目，文档重新编号，df 按剩余条目重算，
+        丢弃不再出现的词项
+
+        Returns:
+            移除的文档数
+        """
+        removed = len(self._doc_ids) - self._alive_count
+        if removed == 0:
+            return 0
+
+        alive = np.frombuffer(self._alive, dtype=np.uint8) == 1
+        keep = np.flatnonzero(alive)
+        remap = np.full(len(self._doc_ids), -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+
+        vocab: Dict[str, int] = {}
+        post_docs: List[array] = []
+        post_tf: List[array] = []
+        df: List[int] = []
+        for term, term_id in self._vocab.items():
+            docs = np.frombuffer(self._post_docs[term_id], dtype=np.int32)
+            live = alive[docs]
+            if not live.any():
+                continue
+            new_docs = array("i")
+            new_docs.frombytes(remap[docs[live]].tobytes())
+            new_tf = array("f")
+            new_tf.frombytes(np.frombuffer(self._post_tf[term_id], dtype=np.float32)[live].tobytes())
+            vocab[term] = len(df)
+            post_docs.append(new_docs)
+            post_tf.append(new_tf)
+            df.append(len(new_docs))
+
+        self._vocab = vocab
+        self._post_docs = post_docs
+        self._post_tf = post_tf
+        self._df = df
+
+        self._doc_ids = [self._doc_ids[i] for i in keep]
+        self._doc_index = {memory_id: i for i, memory_id in enumerate(self._doc_ids)}
+        doc_project = array("i")
+        doc_project.frombytes(np.frombuffer(self._doc_project, dtype=np.int32)[keep].tobytes())
+        doc_len = array("f")
+        doc_len.frombytes(np.frombuffer(self._doc_len, dtype=np.float32)[keep].tobytes())
+        self._doc_project = doc_project
+        self._doc_len = doc_len
+        self._alive = bytearray(b"\x01" * len(keep))
+        self.dirty_count += 1
+        return removed
+
+    # ========================================================================
+    # 查询
+    # ========================================================================
+
+    def search(
+        self,
+        query: str,
+        project_id: Optional[str] = None,
+        top_k: int = 10
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            project_id: 项目ID（None 表示不限项目）
+            top_k: 返回数量
+
+        Returns:
+            [(memory_id, score), ...]，按分数降序
+        """
+        if top_k <= 0 or self._alive_count == 0:
+            return []
+
+        project_idx = None
+        if project_id is not None:
+            project_idx = self._projects.get(project_id)
+            if project_idx is None:
+                return []
+
+        query_terms = Counter(t for t in tokenize(query) if t in self._vocab)
+        if not query_terms:
+            return []
+
+        n_docs = len(self._doc_ids)
+        doc_len = np.frombuffer(self._doc_len, dtype=np.float32)
+        avgdl = self._total_len / self._alive_count if self._total_len > 0 else 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / avgdl)
+
+        doc_parts = []
+        score_parts = []
+        for term, qtf in query_terms.items():
+            term_id = self._vocab[term]
+            df = self._df[term_id]
+            idf = math.log(1.0 + (self._alive_count - df + 0.5) / (df + 0.5))
+            docs = np.frombuffer(self._post_docs[term_id], dtype=np.int32)
+            tf = np.frombuffer(self._post_tf[term_id], dtype=np.float32)
+            doc_parts.append(docs)
+            score_parts.append((qtf * idf * (self.k1 + 1.0)) * tf / (tf + norm[docs]))
+
+        # 所有词项的贡献一次性累加到文档分数
+        scores = np.bincount(
+            np.concatenate(doc_parts),
+            weights=np.concatenate(score_parts),
+            minlength=n_docs
+        )
+
+        mask = np.frombuffer(self._alive, dtype=np.uint8) == 1
+        if project_idx is not None:
+            mask &= np.frombuffer(self._doc_project, dtype=np.int32) == project_idx
+        candidates = np.flatnonzero(mask & (scores > 0))
+        scores = scores[candidates]
+
+        if len(candidates) == 0:
+            return []
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates = candidates[top]
+            scores = scores[top]
+        order = np.argsort(-scores, kind="stable")
+
+        return [(self._doc_ids[i], float(s)) for i, s in zip(candidates[order], scores[order])]
+
+    # ========================================================================
+    # 快照
+    # ========================================================================
+
+    def save(self, path: str) -> None:
+        """
+        保存索引快照（先写临时文件再原子替换）
+
+        Args:
+            path: 快照文件路径（.npz）
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        lengths = np.fromiter((len(p) for p in self._post_docs), dtype=np.int64, count=len(self._post_docs))
+        post_ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=post_ptr[1:])
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            version=np.array([SNAPSHOT_VERSION], dtype=np.int64),
+            params=np.array([self.k1, self.b], dtype=np.float64),
+            meta=np.array([self.last_rowid], dtype=np.int64),
+            vocab=np.array(list(self._vocab.keys()), dtype=str),
+            df=np.array(self._df, dtype=np.int64),
+            post_ptr=post_ptr,
+            post_docs=np.frombuffer(b"".join(p.tobytes() for p in self._post_docs), dtype=np.int32),
+            post_tf=np.frombuffer(b"".join(p.tobytes() for p in self._post_tf), dtype=np.float32),
+            doc_ids=np.array(self._doc_ids, dtype=str),
+            doc_project=np.frombuffer(self._doc_project, dtype=np.int32),
+            doc_len=np.frombuffer(self._doc_len, dtype=np.float32),
+            alive=np.frombuffer(self._alive, dtype=np.uint8),
+            projects=np.array(self._project_names, dtype=str)
+        )
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        self.dirty_count = 0
+
+    @classmethod
+    def load(cls, path: str) -> "MemorySearchIndex":
+        """
+        从快照加载索引
+
+        Args:
+            path: 快照文件路径（.npz）
+
+        Returns:
+            MemorySearchIndex实例
+
+        Raises:
+            ValueError: 快照版本不兼容
+        """
+        with np.load(str(path), allow_pickle=False) as data:
+            if int(data["version"][0]) != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported search index snapshot version: {int(data['version'][0])}")
+
+            k1, b = (float(x) for x in data["params"])
+            index = cls(k1=k1, b=b)
+            index.last_rowid = int(data["meta"][0])
+
+            vocab = data["vocab"].tolist()
+            post_ptr = data["post_ptr"]
+            post_docs = data["post_docs"]
+            post_tf = data["post_tf"]
+
+            index._vocab = {term: i for i, term in enumerate(vocab)}
+            index._df = data["df"].tolist()
+            for i in range(len(vocab)):
+                start, end = post_ptr[i], post_ptr[i + 1]
+                docs = array("i")
+                docs.frombytes(post_docs[start:end].tobytes())
+                tfs = array("f")
+                tfs.frombytes(post_tf[start:end].tobytes())
+                index._post_docs.append(docs)
+                index._post_tf.append(tfs)
+
+            index._doc_ids = data["doc_ids"].tolist()
+            index._doc_project.frombytes(data["doc_project"].astype(np.int32).tobytes())
+            index._doc_len.frombytes(data["doc_len"].astype(np.float32).tobytes())
+            index._alive = bytearray(data["alive"].astype(np.uint8).tobytes())
+            index._project_names = data["projects"].tolist()
+
+        index._projects = {name: i for i, name in enumerate(index._project_names)}
+        index._doc_index = {
+            memory_id: i for i, memory_id in enumerate(index._doc_ids) if index._alive[i]
+        }
+        index._alive_count = len(index._doc_index)
+        index._total_len = float(sum(index._doc_len[i] for i in index._doc_index.values()))
+        index.dirty_count = 0
+        return index
+
+
+# ============================================================================
+# 工厂函数
+# ============================================================================
+
+def build_memory_text(title: str, content: str, tags: Optional[List[str]] = None) -> str:
+    """拼接参与检索的记忆文本（标题 + 内容 + 标签）"""
+    return " ".join([title or "", content or "", " ".join(tags or [])])
+
+
+def create_memory_search_index(snapshot_path: Optional[str] = None) -> MemorySearchIndex:
+    """创建检索索引（快照存在且可读时从快照加载）
+
+    Args:
+        snapshot_path: 快照文件路径
+
+    Returns:
+        MemorySearchIndex实例
+    """
+    if snapshot_path and Path(snapshot_path).exists():
+        try:
+            return MemorySearchIndex.load(snapshot_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    return MemorySearchIndex()
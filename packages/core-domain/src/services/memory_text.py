@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆文本处理（分词）
+
+供本地检索索引（BM25）和近似重复检测（MinHash）共用，不依赖 NumPy
+"""
+
+import re
+from typing import List
+
+
+# 英文/数字单词
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+# 中日韩文字连续片段
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+# 单个词项最大长度（超长的单词截断，避免快照中的定长字符串数组膨胀）
+MAX_TERM_LENGTH = 32
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    文本分词
+
+    - 英文/数字：转小写后按单词切分
+    - 中日韩文字：连续片段切分为双字（bigram），单字片段保留单字
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        词项列表（保留重复，用于计算词频）
+    """
+    if not text:
+        return []
+
+    text = text.lower()
+    tokens = [w[:MAX_TERM_LENGTH] for w in _WORD_RE.findall(text)]
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆写后队列（Write-Behind Queue）
+
+功能：
+1. 检索历史（memory_retrievals）先入内存队列，批量写入
+2. 后台线程定期（或积压达到阈值时）在一个事务内刷新
+3. 数据库切换为 WAL 模式：读取不等待写锁
+
+设计：
+- 请求路径只做内存操作（加锁追加），不打开数据库连接
+- 刷新失败时数据放回队列，超过上限的部分丢弃并计数
+- 检索历史属于尽力而为的数据，进程异常退出时最多丢失一个刷新周期
+- 记忆统计（memory_stats）由数据库触发器维护（migration 012），不经过本队列
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MemoryWriteQueue:
+    """
+    项目记忆写后队列
+
+    检索历史在内存中缓冲，由后台线程批量写入数据库
+    """
+
+    def __init__(
+        self,
+        db_path: str = "database/data/tasks.db",
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        max_pending: int = 10000
+    ):
+        """
+        初始化写后队列
+
+        Args:
+            db_path: 数据库文件路径
+            flush_interval: 刷新间隔（秒）
+            batch_size: 积压检索历史达到该数量时提前刷新
+            max_pending: 最多缓冲的检索历史条数，超出丢弃最旧的
+        """
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # 检索历史：(id, project_id, query, memory_ids_json, retrieved_at)
+        self._retrievals: "deque[Tuple[str, str, str, str, str]]" = deque()
+
+        # 刷新互斥（后台线程与手动 flush 不并发写入）
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wal_enabled = False
+
+        self.stats = {
+            "flushes": 0,
+            "retrievals_written": 0,
+            "retrievals_dropped": 0,
+            "errors": 0,
+            "last_flush_at": None,
+            "last_error": None
+        }
+
+    @contextmanager
+    def _get_connection(self):
+        """获取数据库连接（上下文管理器）
+
+        Yields:
+            sqlite3.Connection: 数据库连接
+        """
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # ========================================================================
+    # 入队（请求路径，只做内存操作）
+    # ========================================================================
+
+    def record_retrieval(self, project_id: str, query: str, memory_ids: List[str]) -> None:
+        """
+        缓冲一条检索历史
+
+        Args:
+            project_id: 项目ID
+            query: 检索查询
+            memory_ids: 检索到的记忆ID列表
+        """
+        item = (
+            f"RETR-{uuid.uuid4().hex[:8]}",
+            project_id,
+            query,
+            json.dumps(memory_ids),
+            datetime.now().isoformat()
+        )
+        with self._lock:
+            self._retrievals.append(item)
+            if len(self._retrievals) > self.max_pending:
+                self._retrievals.popleft()
+                self.stats["retrievals_dropped"] += 1
+            backlog = len(self._retrievals)
+
+        self._ensure_started()
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+
+    # ========================================================================
+    # 刷新
+    # ========================================================================
+
+    def flush(self) -> Dict[str, int]:
+        """
+        将缓冲的数据在一个事务内写入数据库
+
+        Returns:
+            {"retrievals": 写入的检索历史数}
+        """
+        with self._flush_lock:
+            with self._lock:
+                retrievals = list(self._retrievals)
+                self._retrievals.clear()
+
+            if not retrievals:
+                return {"retrievals": 0}
+
+            try:
+                self._write_batch(retrievals)
+            except sqlite3.Error as e:
+                self._requeue(retrievals)
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                raise
+
+            self.stats["flushes"] += 1
+            self.stats["retrievals_written"] += len(retrievals)
+            self.stats["last_flush_at"] = datetime.now().isoformat()
+            return {"retrievals": len(retrievals)}
+
+    def _write_batch(self, retrievals: List[Tuple[str, str, str, str, str]]) -> None:
+        """单事务写入检索历史"""
+        with self._get_connection() as conn:
+            if not self._wal_enabled:
+                # WAL 模式持久化在数据库文件上，读事务不再被写锁阻塞
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_enabled = True
+
+            conn.executemany("""
+                INSERT INTO memory_retrievals (
+                    id, project_id, query, memory_ids, retrieved_at
+                ) VALUES (?, ?, ?, ?, ?)
+            """, retrievals)
+
+    def _requeue(self, retrievals: List[Tuple[str, str, str, str, str]]) -> None:
+        """刷新失败：数据放回队列（超过上限时丢弃最旧的）"""
+        with self._lock:
+            self._retrievals.extendleft(reversed(retrievals))
+            while len(self._retrievals) > self.max_pending:
+                self._retrievals.popleft()
+                self.stats["retrievals_dropped"] += 1
+
+    # ========================================================================
+    # 后台线程
+    # ========================================================================
+
+    def _ensure_started(self) -> None:
+        """首次入队时启动后台线程"""
+        if self._thread is None and self.flush_interval > 0:
+            self.start()
+
+    def start(self) -> None:
+        """启动后台刷新线程"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="memory-write-queue", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止后台线程并刷新剩余数据"""
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            self.logger.error(f"Memory write queue final flush failed: {e}")
+
+    def _run(self) -> None:
+        """后台循环：按间隔（或积压提前唤醒）刷新"""
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Memory write queue flush failed, will retry: {e}")
+                # 失败后退避一个周期，避免忙等
+                time.sleep(self.flush_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列状态"""
+        with self._lock:
+            pending_retrievals = len(self._retrievals)
+        return {
+            **self.stats,
+            "pending_retrievals": pending_retrievals,
+            "running": self._thread is not None
+        }
+
+
+# ============================================================================
+# 工厂函数
+# ============================================================================
+
+def create_memory_write_queue(
+    db_path: str = "database/data/tasks.db",
+    flush_interval: float = 1.0
+) -> MemoryWriteQueue:
+    """创建项目记忆写后队列
+
+    Args:
+        db_path: 数据库文件路径
+        flush_interval: 刷新间隔（秒），0 表示不启动后台线程（只能手动 flush）
+
+    Returns:
+        MemoryWriteQueue实例
+    """
+    return MemoryWriteQueue(db_path=db_path, flush_interval=flush_interval)
@@ -8,16 +8,30 @@
 3. 自动记录问题解决方案
 4. 跨会话知识继承
 5. 集成 Session Memory 和 Ultra Memory Cloud
+6. 本地 BM25 检索（离线时也能按查询文本排序）
+7. 记忆关系图（多跳遍历、加权最短路径、个性化 PageRank）
+8. 检索历史写后批量落库（不占用请求路径的写锁；记忆统计由数据库触发器维护）
+9. 近似重复检测（MinHash-LSH，合并或标记重复记忆）
+10. 预计算排序分（重要性 + 时间衰减 + 检索频次，批量刷新）
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import json
+import math
+import time
 import uuid
 import sqlite3
 from pathlib import Path
 from contextlib import contextmanager
 
+from services.memory_write_queue import create_memory_write_queue
+
+
+# 维护 memory_stats 的触发器（migration 012），存在时统计表才是最新的
+MEMORY_STATS_TRIGGER = "trg_memory_stats_insert"
+
 
 class MemoryType:
     """记忆类型常量"""
@@ -45,6 +59,20 @@ class RelationType:
     SOLVED_BY = "solved-by"          # 由...解决
     EVOLVED_FROM = "evolved-from"    # 由...演化
     DEPENDS_ON = "depends-on"        # 依赖于
+    DUPLICATE_OF = "duplicate-of"    # 近似重复于
+
+
+class TagMatchMode:
+    """标签过滤模式"""
+    ANY = "any"                      # 包含任一标签
+    ALL = "all"                      # 包含全部标签
+
+
+class DedupMode:
+    """近似重复处理模式"""
+    OFF = "off"                      # 不检测
+    FLAG = "flag"                    # 照常写入，标记为重复并建立 duplicate-of 关系
+    MERGE = "merge"                  # 合并进已有记忆（提升重要性、合并标签和关联）
 
 
 class ProjectMemoryService:
@@ -53,16 +81,44 @@ class ProjectMemoryService:
     
     负责管理项目的记忆空间，集成多个记忆系统：
     - 本地数据库（SQLite）
+    - 本地检索索引（BM25，可选依赖 NumPy）
+    - 记忆关系图（按项目缓存的邻接结构）
     - Session Memory MCP（会话记忆）
     - Ultra Memory Cloud MCP（长期记忆）
     """
     
+    # 自动保存检索索引快照的变更阈值
+    SEARCH_SNAPSHOT_EVERY = 100
+    
+    # 知识继承包缓存的最大条目数（按 项目+上下文）
+    KNOWLEDGE_CACHE_SIZE = 256
+    
+    # 近似重复检测每次最多比对的候选数（防止模板化文本的热点分桶拖慢插入）
+    DEDUP_MAX_CANDIDATES = 200
+    
+    # 排序分权重：重要性 / 时间衰减 / 检索频次
+    RANK_WEIGHTS = (0.5, 0.3, 0.2)
+    # 检索次数达到该值时频次分量饱和（对数缩放）
+    RANK_FREQUENCY_SATURATION = 50
+    # 统计检索频次的时间窗口（天）
+    RANK_RETRIEVAL_WINDOW_DAYS = 90
+    
     def __init__(
         self,
         state_manager=None,
         db_path: str = "database/data/tasks.db",
         session_memory_enabled: bool = True,
-        ultra_memory_enabled: bool = True
+        ultra_memory_enabled: bool = True,
+        local_search_enabled: bool = True,
+        search_index_path: Optional[str] = None,
+        search_importance_weight: float = 0.3,
+        knowledge_cache_ttl: float = 300.0,
+        write_behind: bool = True,
+        write_flush_interval: float = 1.0,
+        dedup_mode: str = DedupMode.MERGE,
+        dedup_threshold: float = 0.8,
+        rank_half_life_days: float = 30.0,
+        persist: Optional[bool] = None
     ):
         """
         初始化项目记忆服务
@@ -72,11 +128,59 @@ class ProjectMemoryService:
             db_path: 数据库文件路径
             session_memory_enabled: 是否启用Session Memory
             ultra_memory_enabled: 是否启用Ultra Memory Cloud
+            local_search_enabled: 是否启用本地BM25检索
+            search_index_path: 检索索引快照路径（默认与数据库同目录）
+            search_importance_weight: 检索排序中重要性所占权重（0-1）
+            knowledge_cache_ttl: 知识继承包缓存有效期（秒），0 表示不缓存
+            write_behind: 检索历史是否异步批量写入（False 时每次同步写入）
+            write_flush_interval: 写后队列的刷新间隔（秒）
+            dedup_mode: auto_record_* 的近似重复处理模式（off/flag/merge）
+            dedup_threshold: 判定为近似重复的相似度阈值（估计的 Jaccard 相似度）
+            rank_half_life_days: 排序分时间衰减的半衰期（天）
+            persist: 是否读写本地数据库（db_path）；默认仅在传入 state_manager 时启用（兼容旧行为）
         """
         self.state_manager = state_manager  # 保留兼容性
+        self.persist = persist if persist is not None else bool(state_manager)
         self.db_path = Path(db_path)
         self.session_memory_enabled = session_memory_enabled
         self.ultra_memory_enabled = ultra_memory_enabled
+        self.local_search_enabled = local_search_enabled
+        self.search_index_path = Path(search_index_path) if search_index_path else (
+            self.db_path.with_name(f"{self.db_path.stem}.memory_index.npz")
+        )
+        self.search_importance_weight = search_importance_weight
+        
+        # 本地检索索引（首次检索时加载）
+        self._search_index = None
+        
+        # 知识继承包缓存：(project_id, context) -> (记忆版本号, 过期时间, 知识包)
+        self.knowledge_cache_ttl = knowledge_cache_ttl
+        self._knowledge_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self.knowledge_cache_stats = {"hits": 0, "misses": 0}
+        
+        # 记忆关系图：project_id -> (关系版本号, MemoryGraph)
+        # 首次遍历时加载，创建关系时增量更新，版本号变化（其他进程写入）时重新加载
+        self._memory_graphs: Dict[str, Tuple[Optional[int], Any]] = {}
+        
+        # 检索历史写后队列（首次写入时启动后台线程）
+        self.write_behind = write_behind
+        self._write_queue = create_memory_write_queue(
+            db_path=str(self.db_path),
+            flush_interval=write_flush_interval if write_behind else 0
+        )
+        
+        # 标签索引表（None 表示尚未检查 memory_tags 是否存在）
+        self._tags_table_available: Optional[bool] = None
+        
+        # 近似重复检测（签名器首次使用时创建；None 表示尚未检查签名表是否存在）
+        self.dedup_mode = dedup_mode
+        self.dedup_threshold = dedup_threshold
+        self._min_hasher = None
+        self._dedup_tables_available: Optional[bool] = None
+        
+        # 预计算排序分（None 表示尚未检查 rank_score 列是否存在）
+        self.rank_half_life_days = rank_half_life_days
+        self._rank_score_available: Optional[bool] = None
         
         # 确保数据库目录存在
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -115,7 +219,8 @@ class ProjectMemoryService:
         related_tasks: Optional[List[str]] = None,
         related_issues: Optional[List[str]] = None,
         importance: int = 5,
-        created_by: str = "system"
+        created_by: str = "system",
+        dedup_mode: str = DedupMode.OFF
     ) -> Dict[str, Any]:
         """
         创建项目记忆
@@ -132,10 +237,32 @@ class ProjectMemoryService:
             related_issues: 关联问题ID列表
             importance: 重要性(1-10)
             created_by: 创建者
+            dedup_mode: 近似重复处理模式（off/flag/merge）
             
         Returns:
-            创建的记忆对象
+            创建的记忆对象；合并模式命中重复时返回合并后的已有记忆（merged=True）
+            
+        Raises:
+            ValueError: dedup_mode 不是 off/flag/merge
         """
+        if dedup_mode not in (DedupMode.OFF, DedupMode.FLAG, DedupMode.MERGE):
+            raise ValueError(f"Invalid dedup_mode: {dedup_mode}")
+        
+        # 0. 计算 MinHash 签名，按 LSH 分桶查找近似重复
+        signature = self._compute_signature(title, content) if self.persist else None
+        duplicate = None
+        if signature and dedup_mode != DedupMode.OFF:
+            duplicate = self._find_near_duplicate(project_id, category, signature)
+            if duplicate and dedup_mode == DedupMode.MERGE:
+                return self._merge_into_memory(
+                    memory_id=duplicate[0],
+                    similarity=duplicate[1],
+                    tags=tags,
+                    related_tasks=related_tasks,
+                    related_issues=related_issues,
+                    importance=importance
+                )
+        
         memory_id = f"MEM-{uuid.uuid4().hex[:8]}"
         
         # 1. 存储到本地数据库
@@ -184,12 +311,25 @@ class ProjectMemoryService:
             )
             memory_data["external_memory_id"] = external_memory_id
         
-        # 3. 保存到本地数据库
-        if self.state_manager:
-            self._save_memory_to_db(memory_data)
+        # 3. 保存到本地数据库，并增量更新检索索引
+        if self.persist:
+            rowid = self._save_memory_to_db(
+                memory_data,
+                signature=signature,
+                duplicate_of=duplicate[0] if duplicate else None
+            )
+            self._index_memory(memory_data, tags, rowid)
         
-        # 4. 更新统计
-        self._update_memory_stats(project_id, memory_type)
+        # 4. 标记模式：记录与原记忆的重复关系
+        if duplicate:
+            memory_data["duplicate_of"] = duplicate[0]
+            memory_data["duplicate_similarity"] = duplicate[1]
+            self.create_memory_relation(
+                source_memory_id=memory_id,
+                target_memory_id=duplicate[0],
+                relation_type=RelationType.DUPLICATE_OF,
+                strength=duplicate[1]
+            )
         
         return memory_data
     
@@ -200,7 +340,9 @@ class ProjectMemoryService:
         category: Optional[str] = None,
         memory_type: Optional[str] = None,
         tags: Optional[List[str]] = None,
-        limit: int = 10
+        limit: int = 10,
+        tag_mode: str = TagMatchMode.ANY,
+        record_retrieval: bool = True
     ) -> List[Dict[str, Any]]:
         """
         检索项目记忆
@@ -212,18 +354,36 @@ class ProjectMemoryService:
             memory_type: 记忆类型过滤
             tags: 标签过滤
             limit: 返回数量限制
+            tag_mode: 标签匹配模式 any（任一）/all（全部）
+            record_retrieval: 是否记录检索历史（内部调用传False）
             
         Returns:
             记忆列表
+            
+        Raises:
+            ValueError: tag_mode 不是 any/all
         """
-        # 1. 从本地数据库查询
-        memories = self._query_memories_from_db(
-            project_id=project_id,
-            category=category,
-            memory_type=memory_type,
-            tags=tags,
-            limit=limit
-        )
+        # 1. 有查询文本时使用本地检索排序，否则从本地数据库按排序分查询
+        memories = None
+        if query:
+            memories = self._search_local(
+                project_id=project_id,
+                query=query,
+                category=category,
+                memory_type=memory_type,
+                tags=tags,
+                limit=limit,
+                tag_mode=tag_mode
+            )
+        if memories is None:
+            memories = self._query_memories_from_db(
+                project_id=project_id,
+                category=category,
+                memory_type=memory_type,
+                tags=tags,
+                limit=limit,
+                tag_mode=tag_mode
+            )
         
         # 2. 如果有查询文本，使用Ultra Memory进行语义搜索
         if query and self.ultra_memory_enabled:
@@ -236,11 +396,12 @@ class ProjectMemoryService:
             memories = self._merge_memory_results(memories, ultra_results)
         
         # 3. 记录检索历史（用于优化推荐）
-        self._record_retrieval(
-            project_id=project_id,
-            query=query,
-            memory_ids=[m["id"] for m in memories]
-        )
+        if record_retrieval:
+            self._record_retrieval(
+                project_id=project_id,
+                query=query,
+                memory_ids=[m["id"] for m in memories]
+            )
         
         return memories
     
@@ -307,7 +468,8 @@ class ProjectMemoryService:
             },
             tags=["architecture", "decision", "adr"],
             importance=8,  # 架构决策很重要
-            created_by=decided_by
+            created_by=decided_by,
+            dedup_mode=self.dedup_mode
         )
         
         return memory
@@ -339,7 +501,8 @@ class ProjectMemoryService:
             component_id: 组件ID
             
         Returns:
-            创建的记忆对象（包含问题和方案）
+            创建的记忆对象（包含问题和方案）；relation_created 表示本次是否新建了
+            方案→问题关系（两条记忆都合并进已有记忆且关系已存在时为False）
         """
         # 1. 保存问题到issues表
         issue_id = self._save_issue_to_db(
@@ -374,7 +537,8 @@ class ProjectMemoryService:
             },
             tags=["problem", severity, "resolved"],
             importance=self._severity_to_importance(severity),
-            created_by="system"
+            created_by="system",
+            dedup_mode=self.dedup_mode
         )
         
         # 4. 创建解决方案记忆
@@ -392,20 +556,26 @@ class ProjectMemoryService:
             },
             tags=["solution", "resolved"] + (tools_used or []),
             importance=self._severity_to_importance(severity),
-            created_by="system"
+            created_by="system",
+            dedup_mode=self.dedup_mode
         )
         
-        # 5. 创建记忆关系：方案解决了问题
-        self.create_memory_relation(
-            source_memory_id=solution_memory["id"],
-            target_memory_id=problem_memory["id"],
-            relation_type=RelationType.SOLVED_BY
+        # 5. 创建记忆关系：方案解决了问题（两条记忆都合并进已有记忆时关系通常已存在）
+        relation_created = not (
+            problem_memory.get("merged") and solution_memory.get("merged")
+            and self._relation_exists(solution_memory["id"], problem_memory["id"], RelationType.SOLVED_BY)
         )
+        if relation_created:
+            self.create_memory_relation(
+                source_memory_id=solution_memory["id"],
+                target_memory_id=problem_memory["id"],
+                relation_type=RelationType.SOLVED_BY
+            )
         
         return {
             "problem_memory": problem_memory,
             "solution_memory": solution_memory,
-            "relation_created": True
+            "relation_created": relation_created
         }
     
     # ========================================================================
@@ -436,59 +606,90 @@ class ProjectMemoryService:
                 "recent_memories": [...]  # 最近记忆
             }
         """
-        # 1. 获取架构决策记忆（按重要性排序）
-        decisions = self.retrieve_memories(
-            project_id=project_id,
-            category=MemoryCategory.DECISION,
-            limit=5
-        )
+        # 1. 缓存命中：记忆版本号未变化且未过期
+        cache_key = (project_id, context)
+        version = self._get_memory_version(project_id) if self.knowledge_cache_ttl > 0 else None
         
-        # 2. 获取解决方案记忆（按重要性排序）
-        solutions = self.retrieve_memories(
-            project_id=project_id,
-            category=MemoryCategory.SOLUTION,
-            limit=10
-        )
+        if version is not None:
+            cached = self._knowledge_cache.get(cache_key)
+            if cached and cached[0] == version and cached[1] > time.monotonic():
+                self._knowledge_cache.move_to_end(cache_key)
+                self.knowledge_cache_stats["hits"] += 1
+                package = self._copy_knowledge_package(cached[2])
+                package["inherited_at"] = datetime.now().isoformat()
+                return package
         
-        # 3. 获取重要知识（importance >= 7）
-        important_knowledge = self._query_important_memories(
-            project_id=project_id,
-            min_importance=7,
-            limit=5
-        )
+        self.knowledge_cache_stats["misses"] += 1
         
-        # 4. 获取最近记忆（时间排序）
-        recent_memories = self._query_recent_memories(
-            project_id=project_id,
-            days=7,
-            limit=10
-        )
+        # 2. 决策/方案/重要知识/最近记忆：一次UNION查询
+        sections = self._query_knowledge_sections(project_id)
         
-        # 5. 如果有上下文，使用语义搜索获取相关记忆
+        # 3. 如果有上下文，使用语义搜索获取相关记忆（内部调用，不记录检索历史）
         related_memories = []
-        if context and self.ultra_memory_enabled:
+        if context and (self.ultra_memory_enabled or self.local_search_enabled):
             related_memories = self.retrieve_memories(
                 project_id=project_id,
                 query=context,
-                limit=10
+                limit=10,
+                record_retrieval=False
             )
         
-        return {
+        package = {
             "project_id": project_id,
-            "decisions": decisions,
-            "solutions": solutions,
-            "important_knowledge": important_knowledge,
-            "recent_memories": recent_memories,
+            "decisions": sections["decisions"],
+            "solutions": sections["solutions"],
+            "important_knowledge": sections["important_knowledge"],
+            "recent_memories": sections["recent_memories"],
             "related_memories": related_memories,
             "total_inherited": (
-                len(decisions) +
-                len(solutions) +
-                len(important_knowledge) +
-                len(recent_memories) +
+                sum(len(items) for items in sections.values()) +
                 len(related_memories)
             ),
             "inherited_at": datetime.now().isoformat()
         }
+        
+        # 4. 写入缓存（按LRU淘汰）
+        if version is not None:
+            self._knowledge_cache[cache_key] = (
+                version,
+                time.monotonic() + self.knowledge_cache_ttl,
+                self._copy_knowledge_package(package)
+            )
+            self._knowledge_cache.move_to_end(cache_key)
+            while len(self._knowledge_cache) > self.KNOWLEDGE_CACHE_SIZE:
+                self._knowledge_cache.popitem(last=False)
+        
+        return package
+    
+    @staticmethod
+    def _copy_knowledge_package(package: Dict[str, Any]) -> Dict[str, Any]:
+        """复制知识继承包（记忆字典及其列表/字典字段），调用方修改不影响缓存
+        
+        比 copy.deepcopy 快一个数量级，缓存命中时的主要开销
+        """
+        def copy_memory(memory: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                k: (list(v) if isinstance(v, list) else dict(v) if isinstance(v, dict) else v)
+                for k, v in memory.items()
+            }
+        
+        return {
+            k: ([copy_memory(m) for m in v] if isinstance(v, list) else v)
+            for k, v in package.items()
+        }
+    
+    def clear_knowledge_cache(self, project_id: Optional[str] = None) -> None:
+        """
+        清除知识继承包缓存
+        
+        Args:
+            project_id: 项目ID（None 表示清除全部）
+        """
+        if project_id is None:
+            self._knowledge_cache.clear()
+            return
+        for key in [k for k in self._knowledge_cache if k[0] == project_id]:
+            del self._knowledge_cache[key]
     
     # ========================================================================
     # 记忆关系管理
@@ -524,8 +725,9 @@ class ProjectMemoryService:
             "created_at": datetime.now().isoformat()
         }
         
-        if self.state_manager:
+        if self.persist:
             self._save_relation_to_db(relation_data)
+            self._add_relation_to_graph(relation_data)
         
         return relation_data
     
@@ -546,7 +748,7 @@ class ProjectMemoryService:
         Returns:
             相关记忆列表
         """
-        if not self.state_manager:
+        if not self.persist:
             return []
         
         return self._query_related_memories(
@@ -554,7 +756,291 @@ class ProjectMemoryService:
             relation_types=relation_types,
             min_strength=min_strength
         )
+
+    # ========================================================================
+    # 记忆关系图：多跳遍历
+    # ========================================================================
+
+    def get_memory_neighborhood(
+        self,
+        project_id: str,
+        memory_id: str,
+        max_hops: int = 2,
+        relation_types: Optional[List[str]] = None,
+        min_strength: float = 0.0,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        获取记忆的 k 跳邻域
+
+        Args:
+            project_id: 项目ID
+            memory_id: 起点记忆ID
+            max_hops: 最大跳数
+            relation_types: 关系类型过滤
+            min_strength: 最小关系强度
+            limit: 返回数量
+
+        Returns:
+            记忆列表（按跳数由近到远），每条附带 hops/via/relation_type/strength
+        """
+        graph = self._get_memory_graph(project_id)
+        if graph is None:
+            return []
+
+        hits = graph.k_hop(
+            memory_id,
+            max_hops=max_hops,
+            relation_types=relation_types,
+            min_strength=min_strength,
+            limit=limit
+        )
+        return self._hydrate_graph_results(project_id, hits)
+
+    def find_memory_path(
+        self,
+        project_id: str,
+        source_memory_id: str,
+        target_memory_id: str,
+        relation_types: Optional[List[str]] = None,
+        min_strength: float = 0.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        查找两条记忆之间的最短关系路径（强度越高代价越低）
+
+        Args:
+            project_id: 项目ID
+            source_memory_id: 起点记忆ID
+            target_memory_id: 终点记忆ID
+            relation_types: 关系类型过滤
+            min_strength: 最小关系强度
+
+        Returns:
+            {"path", "edges", "cost", "hops", "memories"}；不可达时返回None
+        """
+        graph = self._get_memory_graph(project_id)
+        if graph is None:
+            return None
+
+        result = graph.shortest_path(
+            source_memory_id,
+            target_memory_id,
+            relation_types=relation_types,
+            min_strength=min_strength
+        )
+        if result is None:
+            return None
+
+        result["memories"] = self._hydrate_graph_results(
+            project_id, [{"memory_id": m} for m in result["path"]]
+        )
+        return result
+
+    def rank_related_memories(
+        self,
+        project_id: str,
+        seed_memory_ids: List[str],
+        relation_types: Optional[List[str]] = None,
+        damping: float = 0.85,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        以若干记忆为种子，按个性化 PageRank 推荐相关记忆
+
+        Args:
+            project_id: 项目ID
+            seed_memory_ids: 种子记忆ID列表
+            relation_types: 关系类型过滤
+            damping: 阻尼系数
+            limit: 返回数量
+
+        Returns:
+            记忆列表（按 graph_score 降序，不含种子本身）
+        """
+        graph = self._get_memory_graph(project_id)
+        if graph is None:
+            return []
+
+        ranked = graph.personalized_pagerank(
+            seed_memory_ids,
+            damping=damping,
+            top_k=limit,
+            relation_types=relation_types
+        )
+        return self._hydrate_graph_results(
+            project_id, [{"memory_id": m, "graph_score": score} for m, score in ranked]
+        )
+
+    def invalidate_memory_graph(self, project_id: Optional[str] = None) -> None:
+        """
+        丢弃缓存的关系图（下次遍历时重新加载）
+
+        Args:
+            project_id: 项目ID，为空时丢弃全部
+        """
+        if project_id is None:
+            self._memory_graphs.clear()
+        else:
+            self._memory_graphs.pop(project_id, None)
+
+    def get_memory_graph_stats(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """获取项目关系图统计（节点数、关系数等）"""
+        graph = self._get_memory_graph(project_id)
+        return graph.get_stats() if graph is not None else None
+
+    # ========================================================================
+    # 近似重复检测
+    # ========================================================================
+    
+    def find_near_duplicate(
+        self,
+        project_id: str,
+        category: str,
+        title: str,
+        content: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        查找与给定文本近似重复的已有记忆（不写入）
+        
+        Args:
+            project_id: 项目ID
+            category: 记忆分类（只在同分类内比对）
+            title: 标题
+            content: 内容
+            
+        Returns:
+            {"memory_id", "similarity"}；没有近似重复时返回None
+        """
+        signature = self._compute_signature(title, content) if self.persist else None
+        if not signature:
+            return None
+        
+        duplicate = self._find_near_duplicate(project_id, category, signature)
+        if duplicate is None:
+            return None
+        return {"memory_id": duplicate[0], "similarity": duplicate[1]}
     
+    def rebuild_memory_signatures(self, project_id: Optional[str] = None, batch_size: int = 1000) -> int:
+        """
+        为缺少签名的记忆回填 MinHash 签名（migration 010 之前的记忆）
+        
+        Args:
+            project_id: 项目ID，为空时处理全部项目
+            batch_size: 每批处理的记忆数
+            
+        Returns:
+            回填的记忆数
+        """
+        if not self.persist or not self._dedup_available():
+            return 0
+        
+        hasher = self._get_min_hasher()
+        total = 0
+        while True:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                conditions = ["ms.memory_id IS NULL"]
+                params: List[Any] = []
+                if project_id:
+                    conditions.append("pm.project_id = ?")
+                    params.append(project_id)
+                cursor.execute(f"""
+                    SELECT pm.id, pm.project_id, pm.title, pm.content
+                    FROM project_memories pm
+                    LEFT JOIN memory_signatures ms ON ms.memory_id = pm.id
+                    WHERE {" AND ".join(conditions)}
+                    LIMIT ?
+                """, params + [batch_size])
+                rows = cursor.fetchall()
+                
+                for row in rows:
+                    signature = hasher.signature(f"{row['title'] or ''} {row['content'] or ''}")
+                    if signature is None:
+                        # 没有可用词项：写入空签名，避免下一批重复读取
+                        cursor.execute("""
+                            INSERT INTO memory_signatures (memory_id, project_id, signature)
+                            VALUES (?, ?, ?)
+                        """, (row["id"], row["project_id"], b""))
+                        continue
+                    self._save_signature(
+                        cursor, row["id"], row["project_id"], (signature, hasher.buckets(signature))
+                    )
+            
+            total += len(rows)
+            if len(rows) < batch_size:
+                return total
+
+    # ========================================================================
+    # 排序分批量刷新
+    # ========================================================================
+    
+    def refresh_rank_scores(
+        self,
+        project_id: Optional[str] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        重新计算 rank_score（定期批处理任务调用）
+        
+        rank_score = w1 * 重要性/10 + w2 * 0.5^(距上次更新天数/半衰期) + w3 * 检索频次分
+        检索频次取最近 RANK_RETRIEVAL_WINDOW_DAYS 天 memory_retrievals 中的命中次数
+        
+        Args:
+            project_id: 项目ID，为空时刷新全部项目
+            now: 计算时间基准（默认当前时间）
+            
+        Returns:
+            {"projects": 刷新的项目数, "updated": 分数变化的记忆数, "duration_ms": 耗时}
+        """
+        if not self.persist or not self._rank_score_ready():
+            return {"projects": 0, "updated": 0, "duration_ms": 0.0}
+        
+        start = time.perf_counter()
+        now = now or datetime.now()
+        window_start = (now - timedelta(days=self.RANK_RETRIEVAL_WINDOW_DAYS)).isoformat()
+        
+        # 先写入缓冲中的检索历史，频次才完整
+        try:
+            self._write_queue.flush()
+        except sqlite3.Error:
+            pass
+        
+        if project_id:
+            projects = [project_id]
+        else:
+            with self._get_connection() as conn:
+                projects = [row[0] for row in conn.execute("SELECT DISTINCT project_id FROM project_memories")]
+        
+        updated = 0
+        for pid in projects:
+            # 每个项目一个事务，避免长时间占用写锁
+            with self._get_connection() as conn:
+                hits = dict(conn.execute("""
+                    SELECT j.value, COUNT(*)
+                    FROM memory_retrievals r,
+                         json_each(CASE WHEN json_valid(r.memory_ids) THEN r.memory_ids ELSE '[]' END) j
+                    WHERE r.project_id = ? AND datetime(r.retrieved_at) >= datetime(?)
+                    GROUP BY j.value
+                """, (pid, window_start)).fetchall())
+                
+                changes = []
+                for row in conn.execute("""
+                    SELECT id, importance, updated_at, rank_score
+                    FROM project_memories WHERE project_id = ?
+                """, (pid,)):
+                    score = self._compute_rank_score(row["importance"], row["updated_at"], hits.get(row["id"], 0), now)
+                    if abs(score - (row["rank_score"] or 0.0)) > 1e-6:
+                        changes.append((score, row["id"]))
+                
+                conn.executemany("UPDATE project_memories SET rank_score = ? WHERE id = ?", changes)
+                updated += len(changes)
+        
+        return {
+            "projects": len(projects),
+            "updated": updated,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
     # ========================================================================
     # 记忆统计
     # ========================================================================
@@ -569,15 +1055,283 @@ class ProjectMemoryService:
         Returns:
             统计信息
         """
-        if not self.state_manager:
+        if not self.persist:
             return {}
         
         return self._query_memory_stats(project_id)
     
+    def rebuild_memory_stats(self, project_id: Optional[str] = None) -> int:
+        """
+        按 project_memories 重建 memory_stats
+        
+        日常计数由触发器维护（migration 012），本方法用于校正历史数据
+        
+        Args:
+            project_id: 项目ID，为空时重建全部项目
+            
+        Returns:
+            重建的项目统计数
+        """
+        if not self.persist:
+            return 0
+        
+        where, params = ("WHERE project_id = ?", (project_id,)) if project_id else ("", ())
+        with self._get_connection() as conn:
+            conn.execute(f"DELETE FROM memory_stats {where}", params)
+            cursor = conn.execute(f"""
+                INSERT INTO memory_stats (
+                    project_id, total_memories, session_memories, ultra_memories,
+                    decision_memories, solution_memories, last_updated
+                )
+                SELECT
+                    project_id,
+                    COUNT(*),
+                    SUM(memory_type = 'session'),
+                    SUM(memory_type = 'ultra'),
+                    SUM(memory_type = 'decision'),
+                    SUM(memory_type = 'solution'),
+                    datetime('now')
+                FROM project_memories
+                {where}
+                GROUP BY project_id
+            """, params)
+            return cursor.rowcount
+    
+    def flush_writes(self) -> Dict[str, int]:
+        """
+        立即写入写后队列中缓冲的检索历史
+        
+        Returns:
+            {"retrievals": 写入的检索历史数}
+        """
+        return self._write_queue.flush()
+    
+    def get_write_queue_stats(self) -> Dict[str, Any]:
+        """获取写后队列状态（积压、已写入、失败次数）"""
+        return self._write_queue.get_stats()
+    
+    def close(self) -> None:
+        """停止写后队列并写入剩余数据"""
+        self._write_queue.stop()
+    
+    # ========================================================================
+    # 本地检索
+    # ========================================================================
+    
+    def save_search_index(self) -> bool:
+        """
+        保存检索索引快照
+        
+        Returns:
+            是否保存成功（索引未加载时返回False）
+        """
+        if self._search_index is None:
+            return False
+        self._search_index.save(str(self.search_index_path))
+        return True
+    
+    def _get_search_index(self):
+        """
+        获取本地检索索引（首次调用时从快照加载，并追赶快照之后新增的记忆）
+        
+        Returns:
+            MemorySearchIndex实例；未启用、缺少NumPy或数据库不可用时返回None
+        """
+        if not self.local_search_enabled:
+            return None
+        
+        if self._search_index is None:
+            try:
+                from services.memory_search_index import create_memory_search_index
+            except ImportError:
+                # NumPy 未安装，退回到按重要性排序
+                self.local_search_enabled = False
+                return None
+            index = create_memory_search_index(str(self.search_index_path))
+        else:
+            index = self._search_index
+        
+        try:
+            added = self._catch_up_search_index(index)
+        except sqlite3.Error:
+            return None
+        
+        first_load = self._search_index is None
+        self._search_index = index
+        if added and (first_load or index.dirty_count >= self.SEARCH_SNAPSHOT_EVERY):
+            self.save_search_index()
+        return index
+    
+    def _catch_up_search_index(self, index) -> int:
+        """将 rowid 大于索引位置的记忆加入索引（其他进程写入的记忆也能被检索到）"""
+        with self._get_connection() as conn:
+            rows = conn.execute("""
+                SELECT rowid, id, project_id, title, content, tags
+                FROM project_memories
+                WHERE rowid > ?
+                ORDER BY rowid
+            """, (index.last_rowid,)).fetchall()
+        
+        from services.memory_search_index import build_memory_text
+        for row in rows:
+            try:
+                tags = json.loads(row["tags"]) if row["tags"] else None
+            except (TypeError, ValueError):
+                tags = None
+            index.add(
+                row["id"],
+                row["project_id"],
+                build_memory_text(row["title"], row["content"], self._normalize_tags(tags)),
+                rowid=row["rowid"]
+            )
+        return len(rows)
+    
+    def _index_memory(
+        self,
+        memory_data: Dict[str, Any],
+        tags: Optional[List[str]],
+        rowid: Optional[int]
+    ) -> None:
+        """新建记忆后增量更新已加载的检索索引"""
+        index = self._search_index
+        if index is None:
+            return
+        
+        from services.memory_search_index import build_memory_text
+        index.add(
+            memory_data["id"],
+            memory_data["project_id"],
+            build_memory_text(memory_data["title"], memory_data["content"], self._normalize_tags(tags)),
+            rowid=rowid
+        )
+        if index.dirty_count >= self.SEARCH_SNAPSHOT_EVERY:
+            self.save_search_index()
+    
+    def _search_local(
+        self,
+        project_id: str,
+        query: str,
+        category: Optional[str],
+        memory_type: Optional[str],
+        tags: Optional[List[str]],
+        limit: int,
+        tag_mode: str = TagMatchMode.ANY
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        本地BM25检索，结果按 相关性 与 重要性 加权排序
+        
+        Returns:
+            记忆列表（带 search_score 字段）；索引不可用时返回None
+        """
+        index = self._get_search_index()
+        if index is None:
+            return None
+        
+        # 多取候选，留出分类/类型/标签过滤的余量
+        hits = index.search(query, project_id=project_id, top_k=max(limit * 5, 50))
+        if not hits:
+            return []
+        
+        bm25_scores = dict(hits)
+        max_score = hits[0][1] or 1.0
+        memories = self._query_memories_by_ids(
+            memory_ids=list(bm25_scores),
+            project_id=project_id,
+            category=category,
+            memory_type=memory_type,
+            tags=tags,
+            tag_mode=tag_mode
+        )
+        
+        weight = self.search_importance_weight
+        for memory in memories:
+            relevance = bm25_scores[memory["id"]] / max_score
+            importance = (memory.get("importance") or 0) / 10.0
+            memory["search_score"] = round((1 - weight) * relevance + weight * importance, 6)
+        
+        memories.sort(key=lambda m: m["search_score"], reverse=True)
+        return memories[:limit]
+    
     # ========================================================================
     # 内部辅助方法
     # ========================================================================
     
+    def _get_memory_graph(self, project_id: str):
+        """
+        获取项目关系图（首次调用或关系版本号变化时从数据库加载）
+
+        Returns:
+            MemoryGraph实例；未启用数据库时返回None
+        """
+        if not self.persist:
+            return None
+
+        version = self._get_relation_version(project_id)
+        cached = self._memory_graphs.get(project_id)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        from services.memory_graph import create_memory_graph
+        graph = create_memory_graph(project_id, self._query_project_relations(project_id))
+        self._memory_graphs[project_id] = (version, graph)
+        return graph
+
+    def _add_relation_to_graph(self, relation_data: Dict[str, Any]) -> None:
+        """新关系写入已加载的关系图（未加载的项目首次遍历时会从数据库读到）"""
+        if not self._memory_graphs:
+            return
+
+        with self._get_connection() as conn:
+            row = conn.execute(
+                "SELECT project_id FROM project_memories WHERE id = ?",
+                (relation_data["source_memory_id"],)
+            ).fetchone()
+        if row is None:
+            return
+
+        project_id = row["project_id"]
+        cached = self._memory_graphs.get(project_id)
+        if cached is None:
+            return
+
+        # 版本号只前进了本次写入的一步时增量更新，否则期间有其他写入，丢弃重新加载
+        version = self._get_relation_version(project_id)
+        if version is None or cached[0] is None or version != cached[0] + 1:
+            self._memory_graphs.pop(project_id, None)
+            return
+
+        graph = cached[1]
+        graph.add_relation(
+            relation_data["source_memory_id"],
+            relation_data["target_memory_id"],
+            relation_data["relation_type"],
+            relation_data["strength"]
+        )
+        self._memory_graphs[project_id] = (version, graph)
+
+    def _hydrate_graph_results(
+        self,
+        project_id: str,
+        hits: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """图遍历结果回表补全记忆内容（保持遍历顺序，丢弃已不存在的记忆）"""
+        if not hits:
+            return []
+
+        memories = self._query_memories_by_ids(
+            [hit["memory_id"] for hit in hits], project_id, None, None, None
+        )
+        by_id = {memory["id"]: memory for memory in memories}
+
+        results = []
+        for hit in hits:
+            memory = by_id.get(hit["memory_id"])
+            if memory is None:
+                continue
+            extra = {k: v for k, v in hit.items() if k != "memory_id"}
+            results.append({**memory, **extra})
+        return results
+
     def _store_to_ultra_memory(
         self,
         project_id: str,
@@ -648,18 +1402,42 @@ class ProjectMemoryService:
         }
         return mapping.get(severity.lower(), 5)
     
-    def _save_memory_to_db(self, memory_data: Dict[str, Any]) -> None:
-        """保存记忆到数据库"""
+    def _normalize_tags(self, tags: Optional[List[str]]) -> List[str]:
+        """标签规范化：去除首尾空白、空标签和重复标签（保持原顺序）"""
+        normalized = []
+        for tag in tags or []:
+            if not isinstance(tag, str):
+                continue
+            tag = tag.strip()
+            if tag and tag not in normalized:
+                normalized.append(tag)
+        return normalized
+    
+    def _save_memory_to_db(
+        self,
+        memory_data: Dict[str, Any],
+        signature: Optional[Tuple[Tuple[int, ...], List[int]]] = None,
+        duplicate_of: Optional[str] = None
+    ) -> int:
+        """保存记忆到数据库
+        
+        Args:
+            memory_data: 记忆数据
+            signature: (MinHash签名, LSH分桶键)，为空时不写签名
+            duplicate_of: 标记模式下的原记忆ID（重复记忆不进入分桶）
+        
+        Returns:
+            新记忆在 project_memories 中的 rowid
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO project_memories (
-                    id, project_id, memory_type, external_memory_id,
-                    category, title, content, context, tags,
-                    related_tasks, related_issues, importance,
-                    created_by, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            columns = [
+                "id", "project_id", "memory_type", "external_memory_id",
+                "category", "title", "content", "context", "tags",
+                "related_tasks", "related_issues", "importance",
+                "created_by", "created_at", "updated_at"
+            ]
+            values = [
                 memory_data["id"],
                 memory_data["project_id"],
                 memory_data["memory_type"],
@@ -675,7 +1453,30 @@ class ProjectMemoryService:
                 memory_data["created_by"],
                 memory_data["created_at"],
                 memory_data["updated_at"]
-            ))
+            ]
+            if self._rank_score_ready():
+                # 新记忆尚无检索记录，频次分量在下次批量刷新时补上
+                columns.append("rank_score")
+                values.append(self._compute_rank_score(memory_data["importance"], memory_data["updated_at"], 0))
+            
+            cursor.execute(f"""
+                INSERT INTO project_memories ({", ".join(columns)})
+                VALUES ({", ".join("?" * len(columns))})
+            """, values)
+            rowid = cursor.lastrowid
+            
+            # 同一事务内写入标签索引表（memory_tags）
+            tags = self._normalize_tags(json.loads(memory_data["tags"]) if memory_data.get("tags") else None)
+            if tags and self._tags_available():
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)
+                """, [(memory_data["id"], tag) for tag in tags])
+            
+            # 同一事务内写入 MinHash 签名和 LSH 分桶
+            if signature:
+                self._save_signature(cursor, memory_data["id"], memory_data["project_id"], signature, duplicate_of)
+        
+        return rowid
     
     def _save_decision_to_db(
         self,
@@ -767,6 +1568,233 @@ class ProjectMemoryService:
             ))
         return solution_id
     
+    def _rank_score_ready(self) -> bool:
+        """rank_score 列是否存在（未执行 migration 011 时按重要性排序）"""
+        if self._rank_score_available is None:
+            try:
+                with self._get_connection() as conn:
+                    columns = {row["name"] for row in conn.execute("PRAGMA table_info(project_memories)")}
+                self._rank_score_available = "rank_score" in columns
+            except sqlite3.Error:
+                self._rank_score_available = False
+        return self._rank_score_available
+    
+    def _compute_rank_score(
+        self,
+        importance: Optional[int],
+        reference_time: Optional[str],
+        hits: int,
+        now: Optional[datetime] = None
+    ) -> float:
+        """
+        计算排序分
+        
+        Args:
+            importance: 重要性 1-10
+            reference_time: 时间衰减的起点（记忆最后更新时间，ISO格式）
+            hits: 时间窗口内的检索命中次数
+            now: 时间基准
+            
+        Returns:
+            排序分（0-1）
+        """
+        now = now or datetime.now()
+        try:
+            age_days = max(0.0, (now - datetime.fromisoformat(reference_time)).total_seconds() / 86400)
+        except (TypeError, ValueError):
+            age_days = 0.0
+        
+        recency = 0.5 ** (age_days / self.rank_half_life_days) if self.rank_half_life_days > 0 else 0.0
+        frequency = min(1.0, math.log1p(hits) / math.log1p(self.RANK_FREQUENCY_SATURATION))
+        w_importance, w_recency, w_frequency = self.RANK_WEIGHTS
+        return round(
+            w_importance * (importance or 0) / 10 + w_recency * recency + w_frequency * frequency,
+            6
+        )
+    
+    def _get_min_hasher(self):
+        """获取 MinHash 签名器（首次调用时创建）"""
+        if self._min_hasher is None:
+            from services.memory_dedup import create_min_hasher
+            self._min_hasher = create_min_hasher()
+        return self._min_hasher
+    
+    def _tags_available(self) -> bool:
+        """标签索引表是否存在（未执行 migration 008 时不写索引，标签过滤逐行解析 tags 列）"""
+        if self._tags_table_available is None:
+            try:
+                with self._get_connection() as conn:
+                    conn.execute("SELECT 1 FROM memory_tags LIMIT 0")
+                self._tags_table_available = True
+            except sqlite3.OperationalError:
+                self._tags_table_available = False
+        return self._tags_table_available
+    
+    def _dedup_available(self) -> bool:
+        """签名表是否存在（未执行 migration 010 时不做近似重复检测）"""
+        if self._dedup_tables_available is None:
+            try:
+                with self._get_connection() as conn:
+                    conn.execute("SELECT 1 FROM memory_signatures LIMIT 0")
+                    conn.execute("SELECT 1 FROM memory_lsh_buckets LIMIT 0")
+                self._dedup_tables_available = True
+            except sqlite3.OperationalError:
+                self._dedup_tables_available = False
+        return self._dedup_tables_available
+    
+    def _compute_signature(self, title: str, content: str) -> Optional[Tuple[Tuple[int, ...], List[int]]]:
+        """计算 (MinHash签名, LSH分桶键)；签名表不存在或文本为空时返回None"""
+        if not self._dedup_available():
+            return None
+        
+        hasher = self._get_min_hasher()
+        signature = hasher.signature(f"{title or ''} {content or ''}")
+        if signature is None:
+            return None
+        return signature, hasher.buckets(signature)
+    
+    def _save_signature(
+        self,
+        cursor: sqlite3.Cursor,
+        memory_id: str,
+        project_id: str,
+        signature: Tuple[Tuple[int, ...], List[int]],
+        duplicate_of: Optional[str] = None
+    ) -> None:
+        """写入签名；非重复记忆同时写入 LSH 分桶（在调用方事务内执行）"""
+        values, buckets = signature
+        cursor.execute("""
+            INSERT OR REPLACE INTO memory_signatures (memory_id, project_id, signature, duplicate_of)
+            VALUES (?, ?, ?, ?)
+        """, (memory_id, project_id, self._get_min_hasher().to_blob(values), duplicate_of))
+        if duplicate_of is None:
+            cursor.executemany("""
+                INSERT OR IGNORE INTO memory_lsh_buckets (project_id, bucket, memory_id)
+                VALUES (?, ?, ?)
+            """, [(project_id, bucket, memory_id) for bucket in buckets])
+    
+    def _find_near_duplicate(
+        self,
+        project_id: str,
+        category: str,
+        signature: Tuple[Tuple[int, ...], List[int]]
+    ) -> Optional[Tuple[str, float]]:
+        """
+        按 LSH 分桶查找候选，用签名估计相似度
+        
+        Returns:
+            (记忆ID, 相似度)；最相似的候选低于阈值时返回None
+        """
+        values, buckets = signature
+        hasher = self._get_min_hasher()
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ",".join("?" * len(buckets))
+            # 先按 (project_id, bucket) 主键取候选，再逐个主键回表
+            cursor.execute(f"""
+                SELECT ms.memory_id, ms.signature
+                FROM (
+                    SELECT DISTINCT memory_id FROM memory_lsh_buckets
+                    WHERE project_id = ? AND bucket IN ({placeholders})
+                    LIMIT ?
+                ) AS c
+                CROSS JOIN memory_signatures AS ms ON ms.memory_id = c.memory_id
+                CROSS JOIN project_memories AS pm ON pm.id = c.memory_id
+                WHERE pm.category = ?
+            """, [project_id] + buckets + [self.DEDUP_MAX_CANDIDATES, category])
+            rows = cursor.fetchall()
+        
+        best = None
+        for row in rows:
+            similarity = hasher.similarity(values, hasher.from_blob(row["signature"]))
+            if similarity >= self.dedup_threshold and (best is None or similarity > best[1]):
+                best = (row["memory_id"], similarity)
+        return best
+    
+    def _merge_into_memory(
+        self,
+        memory_id: str,
+        similarity: float,
+        tags: Optional[List[str]],
+        related_tasks: Optional[List[str]],
+        related_issues: Optional[List[str]],
+        importance: int
+    ) -> Dict[str, Any]:
+        """
+        近似重复合并进已有记忆：重要性 +1（上限10）、合并标签和关联任务/问题
+        
+        Returns:
+            合并后的记忆（merged=True）
+        """
+        def union(existing, extra):
+            merged = list(existing or [])
+            merged.extend(item for item in (extra or []) if item not in merged)
+            return merged
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            row = cursor.execute("SELECT * FROM project_memories WHERE id = ?", (memory_id,)).fetchone()
+            memory = self._row_to_memory(row)
+            
+            merged_tags = self._normalize_tags(union(memory.get("tags"), tags))
+            merged_tasks = union(memory.get("related_tasks"), related_tasks)
+            merged_issues = union(memory.get("related_issues"), related_issues)
+            merged_importance = min(10, max(memory["importance"] or 0, importance) + 1)
+            updated_at = datetime.now().isoformat()
+            
+            cursor.execute("""
+                UPDATE project_memories
+                SET tags = ?, related_tasks = ?, related_issues = ?,
+                    importance = ?, updated_at = ?
+                WHERE id = ?
+            """, (
+                json.dumps(merged_tags) if merged_tags else None,
+                json.dumps(merged_tasks) if merged_tasks else None,
+                json.dumps(merged_issues) if merged_issues else None,
+                merged_importance,
+                updated_at,
+                memory_id
+            ))
+            if merged_tags and self._tags_available():
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)
+                """, [(memory_id, tag) for tag in merged_tags])
+            if self._rank_score_ready():
+                cursor.execute("""
+                    UPDATE project_memories SET rank_score = ? WHERE id = ?
+                """, (self._compute_rank_score(merged_importance, updated_at, 0), memory_id))
+            cursor.execute("""
+                UPDATE memory_signatures SET merge_count = merge_count + 1 WHERE memory_id = ?
+            """, (memory_id,))
+            merge_count = cursor.execute(
+                "SELECT merge_count FROM memory_signatures WHERE memory_id = ?", (memory_id,)
+            ).fetchone()[0]
+        
+        memory.update({
+            "tags": merged_tags,
+            "related_tasks": merged_tasks,
+            "related_issues": merged_issues,
+            "importance": merged_importance,
+            "updated_at": updated_at,
+            "merged": True,
+            "merge_similarity": similarity,
+            "merge_count": merge_count
+        })
+        # 标签变化后更新检索索引中的文本
+        self._index_memory(memory, merged_tags, None)
+        return memory
+    
+    def _relation_exists(self, source_memory_id: str, target_memory_id: str, relation_type: str) -> bool:
+        """检查关系是否已存在"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT 1 FROM memory_relations
+                WHERE source_memory_id = ? AND target_memory_id = ? AND relation_type = ?
+                LIMIT 1
+            """, (source_memory_id, target_memory_id, relation_type)).fetchone()
+        return row is not None
+    
     def _save_relation_to_db(self, relation_data: Dict[str, Any]) -> None:
         """保存关系到数据库"""
         with self._get_connection() as conn:
@@ -785,38 +1813,111 @@ class ProjectMemoryService:
                 relation_data["created_at"]
             ))
     
+    def _build_memory_filters(
+        self,
+        project_id: str,
+        category: Optional[str],
+        memory_type: Optional[str],
+        tags: Optional[List[str]],
+        tag_mode: str
+    ) -> Tuple[List[str], List[Any]]:
+        """构建记忆查询条件（标签过滤走 memory_tags 索引）"""
+        if tag_mode not in (TagMatchMode.ANY, TagMatchMode.ALL):
+            raise ValueError(f"Invalid tag_mode: {tag_mode}")
+        
+        conditions = ["project_id = ?"]
+        params: List[Any] = [project_id]
+        
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        
+        if memory_type:
+            conditions.append("memory_type = ?")
+            params.append(memory_type)
+        
+        tags = self._normalize_tags(tags)
+        if tags and not self._tags_available():
+            # 无索引表：逐行展开 tags JSON 列匹配
+            placeholders = ",".join("?" * len(tags))
+            conditions.append(f"""(
+                SELECT COUNT(DISTINCT TRIM(t.value)) FROM json_each(
+                    CASE WHEN json_valid(tags) THEN tags ELSE '[]' END
+                ) AS t
+                WHERE TRIM(t.value) IN ({placeholders})
+            ) {">= ?" if tag_mode == TagMatchMode.ALL else "> 0"}""")
+            params.extend(tags)
+            if tag_mode == TagMatchMode.ALL:
+                params.append(len(tags))
+        elif tags:
+            placeholders = ",".join("?" * len(tags))
+            if tag_mode == TagMatchMode.ALL:
+                conditions.append(f"""id IN (
+                    SELECT memory_id FROM memory_tags
+                    WHERE tag IN ({placeholders})
+                    GROUP BY memory_id
+                    HAVING COUNT(*) = ?
+                )""")
+                params.extend(tags)
+                params.append(len(tags))
+            else:
+                conditions.append(f"""id IN (
+                    SELECT memory_id FROM memory_tags
+                    WHERE tag IN ({placeholders})
+                )""")
+                params.extend(tags)
+        
+        return conditions, params
+    
+    def _row_to_memory(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """数据库行转换为记忆字典（解析JSON字段）"""
+        memory = dict(row)
+        if memory.get('context'):
+            try:
+                memory['context'] = json.loads(memory['context'])
+            except:
+                pass
+        if memory.get('tags'):
+            try:
+                memory['tags'] = json.loads(memory['tags'])
+            except:
+                memory['tags'] = []
+        if memory.get('related_tasks'):
+            try:
+                memory['related_tasks'] = json.loads(memory['related_tasks'])
+            except:
+                memory['related_tasks'] = []
+        if memory.get('related_issues'):
+            try:
+                memory['related_issues'] = json.loads(memory['related_issues'])
+            except:
+                memory['related_issues'] = []
+        return memory
+    
     def _query_memories_from_db(
         self,
         project_id: str,
         category: Optional[str],
         memory_type: Optional[str],
         tags: Optional[List[str]],
-        limit: int
+        limit: int,
+        tag_mode: str = TagMatchMode.ANY
     ) -> List[Dict[str, Any]]:
         """从数据库查询记忆"""
+        conditions, params = self._build_memory_filters(
+            project_id, category, memory_type, tags, tag_mode
+        )
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # 构建查询条件
-            conditions = ["project_id = ?"]
-            params = [project_id]
-            
-            if category:
-                conditions.append("category = ?")
-                params.append(category)
-            
-            if memory_type:
-                conditions.append("memory_type = ?")
-                params.append(memory_type)
-            
-            # TODO: 标签过滤需要JSON查询（SQLite 3.38+）
-            # 暂时跳过tags过滤
-            
             where_clause = " AND ".join(conditions)
+            # 有 rank_score 列时按预计算排序分走 (project_id, rank_score) 索引
+            order_by = "rank_score DESC" if self._rank_score_ready() else "importance DESC, created_at DESC"
             query = f"""
                 SELECT * FROM project_memories
                 WHERE {where_clause}
-                ORDER BY importance DESC, created_at DESC
+                ORDER BY {order_by}
                 LIMIT ?
             """
             params.append(limit)
@@ -824,74 +1925,130 @@ class ProjectMemoryService:
             cursor.execute(query, params)
             rows = cursor.fetchall()
             
-            # 转换为字典列表
-            memories = []
-            for row in rows:
-                memory = dict(row)
-                # 解析JSON字段
-                if memory.get('context'):
-                    try:
-                        memory['context'] = json.loads(memory['context'])
-                    except:
-                        pass
-                if memory.get('tags'):
-                    try:
-                        memory['tags'] = json.loads(memory['tags'])
-                    except:
-                        memory['tags'] = []
-                if memory.get('related_tasks'):
-                    try:
-                        memory['related_tasks'] = json.loads(memory['related_tasks'])
-                    except:
-                        memory['related_tasks'] = []
-                if memory.get('related_issues'):
-                    try:
-                        memory['related_issues'] = json.loads(memory['related_issues'])
-                    except:
-                        memory['related_issues'] = []
-                memories.append(memory)
-            
-            return memories
+            return [self._row_to_memory(row) for row in rows]
     
-    def _query_important_memories(
+    def _query_memories_by_ids(
         self,
+        memory_ids: List[str],
         project_id: str,
-        min_importance: int,
-        limit: int
+        category: Optional[str],
+        memory_type: Optional[str],
+        tags: Optional[List[str]],
+        tag_mode: str = TagMatchMode.ANY
     ) -> List[Dict[str, Any]]:
-        """查询重要记忆"""
+        """按ID批量查询记忆（同时应用分类/类型/标签过滤）"""
+        if not memory_ids:
+            return []
+        
+        conditions, params = self._build_memory_filters(
+            project_id, category, memory_type, tags, tag_mode
+        )
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM project_memories
-                WHERE project_id = ? AND importance >= ?
-                ORDER BY importance DESC, created_at DESC
-                LIMIT ?
-            """, (project_id, min_importance, limit))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            # CROSS JOIN 固定连接顺序：逐个ID走主键查找，
+            # 避免优化器改用 project_id 索引扫描整个项目
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT pm.*
+                    FROM json_each(?) AS ids
+                    CROSS JOIN project_memories AS pm ON pm.id = ids.value
+                )
+                WHERE {" AND ".join(conditions)}
+            """, [json.dumps(memory_ids)] + params)
+            return [self._row_to_memory(row) for row in cursor.fetchall()]
     
-    def _query_recent_memories(
-        self,
-        project_id: str,
-        days: int,
-        limit: int
-    ) -> List[Dict[str, Any]]:
-        """查询最近记忆"""
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+    def _get_memory_version(self, project_id: str) -> Optional[int]:
+        """
+        查询项目记忆版本号（project_memories 的触发器在每次写入时递增）
+        
+        Returns:
+            版本号；版本表不存在时返回None（不使用缓存）
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT version FROM memory_versions WHERE project_id = ?",
+                    (project_id,)
+                ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row["version"] if row else 0
+    
+    def _get_relation_version(self, project_id: str) -> Optional[int]:
+        """
+        查询项目关系版本号（memory_relations 的触发器在每次写入时递增）
+        
+        Returns:
+            版本号；版本表不存在时返回None（关系图每次重新加载）
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT version FROM memory_relation_versions WHERE project_id = ?",
+                    (project_id,)
+                ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row["version"] if row else 0
+    
+    def _query_knowledge_sections(self, project_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        一次UNION ALL查询获取知识继承包的四个部分
+        
+        - decisions: 架构决策（按重要性，5条）
+        - solutions: 解决方案（按重要性，10条）
+        - important_knowledge: 重要知识 importance >= 7（5条）
+        - recent_memories: 最近7天记忆（按时间，10条）
+        """
+        cutoff_date = (datetime.now() - timedelta(days=7)).isoformat()
+        sections: Dict[str, List[Dict[str, Any]]] = {
+            "decisions": [],
+            "solutions": [],
+            "important_knowledge": [],
+            "recent_memories": []
+        }
         
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM project_memories
-                WHERE project_id = ? AND created_at >= ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (project_id, cutoff_date, limit))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            rows = conn.execute("""
+                SELECT 'decisions' AS section, * FROM (
+                    SELECT * FROM project_memories
+                    WHERE project_id = ? AND category = ?
+                    ORDER BY importance DESC, created_at DESC
+                    LIMIT 5
+                )
+                UNION ALL
+                SELECT 'solutions' AS section, * FROM (
+                    SELECT * FROM project_memories
+                    WHERE project_id = ? AND category = ?
+                    ORDER BY importance DESC, created_at DESC
+                    LIMIT 10
+                )
+                UNION ALL
+                SELECT 'important_knowledge' AS section, * FROM (
+                    SELECT * FROM project_memories
+                    WHERE project_id = ? AND importance >= 7
+                    ORDER BY importance DESC, created_at DESC
+                    LIMIT 5
+                )
+                UNION ALL
+                SELECT 'recent_memories' AS section, * FROM (
+                    SELECT * FROM project_memories
+                    WHERE project_id = ? AND created_at >= ?
+                    ORDER BY created_at DESC
+                    LIMIT 10
+                )
+            """, (
+                project_id, MemoryCategory.DECISION,
+                project_id, MemoryCategory.SOLUTION,
+                project_id,
+                project_id, cutoff_date
+            )).fetchall()
+        
+        for row in rows:
+            memory = self._row_to_memory(row)
+            sections[memory.pop("section")].append(memory)
+        return sections
     
     def _query_related_memories(
         self,
@@ -899,58 +2056,70 @@ class ProjectMemoryService:
         relation_types: Optional[List[str]],
         min_strength: float
     ) -> List[Dict[str, Any]]:
-        """查询相关记忆"""
+        """查询相关记忆（直接邻居）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # 构建查询条件
-            conditions = ["(mr.source_memory_id = ? OR mr.target_memory_id = ?)"]
-            params = [memory_id, memory_id]
-            
+            filters = ["mr.strength >= ?"]
+            filter_params: List[Any] = [min_strength]
             if relation_types:
                 placeholders = ",".join("?" * len(relation_types))
-                conditions.append(f"mr.relation_type IN ({placeholders})")
-                params.extend(relation_types)
-            
-            conditions.append("mr.strength >= ?")
-            params.append(min_strength)
-            
-            where_clause = " AND ".join(conditions)
+                filters.append(f"mr.relation_type IN ({placeholders})")
+                filter_params.extend(relation_types)
+            filter_clause = " AND ".join(filters)
             
-            # 查询关联的记忆
+            # 两个方向分别走 source/target 索引，再合并
+            # （OR + CASE 连接无法同时利用两个索引）
             query = f"""
                 SELECT pm.*, mr.relation_type, mr.strength
                 FROM memory_relations mr
-                JOIN project_memories pm ON (
-                    CASE 
-                        WHEN mr.source_memory_id = ? THEN pm.id = mr.target_memory_id
-                        ELSE pm.id = mr.source_memory_id
-                    END
-                )
-                WHERE {where_clause}
-                ORDER BY mr.strength DESC, pm.importance DESC
+                JOIN project_memories pm ON pm.id = mr.target_memory_id
+                WHERE mr.source_memory_id = ? AND {filter_clause}
+                UNION ALL
+                SELECT pm.*, mr.relation_type, mr.strength
+                FROM memory_relations mr
+                JOIN project_memories pm ON pm.id = mr.source_memory_id
+                WHERE mr.target_memory_id = ? AND mr.source_memory_id != ? AND {filter_clause}
+                ORDER BY strength DESC, importance DESC
             """
-            params.insert(0, memory_id)
+            params = [memory_id] + filter_params + [memory_id, memory_id] + filter_params
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
-    def _query_memory_stats(self, project_id: str) -> Dict[str, Any]:
-        """查询记忆统计"""
+    def _query_project_relations(self, project_id: str) -> List[Tuple[str, str, str, float]]:
+        """查询项目内的全部关系（以源记忆所属项目为准）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
-            # 尝试从统计表获取
             cursor.execute("""
-                SELECT * FROM memory_stats WHERE project_id = ?
+                SELECT mr.source_memory_id, mr.target_memory_id, mr.relation_type, mr.strength
+                FROM project_memories pm
+                JOIN memory_relations mr ON mr.source_memory_id = pm.id
+                WHERE pm.project_id = ?
             """, (project_id,))
-            row = cursor.fetchone()
+            return [tuple(row) for row in cursor.fetchall()]
+    
+    def _query_memory_stats(self, project_id: str) -> Dict[str, Any]:
+        """查询记忆统计"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
             
-            if row:
-                return dict(row)
+            # 统计表只在 migration 012 的触发器存在时随写入更新，否则其中的行可能已过期
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                (MEMORY_STATS_TRIGGER,)
+            )
+            if cursor.fetchone() is not None:
+                cursor.execute("""
+                    SELECT * FROM memory_stats WHERE project_id = ?
+                """, (project_id,))
+                row = cursor.fetchone()
+                
+                if row:
+                    return dict(row)
             
-            # 如果不存在，实时计算
+            # 统计行不存在或未安装触发器时，实时计算
             cursor.execute("""
                 SELECT 
                     COUNT(*) as total_memories,
@@ -965,62 +2134,19 @@ class ProjectMemoryService:
             row = cursor.fetchone()
             return dict(row) if row else {}
     
-    def _update_memory_stats(self, project_id: str, memory_type: str) -> None:
-        """更新记忆统计"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 检查统计记录是否存在
-            cursor.execute("""
-                SELECT project_id FROM memory_stats WHERE project_id = ?
-            """, (project_id,))
-            exists = cursor.fetchone() is not None
-            
-            if exists:
-                # 更新现有统计
-                update_field = f"{memory_type}_memories" if memory_type != "knowledge" else "total_memories"
-                cursor.execute(f"""
-                    UPDATE memory_stats
-                    SET total_memories = total_memories + 1,
-                        {update_field} = {update_field} + 1,
-                        last_updated = ?
-                    WHERE project_id = ?
-                """, (datetime.now().isoformat(), project_id))
-            else:
-                # 创建新统计记录
-                cursor.execute("""
-                    INSERT INTO memory_stats (
-                        project_id, total_memories, session_memories,
-                        ultra_memories, decision_memories, solution_memories,
-                        last_updated
-                    ) VALUES (?, 1, 0, 0, 0, 0, ?)
-                """, (project_id, datetime.now().isoformat()))
-    
     def _record_retrieval(
         self,
         project_id: str,
         query: Optional[str],
         memory_ids: List[str]
     ) -> None:
-        """记录检索历史"""
+        """记录检索历史（进入写后队列）"""
         if not query or not memory_ids:
             return
         
-        retrieval_id = f"RETR-{uuid.uuid4().hex[:8]}"
-        
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO memory_retrievals (
-                    id, project_id, query, memory_ids, retrieved_at
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
-                retrieval_id,
-                project_id,
-                query,
-                json.dumps(memory_ids),
-                datetime.now().isoformat()
-            ))
+        self._write_queue.record_retrieval(project_id, query, memory_ids)
+        if not self.write_behind:
+            self._write_queue.flush()
     
     def _merge_memory_results(
         self,
@@ -1048,7 +2174,13 @@ def create_project_memory_service(
     state_manager=None,
     db_path: str = "database/data/tasks.db",
     session_memory_enabled: bool = True,
-    ultra_memory_enabled: bool = True
+    ultra_memory_enabled: bool = True,
+    local_search_enabled: bool = True,
+    knowledge_cache_ttl: float = 300.0,
+    write_behind: bool = True,
+    dedup_mode: str = DedupMode.MERGE,
+    rank_half_life_days: float = 30.0,
+    persist: Optional[bool] = None
 ) -> ProjectMemoryService:
     """创建项目记忆服务实例
     
@@ -1057,6 +2189,12 @@ def create_project_memory_service(
         db_path: 数据库文件路径
         session_memory_enabled: 是否启用Session Memory
         ultra_memory_enabled: 是否启用Ultra Memory Cloud
+        local_search_enabled: 是否启用本地BM25检索
+        knowledge_cache_ttl: 知识继承包缓存有效期（秒），0 表示不缓存
+        write_behind: 检索历史是否异步批量写入
+        dedup_mode: auto_record_* 的近似重复处理模式（off/flag/merge）
+        rank_half_life_days: 排序分时间衰减的半衰期（天）
+        persist: 是否读写本地数据库；默认仅在传入 state_manager 时启用
         
     Returns:
         ProjectMemoryService实例
@@ -1065,6 +2203,11 @@ def create_project_memory_service(
         state_manager=state_manager,
         db_path=db_path,
         session_memory_enabled=session_memory_enabled,
-        ultra_memory_enabled=ultra_memory_enabled
+        ultra_memory_enabled=ultra_memory_enabled,
+        local_search_enabled=local_search_enabled,
+        knowledge_cache_ttl=knowledge_cache_ttl,
+        write_behind=write_behind,
+        dedup_mode=dedup_mode,
+        rank_half_life_days=rank_half_life_days,
+        persist=persist
     )
-
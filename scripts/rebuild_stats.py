@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重建 memory_stats / event_stats
+
+统计计数由触发器维护（database/migrations/012_add_stats_triggers.sql），
+本脚本按 project_memories / project_events 全量重新计算，用于：
+- 校正触发器上线前或手工修改造成的偏差
+- 刷新 events_today / events_this_week / events_this_month 窗口计数（可放入 cron）
+
+用法:
+    python scripts/rebuild_stats.py
+    python scripts/rebuild_stats.py --project TASKFLOW
+    python scripts/rebuild_stats.py --only events
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.event_service import create_event_store
+from services.project_memory_service import create_project_memory_service
+
+DB_PATH = ROOT / "database" / "data" / "tasks.db"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重建记忆和事件统计")
+    parser.add_argument("--db", default=str(DB_PATH), help="数据库路径")
+    parser.add_argument("--project", default=None, help="只重建指定项目")
+    parser.add_argument("--only", choices=["memories", "events"], default=None, help="只重建一类统计")
+    args = parser.parse_args()
+
+    result = {}
+    if args.only in (None, "memories"):
+        service = create_project_memory_service(
+            persist=True,
+            db_path=args.db,
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        try:
+            result["memory_stats"] = service.rebuild_memory_stats(project_id=args.project)
+        except sqlite3.OperationalError as e:
+            # 数据库尚未执行项目记忆相关的 migration
+            result["memory_stats"] = f"skipped: {e}"
+        finally:
+            service.close()
+
+    if args.only in (None, "events"):
+        try:
+            result["event_stats"] = create_event_store(args.db).rebuild_stats(project_id=args.project)
+        except sqlite3.OperationalError as e:
+            result["event_stats"] = f"skipped: {e}"
+
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
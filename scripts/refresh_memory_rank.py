@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目记忆排序分批量刷新
+
+重新计算 project_memories.rank_score（重要性 + 时间衰减 + 检索频次），
+适合放入 cron；也可用 --interval 常驻循环执行。
+需先执行 database/migrations/011_add_memory_rank_score.sql
+
+用法:
+    python scripts/refresh_memory_rank.py
+    python scripts/refresh_memory_rank.py --project TASKFLOW
+    python scripts/refresh_memory_rank.py --interval 3600
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.project_memory_service import create_project_memory_service
+
+DB_PATH = ROOT / "database" / "data" / "tasks.db"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目记忆排序分批量刷新")
+    parser.add_argument("--db", default=str(DB_PATH), help="数据库路径")
+    parser.add_argument("--project", default=None, help="只刷新指定项目")
+    parser.add_argument("--half-life", type=float, default=30.0, help="时间衰减半衰期（天）")
+    parser.add_argument("--interval", type=float, default=0, help="循环间隔（秒），0 表示只执行一次")
+    args = parser.parse_args()
+
+    service = create_project_memory_service(
+        persist=True,
+        db_path=args.db,
+        session_memory_enabled=False,
+        ultra_memory_enabled=False,
+        local_search_enabled=False,
+        rank_half_life_days=args.half_life
+    )
+
+    try:
+        while True:
+            result = service.refresh_rank_scores(project_id=args.project)
+            print(json.dumps(result, ensure_ascii=False))
+            if args.interval <= 0:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
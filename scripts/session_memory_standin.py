@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Memory MCP 本地替身服务
+
+用于离线开发和同步吞吐量基准测试，实现与真实服务相同的接口：
+- POST /api/memory/store
+- GET  /api/memory/retrieve
+- GET  /health
+
+用法:
+    python scripts/session_memory_standin.py --port 5173
+    python scripts/session_memory_standin.py --port 5173 --latency-ms 20 --failure-rate 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency_ms: float = 0.0, failure_rate: float = 0.0) -> FastAPI:
+    """
+    创建替身服务应用
+
+    Args:
+        latency_ms: 每个请求的模拟延迟（毫秒）
+        failure_rate: 返回503的概率（0-1），用于验证重试逻辑
+
+    Returns:
+        FastAPI应用（app.state.memories 保存已接收的记忆）
+    """
+    app = FastAPI(title="Session Memory Stand-in")
+    app.state.memories = {}
+    app.state.stats = {"store_requests": 0, "injected_failures": 0}
+
+    async def _simulate() -> bool:
+        """模拟延迟和故障，返回是否注入故障"""
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000.0)
+        if failure_rate > 0 and random.random() < failure_rate:
+            app.state.stats["injected_failures"] += 1
+            return True
+        return False
+
+    @app.post("/api/memory/store")
+    async def store(request: Request):
+        app.state.stats["store_requests"] += 1
+        if await _simulate():
+            return JSONResponse(content={"error": "injected failure"}, status_code=503)
+
+        body: Dict[str, Any] = await request.json()
+        session_id = (body.get("metadata") or {}).get("session_id")
+        memory_id = f"MEM-{uuid.uuid4().hex[:8]}"
+        # 同一会话重复上传时覆盖
+        app.state.memories[session_id or memory_id] = {
+            "memory_id": memory_id,
+            "content": body.get("content", ""),
+            "metadata": body.get("metadata", {}),
+            "stored_at": datetime.now().isoformat()
+        }
+        return {"success": True, "memory_id": memory_id}
+
+    @app.get("/api/memory/retrieve")
+    async def retrieve(query: str, limit: int = 10, user_id: str = "architect"):
+        if await _simulate():
+            return JSONResponse(content={"error": "injected failure"}, status_code=503)
+
+        matches = [
+            {
+                "memory_id": m["memory_id"],
+                "relevance": 1.0,
+                "session_id": m["metadata"].get("session_id"),
+                "content": m["content"][:200]
+            }
+            for m in app.state.memories.values()
+            if query in m["content"]
+        ]
+        return {"memories": matches[:limit]}
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "healthy",
+            "memories": len(app.state.memories),
+            **app.state.stats
+        }
+
+    return app
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Session Memory MCP 本地替身服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=5173, help="监听端口（默认5173）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟请求延迟（毫秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="模拟503故障率（0-1）")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(
+        create_app(latency_ms=args.latency_ms, failure_rate=args.failure_rate),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
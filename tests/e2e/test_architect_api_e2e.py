@@ -568,6 +568,10 @@ class TestArchitectOrchestratorUnit:
         assert "articles_created" in result
         assert "task_board_updated" in result
         
+        # 未注入state_manager时不报告虚假的任务创建数
+        assert result["tasks_created"] == 0
+        assert result["task_errors"][0]["error"] == "state_manager not configured"
+        
         # 验证task-board.md已生成
         task_board = temp_docs_dir / "tasks" / "task-board.md"
         assert task_board.exists()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+依赖分析器基准测试
+
+在三种合成 DAG 上测量 DependencyAnalyzer 各方法耗时（均为迭代 O(V+E) 实现）:
+1. random：N 个任务（默认 250k），每个任务依赖最近 window 个任务中的 deps 个（默认约 1M 条边）
+2. chain：单条深度为 chain 的依赖链（原递归实现在约 1000 层时 RecursionError）
+3. lattice：每层 2 个任务、相邻层全连接的菱形格子，祖先路径数随层数指数增长
+   （原 identify_blocking_tasks 会重复访问共享祖先）
+
+另在 random DAG 上测量 CachedDependencyAnalyzer：未命中、按图指纹命中、按版本号命中的耗时。
+
+用法:
+    python tests/performance/bench_dependency_analyzer.py
+    python tests/performance/bench_dependency_analyzer.py --tasks 250000 --deps 4 --chain 200000 --repeat 3
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.dependency_analyzer import CachedDependencyAnalyzer, DependencyAnalyzer
+from automation.models import Task, TaskStatus
+
+
+def random_dag(count: int, deps: int, window: int, seed: int):
+    """每个任务依赖最近 window 个任务中的 deps 个（不足时全部依赖）"""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        previous = range(max(0, i - window), i)
+        tasks.append(Task(
+            id=f"task-{i}", title="任务", estimated_hours=rng.uniform(0.5, 8),
+            status=TaskStatus.COMPLETED if rng.random() < 0.5 else TaskStatus.PENDING,
+            depends_on=[f"task-{d}" for d in rng.sample(previous, min(len(previous), deps))]
+        ))
+    return tasks
+
+
+def chain_dag(length: int):
+    return [
+        Task(id=f"chain-{i}", title="任务", depends_on=[f"chain-{i - 1}"] if i else [])
+        for i in range(length)
+    ]
+
+
+def lattice_dag(levels: int):
+    tasks = [Task(id="root", title="任务")]
+    previous = ["root"]
+    for level in range(levels):
+        current = [f"lattice-{level}-{k}" for k in range(2)]
+        tasks.extend(Task(id=task_id, title="任务", depends_on=previous) for task_id in current)
+        previous = current
+    tasks.append(Task(id="sink", title="任务", depends_on=previous))
+    return tasks
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    size = len(result) if isinstance(result, list) else result
+    return {"result": size, "p50_ms": round(samples[len(samples) // 2] * 1000, 1)}
+
+
+def measure(tasks, target: str, repeat: int) -> dict:
+    analyzer = DependencyAnalyzer()
+    return {
+        "tasks": len(tasks),
+        "edges": sum(len(t.depends_on) for t in tasks),
+        "has_cycle": timed(lambda: analyzer.has_cycle(tasks), repeat),
+        "get_topological_order": timed(lambda: analyzer.get_topological_order(tasks), repeat),
+        "get_critical_path": timed(lambda: analyzer.get_critical_path(tasks), repeat),
+        "get_parallelizable_groups": timed(lambda: analyzer.get_parallelizable_groups(tasks), repeat),
+        "identify_blocking_tasks": timed(lambda: analyzer.identify_blocking_tasks(tasks, target), repeat)
+    }
+
+
+def measure_cache(tasks, repeat: int) -> dict:
+    """关键路径 + 拓扑序 + 并行分组：首次计算 / 图指纹命中 / 版本号命中"""
+    def query(analyzer, **kwargs):
+        analyzer.get_critical_path(tasks, **kwargs)
+        analyzer.get_topological_order(tasks, **kwargs)
+        return analyzer.get_parallelizable_groups(tasks, **kwargs)
+
+    def miss():
+        analyzer = CachedDependencyAnalyzer()
+        return query(analyzer)
+
+    cached = CachedDependencyAnalyzer()
+    query(cached)
+    query(cached, version=1)
+    results = {
+        "miss": timed(miss, repeat),
+        "fingerprint_hit": timed(lambda: query(cached), repeat),
+        "version_hit": timed(lambda: query(cached, version=1), repeat),
+        "fingerprint_only": {
+            "p50_ms": timed(lambda: CachedDependencyAnalyzer.fingerprint(tasks), repeat)["p50_ms"]
+        }
+    }
+    results["cache_info"] = cached.cache_info()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="依赖分析器基准测试")
+    parser.add_argument("--tasks", type=int, default=250000, help="random DAG 任务数量")
+    parser.add_argument("--deps", type=int, default=4, help="random DAG 每个任务的依赖数")
+    parser.add_argument("--window", type=int, default=1000, help="random DAG 依赖窗口")
+    parser.add_argument("--chain", type=int, default=200000, help="依赖链深度")
+    parser.add_argument("--lattice", type=int, default=200, help="菱形格子层数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    random_tasks = random_dag(args.tasks, args.deps, args.window, args.seed)
+    build_s = time.perf_counter() - start
+
+    results = {
+        "random": {"build_tasks_s": round(build_s, 1), **measure(random_tasks, random_tasks[-1].id, args.repeat)},
+        "chain": measure(chain_dag(args.chain), f"chain-{args.chain - 1}", args.repeat),
+        "lattice": measure(lattice_dag(args.lattice), "sink", args.repeat),
+        "cache": measure_cache(random_tasks, args.repeat)
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件驱动调度端到端派发延迟基准测试
+
+调度循环在独立线程中运行，模拟的 Worker 在后台线程中按随机执行时长完成任务
+（调用 TaskScheduler.complete_task）。对比固定间隔轮询与事件驱动两种模式：
+1. 释放延迟：Worker 完成任务（槽位释放）到被分配下一个任务的时间（积压任务时）
+2. 新任务延迟：所有 Worker 空闲时创建任务到任务被分配的时间
+3. 调度轮数：事件驱动模式下抖动窗口合并后的实际调度次数
+
+用法:
+    python tests/performance/bench_event_scheduling.py
+    python tests/performance/bench_event_scheduling.py --tasks 400 --workers 16 --interval 2 --debounce 0.02
+"""
+
+import argparse
+import contextlib
+import heapq
+import io
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.models import Task
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+
+
+def summarize(samples) -> dict:
+    """延迟分位数（毫秒）"""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2)
+    }
+
+
+def run_mode(event_driven: bool, args) -> dict:
+    """运行一种调度模式，返回延迟统计"""
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        sm = StateManager(db_path=str(Path(tmp) / "state.db"))
+        sm.create_tasks([Task(id=f"backlog-{i}", title="积压任务") for i in range(args.tasks)])
+        scheduler = TaskScheduler(sm)
+        for i in range(args.workers):
+            scheduler.register_worker(f"worker-{i}")
+
+        lock = threading.Condition()
+        running = []          # (完成时间, task_id, worker_id)
+        freed_at = {}         # worker_id -> 槽位释放时间
+        created_at = {}       # task_id -> 创建时间
+        release_latency, create_latency = [], []
+        done = {"count": 0}
+        passes = {"count": 0}
+        draining = {"active": True}   # 只在有积压任务时统计释放延迟
+
+        original_schedule = scheduler.schedule_tasks
+
+        def counting_schedule():
+            passes["count"] += 1
+            return original_schedule()
+
+        scheduler.schedule_tasks = counting_schedule
+
+        def on_assignments(assignments):
+            now = time.perf_counter()
+            with lock:
+                for worker_id, task_ids in assignments.items():
+                    if worker_id in freed_at:
+                        release_latency.append(now - freed_at.pop(worker_id))
+                    for task_id in task_ids:
+                        if task_id in created_at:
+                            create_latency.append(now - created_at.pop(task_id))
+                        duration = rng.uniform(args.min_exec, args.max_exec)
+                        heapq.heappush(running, (now + duration, task_id, worker_id))
+                lock.notify_all()
+
+        stop = threading.Event()
+
+        def executor():
+            while not stop.is_set():
+                with lock:
+                    if not running:
+                        lock.wait(0.05)
+                        continue
+                    due, task_id, worker_id = running[0]
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        lock.wait(delay)
+                        continue
+                    heapq.heappop(running)
+                    if draining["active"]:
+                        freed_at[worker_id] = time.perf_counter()
+                scheduler.complete_task(task_id, worker_id, success=True)
+                with lock:
+                    done["count"] += 1
+                    lock.notify_all()
+
+        loop = threading.Thread(target=scheduler.start_scheduling_loop, kwargs={
+            "interval": args.interval, "event_driven": event_driven,
+            "debounce": args.debounce, "on_assignments": on_assignments
+        })
+        worker_thread = threading.Thread(target=executor)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            loop.start()
+            worker_thread.start()
+
+            # 阶段 1：积压任务全部完成
+            with lock:
+                lock.wait_for(lambda: done["count"] >= args.tasks)
+            drain_time = time.perf_counter() - start
+            with lock:
+                draining["active"] = False
+                freed_at.clear()  # 最后一批完成时已没有积压任务可分配
+
+            # 阶段 2：Worker 全部空闲时逐个创建新任务
+            for i in range(args.new_tasks):
+                time.sleep(rng.uniform(0, args.interval))
+                task_id = f"new-{i}"
+                with lock:
+                    created_at[task_id] = time.perf_counter()
+                sm.create_task(Task(id=task_id, title="新任务"))
+                with lock:
+                    lock.wait_for(lambda: task_id not in created_at)
+
+            scheduler.stop()
+            stop.set()
+            loop.join()
+            worker_thread.join()
+
+    return {
+        "drain_s": round(drain_time, 2),
+        "schedule_passes": passes["count"],
+        "release_to_dispatch": summarize(release_latency),
+        "create_to_dispatch": summarize(create_latency)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件驱动调度端到端派发延迟基准测试")
+    parser.add_argument("--tasks", type=int, default=200, help="积压任务数量")
+    parser.add_argument("--workers", type=int, default=8, help="Worker 数量")
+    parser.add_argument("--new-tasks", type=int, default=10, help="阶段 2 逐个创建的任务数")
+    parser.add_argument("--interval", type=float, default=1.0, help="轮询间隔 / 事件驱动的兜底间隔（秒）")
+    parser.add_argument("--debounce", type=float, default=0.01, help="事件驱动的抖动窗口（秒）")
+    parser.add_argument("--min-exec", type=float, default=0.02, help="任务最短执行时长（秒）")
+    parser.add_argument("--max-exec", type=float, default=0.2, help="任务最长执行时长（秒）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    results = {
+        "tasks": args.tasks,
+        "workers": args.workers,
+        "interval_s": args.interval,
+        "debounce_s": args.debounce,
+        "periodic": run_mode(False, args),
+        "event_driven": run_mode(True, args)
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
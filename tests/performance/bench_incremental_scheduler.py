@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量就绪队列调度基准测试
+
+在 N 个任务（默认 100k，随机依赖）和 W 个 Worker（默认 500）上模拟多轮调度：
+每轮把就绪任务分配给空闲 Worker，随后本轮分配的任务全部完成。对比：
+1. legacy：原 schedule_tasks 的做法，每轮对全部候选任务运行
+   DependencyAnalyzer.get_executable_tasks、排序，每次分配遍历全部 Worker
+2. ready_queue：ReadyQueue 增量维护依赖计数和两个堆，每次决策 O(log n)
+两种方式每轮分配的任务集合必须一致（assignments_match）。
+
+可选 --db：在临时数据库上运行 TaskScheduler.schedule_tasks（首轮全量同步 + 之后的增量轮次）。
+
+用法:
+    python tests/performance/bench_incremental_scheduler.py
+    python tests/performance/bench_incremental_scheduler.py --tasks 100000 --workers 500 --ticks 20 --db
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.dependency_analyzer import DependencyAnalyzer
+from automation.models import Task, TaskStatus
+from automation.ready_queue import ReadyQueue
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+
+
+def generate_tasks(count: int, seed: int):
+    """生成合成任务：每个任务依赖最近 5000 个任务中的 0~3 个"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    tasks = []
+    for i in range(count):
+        window = range(max(0, i - 5000), i)
+        deps = rng.sample(window, min(len(window), rng.randrange(4)))
+        tasks.append(Task(
+            id=f"task-{i}", title=f"任务 {i}", priority=f"P{rng.randrange(3)}",
+            depends_on=[f"task-{d}" for d in deps],
+            estimated_hours=rng.uniform(0.5, 8),  # 工时各不相同，两种方式排序无并列
+            created_at=base + timedelta(seconds=i)
+        ))
+    return tasks
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def run_legacy(tasks, workers: int, ticks: int):
+    """原调度方式：每轮全量重算 + 逐 Worker 扫描"""
+    analyzer = DependencyAnalyzer()
+    status = {t.id: "pending" for t in tasks}
+    worker_busy = {f"worker-{i}": False for i in range(workers)}
+    heartbeat = {w: datetime.now() for w in worker_busy}
+
+    def find_best_worker():
+        # 与原 find_best_worker 相同：遍历全部健康 Worker 找负载最低者（只接受空闲 Worker）
+        best, min_load = None, float("inf")
+        for worker_id in worker_busy:
+            if (datetime.now() - heartbeat[worker_id]).total_seconds() < 300:
+                load = 1 if worker_busy[worker_id] else 0
+                if load < min_load:
+                    best, min_load = worker_id, load
+        return best if min_load == 0 else None
+
+    tick_times, rounds = [], []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        completed = {tid for tid, s in status.items() if s == "completed"}
+        candidates = [t for t in tasks if status[t.id] == "pending"]
+        for t in candidates:
+            t.status = "pending"
+        executable = set(analyzer.get_executable_tasks(candidates, completed))
+        unassigned = [t for t in candidates if t.id in executable]
+        unassigned.sort(key=lambda t: (
+            0 if t.priority == "P0" else 1 if t.priority == "P1" else 2, -t.estimated_hours
+        ))
+        assigned = []
+        for task in unassigned:
+            worker_id = find_best_worker()
+            if worker_id is None:
+                break
+            worker_busy[worker_id] = True
+            status[task.id] = "in_progress"
+            assigned.append(task.id)
+        tick_times.append(time.perf_counter() - start)
+        rounds.append(set(assigned))
+
+        # 本轮任务全部完成
+        for task_id in assigned:
+            status[task_id] = "completed"
+        for worker_id in worker_busy:
+            worker_busy[worker_id] = False
+    return tick_times, rounds
+
+
+def run_ready_queue(tasks, workers: int, ticks: int):
+    """增量方式：状态变化时局部更新，分配时只做堆操作"""
+    queue = ReadyQueue()
+    start = time.perf_counter()
+    for t in tasks:
+        queue.upsert_task(t.id, "pending", t.priority, t.estimated_hours, t.depends_on)
+    for i in range(workers):
+        queue.add_worker(f"worker-{i}")
+    load_time = time.perf_counter() - start
+
+    tick_times, decision_times, transition_times, rounds = [], [], [], []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        assigned = []
+        while True:
+            decision_start = time.perf_counter()
+            picked = queue.pop_assignment()
+            if picked is None:
+                break
+            queue.set_status(picked[0], "in_progress")
+            decision_times.append(time.perf_counter() - decision_start)
+            assigned.append(picked)
+        tick_times.append(time.perf_counter() - start)
+        rounds.append({task_id for task_id, _, _ in assigned})
+
+        # 本轮任务全部完成：依赖计数随之更新，Worker 释放槽位
+        start = time.perf_counter()
+        for task_id, worker_id, slots in assigned:
+            queue.set_status(task_id, "completed")
+            queue.release_slots(worker_id, slots)
+        transition_times.append((time.perf_counter() - start) / max(1, len(assigned)))
+    return load_time, tick_times, decision_times, transition_times, rounds
+
+
+def run_db(tasks, workers: int, ticks: int):
+    """TaskScheduler.schedule_tasks 在真实数据库上的轮次耗时"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sm = StateManager(db_path=str(Path(tmp) / "state.db"))
+        sm.create_tasks(tasks)
+        scheduler = TaskScheduler(sm)
+        for i in range(workers):
+            scheduler.register_worker(f"worker-{i}")
+
+        tick_times = []
+        assigned_total = 0
+        for _ in range(ticks):
+            start = time.perf_counter()
+            assignments = scheduler.schedule_tasks()
+            tick_times.append(time.perf_counter() - start)
+            pairs = [(task_id, w) for w, ids in assignments.items() for task_id in ids]
+            assigned_total += len(pairs)
+            for task_id, worker_id in pairs:
+                scheduler.complete_task(task_id, worker_id, success=True)
+            sm.update_tasks_status([(task_id, TaskStatus.COMPLETED) for task_id, _ in pairs])
+    return {
+        "ticks": ticks,
+        "assigned": assigned_total,
+        "first_tick_ms": round(tick_times[0] * 1000, 1),
+        "incremental_tick_p50_ms": round(percentile(tick_times[1:] or tick_times, 0.5) * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量就绪队列调度基准测试")
+    parser.add_argument("--tasks", type=int, default=100000, help="任务数量")
+    parser.add_argument("--workers", type=int, default=500, help="Worker 数量")
+    parser.add_argument("--ticks", type=int, default=20, help="调度轮数")
+    parser.add_argument("--db", action="store_true", help="同时测试 TaskScheduler 在数据库上的轮次耗时")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    tasks = generate_tasks(args.tasks, args.seed)
+
+    legacy_ticks, legacy_rounds = run_legacy(tasks, args.workers, args.ticks)
+    load_time, rq_ticks, decisions, transitions, rq_rounds = run_ready_queue(
+        tasks, args.workers, args.ticks
+    )
+
+    results = {
+        "tasks": args.tasks,
+        "workers": args.workers,
+        "ticks": args.ticks,
+        "assigned": sum(len(r) for r in rq_rounds),
+        "assignments_match": legacy_rounds == rq_rounds,
+        "legacy": {
+            "tick_p50_ms": round(percentile(legacy_ticks, 0.5) * 1000, 1),
+            "tick_max_ms": round(max(legacy_ticks) * 1000, 1)
+        },
+        "ready_queue": {
+            "initial_load_ms": round(load_time * 1000, 1),
+            "tick_p50_ms": round(percentile(rq_ticks, 0.5) * 1000, 2),
+            "tick_max_ms": round(max(rq_ticks) * 1000, 2),
+            "decision_p50_us": round(percentile(decisions, 0.5) * 1e6, 2),
+            "decision_p99_us": round(percentile(decisions, 0.99) * 1e6, 2),
+            "completion_avg_us": round(sum(transitions) / len(transitions) * 1e6, 2)
+        },
+        "tick_speedup": round(percentile(legacy_ticks, 0.5) / percentile(rq_ticks, 0.5), 1)
+    }
+    if args.db:
+        results["task_scheduler_db"] = run_db(tasks, args.workers, min(args.ticks, 5))
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
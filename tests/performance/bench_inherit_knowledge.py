@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知识继承包基准测试
+
+对比重复调用 inherit_knowledge 的耗时：
+1. uncached: 关闭缓存（knowledge_cache_ttl=0），每次一次UNION查询
+2. cached: 版本号缓存，每次只查询一次版本号
+3. cached_with_writes: 每隔 --write-every 次调用写入一条新记忆（缓存失效）
+
+同时统计 memory_retrievals 新增行数（内部调用不应写入检索历史）
+
+用法:
+    python tests/performance/bench_inherit_knowledge.py
+    python tests/performance/bench_inherit_knowledge.py --memories 50000 --calls 2000
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.project_memory_service import (
+    MemoryCategory,
+    MemoryType,
+    create_project_memory_service
+)
+
+MIGRATIONS_DIR = ROOT / "database" / "migrations"
+MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql"
+)
+CATEGORIES = [
+    MemoryCategory.ARCHITECTURE, MemoryCategory.PROBLEM, MemoryCategory.SOLUTION,
+    MemoryCategory.DECISION, MemoryCategory.KNOWLEDGE, MemoryCategory.EXPERIENCE
+]
+
+
+def prepare_db(db_path: Path, memories: int, projects: int, seed: int) -> None:
+    """创建数据库并写入合成记忆"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(db_path))
+    for name in MIGRATIONS:
+        conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+
+    now = datetime.now()
+    conn.executemany("""
+        INSERT INTO project_memories (
+            id, project_id, memory_type, category, title, content, importance, created_at, updated_at
+        ) VALUES (?, ?, 'knowledge', ?, ?, ?, ?, ?, ?)
+    """, [
+        (
+            f"MEM-{i:08d}",
+            f"PROJ-{i % projects}",
+            rng.choice(CATEGORIES),
+            f"记忆 {i}",
+            "合成内容 " * 20,
+            rng.randint(1, 10),
+            (now - timedelta(days=rng.uniform(0, 60))).isoformat(),
+            now.isoformat()
+        )
+        for i in range(memories)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def count_retrievals(db_path: Path) -> int:
+    """memory_retrievals 行数"""
+    conn = sqlite3.connect(str(db_path))
+    count = conn.execute("SELECT COUNT(*) FROM memory_retrievals").fetchone()[0]
+    conn.close()
+    return count
+
+
+def run_scenario(db_path: Path, calls: int, projects: int, cache_ttl: float, write_every: int = 0) -> dict:
+    """执行一个场景"""
+    service = create_project_memory_service(
+        state_manager=object(),
+        db_path=str(db_path),
+        session_memory_enabled=False,
+        ultra_memory_enabled=False,
+        local_search_enabled=False,
+        knowledge_cache_ttl=cache_ttl
+    )
+    retrievals_before = count_retrievals(db_path)
+
+    samples = []
+    for i in range(calls):
+        if write_every and i and i % write_every == 0:
+            service.create_memory(
+                project_id=f"PROJ-{i % projects}",
+                memory_type=MemoryType.KNOWLEDGE,
+                category=MemoryCategory.DECISION,
+                title=f"新决策 {i}",
+                content="基准测试写入",
+                importance=8
+            )
+        start = time.perf_counter()
+        service.inherit_knowledge(project_id=f"PROJ-{i % projects}")
+        samples.append(time.perf_counter() - start)
+
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "calls": calls,
+        "total_s": round(total, 4),
+        "calls_per_s": round(calls / total, 1) if total > 0 else None,
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "cache": dict(service.knowledge_cache_stats),
+        "retrievals_logged": count_retrievals(db_path) - retrievals_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识继承包基准测试")
+    parser.add_argument("--memories", type=int, default=20000, help="记忆数量")
+    parser.add_argument("--projects", type=int, default=10, help="项目数量")
+    parser.add_argument("--calls", type=int, default=1000, help="调用次数")
+    parser.add_argument("--write-every", type=int, default=50, help="cached_with_writes 场景的写入间隔")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        prepare_db(db_path, args.memories, args.projects, args.seed)
+
+        results = {
+            "memories": args.memories,
+            "projects": args.projects,
+            "uncached": run_scenario(db_path, args.calls, args.projects, cache_ttl=0),
+            "cached": run_scenario(db_path, args.calls, args.projects, cache_ttl=300),
+            "cached_with_writes": run_scenario(
+                db_path, args.calls, args.projects, cache_ttl=300, write_every=args.write_every
+            )
+        }
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
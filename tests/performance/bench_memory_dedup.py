@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目记忆近似重复检测基准测试
+
+逐步扩大记忆规模（默认 1k → 10k → 100k），每个规模下测量：
+1. 签名回填吞吐量（rebuild_memory_signatures）
+2. create_memory(dedup_mode=merge) 的插入延迟（p50/p95）
+3. 近似重复的检出率（改动一个词的副本）与误合并数（全新文本）
+
+插入代价应与记忆总数基本无关（LSH 分桶只做一次索引查找）
+
+用法:
+    python tests/performance/bench_memory_dedup.py
+    python tests/performance/bench_memory_dedup.py --sizes 1000,10000,100000 --inserts 500
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.project_memory_service import (
+    DedupMode,
+    MemoryCategory,
+    MemoryType,
+    create_project_memory_service
+)
+
+MIGRATIONS_DIR = ROOT / "database" / "migrations"
+MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "010_add_memory_signatures.sql"
+)
+PROJECT_ID = "PROJ-0"
+VOCABULARY = [f"term{i}" for i in range(20000)]
+
+
+def make_text(rng: random.Random) -> str:
+    """生成一段合成文本（30 个词，来自较大的词表，互不相似）"""
+    return " ".join(rng.choices(VOCABULARY, k=30))
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    """替换一个词，得到近似重复文本"""
+    words = text.split()
+    words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def latency_summary(samples) -> dict:
+    """延迟统计"""
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def add_base_memories(db_path: Path, start: int, end: int, texts: list, rng: random.Random) -> None:
+    """直接写入记忆（不带签名，由回填生成）"""
+    batch = []
+    for i in range(start, end):
+        text = make_text(rng)
+        texts.append(text)
+        batch.append((f"MEM-{i:08d}", PROJECT_ID, "合成记忆", text))
+    conn = sqlite3.connect(str(db_path))
+    conn.executemany("""
+        INSERT INTO project_memories (id, project_id, memory_type, category, title, content, importance)
+        VALUES (?, ?, 'knowledge', 'knowledge', ?, ?, 5)
+    """, batch)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目记忆近似重复检测基准测试")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="记忆规模（逗号分隔，递增）")
+    parser.add_argument("--inserts", type=int, default=300, help="每个规模下的插入次数")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.5, help="插入中近似重复的比例")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = {"inserts_per_size": args.inserts, "duplicate_ratio": args.duplicate_ratio, "sizes": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        conn = sqlite3.connect(str(db_path))
+        for name in MIGRATIONS:
+            conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+        conn.close()
+
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+
+        texts = []
+        for size in sizes:
+            add_base_memories(db_path, len(texts), size, texts, rng)
+
+            start = time.perf_counter()
+            rebuilt = service.rebuild_memory_signatures(batch_size=5000)
+            rebuild_s = time.perf_counter() - start
+
+            samples = []
+            detected = expected = false_merges = 0
+            for i in range(args.inserts):
+                is_duplicate = rng.random() < args.duplicate_ratio
+                text = mutate(rng.choice(texts), rng) if is_duplicate else make_text(rng)
+                start = time.perf_counter()
+                memory = service.create_memory(
+                    project_id=PROJECT_ID,
+                    memory_type=MemoryType.KNOWLEDGE,
+                    category=MemoryCategory.KNOWLEDGE,
+                    title="合成记忆",
+                    content=text,
+                    dedup_mode=DedupMode.MERGE
+                )
+                samples.append(time.perf_counter() - start)
+                expected += is_duplicate
+                if memory.get("merged"):
+                    detected += is_duplicate
+                    false_merges += not is_duplicate
+
+            service.flush_writes()
+            results["sizes"].append({
+                "memories": size,
+                "rebuild": {
+                    "signatures": rebuilt,
+                    "seconds": round(rebuild_s, 3),
+                    "per_s": round(rebuilt / rebuild_s, 1) if rebuilt and rebuild_s > 0 else None
+                },
+                "insert": latency_summary(samples),
+                "duplicates_detected": f"{detected}/{expected}",
+                "false_merges": false_merges
+            })
+        service.close()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
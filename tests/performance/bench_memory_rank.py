@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目记忆预计算排序分基准测试
+
+对比 Top-K 检索（retrieve_memories 不带查询词）的两种排序：
+1. legacy：ORDER BY importance DESC, created_at DESC（未执行 migration 011）
+2. rank_score：ORDER BY rank_score DESC，走 (project_id, rank_score) 索引范围扫描
+
+同时测量 refresh_rank_scores 批量刷新的耗时，并输出两种排序的查询计划
+
+用法:
+    python tests/performance/bench_memory_rank.py
+    python tests/performance/bench_memory_rank.py --memories 100000 --retrievals 20000 --calls 500
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.project_memory_service import create_project_memory_service
+
+MIGRATIONS_DIR = ROOT / "database" / "migrations"
+MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "010_add_memory_signatures.sql"
+)
+RANK_MIGRATION = "011_add_memory_rank_score.sql"
+PROJECT_ID = "PROJ-0"
+
+
+def prepare_db(db_path: Path, memories: int, retrievals: int, with_rank: bool, seed: int) -> None:
+    """创建数据库，写入合成记忆（更新时间分布在一年内）和检索历史"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    conn = sqlite3.connect(str(db_path))
+    for name in MIGRATIONS + ((RANK_MIGRATION,) if with_rank else ()):
+        conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+
+    rows = []
+    for i in range(memories):
+        ts = (now - timedelta(days=rng.uniform(0, 365))).isoformat()
+        rows.append((f"MEM-{i:08d}", f"PROJ-{i % 10}", f"记忆 {i}", "合成内容", rng.randint(1, 10), ts, ts))
+    conn.executemany("""
+        INSERT INTO project_memories (id, project_id, memory_type, category, title, content, importance, created_at, updated_at)
+        VALUES (?, ?, 'knowledge', 'knowledge', ?, ?, ?, ?, ?)
+    """, rows)
+
+    project_ids = [r[0] for r in rows if r[1] == PROJECT_ID]
+    conn.executemany("""
+        INSERT INTO memory_retrievals (id, project_id, query, memory_ids, retrieved_at)
+        VALUES (?, ?, 'bench', ?, ?)
+    """, [
+        (
+            f"RET-{i:08d}", PROJECT_ID,
+            json.dumps(rng.sample(project_ids, min(5, len(project_ids)))),
+            (now - timedelta(days=rng.uniform(0, 120))).isoformat()
+        )
+        for i in range(retrievals)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def latency_summary(samples) -> dict:
+    """延迟统计"""
+    ordered = sorted(samples)
+    return {
+        "calls": len(samples),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def query_plan(db_path: Path, order_by: str) -> list:
+    """Top-K 查询的执行计划"""
+    conn = sqlite3.connect(str(db_path))
+    plan = conn.execute(f"""
+        EXPLAIN QUERY PLAN
+        SELECT * FROM project_memories WHERE project_id = ? ORDER BY {order_by} LIMIT 10
+    """, (PROJECT_ID,)).fetchall()
+    conn.close()
+    return [row[-1] for row in plan]
+
+
+def run_scenario(db_path: Path, calls: int, limit: int, with_rank: bool) -> dict:
+    """执行一个场景"""
+    service = create_project_memory_service(
+        state_manager=object(),
+        db_path=str(db_path),
+        session_memory_enabled=False,
+        ultra_memory_enabled=False,
+        local_search_enabled=False
+    )
+
+    result = {}
+    if with_rank:
+        start = time.perf_counter()
+        refresh = service.refresh_rank_scores()
+        refresh["seconds"] = round(time.perf_counter() - start, 3)
+        result["refresh"] = refresh
+
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        service.retrieve_memories(project_id=PROJECT_ID, limit=limit)
+        samples.append(time.perf_counter() - start)
+    service.close()
+
+    result["top_k"] = latency_summary(samples)
+    result["query_plan"] = query_plan(
+        db_path, "rank_score DESC" if with_rank else "importance DESC, created_at DESC"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目记忆预计算排序分基准测试")
+    parser.add_argument("--memories", type=int, default=100000, help="记忆总数（平均分布在 10 个项目）")
+    parser.add_argument("--retrievals", type=int, default=20000, help="检索历史条数")
+    parser.add_argument("--calls", type=int, default=300, help="Top-K 检索次数")
+    parser.add_argument("--limit", type=int, default=10, help="K")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    results = {"memories": args.memories, "retrievals": args.retrievals, "limit": args.limit}
+    for name, with_rank in (("legacy", False), ("rank_score", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            prepare_db(db_path, args.memories, args.retrievals, with_rank, args.seed)
+            results[name] = run_scenario(db_path, args.calls, args.limit, with_rank)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目记忆本地检索基准测试
+
+测量：
+1. 索引构建吞吐量（增量添加）
+2. 单次检索延迟（p50/p95/max）
+3. 快照保存/加载耗时
+4. 端到端 retrieve_memories(query=...) 延迟（含SQLite回表和过滤，可用 --skip-service 跳过）
+
+用法:
+    python tests/performance/bench_memory_search.py
+    python tests/performance/bench_memory_search.py --memories 100000 --queries 500
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.memory_search_index import MemorySearchIndex, build_memory_text
+from services.project_memory_service import create_project_memory_service
+
+MIGRATIONS_DIR = ROOT / "database" / "migrations"
+
+# 合成语料的词汇
+TOPICS = [
+    "内存泄漏", "数据库索引", "缓存失效", "死锁", "线程池", "任务调度", "依赖分析",
+    "事件监听", "接口超时", "前端渲染", "日志采集", "权限校验", "配置热更新", "消息队列"
+]
+ACTIONS = ["排查", "修复", "优化", "重构", "监控", "回滚", "压测", "设计"]
+WORDS = [
+    "react", "python", "sqlite", "fastapi", "redis", "docker", "kubernetes",
+    "timeout", "retry", "latency", "throughput", "scheduler", "worker", "index"
+]
+
+
+def make_memory(i: int, rng: random.Random) -> dict:
+    """生成一条合成记忆"""
+    topic = rng.choice(TOPICS)
+    sentences = [
+        f"{rng.choice(TOPICS)}{rng.choice(ACTIONS)}，涉及{rng.choice(WORDS)}和{rng.choice(WORDS)}。"
+        for _ in range(rng.randint(2, 6))
+    ]
+    return {
+        "id": f"MEM-{i:08d}",
+        "project_id": f"PROJ-{i % 10}",
+        "title": f"{topic}{rng.choice(ACTIONS)}记录 {i}",
+        "content": "".join(sentences),
+        "tags": rng.sample(WORDS, 2),
+        "importance": rng.randint(1, 10)
+    }
+
+
+def percentile(values, pct):
+    """计算百分位（毫秒）"""
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000, 3)
+
+
+def latency_summary(samples):
+    """延迟统计"""
+    return {
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "max_ms": round(max(samples) * 1000, 3)
+    }
+
+
+def make_queries(count: int, rng: random.Random):
+    """生成查询文本"""
+    return [
+        rng.choice([
+            rng.choice(TOPICS),
+            f"{rng.choice(TOPICS)}{rng.choice(ACTIONS)}",
+            f"{rng.choice(WORDS)} {rng.choice(TOPICS)}"
+        ])
+        for _ in range(count)
+    ]
+
+
+def bench_index(memories, queries, tmp: Path) -> dict:
+    """索引级基准"""
+    index = MemorySearchIndex()
+    start = time.perf_counter()
+    for rowid, m in enumerate(memories, 1):
+        index.add(m["id"], m["project_id"], build_memory_text(m["title"], m["content"], m["tags"]), rowid=rowid)
+    build_s = time.perf_counter() - start
+
+    samples = []
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        index.search(q, project_id=f"PROJ-{i % 10}", top_k=50)
+        samples.append(time.perf_counter() - start)
+
+    snapshot = tmp / "index_only.npz"
+    start = time.perf_counter()
+    index.save(str(snapshot))
+    save_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    MemorySearchIndex.load(str(snapshot))
+    load_s = time.perf_counter() - start
+
+    return {
+        "build_s": round(build_s, 3),
+        "docs_per_s": round(len(memories) / build_s, 1),
+        "vocabulary": len(index._vocab),
+        "search": latency_summary(samples),
+        "snapshot_mb": round(snapshot.stat().st_size / 1024 / 1024, 2),
+        "snapshot_save_s": round(save_s, 3),
+        "snapshot_load_s": round(load_s, 3)
+    }
+
+
+def bench_service(memories, queries, tmp: Path) -> dict:
+    """端到端基准（SQLite + 检索 + 回表过滤 + 重要性加权）"""
+    db_path = tmp / "bench.db"
+    conn = sqlite3.connect(str(db_path))
+    for name in ("003_add_project_memories.sql", "008_add_memory_tags.sql"):
+        conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+    conn.executemany("""
+        INSERT INTO project_memories (id, project_id, memory_type, category, title, content, tags, importance)
+        VALUES (?, ?, 'knowledge', 'knowledge', ?, ?, ?, ?)
+    """, [
+        (m["id"], m["project_id"], m["title"], m["content"], json.dumps(m["tags"]), m["importance"])
+        for m in memories
+    ])
+    conn.executemany(
+        "INSERT INTO memory_tags (memory_id, tag) VALUES (?, ?)",
+        [(m["id"], t) for m in memories for t in m["tags"]]
+    )
+    conn.commit()
+    conn.close()
+
+    service = create_project_memory_service(
+        state_manager=object(),
+        db_path=str(db_path),
+        session_memory_enabled=False,
+        ultra_memory_enabled=False
+    )
+
+    # 首次检索：从数据库构建索引并写快照
+    start = time.perf_counter()
+    service.retrieve_memories(project_id="PROJ-0", query=queries[0])
+    cold_s = time.perf_counter() - start
+
+    samples = []
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        service.retrieve_memories(project_id=f"PROJ-{i % 10}", query=q, limit=10)
+        samples.append(time.perf_counter() - start)
+
+    # 重启：从快照加载
+    restarted = create_project_memory_service(
+        state_manager=object(),
+        db_path=str(db_path),
+        session_memory_enabled=False,
+        ultra_memory_enabled=False
+    )
+    start = time.perf_counter()
+    restarted.retrieve_memories(project_id="PROJ-0", query=queries[0])
+    warm_start_s = time.perf_counter() - start
+
+    return {
+        "cold_build_s": round(cold_s, 3),
+        "restart_from_snapshot_s": round(warm_start_s, 3),
+        "retrieve_memories": latency_summary(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目记忆本地检索基准测试")
+    parser.add_argument("--memories", type=int, default=100000, help="记忆数量")
+    parser.add_argument("--queries", type=int, default=300, help="查询次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--skip-service", action="store_true", help="跳过端到端基准")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    memories = [make_memory(i, rng) for i in range(args.memories)]
+    queries = make_queries(args.queries, rng)
+
+    results = {"memories": args.memories, "queries": args.queries}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["index"] = bench_index(memories, queries, Path(tmp))
+        if not args.skip_service:
+            results["service"] = bench_service(memories, queries, Path(tmp))
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
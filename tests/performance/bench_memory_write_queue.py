@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目记忆写后队列基准测试
+
+对比 write_behind 开/关时的请求路径延迟：
+1. retrieve_memories(query=...)：每次调用都会记录检索历史
+2. create_memory：插入记忆（memory_stats 由触发器在同一事务内更新）
+
+可用 --writer-threads 启动并发写入线程（持续 create_memory），模拟写锁竞争
+
+用法:
+    python tests/performance/bench_memory_write_queue.py
+    python tests/performance/bench_memory_write_queue.py --calls 2000 --writer-threads 2
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "packages" / "core-domain" / "src"))
+
+from services.project_memory_service import (
+    MemoryCategory,
+    MemoryType,
+    create_project_memory_service
+)
+
+MIGRATIONS_DIR = ROOT / "database" / "migrations"
+MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "004_add_events_tables.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "012_add_stats_triggers.sql"
+)
+
+
+def prepare_db(db_path: Path, memories: int) -> None:
+    """创建数据库并写入合成记忆"""
+    conn = sqlite3.connect(str(db_path))
+    for name in MIGRATIONS:
+        conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+    conn.executemany("""
+        INSERT INTO project_memories (id, project_id, memory_type, category, title, content, importance)
+        VALUES (?, 'PROJ-0', 'knowledge', 'knowledge', ?, ?, ?)
+    """, [(f"MEM-{i:08d}", f"缓存优化 {i}", "缓存失效与数据库索引", i % 10 + 1) for i in range(memories)])
+    conn.commit()
+    conn.close()
+
+
+def latency_summary(samples) -> dict:
+    """延迟统计"""
+    ordered = sorted(samples)
+    return {
+        "calls": len(samples),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def run_scenario(db_path: Path, calls: int, writer_threads: int, write_behind: bool) -> dict:
+    """执行一个场景"""
+    service = create_project_memory_service(
+        state_manager=object(),
+        db_path=str(db_path),
+        session_memory_enabled=False,
+        ultra_memory_enabled=False,
+        local_search_enabled=False,
+        knowledge_cache_ttl=0,
+        write_behind=write_behind
+    )
+
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            service.create_memory(
+                project_id="PROJ-1",
+                memory_type=MemoryType.DECISION,
+                category=MemoryCategory.DECISION,
+                title="并发写入",
+                content="基准测试"
+            )
+
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(writer_threads)]
+    for t in threads:
+        t.start()
+
+    retrieve_samples = []
+    create_samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        service.retrieve_memories(project_id="PROJ-0", query="缓存", limit=10)
+        retrieve_samples.append(time.perf_counter() - start)
+
+        if i % 10 == 0:
+            start = time.perf_counter()
+            service.create_memory(
+                project_id="PROJ-0",
+                memory_type=MemoryType.SOLUTION,
+                category=MemoryCategory.SOLUTION,
+                title=f"方案 {i}",
+                content="基准测试"
+            )
+            create_samples.append(time.perf_counter() - start)
+
+    stop.set()
+    for t in threads:
+        t.join()
+    service.close()
+
+    return {
+        "retrieve_memories": latency_summary(retrieve_samples),
+        "create_memory": latency_summary(create_samples),
+        "write_queue": {
+            k: v for k, v in service.get_write_queue_stats().items()
+            if k in ("flushes", "retrievals_written", "errors")
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目记忆写后队列基准测试")
+    parser.add_argument("--memories", type=int, default=5000, help="记忆数量")
+    parser.add_argument("--calls", type=int, default=1000, help="检索次数")
+    parser.add_argument("--writer-threads", type=int, default=1, help="并发写入线程数")
+    args = parser.parse_args()
+
+    results = {"memories": args.memories, "writer_threads": args.writer_threads}
+    for name, write_behind in (("synchronous", False), ("write_behind", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            prepare_db(db_path, args.memories)
+            results[name] = run_scenario(db_path, args.calls, args.writer_threads, write_behind)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Session Memory 批量同步基准测试
+
+默认在进程内启动 Session Memory 替身服务（scripts/session_memory_standin.py），
+无需网络即可测量：
+1. 首次全量同步吞吐量（串行 vs 并发）
+2. 无变化时的增量同步耗时
+3. 部分会话变化后的增量同步耗时
+
+用法:
+    python tests/performance/bench_session_memory_sync.py
+    python tests/performance/bench_session_memory_sync.py --sessions 2000 --latency-ms 20
+    python tests/performance/bench_session_memory_sync.py --url http://127.0.0.1:5173
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "api" / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import httpx
+
+from services.session_memory_sync import SessionMemorySyncService
+from session_memory_standin import create_app
+
+
+def make_sessions(count: int, messages_per_session: int = 6):
+    """生成合成会话数据"""
+    sessions = []
+    for i in range(count):
+        messages = [
+            {
+                "id": f"msg-{j + 1:03d}",
+                "from": "用户" if j % 2 == 0 else "架构师AI",
+                "content": f"会话{i} 第{j}条消息：讨论任务调度与记忆同步的实现细节。",
+                "timestamp": "2025-11-18T23:45:00",
+                "tokens": 120
+            }
+            for j in range(messages_per_session)
+        ]
+        sessions.append({
+            "session_id": f"session-{i + 1:05d}",
+            "title": f"基准测试会话 {i + 1}",
+            "created_at": "2025-11-18T23:00:00",
+            "updated_at": "2025-11-18T23:45:00",
+            "status": "active",
+            "participants": ["用户", "架构师AI"],
+            "tags": ["benchmark"],
+            "messages_count": len(messages),
+            "total_tokens": 120 * len(messages),
+            "summary": "",
+            "messages": messages
+        })
+    return sessions
+
+
+async def timed_sync(service: SessionMemorySyncService, sessions, force: bool = False):
+    """执行一次同步并计时"""
+    start = time.perf_counter()
+    summary = await service.sync_sessions(sessions, force=force)
+    elapsed = time.perf_counter() - start
+    summary.pop("failures", None)
+    return {
+        **summary,
+        "elapsed_s": round(elapsed, 4),
+        "sessions_per_s": round(len(sessions) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+async def run(args):
+    sessions = make_sessions(args.sessions)
+    results = {"sessions": args.sessions, "latency_ms": args.latency_ms, "runs": {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, concurrency in (("sequential", 1), ("concurrent", args.concurrency)):
+            transport = None
+            if not args.url:
+                transport = httpx.ASGITransport(
+                    app=create_app(latency_ms=args.latency_ms, failure_rate=args.failure_rate)
+                )
+
+            service = SessionMemorySyncService(
+                base_url=args.url or "http://standin",
+                db_path=str(Path(tmp) / f"{label}.db"),
+                max_concurrency=concurrency,
+                backoff_base=0.01,
+                backoff_cap=0.1,
+                transport=transport
+            )
+
+            run_result = {"concurrency": concurrency}
+            run_result["full_sync"] = await timed_sync(service, sessions)
+            run_result["incremental_unchanged"] = await timed_sync(service, sessions)
+
+            # 修改10%的会话后再次增量同步
+            for session in sessions[::10]:
+                session["summary"] = f"{label} 更新摘要"
+            run_result["incremental_10pct_changed"] = await timed_sync(service, sessions)
+
+            results["runs"][label] = run_result
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session Memory 批量同步基准测试")
+    parser.add_argument("--sessions", type=int, default=500, help="会话数量")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发上传数")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="替身服务模拟延迟（毫秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="替身服务模拟故障率")
+    parser.add_argument("--url", default=None, help="使用已运行的服务地址（默认进程内替身）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
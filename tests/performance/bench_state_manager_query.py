@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+StateManager 任务查询基准测试
+
+在 N 个任务（默认 50k）上对比：
+1. list_all_tasks()：全部列 + 每行构造 Task 模型（迁移前 Dashboard / 调度器的做法）
+2. Dashboard 统计：query_tasks(fields=["status"], raw=True) 全表投影计数，
+   对比触发器维护的计数表 + 版本号缓存（get_status_counts，缓存命中/写入后）
+3. Dashboard 任务列表：StateManagerAdapter.get_tasks()（投影 9 列，原始元组）
+4. 调度器候选任务：query_tasks(status=[pending, blocked])
+5. 键集分页：每页 page-size 条，首页与末页延迟（深分页不应变慢）
+6. 批量写入：逐条 create_task / update_task_status 对比 create_tasks / update_tasks_status
+7. Dashboard 增量轮询：adapter.get_task_changes(since)（无变化 / 改动 10 个任务后）
+
+用法:
+    python tests/performance/bench_state_manager_query.py
+    python tests/performance/bench_state_manager_query.py --tasks 50000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskStatus
+from automation.state_manager import StateManager
+from industrial_dashboard.adapters import StateManagerAdapter
+
+STATUSES = ["pending"] * 2 + ["in_progress", "review", "blocked"] + ["completed"] * 5
+
+
+def prepare_db(db_path: Path, tasks: int, seed: int) -> StateManager:
+    """创建 StateManager 数据库并直接写入合成任务"""
+    sm = StateManager(db_path=str(db_path))
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    rows = []
+    for i in range(tasks):
+        ts = (base + timedelta(seconds=i)).isoformat()
+        deps = json.dumps([f"task-{rng.randrange(i)}"] if i else [])
+        rows.append((
+            f"task-{i}", f"任务 {i}", "合成任务描述", rng.choice(STATUSES),
+            rng.choice(["P0", "P1", "P2"]), deps, "[]",
+            f"worker-{rng.randrange(50)}" if rng.random() < 0.3 else None,
+            ts, ts, rng.uniform(0.5, 8), "medium"
+        ))
+    conn = sqlite3.connect(str(db_path))
+    conn.executemany("""
+        INSERT INTO tasks (
+            id, title, description, status, priority, depends_on, blocked_by,
+            assigned_to, created_at, updated_at, estimated_hours, complexity
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return sm
+
+
+def timed(fn, repeat: int) -> dict:
+    """执行 repeat 次，返回延迟统计和最后一次的结果规模"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "rows": len(result),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StateManager 任务查询基准测试")
+    parser.add_argument("--tasks", type=int, default=50000, help="任务数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    parser.add_argument("--page-size", type=int, default=500, help="分页大小")
+    parser.add_argument("--batch-size", type=int, default=1000, help="批量写入的任务数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sm = prepare_db(Path(tmp) / "state.db", args.tasks, args.seed)
+        adapter = StateManagerAdapter(sm)
+
+        results = {"tasks": args.tasks, "repeat": args.repeat}
+        results["list_all_tasks"] = timed(sm.list_all_tasks, args.repeat)
+        results["stats_status_projection"] = timed(
+            lambda: sm.query_tasks(fields=["status"], raw=True), args.repeat
+        )
+        results["status_counts_cached"] = timed(sm.get_status_counts, args.repeat * 20)
+        results["status_counts_after_write"] = timed(
+            lambda: (sm.update_task_status("task-0", random.choice(STATUSES)), sm.get_status_counts())[1],
+            args.repeat * 20
+        )
+        results["adapter_get_stats"] = timed(lambda: [adapter.get_stats()], args.repeat * 20)
+        results["adapter_get_tasks"] = timed(adapter.get_tasks, args.repeat)
+        version = adapter.get_task_changes(0)["version"]
+        results["adapter_changes_idle"] = timed(
+            lambda: adapter.get_task_changes(version)["changed"], args.repeat * 20
+        )
+        sm.update_tasks_status([(f"task-{i}", TaskStatus.REVIEW) for i in range(10)])
+        results["adapter_changes_10_updates"] = timed(
+            lambda: adapter.get_task_changes(version)["changed"], args.repeat * 20
+        )
+        results["scheduler_candidates"] = timed(
+            lambda: sm.query_tasks(status=[TaskStatus.PENDING, TaskStatus.BLOCKED]), args.repeat
+        )
+
+        # 键集分页：遍历全部页，记录首页和末页
+        page_samples = []
+        cursor = None
+        while True:
+            start = time.perf_counter()
+            page = sm.query_tasks(
+                fields=["created_at", "id", "title", "status"], raw=True,
+                after=cursor, limit=args.page_size
+            )
+            page_samples.append(time.perf_counter() - start)
+            if not page:
+                break
+            cursor = (page[-1][0], page[-1][1])
+        results["keyset_pagination"] = {
+            "pages": len(page_samples) - 1,
+            "first_page_ms": round(page_samples[0] * 1000, 3),
+            "last_page_ms": round(page_samples[-2] * 1000, 3),
+            "total_ms": round(sum(page_samples) * 1000, 2)
+        }
+
+        # 批量写入：每种方式写入 batch-size 个新任务后改为 completed
+        for mode in ("single", "bulk"):
+            batch = [Task(id=f"{mode}-{i}", title=f"导入任务 {i}") for i in range(args.batch_size)]
+            start = time.perf_counter()
+            if mode == "single":
+                for task in batch:
+                    sm.create_task(task)
+            else:
+                sm.create_tasks(batch)
+            create_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            if mode == "single":
+                for task in batch:
+                    sm.update_task_status(task.id, TaskStatus.COMPLETED)
+            else:
+                sm.update_tasks_status([(task.id, TaskStatus.COMPLETED) for task in batch])
+            update_ms = (time.perf_counter() - start) * 1000
+            results[f"{mode}_writes"] = {
+                "tasks": args.batch_size,
+                "create_ms": round(create_ms, 2),
+                "update_status_ms": round(update_ms, 2)
+            }
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
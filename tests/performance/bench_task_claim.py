@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务原子认领多进程压力测试
+
+N 个 Worker 进程（各自独立的 StateManager 和数据库连接）循环调用
+claim_task 直到没有可认领任务，统计：
+1. 认领吞吐量（claims/s）与单次认领延迟分位数
+2. 重复分配数（同一任务被多个 Worker 认领，必须为 0）
+3. 未被认领的任务数（必须为 0）
+4. 可选：--expire-ratio 比例的认领不提交、让租约过期，由回收器放回后再次认领
+
+用法:
+    python tests/performance/bench_task_claim.py
+    python tests/performance/bench_task_claim.py --tasks 20000 --workers 16 --wal
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskStatus
+from automation.state_manager import StateManager
+
+
+def prepare_db(db_path: Path, tasks: int, wal: bool) -> None:
+    """创建数据库并批量写入待分配任务"""
+    sm = StateManager(db_path=str(db_path))
+    base = datetime(2026, 1, 1)
+    sm.create_tasks([
+        Task(id=f"task-{i}", title=f"任务 {i}", priority=f"P{i % 3}",
+             created_at=base + timedelta(seconds=i))
+        for i in range(tasks)
+    ])
+    if wal:
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+
+
+def run_worker(db_path: str, worker_id: str, expire_ratio: float, seed: int):
+    """Worker 进程：循环认领，按比例模拟崩溃（认领后不提交，租约立即过期）"""
+    sm = StateManager(db_path=db_path)
+    rng = random.Random(seed)
+    claims = []
+    latencies = []
+    while True:
+        crash = rng.random() < expire_ratio
+        start = time.perf_counter()
+        claim = sm.claim_task(worker_id, lease_seconds=-1 if crash else 600)
+        latencies.append(time.perf_counter() - start)
+        if claim is None:
+            break
+        claims.append(claim["task_id"])
+        if not crash:
+            sm.update_task_status(claim["task_id"], TaskStatus.COMPLETED,
+                                  fencing_token=claim["fencing_token"])
+    return claims, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务原子认领多进程压力测试")
+    parser.add_argument("--tasks", type=int, default=5000, help="任务数量")
+    parser.add_argument("--workers", type=int, default=8, help="Worker 进程数")
+    parser.add_argument("--expire-ratio", type=float, default=0.0, help="认领后模拟崩溃的比例")
+    parser.add_argument("--wal", action="store_true", help="数据库使用 WAL 模式")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "state.db"
+        prepare_db(db_path, args.tasks, args.wal)
+        sm = StateManager(db_path=str(db_path))
+
+        all_claims = []
+        latencies = []
+        duplicates = 0
+        rounds = 0
+        reaped = 0
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            while True:
+                rounds += 1
+                results = pool.starmap(run_worker, [
+                    (str(db_path), f"worker-{i}", args.expire_ratio, args.seed + rounds * 1000 + i)
+                    for i in range(args.workers)
+                ])
+                round_claims = []
+                for claims, worker_latencies in results:
+                    round_claims.extend(claims)
+                    latencies.extend(worker_latencies)
+                all_claims.extend(round_claims)
+                # 一轮内没有回收，同一任务被认领两次即为重复分配
+                duplicates += sum(n - 1 for n in Counter(round_claims).values() if n > 1)
+
+                # 回收器：崩溃 Worker 的任务放回待分配，进入下一轮
+                requeued = sm.reap_expired_leases()
+                reaped += len(requeued)
+                if not requeued:
+                    break
+        elapsed = time.perf_counter() - start
+
+        counts = sm.rebuild_status_counts()
+        latencies.sort()
+
+    print(json.dumps({
+        "tasks": args.tasks,
+        "workers": args.workers,
+        "wal": args.wal,
+        "rounds": rounds,
+        "claims": len(all_claims),
+        "reaped": reaped,
+        "double_assignments": duplicates,
+        "unclaimed_tasks": counts.get("pending", 0),
+        "completed_tasks": counts.get("completed", 0),
+        "claims_per_sec": round(len(all_claims) / elapsed, 1),
+        "claim_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "claim_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "elapsed_s": round(elapsed, 2)
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
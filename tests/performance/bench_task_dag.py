@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量任务 DAG 基准测试
+
+在 N 个任务（默认 100k，随机依赖）上对比每次变化后的查询代价:
+1. full：DependencyAnalyzer 从任务列表全量重算 get_executable_tasks + get_parallelizable_groups
+2. incremental：TaskDAG 局部更新后查询 executable_tasks + parallel_groups
+
+变化包括：任务完成（set_status）、新增带依赖的任务、新增依赖边（部分与当前拓扑序相反，触发 Pearce–Kelly 重排）。
+
+用法:
+    python tests/performance/bench_task_dag.py
+    python tests/performance/bench_task_dag.py --tasks 100000 --updates 2000 --full-samples 5
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "apps" / "dashboard" / "src"))
+
+from automation.dependency_analyzer import DependencyAnalyzer
+from automation.models import Task, TaskStatus
+from automation.task_dag import TaskDAG
+
+
+def generate_tasks(count: int, seed: int):
+    """每个任务依赖最近 1000 个任务中的 0~3 个"""
+    rng = random.Random(seed)
+    return [
+        Task(id=f"task-{i}", title="任务",
+             depends_on=[f"task-{d}" for d in rng.sample(range(max(0, i - 1000), i), min(i, rng.randrange(4)))])
+        for i in range(count)
+    ]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量任务 DAG 基准测试")
+    parser.add_argument("--tasks", type=int, default=100000, help="任务数量")
+    parser.add_argument("--updates", type=int, default=2000, help="增量变化次数")
+    parser.add_argument("--full-samples", type=int, default=5, help="全量重算的采样次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tasks = generate_tasks(args.tasks, args.seed)
+
+    start = time.perf_counter()
+    dag = TaskDAG.from_tasks(tasks)
+    build_s = time.perf_counter() - start
+
+    # 全量重算：每次变化后对全部任务重新分析
+    analyzer = DependencyAnalyzer()
+    completed = set()
+    full = []
+    for _ in range(args.full_samples):
+        start = time.perf_counter()
+        analyzer.get_executable_tasks(tasks, completed)
+        analyzer.get_parallelizable_groups(tasks)
+        full.append(time.perf_counter() - start)
+
+    # 增量：完成一个就绪任务 / 新增任务 / 新增依赖边
+    samples = {"complete": [], "add_task": [], "add_edge": []}
+    query = []
+    rejected = 0
+    next_id = args.tasks
+    for _ in range(args.updates):
+        kind = rng.choice(list(samples))
+        start = time.perf_counter()
+        if kind == "complete":
+            ready = dag.executable_tasks()
+            if ready:
+                dag.set_status(ready[0], TaskStatus.COMPLETED)
+        elif kind == "add_task":
+            deps = [f"task-{rng.randrange(next_id)}" for _ in range(rng.randrange(4))]
+            dag.add_task(f"task-{next_id}", deps)
+            next_id += 1
+        else:
+            a, b = rng.randrange(next_id), rng.randrange(next_id)
+            try:
+                dag.add_dependency(f"task-{a}", f"task-{b}")
+            except ValueError:
+                rejected += 1
+        samples[kind].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        dag.executable_tasks()
+        dag.parallel_groups()
+        query.append(time.perf_counter() - start)
+
+    results = {
+        "tasks": args.tasks,
+        "updates": args.updates,
+        "incremental_build_s": round(build_s, 2),
+        "full_recompute_p50_ms": round(percentile(full, 0.5) * 1000, 1),
+        "incremental": {
+            kind: {
+                "count": len(values),
+                "p50_us": round(percentile(values, 0.5) * 1e6, 1),
+                "p99_us": round(percentile(values, 0.99) * 1e6, 1)
+            }
+            for kind, values in samples.items() if values
+        },
+        "cycles_rejected": rejected,
+        "query_p50_ms": round(percentile(query, 0.5) * 1000, 2)
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共基类：临时目录中的 StateManager
+"""
+
+import unittest
+import contextlib
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.state_manager import StateManager
+
+
+class StateManagerTestCase(unittest.TestCase):
+    """临时数据库 + StateManager
+
+    self.db_path 为数据库路径（需要模拟独立进程时另建 StateManager），
+    quiet = True 时测试期间屏蔽标准输出（调度器日志）。
+    """
+
+    quiet = False
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp_dir.name) / "state.db")
+        self.sm = StateManager(db_path=self.db_path)
+        if self.quiet:
+            output = contextlib.redirect_stdout(io.StringIO())
+            output.__enter__()
+            self.addCleanup(output.__exit__, None, None, None)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
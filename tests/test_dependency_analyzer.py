@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+依赖分析器单元测试（循环检测、拓扑排序、关键路径、阻塞任务、并行分组、结果缓存）
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.dependency_analyzer import CachedDependencyAnalyzer, DependencyAnalyzer
+from automation.models import Task, TaskStatus
+from automation.state_manager import StateManager
+
+
+def make_task(task_id, deps=(), hours=1.0, status=TaskStatus.PENDING):
+    return Task(id=task_id, title=task_id, depends_on=list(deps), estimated_hours=hours, status=status)
+
+
+def chain(length):
+    return [make_task(f"t{i}", [f"t{i - 1}"] if i else []) for i in range(length)]
+
+
+class TestDependencyAnalyzer(unittest.TestCase):
+    """测试依赖分析器"""
+
+    def setUp(self):
+        self.analyzer = DependencyAnalyzer()
+        # a -> b -> d, a -> c -> d，c 工时更长
+        self.diamond = [
+            make_task("a", hours=1),
+            make_task("b", ["a"], hours=2),
+            make_task("c", ["a"], hours=5),
+            make_task("d", ["b", "c"], hours=1),
+        ]
+
+    def test_cycle_detection(self):
+        self.assertFalse(self.analyzer.has_cycle(self.diamond))
+        cyclic = self.diamond + [make_task("e", ["f"]), make_task("f", ["e"])]
+        self.assertTrue(self.analyzer.has_cycle(cyclic))
+        self.assertIsNone(self.analyzer.get_topological_order(cyclic))
+        self.assertTrue(self.analyzer.has_cycle([make_task("self", ["self"])]))
+
+    def test_topological_order(self):
+        order = self.analyzer.get_topological_order(self.diamond)
+        self.assertEqual(order[0], "a")
+        self.assertEqual(order[-1], "d")
+        self.assertEqual(set(order), {"a", "b", "c", "d"})
+
+    def test_external_and_duplicate_dependencies_ignored(self):
+        tasks = [make_task("a", ["outside"]), make_task("b", ["a", "a"])]
+        self.assertEqual(self.analyzer.get_topological_order(tasks), ["a", "b"])
+        self.assertEqual(self.analyzer.get_parallelizable_groups(tasks), [["a"], ["b"]])
+
+    def test_critical_path_is_longest_path(self):
+        self.assertEqual(self.analyzer.get_critical_path(self.diamond), ["a", "c", "d"])
+        self.assertEqual(self.analyzer.estimate_total_time(self.diamond), 7)
+
+    def test_critical_path_follows_path_length_not_own_hours(self):
+        """前驱中自身工时最大的不一定在最长路径上"""
+        tasks = [
+            make_task("x1", hours=4), make_task("x2", ["x1"], hours=4),
+            make_task("y", hours=6),
+            make_task("end", ["x2", "y"], hours=1),
+        ]
+        self.assertEqual(self.analyzer.get_critical_path(tasks), ["x1", "x2", "end"])
+        self.assertEqual(self.analyzer.estimate_total_time(tasks), 9)
+
+    def test_critical_path_empty_and_cyclic(self):
+        self.assertEqual(self.analyzer.get_critical_path([]), [])
+        with self.assertRaises(ValueError):
+            self.analyzer.get_critical_path([make_task("e", ["f"]), make_task("f", ["e"])])
+
+    def test_identify_blocking_tasks(self):
+        self.diamond[1] = make_task("b", ["a"], status=TaskStatus.COMPLETED)
+        blocking = self.analyzer.identify_blocking_tasks(self.diamond, "d")
+        self.assertEqual(set(blocking), {"a", "c"})
+        self.assertEqual(self.analyzer.identify_blocking_tasks(self.diamond, "missing"), [])
+
+    def test_parallelizable_groups(self):
+        self.assertEqual(
+            self.analyzer.get_parallelizable_groups(self.diamond), [["a"], ["b", "c"], ["d"]]
+        )
+        with self.assertRaises(ValueError):
+            self.analyzer.get_parallelizable_groups([make_task("e", ["e"])])
+
+    def test_deep_chain_without_recursion(self):
+        """依赖链深度超过递归限制"""
+        tasks = chain(sys.getrecursionlimit() * 5)
+        self.assertFalse(self.analyzer.has_cycle(tasks))
+        self.assertEqual(len(self.analyzer.get_critical_path(tasks)), len(tasks))
+        self.assertEqual(len(self.analyzer.get_parallelizable_groups(tasks)), len(tasks))
+        self.assertEqual(len(self.analyzer.identify_blocking_tasks(tasks, tasks[-1].id)), len(tasks) - 1)
+
+    def test_shared_ancestors_visited_once(self):
+        """菱形格子：祖先路径数随层数指数增长，闭包只有线性规模"""
+        tasks = [make_task("root")]
+        previous = ["root"]
+        for level in range(60):
+            current = [f"l{level}-{k}" for k in range(2)]
+            tasks.extend(make_task(task_id, previous) for task_id in current)
+            previous = current
+        tasks.append(make_task("sink", previous))
+        self.assertEqual(len(self.analyzer.identify_blocking_tasks(tasks, "sink")), 121)
+
+
+class TestCachedDependencyAnalyzerResults(TestDependencyAnalyzer):
+    """CachedDependencyAnalyzer 的结果与 DependencyAnalyzer 一致"""
+
+    def setUp(self):
+        super().setUp()
+        self.analyzer = CachedDependencyAnalyzer()
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """测试按图指纹缓存、LRU 淘汰和命中统计"""
+
+    def setUp(self):
+        self.analyzer = CachedDependencyAnalyzer(maxsize=3)
+        self.tasks = [make_task("a", hours=2), make_task("b", ["a"], hours=3), make_task("c", hours=1)]
+
+    def test_hit_on_unchanged_graph(self):
+        self.assertEqual(self.analyzer.get_critical_path(self.tasks), ["a", "b"])
+        # 内容相同的新列表同样命中
+        copy = [make_task("a", hours=2), make_task("b", ["a"], hours=3), make_task("c", hours=1)]
+        self.assertEqual(self.analyzer.get_critical_path(copy), ["a", "b"])
+        info = self.analyzer.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["size"], info["hit_rate"]), (1, 1, 1, 0.5))
+
+    def test_fingerprint_tracks_hours_deps_and_status(self):
+        self.analyzer.get_critical_path(self.tasks)
+        self.tasks[2] = make_task("c", hours=10)
+        self.assertEqual(self.analyzer.get_critical_path(self.tasks), ["c"])
+        self.tasks[2] = make_task("c", ["b"], hours=10)
+        self.assertEqual(self.analyzer.get_critical_path(self.tasks), ["a", "b", "c"])
+        self.assertEqual(self.analyzer.identify_blocking_tasks(self.tasks, "c"), ["b", "a"])
+        self.tasks[0] = make_task("a", hours=2, status=TaskStatus.COMPLETED)
+        self.assertEqual(self.analyzer.identify_blocking_tasks(self.tasks, "c"), ["b"])
+        self.assertEqual(self.analyzer.cache_info()["hits"], 0)
+
+    def test_version_key_skips_fingerprint(self):
+        """按版本号缓存时不检查任务内容，由调用方保证版本号随变化递增"""
+        self.assertEqual(self.analyzer.get_parallelizable_groups(self.tasks, version=1), [["a", "c"], ["b"]])
+        self.assertEqual(self.analyzer.get_parallelizable_groups([], version=1), [["a", "c"], ["b"]])
+        self.assertEqual(self.analyzer.get_parallelizable_groups([], version=2), [])
+
+    def test_arguments_are_part_of_key(self):
+        self.assertEqual(self.analyzer.get_executable_tasks(self.tasks, set()), ["a", "c"])
+        self.assertEqual(self.analyzer.get_executable_tasks(self.tasks, {"a"}), ["a", "b", "c"])
+        self.assertEqual(self.analyzer.identify_blocking_tasks(self.tasks, "a"), [])
+        self.assertEqual(self.analyzer.cache_info()["misses"], 3)
+
+    def test_lru_eviction(self):
+        for method in ("has_cycle", "get_topological_order", "get_critical_path"):
+            getattr(self.analyzer, method)(self.tasks)
+        self.analyzer.has_cycle(self.tasks)                # 刷新为最近使用
+        self.analyzer.get_parallelizable_groups(self.tasks)  # 淘汰 get_topological_order
+        self.analyzer.has_cycle(self.tasks)
+        self.analyzer.get_topological_order(self.tasks)
+        info = self.analyzer.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["evictions"], info["size"]), (2, 5, 2, 3))
+
+        self.analyzer.cache_clear()
+        self.assertEqual(self.analyzer.cache_info()["size"], 0)
+
+    def test_results_are_copies(self):
+        groups = self.analyzer.get_parallelizable_groups(self.tasks)
+        groups[0].append("mutated")
+        self.analyzer.get_critical_path(self.tasks).clear()
+        self.assertEqual(self.analyzer.get_parallelizable_groups(self.tasks), [["a", "c"], ["b"]])
+        self.assertEqual(self.analyzer.get_critical_path(self.tasks), ["a", "b"])
+
+    def test_cycle_error_cached(self):
+        cyclic = [make_task("e", ["f"]), make_task("f", ["e"])]
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.analyzer.get_critical_path(cyclic)
+        self.assertEqual(self.analyzer.cache_info()["hits"], 1)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            CachedDependencyAnalyzer(maxsize=0)
+
+
+class TestAdapterDependencyAnalysis(unittest.TestCase):
+    """测试 StateManagerAdapter.get_dependency_analysis（按 StateManager 任务版本号缓存）"""
+
+    def test_cached_until_tasks_change(self):
+        from industrial_dashboard.adapters import StateManagerAdapter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sm = StateManager(db_path=str(Path(tmp) / "state.db"))
+            sm.create_tasks([
+                make_task("a", hours=2), make_task("b", ["a"], hours=3), make_task("c", hours=1),
+                make_task("done", hours=9, status=TaskStatus.COMPLETED)
+            ])
+            adapter = StateManagerAdapter(sm)
+
+            first = adapter.get_dependency_analysis()
+            self.assertEqual(first["version"], sm.get_task_version())
+            self.assertEqual((first["critical_path"], first["total_hours"]), (["a", "b"], 5))
+            self.assertEqual(first["parallel_groups"], [["a", "c"], ["b"]])
+
+            second = adapter.get_dependency_analysis()
+            self.assertEqual(second["cache"]["hits"], first["cache"]["hits"] + 3)
+            self.assertEqual(second["cache"]["misses"], first["cache"]["misses"])
+
+            # 任务变化后版本号递增，重新计算
+            sm.update_task_status("a", TaskStatus.COMPLETED)
+            third = adapter.get_dependency_analysis()
+            self.assertGreater(third["version"], first["version"])
+            self.assertEqual((third["critical_path"], third["total_hours"]), (["b"], 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
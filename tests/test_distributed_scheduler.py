@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+多调度器单元测试（共享 Worker 注册表、租约选主、接管后恢复执行中的分配、分片）
+"""
+
+import unittest
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskStatus
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+from state_manager_case import StateManagerTestCase
+
+
+class DistributedTestCase(StateManagerTestCase):
+    """每个调度器使用独立的 StateManager（模拟独立进程）"""
+
+    quiet = True
+
+    def scheduler(self, name, **kwargs):
+        return TaskScheduler(StateManager(db_path=self.db_path), scheduler_id=name, **kwargs)
+
+
+class TestWorkerRegistry(DistributedTestCase):
+    """测试 StateManager 的 Worker 注册表和分配记录"""
+
+    def test_registry_and_assignments(self):
+        """注册信息、心跳持久化；分配记录随任务离开执行中自动删除"""
+        self.assertTrue(self.sm.register_worker("w1", capacity=2, weight=1.5, shard="p1"))
+        self.assertFalse(self.sm.register_worker("w1", capacity=4, weight=1.5, shard="p1"))
+        self.assertTrue(self.sm.worker_heartbeat("w1", datetime(2026, 10, 1)))
+        self.assertFalse(self.sm.worker_heartbeat("missing"))
+        self.sm.record_worker_result("w1", success=False)
+
+        worker = self.sm.list_workers("p1")[0]
+        self.assertEqual(
+            (worker["capacity"], worker["weight"], worker["tasks_failed"], worker["last_heartbeat"]),
+            (4, 1.5, 1, datetime(2026, 10, 1))
+        )
+        self.assertEqual(self.sm.list_workers("p2"), [])
+
+        self.sm.create_tasks([Task(id="a", title="a"), Task(id="b", title="b")])
+        claim = self.sm.claim_task("w1", task_id="a", slots=2)
+        self.sm.claim_task("w1", task_id="b", lease_seconds=-1)
+        self.assertEqual(
+            [(a["task_id"], a["fencing_token"], a["slots"]) for a in self.sm.list_assignments("p1")],
+            [("a", claim["fencing_token"], 2), ("b", 1, 1)]
+        )
+
+        self.sm.update_task_status("a", TaskStatus.REVIEW)
+        self.sm.reap_expired_leases()
+        self.assertEqual(self.sm.list_assignments(), [])
+
+        self.assertTrue(self.sm.unregister_worker("w1"))
+        self.assertEqual(self.sm.list_workers(), [])
+
+    def test_leases(self):
+        """租约：持有者续约令牌不变，过期或释放后换主令牌递增"""
+        now = datetime(2026, 10, 1)
+        self.assertEqual(self.sm.acquire_lease("l", "a", 10, now), 1)
+        self.assertIsNone(self.sm.acquire_lease("l", "b", 10, now + timedelta(seconds=5)))
+        self.assertEqual(self.sm.acquire_lease("l", "a", 10, now + timedelta(seconds=5)), 1)
+        self.assertEqual(self.sm.acquire_lease("l", "b", 10, now + timedelta(seconds=20)), 2)
+        self.assertFalse(self.sm.release_lease("l", "a"))
+        self.assertTrue(self.sm.release_lease("l", "b"))
+        self.assertEqual(self.sm.acquire_lease("l", "a", 10), 3)
+        self.assertEqual(self.sm.get_lease("l")["holder"], "a")
+
+
+class TestLeaderElection(DistributedTestCase):
+    """测试主备调度器和故障接管"""
+
+    def setUp(self):
+        super().setUp()
+        self.sm.create_tasks([Task(id=f"t{i}", title="t") for i in range(3)])
+
+    def test_failover_recovers_in_flight_assignments(self):
+        """主调度器崩溃后备用接管，恢复执行中的分配，不重复分配"""
+        primary = self.scheduler("primary", leader_lease_seconds=0.2)
+        standby = self.scheduler("standby", leader_lease_seconds=0.2)
+        primary.register_worker("w1", capacity=2)
+
+        self.assertEqual(primary.schedule_tasks(), {"w1": ["t0", "t1"]})
+        self.assertEqual(standby.schedule_tasks(), {})
+        self.assertFalse(standby.is_leader)
+        tokens = {t: e["fencing_token"] for t, e in primary.workers["w1"]["tasks"].items()}
+
+        # primary 崩溃（不释放租约），租约过期后 standby 接管
+        time.sleep(0.3)
+        self.assertEqual(standby.schedule_tasks(), {})
+        self.assertTrue(standby.is_leader)
+        self.assertEqual(
+            {t: e["fencing_token"] for t, e in standby.workers["w1"]["tasks"].items()}, tokens
+        )
+        self.assertEqual(standby.get_system_stats()["worker_stats"]["w1"]["used_slots"], 2)
+
+        # 接管后完成任务，释放的槽位分配给剩余任务
+        self.assertTrue(standby.complete_task("t0", "w1", success=True))
+        self.assertEqual(standby.schedule_tasks(), {"w1": ["t2"]})
+
+        # 原主调度器恢复后只能作为备用，旧令牌无法认领
+        self.assertEqual(primary.schedule_tasks(), {})
+        self.assertFalse(primary.is_leader)
+        self.sm.update_task_status("t2", TaskStatus.PENDING)
+        self.assertIsNone(self.sm.claim_task("w1", task_id="t2", leader=(primary.lease_name, 1)))
+
+    def test_clean_handover_and_restart(self):
+        """主动释放租约后备用立即接管；注册表和心跳在重启后保留"""
+        primary = self.scheduler("primary")
+        primary.register_worker("w1", capacity=3, weight=2.0)
+        primary.schedule_tasks()
+        primary.release_leadership()
+
+        restarted = self.scheduler("restarted")
+        self.assertEqual(restarted.schedule_tasks(), {})
+        worker = restarted.get_system_stats()["worker_stats"]["w1"]
+        self.assertEqual((worker["capacity"], worker["weight"], worker["used_slots"]), (3, 2.0, 3))
+        self.assertEqual(worker["current_tasks"], ["t0", "t1", "t2"])
+
+    def test_unhealthy_worker_from_other_process(self):
+        """其他进程写入的心跳决定健康状态，超时的 Worker 任务被放回"""
+        leader = self.scheduler("leader")
+        leader.register_worker("w1")
+        leader.schedule_tasks()
+        self.sm.worker_heartbeat("w1", datetime.now() - timedelta(hours=1))
+
+        self.assertEqual(leader.schedule_tasks(), {})
+        self.assertEqual(self.sm.get_task("t0").status, "pending")
+        self.assertEqual(self.sm.list_assignments(), [])
+
+        self.sm.worker_heartbeat("w1")
+        self.assertEqual(len(leader.schedule_tasks()["w1"]), 1)
+
+
+class TestSharding(DistributedTestCase):
+    """测试按分片并行调度"""
+
+    def test_shards_schedule_in_parallel(self):
+        """不同分片各自选主，只管理本分片的 Worker、只分配本分片的任务"""
+        self.sm.create_tasks(
+            [Task(id=f"p1-{i}", title="t", project_id="p1") for i in range(4)]
+            + [Task(id=f"p2-{i}", title="t", project_id="p2") for i in range(4)]
+            + [Task(id="other", title="t")]
+        )
+        p1 = self.scheduler("s1", shard="p1")
+        p2 = self.scheduler("s2", shard="p2")
+        p1.register_worker("a", capacity=8)
+        p2.register_worker("b", capacity=8)
+
+        first = p1.schedule_tasks()
+        second = p2.schedule_tasks()
+        self.assertTrue(p1.is_leader and p2.is_leader)
+        self.assertEqual(sorted(first["a"]), [f"p1-{i}" for i in range(4)])
+        self.assertEqual(sorted(second["b"]), [f"p2-{i}" for i in range(4)])
+        self.assertEqual(set(p1.workers), {"a"})
+        self.assertEqual(self.sm.get_task("other").status, TaskStatus.PENDING)
+        self.assertEqual([t.id for t in self.sm.query_tasks(shard="p2", status="in_progress")],
+                         [f"p2-{i}" for i in range(4)])
+
+        # 不属于本分片的任务不能被指定分配
+        self.assertFalse(p1.assign_task(self.sm.get_task("other"), "a"))
+
+    def test_cross_shard_dependency(self):
+        """依赖其他分片的任务，在依赖完成后由本分片的调度器分配"""
+        self.sm.create_tasks([
+            Task(id="base", title="t", project_id="p1"),
+            Task(id="next", title="t", project_id="p2", depends_on=["base"])
+        ])
+        p1 = self.scheduler("s1", shard="p1")
+        p2 = self.scheduler("s2", shard="p2")
+        p1.register_worker("a")
+        p2.register_worker("b")
+
+        self.assertEqual(p1.schedule_tasks(), {"a": ["base"]})
+        self.assertEqual(p2.schedule_tasks(), {})
+        self.sm.update_task_status("base", TaskStatus.COMPLETED)
+        self.assertEqual(p2.schedule_tasks(), {"b": ["next"]})
+        self.assertEqual(p1.schedule_tasks(), {})
+
+    def test_cross_shard_dependency_reopened(self):
+        """其他分片的依赖离开已完成状态时，本分片的依赖任务不再被分配"""
+        self.sm.create_tasks([
+            Task(id="base", title="t", project_id="p1", status=TaskStatus.COMPLETED),
+            Task(id="unrelated", title="t", project_id="p1"),
+            Task(id="next", title="t", project_id="p2", depends_on=["base"]),
+            Task(id="later", title="t", project_id="p2")
+        ])
+        p2 = self.scheduler("s2", shard="p2")
+        p2.sync_ready_queue()
+        self.sm.update_task_status("base", TaskStatus.REVISION)
+        self.sm.update_task_status("unrelated", TaskStatus.REVIEW)
+
+        changes = self.sm.get_task_changes(p2._task_version, fields=["id"], raw=True, shard="p2")
+        self.assertEqual(changes["changed"], [("base",)])
+        p2.register_worker("b", capacity=2)
+        self.assertEqual(p2.schedule_tasks(), {"b": ["later"]})
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+事件驱动调度单元测试（StateManager 任务事件、调度循环的触发与抖动合并）
+"""
+
+import unittest
+import contextlib
+import io
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskStatus
+from automation.state_manager import TASK_EVENT_CREATED, TASK_EVENT_STATUS, TASK_EVENT_REAPED
+from automation.task_scheduler import TaskScheduler
+from state_manager_case import StateManagerTestCase
+
+
+class TestTaskEvents(StateManagerTestCase):
+    """测试 StateManager 写入后的任务事件"""
+
+    def test_write_path_events(self):
+        """创建、状态更新、租约回收在提交后通知；失败的写入不通知"""
+        events = []
+        listener = lambda event, task_ids, status: events.append((event, task_ids, status))
+        self.sm.add_task_listener(listener)
+
+        self.sm.create_task(Task(id="a", title="a"))
+        self.sm.create_task(Task(id="a", title="重复"))
+        self.sm.create_tasks([Task(id="b", title="b"), Task(id="c", title="c")])
+        self.sm.update_task_status("a", TaskStatus.COMPLETED)
+        self.sm.update_task_status("missing", TaskStatus.COMPLETED)
+        self.sm.update_tasks_status([("b", "failed"), ("c", "failed")])
+        self.sm.claim_task("w1", task_id="a")
+        self.sm.claim_task("w1", lease_seconds=-1)
+        self.sm.reap_expired_leases()
+
+        self.assertEqual(events, [
+            (TASK_EVENT_CREATED, ["a"], None),
+            (TASK_EVENT_CREATED, ["b", "c"], None),
+            (TASK_EVENT_STATUS, ["a"], "completed"),
+            (TASK_EVENT_STATUS, ["b", "c"], "failed"),
+        ])
+
+        self.sm.update_tasks_status([("b", "pending")])
+        self.sm.claim_task("w1", lease_seconds=-1)
+        self.sm.reap_expired_leases()
+        self.assertEqual(events[-1], (TASK_EVENT_REAPED, ["b"], "pending"))
+
+        self.sm.remove_task_listener(listener)
+        self.sm.create_task(Task(id="d", title="d"))
+        self.assertEqual(len(events), 6)
+
+    def test_listener_errors_do_not_fail_writes(self):
+        """监听器出错时写入仍然成功"""
+        def broken(event, task_ids, status):
+            raise RuntimeError("boom")
+
+        self.sm.add_task_listener(broken)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.sm.create_task(Task(id="a", title="a")))
+        self.assertIsNotNone(self.sm.get_task("a"))
+
+
+class TestEventDrivenLoop(StateManagerTestCase):
+    """测试事件驱动的调度循环"""
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = TaskScheduler(self.sm)
+        self.assigned = queue.Queue()
+        self.passes = 0
+
+        original = self.scheduler.schedule_tasks
+
+        def counting_schedule():
+            self.passes += 1
+            return original()
+
+        self.scheduler.schedule_tasks = counting_schedule
+        self.thread = threading.Thread(
+            target=self.scheduler.start_scheduling_loop,
+            kwargs={"interval": 60, "event_driven": True, "debounce": 0.05,
+                    "on_assignments": self.assigned.put}
+        )
+        self.output = contextlib.redirect_stdout(io.StringIO())
+        self.output.__enter__()
+        self.thread.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+        self.thread.join(timeout=5)
+        self.output.__exit__(None, None, None)
+        self.assertFalse(self.thread.is_alive())
+        super().tearDown()
+
+    def next_assignment(self):
+        return self.assigned.get(timeout=2)
+
+    def test_events_trigger_dispatch(self):
+        """新任务、完成和心跳立即触发调度，不等待兜底间隔"""
+        self.scheduler.register_worker("w1")
+        self.sm.create_task(Task(id="a", title="a"))
+        self.assertEqual(self.next_assignment(), {"w1": ["a"]})
+
+        self.sm.create_task(Task(id="b", title="b"))
+        self.scheduler.complete_task("a", "w1", success=True)
+        self.assertEqual(self.next_assignment(), {"w1": ["b"]})
+
+        # 不健康的 Worker 不参与分配，心跳恢复后立即领取任务
+        self.scheduler.complete_task("b", "w1", success=True)
+        self.sm.worker_heartbeat("w1", datetime.now() - timedelta(hours=1))
+        self.sm.create_task(Task(id="c", title="c"))
+        time.sleep(0.2)
+        self.assertTrue(self.assigned.empty())
+        self.scheduler.heartbeat("w1")
+        self.assertEqual(self.next_assignment(), {"w1": ["c"]})
+
+    def test_debounce_merges_bursts(self):
+        """抖动窗口内的一批事件合并为一轮调度"""
+        for i in range(4):
+            self.scheduler.register_worker(f"w{i}")
+        time.sleep(0.2)
+        passes = self.passes
+
+        for i in range(4):
+            self.sm.create_task(Task(id=f"t{i}", title="t"))
+        assignment = self.next_assignment()
+        self.assertEqual(sorted(sum(assignment.values(), [])), ["t0", "t1", "t2", "t3"])
+        self.assertEqual(self.passes, passes + 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
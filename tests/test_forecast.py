@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+蒙特卡洛交付预测单元测试（时长分布校准、完成时间分位数、任务关键度、Dashboard 适配器）
+"""
+
+import unittest
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from automation.models import Task, TaskStatus
+from automation.state_manager import StateManager
+
+if HAS_NUMPY:
+    from automation.forecast import ScheduleForecaster, forecast_tasks
+
+
+def make_task(task_id, deps=(), hours=1.0, status=TaskStatus.PENDING, complexity="medium", actual=None):
+    return Task(id=task_id, title=task_id, depends_on=list(deps), estimated_hours=hours,
+                status=status, complexity=complexity, actual_hours=actual)
+
+
+def history(complexity, ratios):
+    return [
+        make_task(f"h-{complexity}-{i}", hours=2.0, status=TaskStatus.COMPLETED,
+                  complexity=complexity, actual=2.0 * r)
+        for i, r in enumerate(ratios)
+    ]
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要安装numpy")
+class TestCalibration(unittest.TestCase):
+    """测试时长分布校准"""
+
+    def test_per_complexity_fit(self):
+        forecaster = ScheduleForecaster(trials=10, seed=1)
+        calibration = forecaster.calibrate(history("high", [2.0] * 6) + history("low", [1.0, 1.1]))
+        self.assertEqual(calibration["high"]["source"], "calibrated")
+        self.assertAlmostEqual(calibration["high"]["mu"], 0.6931, places=3)
+        self.assertAlmostEqual(calibration["high"]["sigma"], 0.0)
+        # low 样本不足，退回合并样本
+        self.assertEqual(calibration["low"]["source"], "pooled")
+        self.assertEqual(calibration["low"]["samples"], 8)
+
+    def test_default_without_history(self):
+        forecaster = ScheduleForecaster(trials=10)
+        calibration = forecaster.calibrate([make_task("a")])
+        self.assertEqual(calibration["medium"], {"mu": 0.0, "sigma": 0.4, "samples": 0, "source": "default"})
+
+    def test_invalid_trials(self):
+        with self.assertRaises(ValueError):
+            ScheduleForecaster(trials=0)
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要安装numpy")
+class TestForecast(unittest.TestCase):
+    """测试完成时间预测"""
+
+    def test_exact_durations_match_critical_path(self):
+        """实际/预估恒为 1 时，所有分位数等于关键路径长度"""
+        tasks = history("medium", [1.0] * 5) + [
+            make_task("a", hours=2), make_task("b", ["a"], hours=3),
+            make_task("c", ["a"], hours=1), make_task("d", ["b", "c"], hours=1)
+        ]
+        result = forecast_tasks(tasks, trials=200, seed=1, start=datetime(2026, 1, 1))
+        self.assertEqual(result["remaining"], 4)
+        self.assertEqual(result["deterministic_hours"], 6)
+        self.assertEqual(result["percentiles"], {"p50": 6.0, "p80": 6.0, "p95": 6.0})
+        self.assertEqual(result["completion_dates"]["p50"], "2026-01-01T06:00")
+        criticality = {c["task_id"]: c["index"] for c in result["criticality"]}
+        self.assertEqual(criticality, {"a": 1.0, "b": 1.0, "d": 1.0})
+
+    def test_percentiles_ordered_and_reproducible(self):
+        tasks = [make_task(f"t{i}", [f"t{i - 1}"] if i % 5 else [], hours=2, complexity="high")
+                 for i in range(50)]
+        first = forecast_tasks(tasks, trials=3000, seed=7)
+        second = forecast_tasks(tasks, trials=3000, seed=7)
+        self.assertEqual(first, second)
+        p = first["percentiles"]
+        self.assertLess(p["p50"], p["p80"])
+        self.assertLess(p["p80"], p["p95"])
+        # 10 条等长链并行，每条都可能成为关键路径
+        self.assertEqual(len(first["criticality"]), 20)
+        self.assertTrue(all(0 < c["index"] < 1 for c in first["criticality"]))
+
+    def test_completed_tasks_take_no_time(self):
+        tasks = [make_task("a", hours=5, status=TaskStatus.COMPLETED), make_task("b", ["a"], hours=1)]
+        forecaster = ScheduleForecaster(trials=100, seed=1)
+        forecaster.calibrate(history("medium", [1.0] * 5))
+        result = forecaster.forecast(tasks)
+        self.assertEqual(result["percentiles"]["p95"], 1.0)
+        self.assertEqual([c["task_id"] for c in result["criticality"]], ["b"])
+
+    def test_chunked_trials(self):
+        """试验数超过单批上限时分批执行"""
+        import automation.forecast as forecast
+        tasks = [make_task(f"t{i}", [f"t{i - 1}"] if i else []) for i in range(100)]
+        original = forecast.CHUNK_ELEMENTS
+        forecast.CHUNK_ELEMENTS = 100 * 7
+        try:
+            result = forecast_tasks(tasks, trials=50, seed=3)
+        finally:
+            forecast.CHUNK_ELEMENTS = original
+        self.assertEqual(result["criticality"][0]["index"], 1.0)
+        self.assertGreater(result["percentiles"]["p50"], 50)
+
+    def test_cycle_rejected(self):
+        with self.assertRaises(ValueError):
+            forecast_tasks([make_task("a", ["b"]), make_task("b", ["a"])], trials=10)
+
+    def test_empty(self):
+        result = forecast_tasks([], trials=10)
+        self.assertEqual(result["percentiles"]["p50"], 0.0)
+        self.assertEqual(result["criticality"], [])
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要安装numpy")
+class TestAdapterForecast(unittest.TestCase):
+    """测试 StateManagerAdapter.get_forecast（实际工时来自 StateManager）"""
+
+    def test_forecast_from_state_manager(self):
+        from industrial_dashboard.adapters import StateManagerAdapter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sm = StateManager(db_path=str(Path(tmp) / "state.db"))
+            done = [make_task(f"done-{i}", hours=2.0, status=TaskStatus.COMPLETED) for i in range(5)]
+            sm.create_tasks(done + [make_task("next", ["done-0"], hours=3.0)])
+            for task in done:
+                self.assertTrue(sm.record_actual_hours(task.id, 4.0))
+
+            adapter = StateManagerAdapter(sm)
+            result = adapter.get_forecast(trials=100, seed=1)
+            self.assertEqual(result["calibration"]["medium"]["source"], "calibrated")
+            self.assertAlmostEqual(result["percentiles"]["p50"], 6.0)
+            self.assertEqual(result["criticality"][0]["task_id"], "next")
+
+            # 任务未变化时确定性工时来自按版本号缓存的依赖分析
+            adapter.get_forecast(trials=100, seed=1)
+            self.assertEqual(adapter._dependency_analyzer().cache_info()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆近似重复检测（MinHash-LSH）单元测试
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "packages" / "core-domain" / "src"))
+
+from services import memory_dedup
+from services.memory_dedup import MinHasher, create_min_hasher
+
+
+class TestMinHasher(unittest.TestCase):
+    """测试签名、分桶和相似度估计"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.hasher = create_min_hasher()
+        self.text = "在组件卸载时移除事件监听，并清理定时器和订阅 react useEffect cleanup"
+
+    def test_similarity_estimate(self):
+        """相同文本相似度为1，近似文本高，无关文本低"""
+        sig = self.hasher.signature(self.text)
+        self.assertEqual(len(sig), 64)
+        self.assertEqual(self.hasher.similarity(sig, self.hasher.signature(self.text)), 1.0)
+
+        near = self.hasher.signature(self.text + " 组件")
+        self.assertGreater(self.hasher.similarity(sig, near), 0.8)
+
+        far = self.hasher.signature("数据库索引优化，慢查询从 3 秒降到 20 毫秒")
+        self.assertLess(self.hasher.similarity(sig, far), 0.3)
+        self.assertIsNone(self.hasher.signature("，。！"))
+
+    def test_buckets(self):
+        """近似文本至少共享一个分桶，签名可序列化"""
+        sig = self.hasher.signature(self.text)
+        buckets = self.hasher.buckets(sig)
+        self.assertEqual(len(buckets), 16)
+        self.assertEqual(len(set(buckets)), 16)
+
+        near = self.hasher.buckets(self.hasher.signature(self.text + " 组件"))
+        self.assertTrue(set(buckets) & set(near))
+
+        self.assertEqual(MinHasher.from_blob(MinHasher.to_blob(sig)), sig)
+        with self.assertRaises(ValueError):
+            MinHasher(num_perm=64, bands=10)
+
+    def test_pure_python_matches_numpy(self):
+        """未安装 NumPy 时签名与向量化结果一致"""
+        if memory_dedup.np is None:
+            self.skipTest("需要安装numpy")
+        expected = self.hasher.signature(self.text)
+        saved, memory_dedup.np = memory_dedup.np, None
+        try:
+            self.assertEqual(MinHasher().signature(self.text), expected)
+        finally:
+            memory_dedup.np = saved
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+记忆关系图单元测试
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "packages" / "core-domain" / "src"))
+
+from services.memory_graph import MemoryGraph, create_memory_graph
+
+
+class TestMemoryGraph(unittest.TestCase):
+    """测试邻接结构与遍历"""
+
+    def setUp(self):
+        """测试前准备：A-B-C-D 链，A-D 弱关系，E 孤立"""
+        self.graph = create_memory_graph("P1", [
+            ("A", "B", "caused-by", 1.0),
+            ("B", "C", "solved-by", 0.8),
+            ("C", "D", "related", 0.9),
+            ("A", "D", "related", 0.1),
+        ], memory_ids=["E"])
+
+    def test_k_hop(self):
+        """按跳数由近到远，关系双向可达"""
+        hits = self.graph.k_hop("B", max_hops=1)
+        self.assertEqual({h["memory_id"] for h in hits}, {"A", "C"})
+
+        hits = self.graph.k_hop("C", max_hops=2)
+        hops = {h["memory_id"]: h["hops"] for h in hits}
+        self.assertEqual(hops, {"B": 1, "D": 1, "A": 2})
+        self.assertEqual(self.graph.k_hop("E"), [])
+        self.assertEqual(self.graph.k_hop("NO_SUCH"), [])
+
+    def test_k_hop_filters(self):
+        """关系类型、强度过滤与数量限制"""
+        hits = self.graph.k_hop("A", max_hops=3, relation_types=["caused-by", "solved-by"])
+        self.assertEqual([h["memory_id"] for h in hits], ["B", "C"])
+
+        hits = self.graph.k_hop("A", max_hops=1, min_strength=0.5)
+        self.assertEqual([h["memory_id"] for h in hits], ["B"])
+
+        self.assertEqual(len(self.graph.k_hop("A", max_hops=3, limit=2)), 2)
+        self.assertEqual(self.graph.k_hop("A", relation_types=["unknown"]), [])
+
+    def test_shortest_path_prefers_strong_relations(self):
+        """强关系代价低：A→D 走 A-B-C-D 而非弱的直连"""
+        result = self.graph.shortest_path("A", "D")
+        self.assertEqual(result["path"], ["A", "B", "C", "D"])
+        self.assertEqual(result["hops"], 3)
+        # 边保留原始方向
+        self.assertEqual(result["edges"][0]["source_memory_id"], "A")
+        self.assertEqual(result["edges"][0]["relation_type"], "caused-by")
+
+        reverse = self.graph.shortest_path("D", "A")
+        self.assertEqual(reverse["path"], ["D", "C", "B", "A"])
+        self.assertEqual(reverse["edges"][0]["source_memory_id"], "C")
+
+        self.assertIsNone(self.graph.shortest_path("A", "E"))
+        self.assertEqual(self.graph.shortest_path("A", "A")["hops"], 0)
+
+    def test_personalized_pagerank(self):
+        """种子附近的记忆得分更高，种子本身默认排除"""
+        ranked = self.graph.personalized_pagerank(["A"], top_k=5)
+        ids = [m for m, _ in ranked]
+        self.assertNotIn("A", ids)
+        self.assertNotIn("E", ids)
+        self.assertEqual(ids[0], "B")
+        self.assertGreater(ranked[0][1], ranked[-1][1])
+
+        with_seed = self.graph.personalized_pagerank(["A"], include_seeds=True)
+        self.assertIn("A", [m for m, _ in with_seed])
+        self.assertEqual(self.graph.personalized_pagerank(["NO_SUCH"]), [])
+
+    def test_incremental_add_and_compact(self):
+        """增量添加的关系立即可见，合并后结果不变"""
+        self.graph.add_relation("E", "A", "related", 1.0)
+        self.assertIn("E", [h["memory_id"] for h in self.graph.k_hop("A", max_hops=1)])
+        self.assertGreater(self.graph.get_stats()["pending_edges"], 0)
+
+        before = self.graph.shortest_path("E", "C")
+        self.graph.compact()
+        self.assertEqual(self.graph.get_stats()["pending_edges"], 0)
+        self.assertEqual(self.graph.shortest_path("E", "C"), before)
+        self.assertEqual(self.graph.relation_count, 5)
+
+    def test_auto_compact_threshold(self):
+        """增量边超过阈值时自动合并"""
+        graph = MemoryGraph("P1")
+        for i in range(MemoryGraph.COMPACT_MIN):
+            graph.add_relation(f"N{i}", f"N{i + 1}", "related")
+        self.assertLess(graph.get_stats()["pending_edges"], MemoryGraph.COMPACT_MIN)
+        self.assertEqual(len(graph.k_hop("N0", max_hops=1000, limit=None)), MemoryGraph.COMPACT_MIN)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆本地检索引擎单元测试
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "packages" / "core-domain" / "src"))
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+if HAS_NUMPY:
+    from services.memory_search_index import (
+        MemorySearchIndex,
+        create_memory_search_index,
+        tokenize
+    )
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要安装numpy")
+class TestTokenize(unittest.TestCase):
+    """测试分词"""
+
+    def test_cjk_bigrams(self):
+        """中文按双字切分"""
+        self.assertEqual(tokenize("内存泄漏"), ["内存", "存泄", "泄漏"])
+        self.assertEqual(tokenize("锁"), ["锁"])
+
+    def test_mixed_text(self):
+        """英文转小写按单词切分，中英文混排"""
+        self.assertEqual(tokenize("React Hooks 性能"), ["react", "hooks", "性能"])
+
+
+@unittest.skipUnless(HAS_NUMPY, "需要安装numpy")
+class TestMemorySearchIndex(unittest.TestCase):
+    """测试BM25索引"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.index = MemorySearchIndex()
+        self.index.add("MEM-1", "P1", "修复内存泄漏 在组件卸载时移除事件监听", rowid=1)
+        self.index.add("MEM-2", "P1", "使用缓存优化数据库查询性能", rowid=2)
+        self.index.add("MEM-3", "P1", "内存 内存 内存 占用过高的排查方法", rowid=3)
+        self.index.add("MEM-4", "P2", "另一个项目的内存泄漏", rowid=4)
+
+    def test_search_ranks_relevant_documents(self):
+        """相关文档排在前面，按项目隔离"""
+        results = self.index.search("内存泄漏", project_id="P1", top_k=10)
+        ids = [memory_id for memory_id, _ in results]
+
+        self.assertEqual(ids[0], "MEM-1")
+        self.assertIn("MEM-3", ids)
+        self.assertNotIn("MEM-2", ids)
+        self.assertNotIn("MEM-4", ids)
+        self.assertGreater(results[0][1], results[-1][1])
+
+    def test_top_k_and_unknown_terms(self):
+        """Top-K截断，未知词项返回空"""
+        self.assertEqual(len(self.index.search("内存", top_k=2)), 2)
+        self.assertEqual(self.index.search("kubernetes", project_id="P1"), [])
+        self.assertEqual(self.index.search("内存", project_id="NO_SUCH"), [])
+
+    def test_remove_and_replace(self):
+        """删除后不再命中，重复添加替换旧文档"""
+        self.assertTrue(self.index.remove("MEM-1"))
+        ids = [m for m, _ in self.index.search("泄漏", project_id="P1")]
+        self.assertNotIn("MEM-1", ids)
+
+        self.index.add("MEM-2", "P1", "事件监听泄漏")
+        ids = [m for m, _ in self.index.search("泄漏", project_id="P1")]
+        self.assertEqual(ids, ["MEM-2"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_compaction_drops_postings(self):
+        """墓碑超过阈值时压缩：倒排条目和 df 与只添加剩余文档的索引一致"""
+        index = MemorySearchIndex(compact_ratio=0.5, compact_min=2)
+        fresh = MemorySearchIndex()
+        texts = {
+            "MEM-1": "修复内存泄漏 在组件卸载时移除事件监听",
+            "MEM-2": "使用缓存优化数据库查询性能",
+            "MEM-3": "内存 内存 内存 占用过高的排查方法",
+            "MEM-4": "内存泄漏复盘"
+        }
+        for memory_id, text in texts.items():
+            index.add(memory_id, "P1", text)
+        for memory_id in ("MEM-3", "MEM-4"):
+            fresh.add(memory_id, "P1", texts[memory_id])
+
+        index.remove("MEM-1")
+        self.assertEqual(len(index._doc_ids), 4)
+        index.remove("MEM-2")
+        self.assertEqual(len(index._doc_ids), 2)
+        self.assertNotIn("缓存", index._vocab)
+        self.assertEqual(index._df[index._vocab["内存"]], 2)
+
+        actual = index.search("内存泄漏", project_id="P1")
+        expected = fresh.search("内存泄漏", project_id="P1")
+        self.assertEqual([m for m, _ in actual], [m for m, _ in expected])
+        for (_, a), (_, b) in zip(actual, expected):
+            self.assertAlmostEqual(a, b, places=5)
+
+        # 压缩后仍可增量添加、删除
+        index.add("MEM-5", "P1", "事件监听泄漏")
+        self.assertEqual([m for m, _ in index.search("监听", project_id="P1")], ["MEM-5"])
+        self.assertTrue(index.remove("MEM-3"))
+        self.assertEqual(len(index), 2)
+
+    def test_snapshot_roundtrip(self):
+        """快照保存后加载，检索结果一致"""
+        self.index.remove("MEM-2")
+        expected = self.index.search("内存泄漏", project_id="P1")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "index.npz"
+            self.index.save(str(path))
+            loaded = create_memory_search_index(str(path))
+
+        self.assertEqual(loaded.last_rowid, 4)
+        self.assertEqual(len(loaded), 3)
+        self.assertNotIn("MEM-2", loaded)
+        actual = loaded.search("内存泄漏", project_id="P1")
+        self.assertEqual([m for m, _ in actual], [m for m, _ in expected])
+        for (_, a), (_, b) in zip(actual, expected):
+            self.assertAlmostEqual(a, b, places=5)
+
+        # 加载后仍可增量添加
+        loaded.add("MEM-5", "P1", "内存泄漏复盘", rowid=5)
+        self.assertIn("MEM-5", [m for m, _ in loaded.search("复盘", project_id="P1")])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
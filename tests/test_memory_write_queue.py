@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+项目记忆写后队列单元测试
+"""
+
+import unittest
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "packages" / "core-domain" / "src"))
+
+from services.memory_write_queue import MemoryWriteQueue, create_memory_write_queue
+from services.project_memory_service import MemoryCategory, MemoryType, create_project_memory_service
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+
+
+class TestMemoryWriteQueue(unittest.TestCase):
+    """测试缓冲、批量刷新和失败重试"""
+
+    def setUp(self):
+        """测试前准备：临时数据库 + migration，不启动后台线程"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        conn = sqlite3.connect(str(self.db_path))
+        conn.executescript((MIGRATIONS_DIR / "003_add_project_memories.sql").read_text(encoding="utf-8"))
+        conn.close()
+        self.queue = create_memory_write_queue(str(self.db_path), flush_interval=0)
+
+    def tearDown(self):
+        self.queue.stop()
+        self.tmp_dir.cleanup()
+
+    def _query(self, sql, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_buffered_until_flush(self):
+        """入队只在内存中缓冲，flush 时一次写入"""
+        for i in range(5):
+            self.queue.record_retrieval("P1", f"查询{i}", ["MEM-1"])
+
+        self.assertEqual(self._query("SELECT COUNT(*) FROM memory_retrievals")[0][0], 0)
+        self.assertEqual(self.queue.get_stats()["pending_retrievals"], 5)
+
+        self.assertEqual(self.queue.flush(), {"retrievals": 5})
+        self.assertEqual(self._query("SELECT COUNT(*) FROM memory_retrievals")[0][0], 5)
+        self.assertEqual(self.queue.get_stats()["pending_retrievals"], 0)
+        self.assertEqual(self.queue.flush(), {"retrievals": 0})
+        self.assertEqual(self._query("PRAGMA journal_mode")[0][0], "wal")
+
+    def test_failed_flush_requeues(self):
+        """写入失败时数据放回队列，下次刷新补写"""
+        self.queue.record_retrieval("P1", "查询1", ["MEM-1"])
+
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("ALTER TABLE memory_retrievals RENAME TO memory_retrievals_tmp")
+        conn.close()
+        with self.assertRaises(sqlite3.Error):
+            self.queue.flush()
+        self.assertEqual(self.queue.get_stats()["errors"], 1)
+        self.assertEqual(self.queue.get_stats()["pending_retrievals"], 1)
+        self.queue.record_retrieval("P1", "查询2", ["MEM-1"])
+
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("ALTER TABLE memory_retrievals_tmp RENAME TO memory_retrievals")
+        conn.close()
+        self.assertEqual(self.queue.flush(), {"retrievals": 2})
+        queries = [r[0] for r in self._query("SELECT query FROM memory_retrievals ORDER BY query")]
+        self.assertEqual(queries, ["查询1", "查询2"])
+
+    def test_max_pending_drops_oldest(self):
+        """超过缓冲上限时丢弃最旧的检索历史"""
+        queue = MemoryWriteQueue(str(self.db_path), flush_interval=0, max_pending=3)
+        for i in range(5):
+            queue.record_retrieval("P1", f"查询{i}", ["MEM-1"])
+        self.assertEqual(queue.get_stats()["retrievals_dropped"], 2)
+        queue.flush()
+        queries = [r[0] for r in self._query("SELECT query FROM memory_retrievals ORDER BY query")]
+        self.assertEqual(queries, ["查询2", "查询3", "查询4"])
+
+    def test_background_thread_flushes(self):
+        """后台线程按间隔刷新，stop 时写入剩余数据"""
+        queue = create_memory_write_queue(str(self.db_path), flush_interval=0.05)
+        queue.record_retrieval("P1", "查询", ["MEM-1"])
+        self.assertTrue(queue.get_stats()["running"])
+        queue.stop()
+        self.assertFalse(queue.get_stats()["running"])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM memory_retrievals")[0][0], 1)
+
+
+class TestServiceWriteBehind(unittest.TestCase):
+    """测试服务接入写后队列"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        conn = sqlite3.connect(str(self.db_path))
+        for name in (
+            "003_add_project_memories.sql",
+            "004_add_events_tables.sql",
+            "008_add_memory_tags.sql",
+            "009_add_memory_versions.sql",
+            "012_add_stats_triggers.sql"
+        ):
+            conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+        conn.close()
+        self.service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp_dir.cleanup()
+
+    def test_stats_maintained_without_flush(self):
+        """记忆统计由触发器随插入更新，不经过写后队列"""
+        for _ in range(2):
+            self.service.create_memory(
+                project_id="P1",
+                memory_type=MemoryType.DECISION,
+                category=MemoryCategory.DECISION,
+                title="决策",
+                content="内容"
+            )
+        self.service.flush_writes()
+        self.service.create_memory(
+            project_id="P1",
+            memory_type=MemoryType.DECISION,
+            category=MemoryCategory.DECISION,
+            title="决策",
+            content="内容"
+        )
+
+        stats = self.service.get_memory_stats("P1")
+        self.assertEqual(stats["total_memories"], 3)
+        self.assertEqual(stats["decision_memories"], 3)
+        self.assertEqual(self.service.get_write_queue_stats()["flushes"], 0)
+
+    def test_retrieval_logged_after_flush(self):
+        """检索历史异步写入"""
+        self.service.create_memory(
+            project_id="P1",
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.KNOWLEDGE,
+            title="缓存",
+            content="缓存优化"
+        )
+        self.service.retrieve_memories(project_id="P1", query="缓存")
+        self.service.flush_writes()
+
+        conn = sqlite3.connect(str(self.db_path))
+        count = conn.execute("SELECT COUNT(*) FROM memory_retrievals").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, 1)
+
+    def test_synchronous_mode(self):
+        """write_behind=False 时每次同步写入"""
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False,
+            write_behind=False
+        )
+        service.create_memory(
+            project_id="P2",
+            memory_type=MemoryType.SOLUTION,
+            category=MemoryCategory.SOLUTION,
+            title="方案",
+            content="内容"
+        )
+        service.retrieve_memories(project_id="P2", query="方案")
+        self.assertEqual(service.get_write_queue_stats()["pending_retrievals"], 0)
+        self.assertEqual(service.get_write_queue_stats()["retrievals_written"], 1)
+        self.assertFalse(service.get_write_queue_stats()["running"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
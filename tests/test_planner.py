@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+资源受限列表调度计划单元测试（关键路径优先、槽位约束、前向-后向改进、按计划分配）
+"""
+
+import unittest
+import contextlib
+import io
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskStatus
+from automation.planner import ListSchedulingPlanner, plan_tasks
+from automation.ready_queue import ReadyQueue
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+
+
+def make_task(task_id, deps=(), hours=1.0, priority="P1", complexity="medium"):
+    return Task(id=task_id, title=task_id, depends_on=list(deps), estimated_hours=hours,
+                priority=priority, complexity=complexity)
+
+
+def random_tasks(count, seed):
+    rng = random.Random(seed)
+    return [
+        make_task(f"t{i}", [f"t{d}" for d in rng.sample(range(max(0, i - 20), i), min(i, rng.randrange(3)))],
+                  hours=rng.choice([0.5, 1, 2, 3, 5]), complexity=rng.choice(["low", "medium", "high"]),
+                  priority=rng.choice(["P0", "P1", "P2"]))
+        for i in range(count)
+    ]
+
+
+class TestListSchedulingPlanner(unittest.TestCase):
+    """测试 ListSchedulingPlanner"""
+
+    def assertFeasible(self, tasks, plan):
+        """每个任务恰好计划一次，依赖先完成，任意时刻 Worker 占用的槽位不超过容量"""
+        entries = {e.task_id: e for e in plan.entries}
+        self.assertEqual(set(entries), {t.id for t in tasks})
+        for task in tasks:
+            entry = entries[task.id]
+            self.assertAlmostEqual(entry.finish - entry.start, task.estimated_hours)
+            for dep in task.depends_on:
+                self.assertLessEqual(entries[dep].finish, entry.start + 1e-9)
+        for worker_id, worker_entries in plan.by_worker().items():
+            events = sorted([(e.start, e.slots) for e in worker_entries if e.finish > e.start]
+                            + [(e.finish, -e.slots) for e in worker_entries if e.finish > e.start])
+            used = 0
+            for _, delta in events:
+                used += delta
+                self.assertLessEqual(used, plan.workers[worker_id])
+        self.assertAlmostEqual(plan.makespan, max((e.finish for e in plan.entries), default=0.0))
+        self.assertGreaterEqual(plan.makespan, plan.lower_bound - 1e-9)
+
+    def test_critical_path_first(self):
+        """关键路径上的低优先级链先于高优先级的独立任务"""
+        tasks = [
+            make_task("x1", priority="P2"), make_task("x2", ["x1"], priority="P2"),
+            make_task("x3", ["x2"], priority="P2"),
+            make_task("p1", priority="P0"), make_task("p2", priority="P0"), make_task("p3", priority="P0")
+        ]
+        plan = plan_tasks(tasks, {"w1": 1, "w2": 1})
+        self.assertFeasible(tasks, plan)
+        # 按优先级贪心分配需要 4 小时
+        self.assertEqual(plan.makespan, 3.0)
+        self.assertEqual(plan.lower_bound, 3.0)
+        self.assertEqual(plan.ranks()["x1"], 0.0)
+
+    def test_slots_best_fit_and_backfill(self):
+        """大任务等待槽位时，小任务回填；小任务优先放进剩余槽位最少的 Worker"""
+        tasks = [
+            make_task("small", hours=2, complexity="low"),
+            make_task("big", hours=1, complexity="high"),
+            make_task("filler", hours=1, complexity="low")
+        ]
+        plan = plan_tasks(tasks, {"pair": 2, "single": 1})
+        self.assertFeasible(tasks, plan)
+        entries = {e.task_id: e for e in plan.entries}
+        self.assertEqual((entries["small"].worker_id, entries["small"].start), ("single", 0.0))
+        self.assertEqual((entries["big"].worker_id, entries["big"].slots), ("pair", 2))
+        self.assertEqual(plan.makespan, 2.0)
+
+    def test_oversized_task_takes_whole_worker(self):
+        tasks = [make_task("big", complexity="high"), make_task("small", complexity="low")]
+        plan = plan_tasks(tasks, {"w1": 1})
+        self.assertFeasible(tasks, plan)
+        self.assertEqual([e.slots for e in plan.entries], [1, 1])
+        self.assertEqual(plan.makespan, 2.0)
+
+    def test_pinned_tasks_start_on_their_worker(self):
+        tasks = [make_task("running", hours=1), make_task("long", hours=5), make_task("next", ["running"])]
+        plan = plan_tasks(tasks, {"w1": 1, "w2": 1}, pinned={"running": "w2"})
+        self.assertFeasible(tasks, plan)
+        entries = {e.task_id: e for e in plan.entries}
+        self.assertEqual((entries["running"].worker_id, entries["running"].start), ("w2", 0.0))
+        self.assertEqual(entries["long"].worker_id, "w1")
+
+    def test_pinned_tasks_over_capacity_scheduled_normally(self):
+        """同一 Worker 上放不下的固定任务不超额占用槽位，按普通任务排"""
+        tasks = [make_task("a", complexity="low"), make_task("b", complexity="high")]
+        plan = plan_tasks(tasks, {"pair": 2, "single": 1}, pinned={"a": "pair", "b": "pair"})
+        self.assertFeasible(tasks, plan)
+        entries = {e.task_id: e for e in plan.entries}
+        self.assertEqual((entries["a"].worker_id, entries["a"].start), ("pair", 0.0))
+        self.assertEqual((entries["b"].worker_id, entries["b"].start), ("single", 0.0))
+
+    def test_random_graphs_feasible_and_refinement_monotonic(self):
+        for seed in range(5):
+            tasks = random_tasks(300, seed)
+            workers = {"w1": 2, "w2": 1, "w3": 3}
+            base = plan_tasks(tasks, workers)
+            refined = plan_tasks(tasks, workers, refine=True)
+            self.assertFeasible(tasks, base)
+            self.assertFeasible(tasks, refined)
+            self.assertLessEqual(refined.makespan, base.makespan + 1e-9)
+            self.assertAlmostEqual(refined.improvement, base.makespan - refined.makespan)
+
+    def test_external_dependencies_ignored(self):
+        plan = plan_tasks([make_task("a", ["done-earlier"])], {"w1": 1})
+        self.assertEqual(plan.makespan, 1.0)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            ListSchedulingPlanner({})
+        with self.assertRaises(ValueError):
+            ListSchedulingPlanner({"w1": 0})
+        with self.assertRaises(ValueError):
+            plan_tasks([make_task("a", ["b"]), make_task("b", ["a"])], {"w1": 1})
+        with self.assertRaises(ValueError):
+            plan_tasks([make_task("a")], {"w1": 1}, pinned={"a": "missing"})
+
+    def test_empty(self):
+        plan = plan_tasks([], {"w1": 1}, refine=True)
+        self.assertEqual((plan.entries, plan.makespan, plan.iterations), ([], 0.0, 0))
+        self.assertEqual(plan.to_dict()["utilization"], 0.0)
+
+
+class TestFollowPlan(unittest.TestCase):
+    """测试 ReadyQueue.set_ranks 和 TaskScheduler.build_plan / follow_plan"""
+
+    def test_ready_queue_ranks(self):
+        """计划内任务按 rank 排在计划外任务之前，清除计划后恢复按优先级"""
+        queue = ReadyQueue()
+        queue.upsert_task("p0", "pending", "P0", 1)
+        queue.upsert_task("late", "pending", "P2", 1)
+        queue.upsert_task("early", "pending", "P2", 1)
+        queue.set_ranks({"late": 2.0, "early": 0.0})
+        queue.add_worker("w1", capacity=3)
+        self.assertEqual([queue.pop_assignment()[0] for _ in range(3)], ["early", "late", "p0"])
+
+        for task_id in ("p0", "late", "early"):
+            queue.release_assignment(task_id, "w1", 1)
+        queue.set_ranks(None)
+        self.assertEqual(queue.pop_assignment()[0], "p0")
+
+    def test_scheduler_follows_plan(self):
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            sm = StateManager(db_path=str(Path(tmp) / "state.db"))
+            sm.create_tasks([
+                make_task("p0-a", priority="P0"), make_task("p0-b", priority="P0"),
+                make_task("chain-1", priority="P2"), make_task("chain-2", ["chain-1"], priority="P2"),
+                make_task("chain-3", ["chain-2"], priority="P2")
+            ])
+            scheduler = TaskScheduler(sm)
+            scheduler.register_worker("w1")
+            scheduler.register_worker("w2")
+
+            plan = scheduler.build_plan()
+            self.assertEqual(plan.makespan, 3.0)
+            scheduler.follow_plan(plan)
+            assigned = sorted(t for tasks in scheduler.schedule_tasks().values() for t in tasks)
+            # 按优先级会先分配两个 P0 任务
+            self.assertEqual(assigned, ["chain-1", "p0-a"])
+
+            # 执行中的任务固定在其 Worker 上
+            replanned = scheduler.build_plan(refine=False)
+            running = {e.task_id: e for e in replanned.entries if e.start == 0.0}
+            self.assertEqual(running["chain-1"].worker_id, sm.get_task("chain-1").assigned_to)
+
+            # chain-1 完成后，chain-2 与剩余的 P0 任务一起分配
+            scheduler.complete_task("chain-1", sm.get_task("chain-1").assigned_to, True)
+            scheduler.complete_task("p0-a", sm.get_task("p0-a").assigned_to, True)
+            sm.update_task_status("chain-1", TaskStatus.COMPLETED)  # 审核通过
+            assigned = sorted(t for tasks in scheduler.schedule_tasks().values() for t in tasks)
+            self.assertEqual(assigned, ["chain-2", "p0-b"])
+
+    def test_no_healthy_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            scheduler = TaskScheduler(StateManager(db_path=str(Path(tmp) / "state.db")))
+            self.assertIsNone(scheduler.build_plan())
+
+
+if __name__ == "__main__":
+    unittest.main()
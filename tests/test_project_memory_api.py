@@ -4,7 +4,10 @@
 """
 
 import unittest
+import importlib.util
+import sqlite3
 import sys
+import tempfile
 from pathlib import Path
 from typing import Dict, Any
 
@@ -13,6 +16,24 @@ from typing import Dict, Any
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "api" / "src"))
 
+try:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    HAS_FASTAPI = True
+except ImportError:
+    HAS_FASTAPI = False
+
+ROUTES_DIR = Path(__file__).parent.parent / "apps" / "api" / "src" / "routes"
+MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+MEMORY_MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "010_add_memory_signatures.sql",
+    "011_add_memory_rank_score.sql",
+    "013_add_memory_relation_versions.sql"
+)
+
 
 class TestProjectMemoryAPI(unittest.TestCase):
     """测试项目记忆API"""
@@ -111,6 +132,68 @@ class TestProjectMemoryAPI(unittest.TestCase):
         pass
 
 
+@unittest.skipUnless(HAS_FASTAPI, "需要安装fastapi")
+class TestProjectMemoryRoutes(unittest.TestCase):
+    """通过路由读写真实数据库（get_project_memory_service 指向临时数据库）"""
+
+    def setUp(self):
+        # 直接加载路由模块（routes/__init__ 会导入全部路由）
+        spec = importlib.util.spec_from_file_location("project_memory_routes", ROUTES_DIR / "project_memory.py")
+        routes = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(routes)
+
+        self.routes = routes
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = Path(self.tmp_dir.name) / "tasks.db"
+        conn = sqlite3.connect(str(db_path))
+        for name in MEMORY_MIGRATIONS:
+            conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+        conn.close()
+
+        self.original_db_path = routes.MEMORY_DB_PATH
+        routes.MEMORY_DB_PATH = str(db_path)
+        routes._project_memory_service = None
+        app = FastAPI()
+        app.include_router(routes.router)
+        self.client = TestClient(app)
+        self.project_code = "TEST_PROJECT"
+
+    def tearDown(self):
+        if self.routes._project_memory_service is not None:
+            self.routes._project_memory_service.close()
+        self.routes._project_memory_service = None
+        self.routes.MEMORY_DB_PATH = self.original_db_path
+        self.tmp_dir.cleanup()
+
+    def create(self, title):
+        response = self.client.post(f"/api/projects/{self.project_code}/memories", json={
+            "memory_type": "decision", "category": "decision", "title": title, "content": f"{title} 的内容"
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()["memory"]["id"]
+
+    def test_memory_written_and_neighborhood_read_back(self):
+        first, second, third = self.create("决策A"), self.create("决策B"), self.create("决策C")
+        for source, target in ((first, second), (second, third)):
+            response = self.client.post(f"/api/projects/{self.project_code}/memories/relations", json={
+                "source_memory_id": source, "target_memory_id": target, "relation_type": "related"
+            })
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(
+            f"/api/projects/{self.project_code}/memories/{first}/graph/neighborhood", params={"max_hops": 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        memories = response.json()["memories"]
+        self.assertEqual([(m["id"], m["hops"]) for m in memories], [(second, 1), (third, 2)])
+
+    def test_rank_refresh_through_route(self):
+        self.create("决策A")
+        response = self.client.post(f"/api/projects/{self.project_code}/memories/rank/refresh")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["projects"], 1)
+
+
 if __name__ == "__main__":
     print("⚠️  注意: API集成测试需要FastAPI TestClient")
     print("当前为占位测试，实际测试需要完整的API环境")
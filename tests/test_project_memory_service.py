@@ -3,9 +3,12 @@
 项目记忆服务单元测试
 """
 
+import json
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
+import sqlite3
 import sys
+import tempfile
 from pathlib import Path
 
 # 添加项目路径
@@ -16,9 +19,30 @@ from services.project_memory_service import (
     MemoryType,
     MemoryCategory,
     RelationType,
+    TagMatchMode,
+    DedupMode,
     create_project_memory_service
 )
 
+MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+SCHEMAS_DIR = Path(__file__).parent.parent / "database" / "schemas"
+MEMORY_MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "010_add_memory_signatures.sql",
+    "011_add_memory_rank_score.sql",
+    "013_add_memory_relation_versions.sql"
+)
+
+
+def apply_migrations(db_path: Path) -> None:
+    """在临时数据库上执行项目记忆相关的migration"""
+    conn = sqlite3.connect(str(db_path))
+    for name in MEMORY_MIGRATIONS:
+        conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+    conn.close()
+
 
 class TestProjectMemoryService(unittest.TestCase):
     """测试项目记忆服务"""
@@ -243,6 +267,657 @@ class TestMemoryFormatting(unittest.TestCase):
         self.assertEqual(self.service._severity_to_importance("unknown"), 5)
 
 
+class TestMemoryTagFilter(unittest.TestCase):
+    """测试标签索引表和标签过滤"""
+    
+    def setUp(self):
+        """测试前准备：临时数据库 + migration"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        
+        apply_migrations(self.db_path)
+        
+        self.service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False
+        )
+        self.project_id = "TEST_PROJECT"
+        
+        self.react = self._create("React Hooks", ["react", "performance"])
+        self.vue = self._create("Vue 响应式", ["vue", " performance "])
+        self.python = self._create("Python 类型提示", ["python"])
+    
+    def tearDown(self):
+        self.service.close()
+        self.tmp_dir.cleanup()
+    
+    def _create(self, title, tags):
+        return self.service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.KNOWLEDGE,
+            title=title,
+            content=title,
+            tags=tags
+        )
+    
+    def _titles(self, **kwargs):
+        memories = self.service.retrieve_memories(project_id=self.project_id, limit=10, **kwargs)
+        return sorted(m["title"] for m in memories)
+    
+    def test_tags_indexed_on_create(self):
+        """创建记忆时同步写入memory_tags（去除空白和重复）"""
+        conn = sqlite3.connect(str(self.db_path))
+        rows = conn.execute(
+            "SELECT tag FROM memory_tags WHERE memory_id = ? ORDER BY tag", (self.vue["id"],)
+        ).fetchall()
+        conn.close()
+        self.assertEqual([r[0] for r in rows], ["performance", "vue"])
+    
+    def test_any_of_filter(self):
+        """任一标签匹配"""
+        self.assertEqual(
+            self._titles(tags=["react", "python"]),
+            ["Python 类型提示", "React Hooks"]
+        )
+        self.assertEqual(
+            self._titles(tags=["performance"]),
+            ["React Hooks", "Vue 响应式"]
+        )
+    
+    def test_all_of_filter(self):
+        """全部标签匹配"""
+        self.assertEqual(
+            self._titles(tags=["react", "performance"], tag_mode=TagMatchMode.ALL),
+            ["React Hooks"]
+        )
+        self.assertEqual(
+            self._titles(tags=["react", "python"], tag_mode=TagMatchMode.ALL),
+            []
+        )
+    
+    def test_invalid_tag_mode(self):
+        """无效的匹配模式"""
+        with self.assertRaises(ValueError):
+            self.service.retrieve_memories(project_id=self.project_id, tags=["react"], tag_mode="some")
+    
+    def test_without_tags_table(self):
+        """未执行 migration 008 时照常写入，标签过滤逐行解析 tags 列"""
+        db_path = Path(self.tmp_dir.name) / "legacy.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript((MIGRATIONS_DIR / "003_add_project_memories.sql").read_text(encoding="utf-8"))
+        conn.close()
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        try:
+            for title, tags in [("React Hooks", ["react", "performance"]), ("Vue 响应式", ["vue", " performance "])]:
+                service.create_memory(
+                    project_id=self.project_id,
+                    memory_type=MemoryType.KNOWLEDGE,
+                    category=MemoryCategory.KNOWLEDGE,
+                    title=title,
+                    content=title,
+                    tags=tags
+                )
+            
+            def titles(**kwargs):
+                memories = service.retrieve_memories(project_id=self.project_id, limit=10, **kwargs)
+                return sorted(m["title"] for m in memories)
+            
+            self.assertEqual(titles(tags=["performance"]), ["React Hooks", "Vue 响应式"])
+            self.assertEqual(titles(tags=["react", "performance"], tag_mode=TagMatchMode.ALL), ["React Hooks"])
+        finally:
+            service.close()
+    
+    def test_migration_backfill(self):
+        """migration 008 回填已有记忆的标签"""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("DELETE FROM memory_tags")
+        conn.execute("""
+            INSERT INTO project_memories (id, project_id, memory_type, category, title, content, tags)
+            VALUES ('MEM-legacy', ?, 'knowledge', 'knowledge', '旧记忆', '内容', 'not-json')
+        """, (self.project_id,))
+        conn.executescript((MIGRATIONS_DIR / "008_add_memory_tags.sql").read_text(encoding="utf-8"))
+        count = conn.execute("SELECT COUNT(*) FROM memory_tags").fetchone()[0]
+        conn.close()
+        
+        self.assertEqual(count, 5)
+        self.assertEqual(self._titles(tags=["vue"]), ["Vue 响应式"])
+
+
+class TestLocalSearch(unittest.TestCase):
+    """测试本地BM25检索（需要numpy）"""
+    
+    def setUp(self):
+        """测试前准备：临时数据库 + migration"""
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("需要安装numpy")
+        
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # 先注册的清理最后执行：所有服务关闭后再删除临时目录
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        
+        apply_migrations(self.db_path)
+        
+        self.project_id = "TEST_PROJECT"
+        self.service = self._make_service()
+        self._create("内存泄漏排查", "组件卸载时移除事件监听，修复内存泄漏", 5, ["frontend"])
+        self._create("数据库优化", "为查询添加索引", 9, ["backend"])
+        self._create("内存占用", "大对象缓存导致内存占用过高", 9, ["backend"])
+    
+    def _make_service(self):
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False
+        )
+        self.addCleanup(service.close)
+        return service
+    
+    def _create(self, title, content, importance, tags):
+        return self.service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.KNOWLEDGE,
+            title=title,
+            content=content,
+            tags=tags,
+            importance=importance
+        )
+    
+    def test_query_ranks_by_relevance(self):
+        """有查询文本时按相关性排序，不相关的记忆不返回"""
+        memories = self.service.retrieve_memories(project_id=self.project_id, query="内存泄漏")
+        titles = [m["title"] for m in memories]
+        
+        self.assertEqual(titles[0], "内存泄漏排查")
+        self.assertNotIn("数据库优化", titles)
+        self.assertIn("search_score", memories[0])
+    
+    def test_query_with_tag_filter(self):
+        """检索结果同时应用标签过滤"""
+        memories = self.service.retrieve_memories(
+            project_id=self.project_id, query="内存", tags=["backend"]
+        )
+        self.assertEqual([m["title"] for m in memories], ["内存占用"])
+    
+    def test_incremental_index_and_snapshot(self):
+        """新建记忆立即可检索，快照加载后追赶其他实例写入的记忆"""
+        self.service.retrieve_memories(project_id=self.project_id, query="内存")
+        self._create("死锁分析", "事务加锁顺序不一致导致死锁", 6, [])
+        titles = [m["title"] for m in self.service.retrieve_memories(project_id=self.project_id, query="死锁")]
+        self.assertEqual(titles, ["死锁分析"])
+        self.assertTrue(self.service.save_search_index())
+        
+        # 另一个实例写入
+        self._make_service().create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.KNOWLEDGE,
+            title="线程池配置",
+            content="线程池过小导致请求排队",
+            importance=5
+        )
+        
+        restarted = self._make_service()
+        titles = [m["title"] for m in restarted.retrieve_memories(project_id=self.project_id, query="线程池")]
+        self.assertEqual(titles, ["线程池配置"])
+
+
+class TestKnowledgeCache(unittest.TestCase):
+    """测试知识继承包（单次查询 + 版本号缓存）"""
+    
+    def setUp(self):
+        """测试前准备：临时数据库 + migration"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        apply_migrations(self.db_path)
+        
+        self.service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        self.project_id = "TEST_PROJECT"
+        self._create(MemoryCategory.DECISION, "决策1", 8)
+        self._create(MemoryCategory.SOLUTION, "方案1", 6)
+        self._create(MemoryCategory.KNOWLEDGE, "知识1", 3)
+    
+    def tearDown(self):
+        self.service.close()
+        self.tmp_dir.cleanup()
+    
+    def _create(self, category, title, importance):
+        return self.service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=category,
+            title=title,
+            content=title,
+            importance=importance
+        )
+    
+    def test_sections(self):
+        """四个部分一次查询返回"""
+        package = self.service.inherit_knowledge(project_id=self.project_id)
+        
+        self.assertEqual([m["title"] for m in package["decisions"]], ["决策1"])
+        self.assertEqual([m["title"] for m in package["solutions"]], ["方案1"])
+        self.assertEqual([m["title"] for m in package["important_knowledge"]], ["决策1"])
+        self.assertEqual(len(package["recent_memories"]), 3)
+        self.assertEqual(package["total_inherited"], 6)
+        self.assertNotIn("section", package["decisions"][0])
+    
+    def test_cache_hit_and_invalidation(self):
+        """版本号未变化时命中缓存，任何写入（包括其他实例）使缓存失效"""
+        first = self.service.inherit_knowledge(project_id=self.project_id)
+        second = self.service.inherit_knowledge(project_id=self.project_id)
+        self.assertEqual(self.service.knowledge_cache_stats, {"hits": 1, "misses": 1})
+        self.assertEqual(first["decisions"], second["decisions"])
+        
+        # 返回的是副本，调用方修改不影响缓存
+        second["decisions"].clear()
+        self.assertEqual(len(self.service.inherit_knowledge(project_id=self.project_id)["decisions"]), 1)
+        
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("UPDATE project_memories SET importance = 9 WHERE title = '方案1'")
+        conn.commit()
+        conn.close()
+        
+        package = self.service.inherit_knowledge(project_id=self.project_id)
+        self.assertEqual(self.service.knowledge_cache_stats["misses"], 2)
+        self.assertIn("方案1", [m["title"] for m in package["important_knowledge"]])
+    
+    def test_no_retrieval_logging(self):
+        """内部检索不写入 memory_retrievals"""
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=True
+        )
+        service.inherit_knowledge(project_id=self.project_id, context="决策")
+        service.flush_writes()
+        service.close()
+        
+        conn = sqlite3.connect(str(self.db_path))
+        count = conn.execute("SELECT COUNT(*) FROM memory_retrievals").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, 0)
+
+
+class TestMemoryGraphTraversal(unittest.TestCase):
+    """测试记忆关系图（相关记忆、多跳遍历、路径、PageRank）"""
+
+    def setUp(self):
+        """测试前准备：问题 → 原因 → 方案 链"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        apply_migrations(self.db_path)
+
+        self.service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        self.project_id = "TEST_PROJECT"
+        self.problem = self._create("内存泄漏", 8)["id"]
+        self.cause = self._create("未移除事件监听", 6)["id"]
+        self.solution = self._create("卸载时清理监听", 9)["id"]
+        self.service.create_memory_relation(self.problem, self.cause, RelationType.CAUSED_BY, 0.9)
+        self.service.create_memory_relation(self.cause, self.solution, RelationType.SOLVED_BY, 0.8)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp_dir.cleanup()
+
+    def _create(self, title, importance):
+        return self.service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.PROBLEM,
+            title=title,
+            content=title,
+            importance=importance
+        )
+
+    def test_related_memories_both_directions(self):
+        """直接相关记忆：作为源和目标都能查到"""
+        related = self.service.get_related_memories(self.cause, min_strength=0.0)
+        self.assertEqual([m["id"] for m in related], [self.problem, self.solution])
+        self.assertEqual(related[0]["relation_type"], RelationType.CAUSED_BY)
+
+        related = self.service.get_related_memories(self.cause, relation_types=[RelationType.SOLVED_BY])
+        self.assertEqual([m["id"] for m in related], [self.solution])
+
+    def test_neighborhood(self):
+        """多跳邻域回表补全记忆内容"""
+        memories = self.service.get_memory_neighborhood(self.project_id, self.problem, max_hops=2)
+        self.assertEqual([m["id"] for m in memories], [self.cause, self.solution])
+        self.assertEqual(memories[1]["hops"], 2)
+        self.assertEqual(memories[1]["via"], self.cause)
+        self.assertEqual(memories[1]["title"], "卸载时清理监听")
+
+        self.assertEqual(len(self.service.get_memory_neighborhood(self.project_id, self.problem, max_hops=1)), 1)
+        self.assertEqual(self.service.get_memory_neighborhood("OTHER_PROJECT", self.problem), [])
+
+    def test_incremental_update(self):
+        """图加载后新建的关系立即可见"""
+        self.service.get_memory_neighborhood(self.project_id, self.problem)
+        extra = self._create("回归测试", 5)["id"]
+        self.service.create_memory_relation(self.solution, extra, RelationType.RELATED, 1.0)
+
+        memories = self.service.get_memory_neighborhood(self.project_id, self.problem, max_hops=3)
+        self.assertIn(extra, [m["id"] for m in memories])
+        self.assertEqual(self.service.get_memory_graph_stats(self.project_id)["relations"], 3)
+
+    def test_relation_written_elsewhere(self):
+        """其他进程写入或删除的关系在下次遍历时可见（无需手动失效）"""
+        self.assertEqual(len(self.service.get_memory_neighborhood(self.project_id, self.problem)), 2)
+        extra = self._create("回归测试", 5)["id"]
+
+        other = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        other.create_memory_relation(self.solution, extra, RelationType.RELATED, 1.0)
+        other.close()
+
+        memories = self.service.get_memory_neighborhood(self.project_id, self.problem, max_hops=3)
+        self.assertIn(extra, [m["id"] for m in memories])
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM memory_relations WHERE source_memory_id = ?", (self.cause,))
+        conn.commit()
+        conn.close()
+        memories = self.service.get_memory_neighborhood(self.project_id, self.problem, max_hops=3)
+        self.assertEqual([m["id"] for m in memories], [self.cause])
+
+    def test_path_and_rank(self):
+        """最短路径与个性化 PageRank"""
+        result = self.service.find_memory_path(self.project_id, self.problem, self.solution)
+        self.assertEqual(result["path"], [self.problem, self.cause, self.solution])
+        self.assertEqual([m["title"] for m in result["memories"]], ["内存泄漏", "未移除事件监听", "卸载时清理监听"])
+
+        isolated = self._create("孤立记忆", 5)["id"]
+        self.assertIsNone(self.service.find_memory_path(self.project_id, self.problem, isolated))
+
+        ranked = self.service.rank_related_memories(self.project_id, [self.problem], limit=5)
+        self.assertEqual([m["id"] for m in ranked], [self.cause, self.solution])
+        self.assertGreater(ranked[0]["graph_score"], ranked[1]["graph_score"])
+
+
+class TestNearDuplicateDetection(unittest.TestCase):
+    """测试近似重复检测（MinHash-LSH）"""
+    
+    def setUp(self):
+        """测试前准备：临时数据库 + migration"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # 先注册的清理最后执行：所有服务关闭后再删除临时目录
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        # auto_record_* 还会写入 issues/solutions/decisions 表
+        conn = sqlite3.connect(str(self.db_path))
+        conn.executescript((SCHEMAS_DIR / "v2_knowledge_schema.sql").read_text(encoding="utf-8"))
+        conn.close()
+        apply_migrations(self.db_path)
+        self.project_id = "TEST_PROJECT"
+    
+    def _service(self, dedup_mode):
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False,
+            write_behind=False,
+            dedup_mode=dedup_mode
+        )
+        self.addCleanup(service.close)
+        return service
+    
+    def _record(self, service, solution_description="在组件卸载时移除事件监听，并清理定时器和订阅", tools=None):
+        return service.auto_record_problem_solution(
+            project_id=self.project_id,
+            problem_title="内存泄漏",
+            problem_description="长时间运行后内存持续增长，页面切换后旧组件仍然占用内存",
+            solution_title="修复事件监听器泄漏",
+            solution_description=solution_description,
+            tools_used=tools,
+            severity="medium"
+        )
+    
+    def _count(self, sql):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute(sql).fetchone()[0]
+        finally:
+            conn.close()
+    
+    def test_merge_mode(self):
+        """合并模式：重复记录合并进已有记忆，重要性提升，标签合并"""
+        service = self._service(DedupMode.MERGE)
+        first = self._record(service)
+        second = self._record(service, "在组件卸载时移除事件监听，并清理定时器和订阅。", tools=["devtools"])
+        
+        self.assertTrue(second["problem_memory"]["merged"])
+        self.assertEqual(second["problem_memory"]["id"], first["problem_memory"]["id"])
+        self.assertEqual(second["solution_memory"]["id"], first["solution_memory"]["id"])
+        self.assertEqual(second["problem_memory"]["importance"], first["problem_memory"]["importance"] + 1)
+        self.assertIn("devtools", second["solution_memory"]["tags"])
+        self.assertEqual(second["solution_memory"]["merge_count"], 1)
+        self.assertTrue(first["relation_created"])
+        self.assertFalse(second["relation_created"])
+        
+        self.assertEqual(self._count("SELECT COUNT(*) FROM project_memories"), 2)
+        # 已存在的 solved-by 关系不重复创建
+        self.assertEqual(self._count("SELECT COUNT(*) FROM memory_relations"), 1)
+    
+    def test_flag_mode(self):
+        """标记模式：照常写入，记录 duplicate-of 关系，重复记忆不进入分桶"""
+        service = self._service(DedupMode.FLAG)
+        first = self._record(service)
+        second = self._record(service)
+        
+        problem = second["problem_memory"]
+        self.assertNotEqual(problem["id"], first["problem_memory"]["id"])
+        self.assertEqual(problem["duplicate_of"], first["problem_memory"]["id"])
+        self.assertEqual(problem["duplicate_similarity"], 1.0)
+        
+        related = service.get_related_memories(problem["id"], relation_types=[RelationType.DUPLICATE_OF])
+        self.assertEqual([m["id"] for m in related], [first["problem_memory"]["id"]])
+        self.assertEqual(
+            self._count(f"SELECT COUNT(*) FROM memory_lsh_buckets WHERE memory_id = '{problem['id']}'"), 0
+        )
+    
+    def test_distinct_and_off(self):
+        """不同内容、不同分类或关闭检测时不合并"""
+        service = self._service(DedupMode.MERGE)
+        self._record(service)
+        other = self._record(service, "升级依赖版本后问题消失，原因是第三方库的缓存未释放")
+        self.assertTrue(other["problem_memory"]["merged"])
+        self.assertFalse(other["solution_memory"].get("merged", False))
+        self.assertTrue(other["relation_created"])
+        
+        memory = service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.PROBLEM,
+            title="内存泄漏",
+            content="长时间运行后内存持续增长，页面切换后旧组件仍然占用内存"
+        )
+        self.assertNotIn("merged", memory)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM project_memories"), 4)
+        
+        with self.assertRaises(ValueError):
+            service.create_memory(self.project_id, MemoryType.KNOWLEDGE, MemoryCategory.PROBLEM, "t", "c", dedup_mode="bad")
+    
+    def test_rebuild_signatures(self):
+        """回填签名后，已有记忆可以被检测到"""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute("""
+            INSERT INTO project_memories (id, project_id, memory_type, category, title, content)
+            VALUES ('MEM-OLD', ?, 'knowledge', 'decision', 'ADR: 采用Monorepo', '使用 pnpm workspace 管理前后端包')
+        """, (self.project_id,))
+        conn.commit()
+        conn.close()
+        
+        service = self._service(DedupMode.MERGE)
+        self.assertIsNone(service.find_near_duplicate(self.project_id, "decision", "ADR: 采用Monorepo", "使用 pnpm workspace 管理前后端包"))
+        self.assertEqual(service.rebuild_memory_signatures(), 1)
+        self.assertEqual(service.rebuild_memory_signatures(), 0)
+        
+        duplicate = service.find_near_duplicate(self.project_id, "decision", "ADR: 采用Monorepo", "使用 pnpm workspace 管理前后端包")
+        self.assertEqual(duplicate["memory_id"], "MEM-OLD")
+
+
+class TestRankScore(unittest.TestCase):
+    """测试预计算排序分（重要性 + 时间衰减 + 检索频次）"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "memories.db"
+        apply_migrations(self.db_path)
+        
+        self.service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False,
+            knowledge_cache_ttl=0
+        )
+        self.project_id = "TEST_PROJECT"
+    
+    def tearDown(self):
+        self.service.close()
+        self.tmp_dir.cleanup()
+    
+    def _create(self, title, importance=5):
+        return self.service.create_memory(
+            project_id=self.project_id,
+            memory_type=MemoryType.KNOWLEDGE,
+            category=MemoryCategory.KNOWLEDGE,
+            title=title,
+            content=title,
+            importance=importance
+        )["id"]
+    
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+    
+    def _rank_score(self, memory_id):
+        conn = sqlite3.connect(str(self.db_path))
+        score = conn.execute("SELECT rank_score FROM project_memories WHERE id = ?", (memory_id,)).fetchone()[0]
+        conn.close()
+        return score
+    
+    def test_compute_rank_score(self):
+        """排序分组成：重要性、衰减（半衰期）、频次饱和"""
+        now = datetime(2026, 1, 31)
+        fresh = self.service._compute_rank_score(10, now.isoformat(), 0, now)
+        self.assertAlmostEqual(fresh, 0.8)
+        
+        half = self.service._compute_rank_score(10, datetime(2026, 1, 1).isoformat(), 0, now)
+        self.assertAlmostEqual(half, 0.5 + 0.3 * 0.5)
+        
+        saturated = self.service._compute_rank_score(10, now.isoformat(), 10000, now)
+        self.assertAlmostEqual(saturated, 1.0)
+    
+    def test_new_memory_scored_on_insert(self):
+        """新记忆写入时即带有排序分，重要性高的排在前面"""
+        low = self._create("低重要性", 2)
+        high = self._create("高重要性", 9)
+        self.assertGreater(self._rank_score(high), self._rank_score(low))
+        
+        memories = self.service.retrieve_memories(project_id=self.project_id, limit=10)
+        self.assertEqual([m["id"] for m in memories], [high, low])
+    
+    def test_refresh_applies_decay_and_frequency(self):
+        """刷新后：旧记忆衰减，常被检索的记忆上升"""
+        stale = self._create("陈旧知识", 8)
+        popular = self._create("常用知识", 5)
+        plain = self._create("普通知识", 5)
+        
+        old = (datetime.now() - timedelta(days=365)).isoformat()
+        self._execute("UPDATE project_memories SET updated_at = ? WHERE id = ?", (old, stale))
+        for i in range(20):
+            self._execute("""
+                INSERT INTO memory_retrievals (id, project_id, query, memory_ids)
+                VALUES (?, ?, 'q', ?)
+            """, (f"RET-{i}", self.project_id, json.dumps([popular])))
+        self._execute("""
+            INSERT INTO memory_retrievals (id, project_id, query, memory_ids)
+            VALUES ('RET-bad', ?, 'q', 'not json')
+        """, (self.project_id,))
+        
+        result = self.service.refresh_rank_scores(project_id=self.project_id)
+        self.assertEqual(result["projects"], 1)
+        # 新写入的普通记忆分数不变，只有陈旧和常用记忆被更新
+        self.assertEqual(result["updated"], 2)
+        
+        memories = self.service.retrieve_memories(project_id=self.project_id, limit=10)
+        self.assertEqual([m["id"] for m in memories], [popular, plain, stale])
+        
+        # 分数未变化时不再写入
+        self.assertEqual(self.service.refresh_rank_scores()["updated"], 0)
+    
+    def test_refresh_does_not_bump_memory_version(self):
+        """刷新排序分不使知识继承缓存失效"""
+        self._create("知识", 5)
+        old = (datetime.now() - timedelta(days=60)).isoformat()
+        self._execute("UPDATE project_memories SET updated_at = ?", (old,))
+        version = self.service._get_memory_version(self.project_id)
+        
+        self.assertEqual(self.service.refresh_rank_scores()["updated"], 1)
+        self.assertEqual(self.service._get_memory_version(self.project_id), version)
+    
+    def test_without_rank_column(self):
+        """未执行 migration 011 时回退为按重要性排序"""
+        db_path = Path(self.tmp_dir.name) / "legacy.db"
+        conn = sqlite3.connect(str(db_path))
+        for name in MEMORY_MIGRATIONS[:-1]:
+            conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+        conn.close()
+        
+        service = create_project_memory_service(
+            state_manager=object(),
+            db_path=str(db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        service.create_memory(self.project_id, MemoryType.KNOWLEDGE, MemoryCategory.KNOWLEDGE, "低", "低", importance=2)
+        service.create_memory(self.project_id, MemoryType.KNOWLEDGE, MemoryCategory.KNOWLEDGE, "高", "高", importance=9)
+        
+        memories = service.retrieve_memories(project_id=self.project_id, limit=10)
+        self.assertEqual([m["title"] for m in memories], ["高", "低"])
+        self.assertEqual(service.refresh_rank_scores()["updated"], 0)
+        service.close()
+
+
 class TestFactoryFunction(unittest.TestCase):
     """测试工厂函数"""
     
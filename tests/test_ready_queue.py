@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+增量就绪队列单元测试
+"""
+
+import unittest
+import sqlite3
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskPriority, TaskStatus
+from automation.ready_queue import ReadyQueue
+from automation.task_scheduler import TaskScheduler
+from state_manager_case import StateManagerTestCase
+
+
+class TestReadyQueue(unittest.TestCase):
+    """测试 ReadyQueue 的依赖计数、优先级和 Worker 容量"""
+
+    def setUp(self):
+        self.queue = ReadyQueue()
+
+    def drain(self):
+        """不断加入新 Worker，按顺序取出全部就绪任务"""
+        order = []
+        i = 0
+        while self.queue.ready_count():
+            self.queue.add_worker(f"drain-{i}")
+            i += 1
+            order.append(self.queue.pop_assignment()[0])
+        return order
+
+    def test_priority_order(self):
+        """按 (优先级, -预估工时) 排序，P0/P1 之外的优先级排最后"""
+        self.queue.upsert_task("p2-short", "pending", "P2", 1)
+        self.queue.upsert_task("p0-short", "pending", "P0", 1)
+        self.queue.upsert_task("p0-long", "pending", "P0", 5)
+        self.queue.upsert_task("p1", "pending", TaskPriority.P1, 2)
+        self.queue.upsert_task("other", "pending", None, None)
+        self.assertEqual(self.drain(), ["p0-long", "p0-short", "p1", "p2-short", "other"])
+
+    def test_dependency_counters(self):
+        """依赖全部完成后才就绪；撤销完成、删除依赖后重新阻塞"""
+        self.queue.upsert_task("a", "pending")
+        self.queue.upsert_task("c", "pending", depends_on=["a", "b"])
+        self.assertFalse(self.queue.is_ready("c"))  # b 尚不存在
+
+        self.queue.upsert_task("b", "completed")
+        self.queue.set_status("a", TaskStatus.COMPLETED)
+        self.assertTrue(self.queue.is_ready("c"))
+
+        self.queue.set_status("a", "review")
+        self.assertFalse(self.queue.is_ready("c"))
+        self.queue.set_status("a", "completed")
+        self.queue.remove_task("b")
+        self.assertFalse(self.queue.is_ready("c"))
+        self.assertEqual(self.queue.ready_count(), 0)
+
+        # 修改依赖列表
+        self.queue.upsert_task("c", "pending", depends_on=["a"])
+        self.assertEqual(self.drain(), ["c"])
+
+    def test_stale_entries(self):
+        """优先级变化或离开待分配后，旧堆条目不会被取出"""
+        self.queue.upsert_task("a", "pending", "P2")
+        self.queue.upsert_task("b", "pending", "P1")
+        self.queue.upsert_task("a", "pending", "P0")
+        self.queue.set_status("b", "in_progress")
+        self.queue.upsert_task("c", "pending", "P1")
+        self.assertEqual(self.drain(), ["a", "c"])
+
+    def test_workers(self):
+        """负载相同时先变为可用的 Worker 先分配；失败时放回"""
+        self.queue.upsert_task("a", "pending", "P0")
+        self.queue.upsert_task("b", "pending", "P1")
+        self.assertIsNone(self.queue.pop_assignment())
+
+        for worker_id in ("w1", "w2", "w3"):
+            self.queue.add_worker(worker_id)
+        self.queue.remove_worker("w2")
+        self.assertEqual(self.queue.idle_count(), 2)
+
+        self.assertEqual(self.queue.pop_assignment(), ("a", "w1", 1))
+        self.queue.release_assignment("a", "w1", 1, task_available=False)
+        self.assertEqual(self.queue.pop_assignment(), ("b", "w3", 1))
+        self.queue.release_assignment("b", "w3", 1)
+        self.assertEqual(self.queue.pop_assignment(), ("b", "w1", 1))
+        self.assertIsNone(self.queue.pop_assignment())
+        self.assertEqual(self.queue.idle_count(), 1)
+
+        self.queue.set_worker_available("w3", False)
+        self.assertEqual(self.queue.idle_count(), 0)
+        with self.assertRaises(ValueError):
+            self.queue.add_worker("w4", capacity=0)
+
+    def test_weighted_capacity(self):
+        """多槽位 Worker 按加权负载均衡，high 复杂度任务占用两个槽位"""
+        self.queue.add_worker("small", capacity=2)
+        self.queue.add_worker("big", capacity=4, weight=2.0)
+        for i in range(6):
+            self.queue.upsert_task(f"t{i}", "pending", "P1", 10 - i)
+
+        picks = [self.queue.pop_assignment()[1] for _ in range(6)]
+        # big 的加权负载按 1/8 递增，small 按 1/2 递增；负载相同时先可用者优先
+        self.assertEqual(picks, ["small", "big", "big", "big", "big", "small"])
+        self.assertEqual(self.queue.worker_slots("big"), (4, 4))
+        self.assertAlmostEqual(self.queue.worker_load("big"), 0.5)
+        self.assertEqual(self.queue.least_loaded_worker(), None)
+
+        self.queue.release_slots("big", 2)
+        self.queue.release_slots("small", 1)
+        self.assertEqual(self.queue.least_loaded_worker(), "big")
+
+    def test_slot_fitting(self):
+        """high 任务放不下时低复杂度任务先用剩余槽位；超过容量的任务独占 Worker"""
+        self.queue.add_worker("w", capacity=3)
+        self.queue.upsert_task("h1", "pending", "P0", complexity="high")
+        self.queue.upsert_task("h2", "pending", "P0", complexity="high")
+        self.queue.upsert_task("low", "pending", "P2", complexity="low")
+        self.assertEqual(self.queue.pop_assignment(), ("h1", "w", 2))
+        self.assertEqual(self.queue.pop_assignment(), ("low", "w", 1))
+        self.assertIsNone(self.queue.pop_assignment())
+        self.assertTrue(self.queue.is_ready("h2"))
+
+        self.queue.add_worker("tiny", capacity=1)
+        self.assertEqual(self.queue.pop_assignment(), ("h2", "tiny", 1))
+        self.assertEqual(self.queue.acquire_slots("tiny", 1), 0)
+
+    def test_compaction(self):
+        """反复修改同一任务时堆不会无限增长"""
+        self.queue.upsert_task("a", "pending")
+        for i in range(10000):
+            self.queue.upsert_task("a", "pending", estimated_hours=i)
+        self.assertLess(len(self.queue._ready), 2100)
+        self.assertEqual(self.drain(), ["a"])
+
+
+class TestIncrementalScheduling(StateManagerTestCase):
+    """测试 TaskScheduler 基于就绪队列的增量调度"""
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = TaskScheduler(self.sm)
+
+    def test_completion_unblocks_dependents(self):
+        """任务完成后依赖它的任务在下一轮被分配给空闲 Worker"""
+        self.sm.create_tasks([
+            Task(id="a", title="a", priority=TaskPriority.P2),
+            Task(id="b", title="b", priority=TaskPriority.P0, depends_on=["a"]),
+            Task(id="c", title="c", priority=TaskPriority.P1, estimated_hours=3),
+        ])
+        self.scheduler.register_worker("w1")
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["c"]})
+        self.assertEqual(self.scheduler.schedule_tasks(), {})
+
+        self.scheduler.register_worker("w2")
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w2": ["a"]})
+
+        self.scheduler.complete_task("a", "w2", success=True)
+        self.sm.update_task_status("a", TaskStatus.COMPLETED)
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w2": ["b"]})
+
+    def test_capacity_and_utilization(self):
+        """多槽位 Worker 同时执行多个任务，统计中包含利用率"""
+        self.sm.create_tasks([
+            Task(id="big", title="t", complexity="high", estimated_hours=8),
+            Task(id="s1", title="t", complexity="low"),
+            Task(id="s2", title="t"),
+        ])
+        self.scheduler.register_worker("w1", capacity=3)
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["big", "s1"]})
+
+        stats = self.scheduler.get_system_stats()
+        worker = stats["worker_stats"]["w1"]
+        self.assertEqual((worker["used_slots"], worker["capacity"], worker["current_tasks"]), (3, 3, ["big", "s1"]))
+        self.assertEqual((stats["total_slots"], stats["used_slots"], stats["utilization"]), (3, 3, 1.0))
+
+        self.scheduler.complete_task("big", "w1", success=True)
+        self.assertAlmostEqual(self.scheduler.get_worker_utilization("w1"), 1 / 3)
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["s2"]})
+
+    def test_external_changes_and_deletes(self):
+        """其他进程的认领和删除通过增量同步应用"""
+        self.sm.create_tasks([Task(id=f"t{i}", title="t") for i in range(3)])
+        self.assertEqual(self.scheduler.sync_ready_queue(), 3)
+        self.sm.claim_task("other", task_id="t0")
+        with sqlite3.connect(str(self.sm.db_path)) as conn:
+            conn.execute("DELETE FROM tasks WHERE id = 't1'")
+        self.assertEqual(self.scheduler.sync_ready_queue(), 2)
+        self.assertEqual(self.scheduler.sync_ready_queue(), 0)
+
+        self.scheduler.register_worker("w1")
+        self.scheduler.register_worker("w2")
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["t2"]})
+
+    def test_stale_queue_claim_fails(self):
+        """就绪队列尚未同步到的认领：认领失败，Worker 放回空闲队列"""
+        self.sm.create_tasks([Task(id="t0", title="t"), Task(id="t1", title="t")])
+        self.scheduler.sync_ready_queue()
+        self.sm.claim_task("other", task_id="t0")
+        self.scheduler.register_worker("w1")
+
+        # 未同步前直接取队列：t0 认领失败后继续分配 t1
+        self.scheduler.sync_ready_queue = lambda: 0
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["t1"]})
+
+    def test_refused_pending_task_requeued(self):
+        """就绪队列与数据库的依赖不一致时认领失败，任务按数据库的依赖放回，依赖完成后分配"""
+        self.sm.create_tasks([
+            Task(id="a", title="a", priority=TaskPriority.P0),
+            Task(id="b", title="b", priority=TaskPriority.P1, depends_on=["a"])
+        ])
+        self.scheduler.register_worker("w1", capacity=2)
+        self.scheduler.sync_ready_queue()
+        self.scheduler.ready_queue.upsert_task("b", "pending", "P1", 1.0)
+
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["a"]})
+        self.scheduler.complete_task("a", "w1", True)
+        self.sm.update_task_status("a", TaskStatus.COMPLETED)
+        self.assertEqual(self.scheduler.schedule_tasks(), {"w1": ["b"]})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+调度离散事件模拟器单元测试（合成 DAG 生成、模拟结果的一致性和可复现性）
+"""
+
+import unittest
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.simulator import (
+    RESULT_SCHEMA_VERSION, SimulationConfig, critical_path_hours, generate_dag, run_simulation
+)
+
+
+def simulate(**overrides):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_simulation(SimulationConfig(tasks=120, workers=6, width=10), **overrides)
+
+
+class TestGenerateDag(unittest.TestCase):
+    """测试合成 DAG"""
+
+    def test_shapes_are_topologically_ordered(self):
+        """依赖只指向更早生成的任务"""
+        for shape in ("layered", "random", "chains"):
+            tasks = generate_dag(SimulationConfig(tasks=200, shape=shape, width=10))
+            self.assertEqual(len(tasks), 200)
+            seen = set()
+            for task in tasks:
+                self.assertTrue(set(task.depends_on) <= seen, shape)
+                seen.add(task.id)
+
+    def test_chains(self):
+        """chains：width 条互不相交的链，关键路径为最长链"""
+        tasks = generate_dag(SimulationConfig(tasks=30, shape="chains", width=3))
+        self.assertEqual([t.depends_on for t in tasks[:4]], [[], [], [], ["sim-0"]])
+        chain = [t.estimated_hours for t in tasks]
+        longest = max(sum(chain[i::3]) for i in range(3))
+        self.assertAlmostEqual(critical_path_hours(tasks), longest)
+
+    def test_deterministic_and_invalid_shape(self):
+        config = SimulationConfig(tasks=50, shape="random")
+        first, second = generate_dag(config), generate_dag(config)
+        self.assertEqual([(t.id, t.depends_on, t.estimated_hours) for t in first],
+                         [(t.id, t.depends_on, t.estimated_hours) for t in second])
+        with self.assertRaises(ValueError):
+            generate_dag(SimulationConfig(shape="star"))
+
+
+class TestSimulation(unittest.TestCase):
+    """测试模拟结果"""
+
+    def test_all_tasks_complete(self):
+        result = simulate()
+        self.assertEqual(result["schema_version"], RESULT_SCHEMA_VERSION)
+        self.assertEqual(result["tasks"]["completed"], 120)
+        self.assertEqual(result["tasks"]["unreachable"], 0)
+        self.assertEqual(result["scheduler"]["decisions"], 120)
+        # 利用率在 (0, 1] 内
+        self.assertGreater(result["utilization"], 0)
+        self.assertLessEqual(result["utilization"], 1.0 + 1e-9)
+        self.assertLessEqual(result["queue_wait_hours"]["p50"], result["queue_wait_hours"]["p99"])
+
+    def test_exact_without_noise(self):
+        """时长无噪声且 Worker 充足时，makespan 等于关键路径，且无排队"""
+        result = simulate(duration_sigma=0.0, workers=200)
+        self.assertAlmostEqual(result["makespan_hours"], result["critical_path_hours"], places=3)
+        self.assertEqual(result["queue_wait_hours"]["max"], 0.0)
+
+    def test_failures_retry_and_give_up(self):
+        result = simulate(failure_rate=1.0, max_retries=1)
+        self.assertEqual(result["tasks"]["completed"], 0)
+        self.assertGreater(result["tasks"]["failed"], 0)
+        self.assertEqual(result["tasks"]["retries"], result["tasks"]["failed"])
+        # 失败任务的后继永远不会就绪
+        self.assertEqual(
+            result["tasks"]["failed"] + result["tasks"]["unreachable"], result["tasks"]["total"]
+        )
+
+    def test_reproducible(self):
+        first, second = simulate(failure_rate=0.2), simulate(failure_rate=0.2)
+        self.assertEqual(first["makespan_hours"], second["makespan_hours"])
+        self.assertEqual(first["tasks"], second["tasks"])
+
+    def test_more_workers_not_slower(self):
+        few, many = simulate(workers=2), simulate(workers=20)
+        self.assertLess(many["makespan_hours"], few["makespan_hours"])
+
+
+if __name__ == "__main__":
+    unittest.main()
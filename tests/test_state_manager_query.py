@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+StateManager 任务查询 API 单元测试（过滤、键集分页、列投影、原始元组、批量写入、增量同步）
+"""
+
+import importlib.util
+import unittest
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskPriority, TaskStatus
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+from industrial_dashboard.adapters import StateManagerAdapter
+from state_manager_case import StateManagerTestCase
+
+
+class TaskQueryTestCase(StateManagerTestCase):
+    """临时 StateManager + 测试任务"""
+
+    def setUp(self):
+        """测试前准备：10 个任务，状态/优先级/执行者交替"""
+        super().setUp()
+        base = datetime(2026, 10, 1)
+        statuses = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED]
+        for i in range(10):
+            self.sm.create_task(Task(
+                id=f"task-{i}",
+                title=f"任务{i}",
+                status=statuses[i % 3],
+                priority=TaskPriority.P0 if i % 2 == 0 else TaskPriority.P2,
+                depends_on=[f"task-{i - 1}"] if i else [],
+                assigned_to="worker-1" if i < 5 else None,
+                created_at=base + timedelta(minutes=i),
+                updated_at=base + timedelta(minutes=i)
+            ))
+
+
+class TestQueryTasks(TaskQueryTestCase):
+    """测试 StateManager.query_tasks"""
+
+    def test_filters(self):
+        """状态/执行者/优先级过滤，支持多值与枚举"""
+        pending = self.sm.query_tasks(status=TaskStatus.PENDING)
+        self.assertEqual([t.id for t in pending], ["task-0", "task-3", "task-6", "task-9"])
+        self.assertIsInstance(pending[0], Task)
+
+        open_tasks = self.sm.query_tasks(status=["pending", TaskStatus.IN_PROGRESS], fields=["id"], raw=True)
+        self.assertEqual(len(open_tasks), 7)
+
+        rows = self.sm.query_tasks(assigned_to="worker-1", priority=TaskPriority.P0, fields=["id"], raw=True)
+        self.assertEqual(rows, [("task-0",), ("task-2",), ("task-4",)])
+
+    def test_keyset_pagination(self):
+        """用上一页最后一行的 (created_at, id) 翻页，结果不重不漏"""
+        seen = []
+        cursor = None
+        while True:
+            page = self.sm.query_tasks(fields=["created_at", "id"], raw=True, after=cursor, limit=4)
+            if not page:
+                break
+            seen.extend(task_id for _, task_id in page)
+            cursor = page[-1]
+        self.assertEqual(seen, [f"task-{i}" for i in range(10)])
+
+    def test_projection(self):
+        """字典投影解码 JSON 列，原始元组保持字符串"""
+        item = self.sm.query_tasks(status="completed", fields=["id", "depends_on"], limit=1)[0]
+        self.assertEqual(item, {"id": "task-2", "depends_on": ["task-1"]})
+
+        row = self.sm.query_tasks(status="completed", fields=["id", "depends_on"], raw=True, limit=1)[0]
+        self.assertEqual(row, ("task-2", '["task-1"]'))
+
+        with self.assertRaises(ValueError):
+            self.sm.query_tasks(fields=["id; DROP TABLE tasks"])
+
+    def test_list_helpers_unchanged(self):
+        """原有 list_* 方法基于查询 API，结果不变"""
+        self.assertEqual(len(self.sm.list_all_tasks()), 10)
+        self.assertEqual(len(self.sm.list_tasks_by_status(TaskStatus.COMPLETED)), 3)
+        self.assertEqual(len(self.sm.list_tasks_assigned_to("worker-1")), 5)
+
+
+class TestStatusCounters(TaskQueryTestCase):
+    """测试触发器维护的状态计数与版本号缓存"""
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(str(self.sm.db_path))
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def test_counts_follow_writes(self):
+        """插入、改状态、删除（包括绕过 StateManager 的直接写库）都反映到计数"""
+        self.assertEqual(self.sm.get_status_counts(), {"pending": 4, "in_progress": 3, "completed": 3})
+
+        self.sm.update_task_status("task-0", TaskStatus.COMPLETED)
+        self._execute("DELETE FROM tasks WHERE id = 'task-1'")
+        self._execute("UPDATE tasks SET title = '改标题' WHERE id = 'task-2'")
+        self.assertEqual(self.sm.get_status_counts(), {"pending": 3, "in_progress": 2, "completed": 4})
+
+        status = self.sm.get_system_status()
+        self.assertEqual((status.total_tasks, status.completed_tasks), (9, 4))
+
+    def test_cache_invalidated_by_version(self):
+        """版本号不变时使用缓存；任何状态变化都会递增版本号"""
+        self.sm.get_status_counts()
+        version, _ = self.sm._status_counts_cache
+
+        # 直接篡改计数表（不经过触发器，版本号不变）：命中缓存
+        self._execute("UPDATE task_status_counts SET count = 99")
+        self.assertEqual(self.sm.get_status_counts()["pending"], 4)
+
+        self._execute("UPDATE tasks SET status = 'review' WHERE id = 'task-0'")
+        self.assertEqual(self.sm.get_status_counts()["review"], 1)
+        self.assertGreater(self.sm._status_counts_cache[0], version)
+
+    def test_backfill_and_rebuild(self):
+        """已有任务的旧库首次打开时回填计数；rebuild_status_counts 可校正"""
+        self._execute("DROP TABLE task_status_counts")
+        sm = StateManager(db_path=str(self.sm.db_path))
+        self.assertEqual(sum(sm.get_status_counts().values()), 10)
+
+        self._execute("UPDATE task_status_counts SET count = 0")
+        self.assertEqual(sm.rebuild_status_counts()["completed"], 3)
+
+
+class TestBulkWrites(TaskQueryTestCase):
+    """测试批量创建与批量状态更新"""
+
+    def test_create_tasks(self):
+        """模型与字典混合批量创建，多余字段被忽略"""
+        result = self.sm.create_tasks([
+            Task(id="bulk-0", title="批量0"),
+            {"id": "bulk-1", "title": "批量1", "depends_on": ["bulk-0"], "metadata": {"x": 1}}
+        ])
+        self.assertEqual(result, {"success": True, "created": 2, "errors": []})
+        self.assertEqual(self.sm.get_task("bulk-1").depends_on, ["bulk-0"])
+        self.assertEqual(self.sm.get_status_counts()["pending"], 6)
+
+    def test_create_tasks_all_or_nothing(self):
+        """任何一条出错时整批不写入，并逐条返回错误"""
+        result = self.sm.create_tasks([
+            {"id": "bulk-0", "title": "正常"},
+            {"id": "task-3", "title": "已存在"},
+            {"id": "bulk-0", "title": "批次内重复"},
+            {"id": "bulk-3", "title": "无效优先级", "priority": "P9"}
+        ])
+        self.assertFalse(result["success"])
+        self.assertEqual(result["created"], 0)
+        self.assertEqual([(e["index"], e["id"]) for e in result["errors"]],
+                         [(1, "task-3"), (2, "bulk-0"), (3, "bulk-3")])
+        self.assertIsNone(self.sm.get_task("bulk-0"))
+
+    def test_update_tasks_status(self):
+        """批量更新状态；未知任务或无效状态时整批不更新"""
+        result = self.sm.update_tasks_status([
+            ("task-0", TaskStatus.COMPLETED), ("task-3", "blocked")
+        ])
+        self.assertEqual(result, {"success": True, "updated": 2, "errors": []})
+        self.assertEqual(self.sm.get_task("task-3").status, "blocked")
+
+        result = self.sm.update_tasks_status([
+            ("task-6", "completed"), ("missing", "completed"), ("task-9", "done")
+        ])
+        self.assertFalse(result["success"])
+        self.assertEqual([e["error"] for e in result["errors"]], ["task not found", "invalid status: done"])
+        self.assertEqual(self.sm.get_task("task-6").status, "pending")
+
+    @unittest.skipUnless(importlib.util.find_spec("anthropic"), "需要 anthropic SDK")
+    def test_project_manager_ai(self):
+        """ProjectManagerAI 通过批量接口写入白板"""
+        from automation.project_manager_ai import ProjectManagerAI
+        pm = ProjectManagerAI(self.sm)
+        self.assertTrue(pm.create_tasks_in_board([Task(id="pm-0", title="a"), Task(id="pm-1", title="b")]))
+        self.assertFalse(pm.create_tasks_in_board([Task(id="pm-2", title="c"), Task(id="pm-0", title="a")]))
+        self.assertIsNone(self.sm.get_task("pm-2"))
+
+    def test_adapter_bulk_tasks(self):
+        """看板批量接口写入适配器的 StateManager；创建失败时不执行更新"""
+        adapter = StateManagerAdapter(self.sm)
+        result = adapter.bulk_tasks(
+            [{"id": "bulk-0", "title": "批量0"}], [{"id": "task-0", "status": "completed"}]
+        )
+        self.assertTrue(result["success"])
+        self.assertEqual(self.sm.get_task("bulk-0").title, "批量0")
+        self.assertEqual(self.sm.get_task("task-0").status, "completed")
+
+        result = adapter.bulk_tasks(
+            [{"id": "task-3", "title": "已存在"}], [{"id": "task-6", "status": "completed"}]
+        )
+        self.assertFalse(result["success"])
+        self.assertNotIn("update_status", result)
+        self.assertEqual(self.sm.get_task("task-6").status, "pending")
+
+
+class TestTaskChanges(TaskQueryTestCase):
+    """测试任务版本号与增量同步"""
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(str(self.sm.db_path))
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def test_changes_since(self):
+        """任何写入（包括直接写库）都递增版本号；删除通过墓碑下发"""
+        full = self.sm.get_task_changes(0, fields=["id"], raw=True)
+        self.assertEqual((full["version"], len(full["changed"]), full["reset"]), (10, 10, False))
+
+        self.sm.update_task_status("task-0", TaskStatus.BLOCKED)
+        self._execute("UPDATE tasks SET title = '改标题' WHERE id = 'task-5'")
+        self._execute("DELETE FROM tasks WHERE id = 'task-9'")
+        delta = self.sm.get_task_changes(full["version"], fields=["id", "version"])
+        self.assertEqual(delta["changed"], [{"id": "task-0", "version": 11}, {"id": "task-5", "version": 12}])
+        self.assertEqual((delta["deleted"], delta["version"]), (["task-9"], 13))
+
+        # 无变化时返回空增量；重新创建被删除的任务会清除墓碑
+        self.assertEqual(self.sm.get_task_changes(13)["changed"], [])
+        self.sm.create_task(Task(id="task-9", title="重建"))
+        delta = self.sm.get_task_changes(13, fields=["id"], raw=True)
+        self.assertEqual((delta["changed"], delta["deleted"]), ([("task-9",)], []))
+
+    def test_reset_and_legacy_backfill(self):
+        """since 超出当前版本号时要求重置；旧库补列后全部任务记为版本 1"""
+        delta = self.sm.get_task_changes(999, fields=["id"], raw=True)
+        self.assertTrue(delta["reset"])
+        self.assertEqual(len(delta["changed"]), 10)
+
+        legacy = Path(self.tmp_dir.name) / "legacy.db"
+        conn = sqlite3.connect(str(legacy))
+        conn.execute("""
+            CREATE TABLE tasks (id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT,
+                                status TEXT NOT NULL, priority TEXT, depends_on TEXT, blocked_by TEXT,
+                                assigned_to TEXT, assigned_at TEXT, completed_at TEXT,
+                                created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+                                estimated_hours REAL, actual_hours REAL, complexity TEXT)
+        """)
+        conn.execute("INSERT INTO tasks (id, title, status, created_at, updated_at) VALUES ('t', 't', 'pending', 'x', 'x')")
+        conn.commit()
+        conn.close()
+        sm = StateManager(db_path=str(legacy))
+        self.assertEqual(sm.get_task_changes(0, fields=["id", "version"]),
+                         {"version": 1, "changed": [{"id": "t", "version": 1}], "deleted": [], "reset": False})
+        sm.update_task_status("t", TaskStatus.COMPLETED)
+        self.assertEqual(sm.get_task_changes(1, fields=["status"], raw=True)["changed"], [("completed",)])
+
+
+class TestQueryCallers(TaskQueryTestCase):
+    """测试迁移到查询 API 的调用方"""
+
+    def test_adapter(self):
+        """Dashboard 适配器：统计和任务列表"""
+        adapter = StateManagerAdapter(self.sm)
+        stats = adapter.get_stats()
+        self.assertEqual(
+            (stats.total_tasks, stats.pending_tasks, stats.in_progress_tasks, stats.completed_tasks),
+            (10, 4, 3, 3)
+        )
+
+        tasks = adapter.get_tasks()
+        self.assertEqual(len(tasks), 10)
+        self.assertEqual((tasks[1].status, tasks[1].priority), ("in_progress", "P2"))
+
+        changes = adapter.get_task_changes(10)
+        self.assertEqual((changes["changed"], changes["deleted"]), ([], []))
+        self.sm.update_task_status("task-1", TaskStatus.REVIEW)
+        changes = adapter.get_task_changes(changes["version"])
+        self.assertEqual([(t.id, t.status) for t in changes["changed"]], [("task-1", "review")])
+
+    def test_scheduler(self):
+        """调度器只分配依赖已完成的待分配任务"""
+        self.sm.create_task(Task(id="task-10", title="依赖进行中任务", depends_on=["task-1"]))
+        scheduler = TaskScheduler(self.sm)
+        for worker_id in ("worker-a", "worker-b", "worker-c", "worker-d", "worker-e"):
+            scheduler.register_worker(worker_id)
+
+        # task-0 无依赖，task-3/6/9 的依赖已完成；task-10 依赖的 task-1 仍在进行中
+        assignments = scheduler.schedule_tasks()
+        self.assertEqual(sorted(sum(assignments.values(), [])), ["task-0", "task-3", "task-6", "task-9"])
+        self.assertTrue(all(len(task_ids) == 1 for task_ids in assignments.values()))
+
+        stats = scheduler.get_system_stats()
+        self.assertEqual((stats["total_tasks"], stats["pending_tasks"], stats["in_progress_tasks"]), (11, 1, 7))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
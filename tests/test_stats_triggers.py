@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+统计触发器（memory_stats / event_stats）单元测试
+"""
+
+import unittest
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "packages" / "core-domain" / "src"))
+
+from services.event_service import EventCategory, EventSeverity, create_event_emitter, create_event_store
+from services.project_memory_service import MemoryCategory, MemoryType, create_project_memory_service
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+MIGRATIONS = (
+    "003_add_project_memories.sql",
+    "004_add_events_tables.sql",
+    "008_add_memory_tags.sql",
+    "009_add_memory_versions.sql",
+    "012_add_stats_triggers.sql"
+)
+
+
+class StatsTestCase(unittest.TestCase):
+    """临时数据库 + migration"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "stats.db"
+        self._apply(MIGRATIONS)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _apply(self, names):
+        conn = sqlite3.connect(str(self.db_path))
+        for name in names:
+            conn.executescript((MIGRATIONS_DIR / name).read_text(encoding="utf-8"))
+        conn.close()
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def _row(self, sql, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+
+class TestMemoryStatsTriggers(StatsTestCase):
+    """测试 memory_stats 触发器"""
+
+    MEMORY_STATS = """
+        SELECT total_memories, session_memories, ultra_memories, decision_memories, solution_memories
+        FROM memory_stats WHERE project_id = ?
+    """
+
+    def _insert(self, memory_id, project_id, memory_type):
+        self._execute("""
+            INSERT INTO project_memories (id, project_id, memory_type, category, title, content)
+            VALUES (?, ?, ?, 'knowledge', 't', 'c')
+        """, (memory_id, project_id, memory_type))
+
+    def test_direct_sql_writes_counted(self):
+        """绕过服务直接写库也会计入统计"""
+        self._insert("M1", "P1", "decision")
+        self._insert("M2", "P1", "solution")
+        self._insert("M3", "P1", "knowledge")
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P1",)), (3, 0, 0, 1, 1))
+
+    def test_delete_and_update(self):
+        """删除扣减；修改类型或项目时从原统计移到新统计"""
+        self._insert("M1", "P1", "decision")
+        self._insert("M2", "P1", "ultra")
+
+        self._execute("UPDATE project_memories SET memory_type = 'solution' WHERE id = 'M1'")
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P1",)), (2, 0, 1, 0, 1))
+
+        self._execute("UPDATE project_memories SET project_id = 'P2' WHERE id = 'M2'")
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P1",)), (1, 0, 0, 0, 1))
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P2",)), (1, 0, 1, 0, 0))
+
+        # 其他列的更新不触发统计变化
+        self._execute("UPDATE project_memories SET title = 'x' WHERE id = 'M1'")
+        self._execute("DELETE FROM project_memories WHERE id = 'M1'")
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P1",)), (0, 0, 0, 0, 0))
+
+    def test_migration_backfills_existing_rows(self):
+        """迁移前已存在的记忆在迁移时计入统计"""
+        self.db_path = Path(self.tmp_dir.name) / "legacy.db"
+        self._apply(MIGRATIONS[:-1])
+        self._insert("M1", "P1", "session")
+        self._insert("M2", "P1", "session")
+        self._execute("INSERT INTO memory_stats (project_id, total_memories) VALUES ('P1', 99)")
+
+        self._apply(MIGRATIONS[-1:])
+        self.assertEqual(self._row(self.MEMORY_STATS, ("P1",)), (2, 2, 0, 0, 0))
+
+    def test_service_rebuild(self):
+        """rebuild_memory_stats 校正被改坏的统计"""
+        service = create_project_memory_service(
+            persist=True,
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        for _ in range(2):
+            service.create_memory("P1", MemoryType.DECISION, MemoryCategory.DECISION, "决策", "内容")
+        self.assertEqual(service.get_memory_stats("P1")["decision_memories"], 2)
+
+        self._execute("UPDATE memory_stats SET total_memories = 0, decision_memories = 7")
+        self.assertEqual(service.rebuild_memory_stats("P1"), 1)
+        stats = service.get_memory_stats("P1")
+        self.assertEqual((stats["total_memories"], stats["decision_memories"]), (2, 2))
+        self.assertEqual(service.rebuild_memory_stats(), 1)
+        service.close()
+
+
+class TestEventStatsTriggers(StatsTestCase):
+    """测试 event_stats 触发器"""
+
+    EVENT_STATS = """
+        SELECT total_events, task_events, issue_events, system_events,
+               info_events, warning_events, error_events, last_event_at
+        FROM event_stats WHERE project_id = ?
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.emitter = create_event_emitter(str(self.db_path))
+        self.store = create_event_store(str(self.db_path))
+
+    def test_emit_counted_by_trigger(self):
+        """发射事件后统计即时更新（general 归入 system，未知严重性归入 info）"""
+        self.emitter.emit("P1", "task.created", "任务1", category=EventCategory.TASK,
+                          severity=EventSeverity.INFO, occurred_at="2026-10-01T10:00:00")
+        self.emitter.emit("P1", "issue.discovered", "问题1", category=EventCategory.ISSUE,
+                          severity=EventSeverity.WARNING, occurred_at="2026-10-03T10:00:00")
+        self.emitter.emit("P1", "note", "备注", category=EventCategory.GENERAL,
+                          severity="debug", occurred_at="2026-10-02T10:00:00")
+
+        self.assertEqual(
+            self._row(self.EVENT_STATS, ("P1",)),
+            (3, 1, 1, 1, 2, 1, 0, "2026-10-03T10:00:00")
+        )
+        stats = self.store.get_stats("P1")
+        self.assertEqual((stats["total_events"], stats["warning_events"]), (3, 1))
+
+    def test_delete_and_update(self):
+        """删除扣减并重新计算最近事件时间；修改分类/严重性时移动计数"""
+        first = self.emitter.emit("P1", "task.created", "任务1", category=EventCategory.TASK,
+                                  occurred_at="2026-10-01T10:00:00")
+        last = self.emitter.emit("P1", "task.failed", "任务2", category=EventCategory.TASK,
+                                 severity=EventSeverity.ERROR, occurred_at="2026-10-05T10:00:00")
+
+        self._execute("UPDATE project_events SET severity = 'warning' WHERE id = ?", (last["id"],))
+        self.assertEqual(self._row(self.EVENT_STATS, ("P1",))[4:7], (1, 1, 0))
+
+        self._execute("DELETE FROM project_events WHERE id = ?", (last["id"],))
+        self.assertEqual(
+            self._row(self.EVENT_STATS, ("P1",)),
+            (1, 1, 0, 0, 1, 0, 0, first["occurred_at"])
+        )
+
+    def test_store_rebuild(self):
+        """rebuild_stats 按事件表重建，并计算时间窗口计数"""
+        self.emitter.emit("P1", "task.created", "任务1", category=EventCategory.TASK)
+        self.emitter.emit("P2", "task.created", "任务2", category=EventCategory.TASK,
+                          occurred_at="2020-01-01T00:00:00")
+        self._execute("UPDATE event_stats SET total_events = 42")
+
+        self.assertEqual(self.store.rebuild_stats(), 2)
+        self.assertEqual(self.store.get_stats("P1")["total_events"], 1)
+        self.assertEqual(self.store.get_stats("P1")["events_this_week"], 1)
+        self.assertEqual(self.store.get_stats("P2")["events_this_week"], 0)
+
+        self._execute("DELETE FROM event_stats WHERE project_id = 'P2'")
+        self.assertEqual(self.store.rebuild_stats("P2"), 1)
+        self.assertEqual(self.store.get_stats("P2")["total_events"], 1)
+
+
+
+class TestStatsWithoutTriggers(StatsTestCase):
+    """未执行 migration 012（有统计表、没有触发器）时统计实时计算，不返回过期的统计行"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "stats.db"
+        self._apply(MIGRATIONS[:-1])
+
+    def test_event_stats_live(self):
+        self._execute("""
+            INSERT INTO event_stats (project_id, total_events, task_events) VALUES ('P1', 5, 5)
+        """)
+        emitter = create_event_emitter(str(self.db_path))
+        emitter.emit("P1", "issue.discovered", "问题1", category=EventCategory.ISSUE,
+                     severity=EventSeverity.ERROR)
+
+        stats = create_event_store(str(self.db_path)).get_stats("P1")
+        self.assertEqual(
+            (stats["total_events"], stats["task_events"], stats["issue_events"], stats["error_events"]),
+            (1, 0, 1, 1)
+        )
+
+    def test_memory_stats_live(self):
+        self._execute("INSERT INTO memory_stats (project_id, total_memories) VALUES ('P1', 9)")
+        service = create_project_memory_service(
+            persist=True,
+            db_path=str(self.db_path),
+            session_memory_enabled=False,
+            ultra_memory_enabled=False,
+            local_search_enabled=False
+        )
+        service.create_memory("P1", MemoryType.DECISION, MemoryCategory.DECISION, "决策", "内容")
+        stats = service.get_memory_stats("P1")
+        self.assertEqual((stats["total_memories"], stats["decision_memories"]), (1, 1))
+        service.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+任务原子认领单元测试（租约、fencing token、过期回收）
+"""
+
+import unittest
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.models import Task, TaskPriority, TaskStatus
+from automation.state_manager import StateManager
+from automation.task_scheduler import TaskScheduler
+from state_manager_case import StateManagerTestCase
+
+
+class TestClaimTask(StateManagerTestCase):
+    """测试 StateManager.claim_task / renew_lease / reap_expired_leases"""
+
+    def setUp(self):
+        super().setUp()
+        base = datetime(2026, 10, 1)
+        self.sm.create_tasks([
+            Task(id="a", title="a", priority=TaskPriority.P1, created_at=base),
+            Task(id="b", title="b", priority=TaskPriority.P0, created_at=base + timedelta(minutes=1)),
+            Task(id="c", title="c", priority=TaskPriority.P0, depends_on=["a"],
+                 created_at=base + timedelta(minutes=2))
+        ])
+
+    def test_claim_order_and_dependencies(self):
+        """按优先级认领，依赖未完成的任务不可认领"""
+        first = self.sm.claim_task("w1")
+        self.assertEqual((first["task_id"], first["fencing_token"]), ("b", 1))
+        self.assertEqual(self.sm.claim_task("w2")["task_id"], "a")
+        self.assertIsNone(self.sm.claim_task("w3"))
+
+        task = self.sm.get_task("a")
+        self.assertEqual((task.status, task.assigned_to), ("in_progress", "w2"))
+
+        self.sm.update_task_status("a", TaskStatus.COMPLETED)
+        self.assertEqual(self.sm.claim_task("w3", task_id="c")["task_id"], "c")
+
+    def test_claim_specific_task_once(self):
+        """同一任务只能被认领一次"""
+        self.assertIsNotNone(self.sm.claim_task("w1", task_id="a"))
+        self.assertIsNone(self.sm.claim_task("w2", task_id="a"))
+        self.assertIsNone(self.sm.claim_task("w2", task_id="missing"))
+
+    def test_concurrent_claims(self):
+        """多线程并发认领（各自独立连接），每个任务只分配一次"""
+        self.sm.create_tasks([Task(id=f"t{i}", title="t") for i in range(40)])
+        claimed = []
+        lock = threading.Lock()
+
+        def worker(worker_id):
+            while True:
+                claim = self.sm.claim_task(worker_id)
+                if claim is None:
+                    return
+                with lock:
+                    claimed.append(claim["task_id"])
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), len(set(claimed)))
+        self.assertEqual(len(claimed), 42)  # c 依赖 a，a 未完成
+
+    def test_reap_and_fencing(self):
+        """过期租约被回收，原持有者的令牌失效"""
+        old = self.sm.claim_task("w1", task_id="a", lease_seconds=60)
+        self.assertEqual(self.sm.reap_expired_leases(), [])
+        self.assertEqual(self.sm.reap_expired_leases(datetime.now() + timedelta(minutes=5)), ["a"])
+        self.assertEqual(self.sm.get_task("a").status, "pending")
+
+        new = self.sm.claim_task("w2", task_id="a")
+        self.assertEqual(new["fencing_token"], old["fencing_token"] + 1)
+
+        # 旧持有者既不能续约也不能提交
+        self.assertFalse(self.sm.renew_lease("a", old["fencing_token"]))
+        self.assertFalse(self.sm.update_task_status("a", TaskStatus.REVIEW, fencing_token=old["fencing_token"]))
+        self.assertTrue(self.sm.renew_lease("a", new["fencing_token"]))
+        self.assertTrue(self.sm.update_task_status("a", TaskStatus.REVIEW, fencing_token=new["fencing_token"]))
+
+        # 离开执行中后租约清除，不会被回收
+        self.assertEqual(self.sm.reap_expired_leases(datetime.now() + timedelta(days=1)), [])
+
+    def test_stale_holder_after_reap(self):
+        """回收后、重新认领前，原持有者的令牌同样失效"""
+        old = self.sm.claim_task("w1", task_id="a", lease_seconds=60)
+        self.sm.reap_expired_leases(datetime.now() + timedelta(minutes=5))
+
+        self.assertFalse(self.sm.update_task_status("a", TaskStatus.REVIEW, fencing_token=old["fencing_token"]))
+        task = self.sm.get_task("a")
+        self.assertEqual((task.status, task.assigned_to), ("pending", None))
+
+
+class TestSchedulerClaims(StateManagerTestCase):
+    """测试 TaskScheduler 基于认领的分配"""
+
+    def test_two_schedulers_no_double_assignment(self):
+        """两个调度器共享数据库时不会重复分配"""
+        self.sm.create_tasks([Task(id=f"t{i}", title="t") for i in range(3)])
+        s1, s2 = TaskScheduler(self.sm), TaskScheduler(StateManager(db_path=str(self.sm.db_path)))
+        for i in range(2):
+            s1.register_worker(f"a{i}")
+            s2.register_worker(f"b{i}")
+
+        task = self.sm.get_task("t0")
+        self.assertTrue(s1.assign_task(task, "a0"))
+        self.assertFalse(s2.assign_task(task, "b0"))
+
+        assigned = sum(s1.schedule_tasks().values(), []) + sum(s2.schedule_tasks().values(), [])
+        self.assertEqual(sorted(assigned), ["t1", "t2"])
+
+    def test_heartbeat_renews_and_reaper_requeues(self):
+        """心跳续约；租约过期后任务回到待分配，旧令牌提交失败"""
+        self.sm.create_task(Task(id="t0", title="t"))
+        scheduler = TaskScheduler(self.sm, lease_seconds=-1)
+        scheduler.register_worker("w1")
+        scheduler.schedule_tasks()
+        token = scheduler.workers["w1"]["tasks"]["t0"]["fencing_token"]
+
+        self.assertEqual(scheduler.reap_expired_leases(), ["t0"])
+        self.assertEqual(scheduler.workers["w1"]["tasks"], {})
+        self.assertEqual(self.sm.get_task("t0").status, "pending")
+
+        scheduler.lease_seconds = 60
+        scheduler.schedule_tasks()
+        self.assertTrue(scheduler.heartbeat("w1"))
+        self.assertEqual(scheduler.workers["w1"]["tasks"]["t0"]["fencing_token"], token + 1)
+        self.assertFalse(self.sm.update_task_status("t0", TaskStatus.FAILED, fencing_token=token))
+        self.assertTrue(scheduler.complete_task("t0", "w1", success=True))
+        self.assertEqual(self.sm.get_task("t0").status, "review")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+增量任务 DAG 单元测试（在线循环检测、拓扑序、层级和就绪集合的增量维护）
+"""
+
+import unittest
+import random
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "dashboard" / "src"))
+
+from automation.dependency_analyzer import DependencyAnalyzer
+from automation.models import Task, TaskStatus
+from automation.task_dag import TaskDAG
+
+
+class TestTaskDAG(unittest.TestCase):
+    """测试增量任务 DAG"""
+
+    def setUp(self):
+        self.dag = TaskDAG()
+
+    def assertConsistent(self, dag):
+        """与 DependencyAnalyzer 全量计算的结果一致"""
+        tasks = [
+            Task(id=task_id, title=task_id, depends_on=sorted(dag.dependencies(task_id)),
+                 status=dag._status[task_id])
+            for task_id in dag.topological_order()
+        ]
+        position = {task_id: i for i, task_id in enumerate(dag.topological_order())}
+        for task in tasks:
+            for dep_id in task.depends_on:
+                if dep_id in position:
+                    self.assertLess(position[dep_id], position[task.id])
+
+        analyzer = DependencyAnalyzer()
+        self.assertEqual(
+            [set(g) for g in dag.parallel_groups()],
+            [set(g) for g in analyzer.get_parallelizable_groups(tasks)]
+        )
+        completed = {t.id for t in tasks if t.status == TaskStatus.COMPLETED}
+        self.assertEqual(set(dag.executable_tasks()), set(analyzer.get_executable_tasks(tasks, completed)))
+
+    def test_out_of_order_insertion_reorders(self):
+        self.dag.add_task("c", ["b"])
+        self.dag.add_task("b", ["a"])
+        self.dag.add_task("a")
+        self.assertEqual(self.dag.topological_order(), ["a", "b", "c"])
+        self.assertEqual(self.dag.parallel_groups(), [["a"], ["b"], ["c"]])
+        self.assertEqual(self.dag.executable_tasks(), ["a"])
+
+    def test_cycle_rejected_and_graph_unchanged(self):
+        self.dag.add_task("a")
+        self.dag.add_task("b", ["a"])
+        self.dag.add_task("c", ["b"])
+        with self.assertRaises(ValueError):
+            self.dag.add_dependency("a", "c")
+        with self.assertRaises(ValueError):
+            self.dag.add_dependency("a", "a")
+        self.assertEqual(self.dag.dependencies("a"), set())
+        self.assertEqual(self.dag.topological_order(), ["a", "b", "c"])
+
+        # 缺失依赖加入时成环
+        self.dag.add_task("x", ["y"])
+        with self.assertRaises(ValueError):
+            self.dag.add_task("y", ["x"])
+        self.assertNotIn("y", self.dag)
+        self.assertEqual(self.dag.dependencies("x"), {"y"})
+        self.assertConsistent(self.dag)
+
+    def test_ready_set_follows_status(self):
+        self.dag.add_task("a")
+        self.dag.add_task("b", ["a"])
+        self.dag.add_task("c", ["a", "b"])
+        self.assertEqual(self.dag.executable_tasks(), ["a"])
+        self.dag.set_status("a", TaskStatus.IN_PROGRESS)
+        self.assertEqual(self.dag.executable_tasks(), [])
+        self.dag.set_status("a", TaskStatus.COMPLETED)
+        self.assertEqual(self.dag.executable_tasks(), ["b"])
+        self.dag.set_status("b", TaskStatus.COMPLETED)
+        self.assertEqual(self.dag.executable_tasks(), ["c"])
+        self.dag.set_status("a", TaskStatus.PENDING)
+        self.assertEqual(self.dag.executable_tasks(), ["a"])
+
+    def test_missing_and_removed_dependencies(self):
+        self.dag.add_task("b", ["a"])
+        self.assertFalse(self.dag.is_ready("b"))
+        self.dag.add_task("a", status=TaskStatus.COMPLETED)
+        self.assertTrue(self.dag.is_ready("b"))
+        self.assertEqual(self.dag.level("b"), 1)
+
+        self.dag.remove_task("a")
+        self.assertFalse(self.dag.is_ready("b"))
+        self.assertEqual(self.dag.level("b"), 0)
+        self.assertEqual(self.dag.dependencies("b"), {"a"})
+
+        self.dag.remove_dependency("b", "a")
+        self.assertTrue(self.dag.is_ready("b"))
+
+    def test_levels_drop_after_edge_removal(self):
+        self.dag.add_task("a")
+        self.dag.add_task("b", ["a"])
+        self.dag.add_task("c", ["b"])
+        self.dag.add_task("d", ["a", "c"])
+        self.assertEqual(self.dag.level("d"), 3)
+        self.dag.remove_dependency("d", "c")
+        self.assertEqual(self.dag.level("d"), 1)
+        self.assertEqual(self.dag.parallel_groups(), [["a"], ["b", "d"], ["c"]])
+
+    def test_random_updates_match_full_recomputation(self):
+        rng = random.Random(7)
+        ids = [f"t{i}" for i in range(40)]
+        statuses = [TaskStatus.PENDING, TaskStatus.COMPLETED, TaskStatus.IN_PROGRESS, TaskStatus.BLOCKED]
+        for step in range(600):
+            action = rng.random()
+            task_id, other = rng.choice(ids), rng.choice(ids)
+            if task_id not in self.dag:
+                try:
+                    self.dag.add_task(task_id, rng.sample(ids, rng.randrange(3)), rng.choice(statuses))
+                except ValueError:
+                    self.assertNotIn(task_id, self.dag)
+            elif action < 0.4:
+                try:
+                    self.dag.add_dependency(task_id, other)
+                except ValueError:
+                    pass
+            elif action < 0.6:
+                self.dag.remove_dependency(task_id, other)
+            elif action < 0.9:
+                self.dag.set_status(task_id, rng.choice(statuses))
+            else:
+                self.dag.remove_task(task_id)
+            if step % 20 == 0:
+                self.assertConsistent(self.dag)
+        self.assertConsistent(self.dag)
+
+    def test_from_tasks(self):
+        tasks = [Task(id="a", title="a"), Task(id="b", title="b", depends_on=["a"])]
+        dag = TaskDAG.from_tasks(tasks)
+        self.assertEqual(dag.parallel_groups(), [["a"], ["b"]])
+        with self.assertRaises(ValueError):
+            TaskDAG.from_tasks(tasks + [Task(id="a", title="dup")])
+
+
+if __name__ == "__main__":
+    unittest.main()